@@ -0,0 +1,159 @@
+"""
+expiry.py
+
+Expiry notification sweeps for assets and documents.
+
+A sweep selects only the rows whose notify date (the expiry date minus the
+notify before days, computed by the database as an annotated date) falls
+after the last swept day and on or before today. Their notifications are
+inserted with one `notify_many` call, and expired documents are deactivated
+with one update. The last swept day is stored in ExpirySweep, so a sweep
+that runs again on the same day does nothing and the days missed while the
+scheduler was not running are caught up on the next run.
+"""
+
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import DateField, DurationField, ExpressionWrapper, F, Value
+from django.db.models.functions import Cast
+from django.urls import reverse
+from django.utils.translation import gettext_noop
+
+
+def notify_date():
+    """
+    Date expression of the day a row with `expiry_date` and `notify_before`
+    is notified on
+    """
+    # the integer times duration product is not typed by Django on its own
+    notify_before = ExpressionWrapper(
+        F("notify_before") * Value(timedelta(days=1)), output_field=DurationField()
+    )
+    return Cast(F("expiry_date") - notify_before, output_field=DateField())
+
+
+def asset_message(asset):
+    """
+    (verb key, params) of the expiry notification of an asset
+    """
+    return (
+        gettext_noop("The Asset '%(name)s' expires in %(days)s days"),
+        {"name": asset.asset_name, "days": asset.notify_before},
+    )
+
+
+def document_message(document):
+    """
+    (verb key, params) of the expiry notification of a document
+    """
+    return (
+        gettext_noop("The document '%(title)s' expires in %(days)s days"),
+        {"title": document.title, "days": document.notify_before},
+    )
+
+
+def _due(queryset, after, today):
+    return (
+        queryset.filter(expiry_date__isnull=False, notify_before__isnull=False)
+        .alias(notify_date=notify_date())
+        .filter(notify_date__gt=after, notify_date__lte=today)
+    )
+
+
+def expiring_asset_notifications(after, today):
+    """
+    Notification entries of the assets notified after `after` up to `today`
+    """
+    from django.contrib.auth.models import User
+
+    from asset.models import Asset
+
+    superuser = User.objects.filter(is_superuser=True).only("id").first()
+    redirect = reverse("asset-category-view")
+    entries = []
+    for asset in _due(Asset._base_manager.all(), after, today).select_related(
+        "owner__employee_user_id"
+    ):
+        recipient = getattr(asset.owner, "employee_user_id", None) or superuser
+        if recipient is not None:
+            entries.append((recipient, *asset_message(asset), redirect))
+    return entries
+
+
+def expiring_document_notifications(after, today):
+    """
+    Notification entries of the documents notified after `after` up to
+    `today`
+    """
+    from horilla_documents.models import Document
+
+    redirect = reverse("asset-category-view")
+    entries = []
+    for document in _due(Document._base_manager.all(), after, today).select_related(
+        "employee_id__employee_user_id"
+    ):
+        recipient = document.employee_id.employee_user_id
+        if recipient is not None:
+            entries.append((recipient, *document_message(document), redirect))
+    return entries
+
+
+def deactivate_expired_documents(today):
+    """
+    Deactivate the active documents that expired, returns their number
+    """
+    from horilla_documents.models import Document
+
+    return Document._base_manager.filter(is_active=True, expiry_date__lte=today).update(
+        is_active=False
+    )
+
+
+def sweep(name, build, today=None, bot=None, after_sweep=None):
+    """
+    Run the sweep `name` for the days after its watermark up to `today`
+    (today by default), returns the number of notifications created. Does
+    nothing when the sweep already ran for `today`.
+    """
+    from asset.models import ExpirySweep
+    from base.rotation import get_bot
+    from notifications.bulk import notify_many
+
+    today = today or date.today()
+    with transaction.atomic():
+        watermark, _ = ExpirySweep.objects.select_for_update().get_or_create(
+            sweep=name, defaults={"swept_on": today - timedelta(days=1)}
+        )
+        if watermark.swept_on >= today:
+            return 0
+        bot = bot or get_bot()
+        notifications = []
+        if bot is not None:
+            notifications = notify_many(bot, build(watermark.swept_on, today))
+        if after_sweep is not None:
+            after_sweep(today)
+        watermark.swept_on = today
+        watermark.save()
+    return len(notifications)
+
+
+def sweep_assets(today=None, bot=None):
+    """
+    Notify the owners of the expiring assets
+    """
+    return sweep("assets", expiring_asset_notifications, today, bot)
+
+
+def sweep_documents(today=None, bot=None):
+    """
+    Notify the employees of their expiring documents and deactivate the
+    expired ones
+    """
+    return sweep(
+        "documents",
+        expiring_document_notifications,
+        today,
+        bot,
+        after_sweep=deactivate_expired_documents,
+    )
@@ -329,3 +329,19 @@ class AssetRequest(HorillaModel):
             "color": COLOR_CLASS.get(status),
             "link": LINK_CLASS.get(status),
         }
+
+
+class ExpirySweep(models.Model):
+    """
+    Last day an expiry notification sweep ran for, see `asset.expiry`
+    """
+
+    SWEEPS = [
+        ("assets", _("Assets")),
+        ("documents", _("Documents")),
+    ]
+    sweep = models.CharField(max_length=20, choices=SWEEPS, unique=True)
+    swept_on = models.DateField()
+
+    def __str__(self):
+        return f"{self.sweep} {self.swept_on}"
@@ -2,4 +2,52 @@
 This module contains test cases for the assets application.
 """
 
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+
+from asset.expiry import sweep_assets
+from asset.models import Asset, AssetCategory
+from employee.models import Employee
+from notifications.models import Notification
+
+
+class ExpirySweepTests(TestCase):
+    def setUp(self):
+        self.today = date(2026, 10, 19)
+        self.bot = User.objects.create_user("Horilla Bot")
+        self.owner = Employee(
+            employee_first_name="Owner", email="owner@horilla.test", phone="1"
+        )
+        self.owner.save()
+        category = AssetCategory.objects.bulk_create(
+            [AssetCategory(asset_category_name="Laptops")]
+        )[0]
+        Asset.objects.bulk_create(
+            Asset(
+                asset_name=name,
+                owner=self.owner,
+                asset_tracking_id=name,
+                asset_purchase_date=date(2025, 1, 1),
+                asset_purchase_cost=1000,
+                asset_category_id=category,
+                expiry_date=self.today + timedelta(days=days),
+                notify_before=3,
+            )
+            for name, days in [("Due", 3), ("Later", 4)]
+        )
+
+    def notifications(self):
+        return Notification.objects.filter(recipient=self.owner.employee_user_id)
+
+    def test_asset_due_today_is_notified_once(self):
+        self.assertEqual(sweep_assets(self.today, self.bot), 1)
+        notification = self.notifications().get()
+        self.assertIn("Due", notification.verb)
+        self.assertEqual(sweep_assets(self.today, self.bot), 0)
+
+    def test_missed_days_are_caught_up(self):
+        sweep_assets(self.today - timedelta(days=1), self.bot)
+        self.assertEqual(sweep_assets(self.today + timedelta(days=1), self.bot), 2)
+        self.assertEqual(self.notifications().count(), 2)
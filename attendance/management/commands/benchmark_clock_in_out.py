@@ -0,0 +1,123 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max
+
+from attendance.methods.utils import Request
+from attendance.models import Attendance, AttendanceActivity
+from attendance.views.clock_in_out import clock_in, clock_out
+from employee.models import Employee
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent clock-in/clock-out. Every selected employee clocks "
+        "in and out from a pool of threads and the latency percentiles are "
+        "reported. The attendance rows created by the run are removed afterwards "
+        "unless --keep is given, run it against a staging database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--employees", type=int, default=200, help="Number of employees"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=20, help="Concurrent threads"
+        )
+        parser.add_argument(
+            "--clicks",
+            type=int,
+            default=1,
+            help="Concurrent clicks per employee, more than one checks the locking",
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the created attendance rows"
+        )
+
+    def handle(self, *args, **options):
+        employees = list(
+            Employee.objects.entire()
+            .filter(
+                is_active=True,
+                employee_user_id__isnull=False,
+                employee_work_info__shift_id__isnull=False,
+            )
+            .select_related("employee_user_id", "employee_work_info")[
+                : options["employees"]
+            ]
+        )
+        if not employees:
+            raise CommandError("No active employees with a shift to benchmark.")
+
+        last_attendance = Attendance.objects.entire().aggregate(last=Max("id"))["last"]
+        last_activity = AttendanceActivity.objects.entire().aggregate(last=Max("id"))[
+            "last"
+        ]
+
+        jobs = [employee for employee in employees for _ in range(options["clicks"])]
+        try:
+            for label, view in (("clock-in", clock_in), ("clock-out", clock_out)):
+                self.report(label, self.run(view, jobs, options["workers"]))
+            duplicates = (
+                Attendance.objects.entire()
+                .filter(id__gt=last_attendance or 0)
+                .values("employee_id", "attendance_date")
+                .annotate(count=Count("id"))
+                .filter(count__gt=1)
+                .count()
+            )
+            style = self.style.SUCCESS if not duplicates else self.style.ERROR
+            self.stdout.write(style(f"Duplicate attendances: {duplicates}"))
+        finally:
+            if not options["keep"]:
+                AttendanceActivity.objects.entire().filter(
+                    id__gt=last_activity or 0
+                ).delete()
+                for attendance in Attendance.objects.entire().filter(
+                    id__gt=last_attendance or 0
+                ):
+                    attendance.delete()
+
+    def run(self, view, employees, workers):
+        def click(employee):
+            now = datetime.now()
+            request = Request(
+                user=employee.employee_user_id,
+                date=now.date(),
+                time=now.time(),
+                datetime=now,
+            )
+            start = time.perf_counter()
+            try:
+                ok = view(request).status_code == 200
+            except Exception:
+                ok = False
+            latency = time.perf_counter() - start
+            # every request of a real worker gets its own connection
+            connection.close()
+            return latency, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(click, employees))
+        return results, time.perf_counter() - started
+
+    def report(self, label, run):
+        results, elapsed = run
+        latencies = sorted(latency * 1000 for latency, _ in results)
+        errors = sum(1 for _, ok in results if not ok)
+        percentiles = (
+            statistics.quantiles(latencies, n=100)
+            if len(latencies) > 1
+            else latencies * 99
+        )
+        self.stdout.write(
+            f"{label}: {len(results)} requests in {elapsed:.2f}s "
+            f"({len(results) / elapsed:.1f} req/s), errors {errors}\n"
+            f"  p50 {percentiles[49]:.1f}ms  p95 {percentiles[94]:.1f}ms  "
+            f"p99 {percentiles[98]:.1f}ms  max {latencies[-1]:.1f}ms"
+        )
@@ -0,0 +1,154 @@
+"""
+clock_lookups.py
+
+Per-process cache of the rows read on every clock-in/clock-out click.
+
+The attendance general settings, the late come/early out tracking flag, the
+allowed IP networks and the shift days change rarely but were read from the
+database on every click. The shift schedule of the employee comes from the
+shift calendar, see `base.shift_calendar`. They are kept in a process cache
+tagged with a version stored in the Django cache. The version is bumped
+whenever one of the source models is written, so every worker process reloads
+them on its next lookup.
+"""
+
+import ipaddress
+import threading
+import time
+
+from django.core.cache import cache
+
+CLOCK_LOOKUPS_VERSION_KEY = "attendance:clock_lookups:version"
+
+_lookups = {}
+_version = None
+_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(CLOCK_LOOKUPS_VERSION_KEY)
+    if version is None:
+        version = time.time()
+        cache.add(CLOCK_LOOKUPS_VERSION_KEY, version, None)
+        version = cache.get(CLOCK_LOOKUPS_VERSION_KEY, version)
+    return version
+
+
+def invalidate_clock_lookups():
+    """
+    Drop the cached lookups of every process
+    """
+    global _version
+    cache.set(CLOCK_LOOKUPS_VERSION_KEY, time.time(), None)
+    with _lock:
+        _lookups.clear()
+        _version = None
+
+
+def _cached(key, loader):
+    global _version
+    version = _current_version()
+    if version != _version:
+        with _lock:
+            if version != _version:
+                _lookups.clear()
+                _version = version
+    if key not in _lookups:
+        value = loader()
+        with _lock:
+            _lookups[key] = value
+    return _lookups[key]
+
+
+def get_attendance_general_setting(selected_company):
+    """
+    AttendanceGeneralSetting of the selected company, the global one when
+    all companies are selected
+    """
+    from attendance.models import AttendanceGeneralSetting
+
+    company_id = None if selected_company in (None, "", "all") else selected_company
+
+    def load():
+        return AttendanceGeneralSetting.objects.filter(company_id=company_id).first()
+
+    return _cached(("general_setting", str(company_id)), load)
+
+
+def get_time_runner_enabled(selected_company) -> bool:
+    """
+    Cached `timerunner_enabled` flag
+    """
+    from attendance.models import AttendanceGeneralSetting
+
+    def load():
+        first = AttendanceGeneralSetting.objects.first()
+        return first.time_runner if first else True
+
+    return _cached(("time_runner", str(selected_company)), load)
+
+
+def get_late_come_early_out_tracking() -> bool:
+    """
+    Cached `enable_late_come_early_out_tracking` flag
+    """
+    from base.models import TrackLateComeEarlyOut
+
+    def load():
+        tracking = TrackLateComeEarlyOut.objects.first()
+        return tracking.is_enable if tracking else True
+
+    return _cached(("late_come_early_out_tracking",), load)
+
+
+def get_allowed_ip_networks():
+    """
+    None when the IP restriction is disabled, otherwise the list of parsed
+    allowed networks
+    """
+    from base.models import AttendanceAllowedIP
+
+    def load():
+        allowed_attendance_ips = AttendanceAllowedIP.objects.first()
+        if not allowed_attendance_ips or not allowed_attendance_ips.is_enabled:
+            return None
+        networks = []
+        for allowed_ip in (allowed_attendance_ips.additional_data or {}).get(
+            "allowed_ips", []
+        ):
+            try:
+                networks.append(ipaddress.ip_network(allowed_ip, strict=False))
+            except ValueError:
+                continue
+        return networks
+
+    return _cached(("allowed_ips",), load)
+
+
+def is_ip_allowed(ip) -> bool:
+    """
+    Whether attendance can be marked from the given client IP
+    """
+    networks = get_allowed_ip_networks()
+    if networks is None:
+        return True
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def get_shift_day(day_name):
+    """
+    EmployeeShiftDay row of a lower case week day name
+    """
+    from base.models import EmployeeShiftDay
+
+    def load():
+        return {day.day: day for day in EmployeeShiftDay.objects.entire()}
+
+    shift_day = _cached(("shift_days",), load).get(day_name)
+    if shift_day is None:
+        raise EmployeeShiftDay.DoesNotExist(f"No shift day for {day_name}")
+    return shift_day
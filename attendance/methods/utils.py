@@ -17,6 +17,7 @@ from django.utils.translation import gettext_lazy as _
 
 from base.methods import get_pagination
 from base.models import WEEK_DAYS, CompanyLeaves, Holidays
+from base.working_calendar import company_leave_dates_in_year
 from employee.models import Employee
 from horilla.horilla_settings import HORILLA_DATE_FORMATS, HORILLA_TIME_FORMATS
 
@@ -478,35 +479,9 @@ def monthly_leave_days(month, year):
 
     company_leaves = CompanyLeaves.objects.all()
     for company_leave in company_leaves:
-        year = year
-        month = month
-        based_on_week = company_leave.based_on_week
-        based_on_week_day = company_leave.based_on_week_day
-        if based_on_week != None:
-            calendar.setfirstweekday(6)
-            month_calendar = calendar.monthcalendar(year, month)
-            weeks = month_calendar[int(based_on_week)]
-            weekdays_in_weeks = [day for day in weeks if day != 0]
-            for day in weekdays_in_weeks:
-                date_name = datetime.strptime(
-                    f"{year}-{month:02}-{day:02}", "%Y-%m-%d"
-                ).date()
-                if (
-                    date_name.weekday() == int(based_on_week_day)
-                    and date_name not in leave_dates
-                ):
-                    leave_dates.append(date_name)
-        else:
-            calendar.setfirstweekday(0)
-            month_calendar = calendar.monthcalendar(year, month)
-            for week in month_calendar:
-                if week[int(based_on_week_day)] != 0:
-                    date_name = datetime.strptime(
-                        f"{year}-{month:02}-{week[int(based_on_week_day)]:02}",
-                        "%Y-%m-%d",
-                    ).date()
-                    if date_name not in leave_dates:
-                        leave_dates.append(date_name)
+        for leave_date in company_leave_dates_in_year(company_leave, year):
+            if leave_date.month == month and leave_date not in leave_dates:
+                leave_dates.append(leave_date)
     return leave_dates
 
 
@@ -0,0 +1,203 @@
+"""
+work_record_matrix.py
+
+Employee x day matrix of the work records of a month.
+
+The work records of the month are read with one `values_list` query into
+numpy arrays indexed by (employee index, day index). The per-employee
+totals are column reductions over those arrays, and the HTML grid and the
+XLSX export are both rendered from the same matrix instead of looking up a
+WorkRecords instance per cell.
+"""
+
+import calendar
+from datetime import date
+
+import numpy as np
+from django.apps import apps
+from django.db.models import Count
+
+# index 0 is "no work record"
+RECORD_TYPES = [
+    "",
+    "FDP",
+    "HDP",
+    "ABS",
+    "LEA",
+    "HD",
+    "MCO",
+    "WOF",
+    "LFD",
+    "LHD",
+    "CONF",
+    "DFT",
+]
+RECORD_CODES = {record_type: code for code, record_type in enumerate(RECORD_TYPES)}
+LEAVE_TYPES = ["LEA", "LFD"]
+TOTAL_COLUMNS = ["present", "half_day", "leave", "half_day_leave", "absent", "late"]
+
+
+class WorkRecordCell:
+    """
+    One day of one employee, with the attributes the grid template reads
+    """
+
+    __slots__ = (
+        "work_record_type",
+        "is_leave_record",
+        "shift_id",
+        "date",
+        "title_message",
+    )
+
+    def __init__(self, work_record_type, is_leave_record, shift_id, day, title):
+        self.work_record_type = work_record_type
+        self.is_leave_record = is_leave_record
+        self.shift_id = shift_id
+        self.date = day
+        self.title_message = title
+
+
+class WorkRecordMatrix:
+    """
+    Work record types, leave flags and totals of employees over a month
+    """
+
+    def __init__(self, employees, year, month, leave_dates=(), today=None):
+        self.employees = list(employees)
+        self.today = today or date.today()
+        self.dates = [
+            date(year, month, day)
+            for day in range(1, calendar.monthrange(year, month)[1] + 1)
+        ]
+        shape = (len(self.employees), len(self.dates))
+        self.codes = np.zeros(shape, dtype=np.int8)
+        self.is_leave_record = np.zeros(shape, dtype=bool)
+        self.has_shift = np.zeros(shape, dtype=bool)
+        self.titles = {}
+        self.late = np.zeros(len(self.employees), dtype=np.int32)
+        leave_dates = set(leave_dates)
+        self.holidays = np.array([day in leave_dates for day in self.dates])
+        self.past = np.array([day < self.today for day in self.dates])
+        self.future = np.array([day > self.today for day in self.dates])
+        self._load()
+
+    def _load(self):
+        from attendance.models import AttendanceLateComeEarlyOut, WorkRecords
+
+        if not self.employees:
+            return
+        # an employee listed twice fills both rows
+        rows = {}
+        for index, employee in enumerate(self.employees):
+            rows.setdefault(employee.pk, []).append(index)
+        fields = [
+            "employee_id",
+            "date",
+            "work_record_type",
+            "is_leave_record",
+            "shift_id",
+            "message",
+        ]
+        if apps.is_installed("leave"):
+            fields.append("leave_request_id__leave_type_id__name")
+        records = WorkRecords.objects.filter(
+            employee_id__in=list(rows),
+            date__range=(self.dates[0], self.dates[-1]),
+        ).values_list(*fields)
+        # later rows win, as with the dict the grid was built from
+        for record in records.order_by("id").iterator(chunk_size=5000):
+            employee_id, day, record_type, is_leave, shift_id, message, *leave_type = (
+                record
+            )
+            row, column = rows[employee_id], day.day - 1
+            self.codes[row, column] = RECORD_CODES.get(record_type, 0)
+            self.is_leave_record[row, column] = is_leave
+            self.has_shift[row, column] = shift_id is not None
+            if message == "Leave" and leave_type and leave_type[0]:
+                message = f"{message} | {leave_type[0]}"
+            if message:
+                self.titles[(employee_id, column)] = message
+            else:
+                self.titles.pop((employee_id, column), None)
+
+        late = (
+            AttendanceLateComeEarlyOut.objects.filter(
+                type="late_come",
+                employee_id__in=list(rows),
+                attendance_id__attendance_date__range=(
+                    self.dates[0],
+                    self.dates[-1],
+                ),
+            )
+            .order_by()
+            .values_list("employee_id")
+            .annotate(count=Count("id"))
+        )
+        for employee_id, count in late:
+            self.late[rows[employee_id]] = count
+
+    def count(self, *record_types, mask=None):
+        """
+        Per-employee number of days with one of the record types
+        """
+        matches = np.isin(self.codes, [RECORD_CODES[t] for t in record_types])
+        if mask is not None:
+            matches &= mask
+        return matches.sum(axis=1)
+
+    def totals(self):
+        """
+        Per-employee totals, {column: array} in TOTAL_COLUMNS order
+        """
+        # a draft record on a past working day with a shift is an absence, as
+        # is an ABS record (counted as absent by the payslips too)
+        absent_mask = self.has_shift & (self.past & ~self.holidays)[np.newaxis, :]
+        return {
+            "present": self.count("FDP"),
+            "half_day": self.count("HDP"),
+            "leave": self.count(*LEAVE_TYPES),
+            "half_day_leave": self.count("LHD"),
+            "absent": self.count("DFT", mask=absent_mask) + self.count("ABS"),
+            "late": self.late,
+        }
+
+    def rows(self):
+        """
+        (employee, [WorkRecordCell or None per day], {total: value}) for the
+        HTML grid
+        """
+        totals = self.totals()
+        record_types = np.array(RECORD_TYPES, dtype=object)[self.codes]
+        for row, employee in enumerate(self.employees):
+            cells = []
+            for column, day in enumerate(self.dates):
+                record_type = record_types[row, column]
+                if not record_type:
+                    cells.append(None)
+                    continue
+                cells.append(
+                    WorkRecordCell(
+                        record_type,
+                        bool(self.is_leave_record[row, column]),
+                        bool(self.has_shift[row, column]),
+                        day,
+                        self.titles.get((employee.pk, column)),
+                    )
+                )
+            yield employee, cells, {
+                column: int(values[row]) for column, values in totals.items()
+            }
+
+    def export_values(self):
+        """
+        Employee x day array of the values written to the XLSX export.
+        Records after today are left out, past working days without a record
+        are drafts, and drafts are blank on holidays, today and later.
+        """
+        codes = np.where(self.future[np.newaxis, :], 0, self.codes)
+        values = np.array(RECORD_TYPES, dtype=object)[codes]
+        blank_draft = (~self.past | self.holidays)[np.newaxis, :]
+        values[(codes == 0) & ~blank_draft] = "DFT"
+        values[(codes == RECORD_CODES["DFT"]) & blank_draft] = ""
+        return values
@@ -298,13 +298,17 @@ class Attendance(HorillaModel):
         ).order_by("id")
         return activities.last()
 
-    def get_at_work_from_activities(self):
+    def get_at_work_from_activities(self, activities=None):
         """
         This method is used to retun the at work calculated from the activities
+
+        `activities` can be passed when they are already loaded for several
+        attendances at once.
         """
-        activities = AttendanceActivity.objects.filter(
-            attendance_date=self.attendance_date, employee_id=self.employee_id
-        ).order_by("clock_in")
+        if activities is None:
+            activities = AttendanceActivity.objects.filter(
+                attendance_date=self.attendance_date, employee_id=self.employee_id
+            ).order_by("clock_in")
         at_work_seconds = 0
         now = datetime.now()
         for activity in activities:
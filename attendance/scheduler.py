@@ -10,6 +10,7 @@ from base.backends import logger
 
 def create_work_record():
     from attendance.models import WorkRecords
+    from base.shift_calendar import get_shift_calendar_days
     from employee.models import Employee
 
     date = datetime.datetime.today()
@@ -17,12 +18,17 @@ def create_work_record():
         "employee_id", flat=True
     )
     employees = Employee.objects.exclude(id__in=work_records)
+    # today's shift and schedule of every employee from the shift calendar
+    calendar_days = get_shift_calendar_days(
+        date.date(), employees.values_list("id", flat=True)
+    )
     records_to_create = []
 
     for employee in employees:
         try:
-            shift_schedule = employee.get_shift_schedule()
-            shift = employee.get_shift()
+            calendar_day = calendar_days.get(employee.id)
+            shift_schedule = calendar_day.schedule_id if calendar_day else None
+            shift = calendar_day.shift_id if calendar_day else None
             if shift_schedule is None:
                 # No schedule for today -> Weekly Off
                 record = WorkRecords(
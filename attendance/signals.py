@@ -7,11 +7,18 @@ from django.db.models.signals import post_migrate, post_save, pre_delete, post_d
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
+from attendance.methods.clock_lookups import invalidate_clock_lookups
 from attendance.methods.utils import strtime_seconds
 from attendance.models import Attendance, AttendanceGeneralSetting, WorkRecords
-from base.models import Company, PenaltyAccounts
+from base.models import (
+    AttendanceAllowedIP,
+    Company,
+    PenaltyAccounts,
+    TrackLateComeEarlyOut,
+)
 from employee.models import Employee
 from horilla.methods import get_horilla_model_class
+from horilla.signals import post_bulk_update
 from base.models import EmployeeShiftDay, EmployeeShiftSchedule
 
 
@@ -241,3 +248,21 @@ def create_missing_work_records_on_schedule_save(sender, instance, created, **kw
 @receiver(post_delete, sender=EmployeeShiftSchedule)
 def create_missing_work_records_on_schedule_delete(sender, instance, **_kwargs):
     _create_missing_work_records_for_shift(instance.shift_id)
+
+
+@receiver(post_save, sender=AttendanceGeneralSetting)
+@receiver(post_delete, sender=AttendanceGeneralSetting)
+@receiver(post_bulk_update, sender=AttendanceGeneralSetting)
+@receiver(post_save, sender=AttendanceAllowedIP)
+@receiver(post_delete, sender=AttendanceAllowedIP)
+@receiver(post_bulk_update, sender=AttendanceAllowedIP)
+@receiver(post_save, sender=TrackLateComeEarlyOut)
+@receiver(post_delete, sender=TrackLateComeEarlyOut)
+@receiver(post_bulk_update, sender=TrackLateComeEarlyOut)
+@receiver(post_save, sender=EmployeeShiftDay)
+@receiver(post_delete, sender=EmployeeShiftDay)
+def refresh_clock_lookups(sender, **kwargs):
+    """
+    Drop the cached clock-in/clock-out lookups when their source rows change
+    """
+    invalidate_clock_lookups()
@@ -1,3 +1,127 @@
+from datetime import date
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from attendance.methods.clock_lookups import (
+    get_late_come_early_out_tracking,
+    invalidate_clock_lookups,
+    is_ip_allowed,
+)
+from attendance.methods.work_record_matrix import WorkRecordMatrix
+from attendance.models import WorkRecords
+from base.models import AttendanceAllowedIP, EmployeeShift, TrackLateComeEarlyOut
+from employee.models import Employee
+
+
+class ClockLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_clock_lookups()
+
+    def test_ip_restriction(self):
+        self.assertTrue(is_ip_allowed("203.0.113.7"))
+        AttendanceAllowedIP.objects.create(
+            is_enabled=True,
+            additional_data={"allowed_ips": ["10.0.0.0/24", "192.168.1.5", "bad"]},
+        )
+        self.assertTrue(is_ip_allowed("10.0.0.42"))
+        self.assertTrue(is_ip_allowed("192.168.1.5"))
+        self.assertFalse(is_ip_allowed("192.168.1.6"))
+        self.assertFalse(is_ip_allowed("not an ip"))
+
+    def test_lookups_are_cached_until_the_source_changes(self):
+        tracking = TrackLateComeEarlyOut(is_enable=False)
+        tracking.save()
+        self.assertFalse(get_late_come_early_out_tracking())
+        with self.assertNumQueries(0):
+            self.assertFalse(get_late_come_early_out_tracking())
+        tracking.is_enable = True
+        tracking.save()
+        self.assertTrue(get_late_come_early_out_tracking())
+
+
+def create_employee(name):
+    employee = Employee(
+        employee_first_name=name, email=f"{name.lower()}@horilla.test", phone="1"
+    )
+    employee.save()
+    return employee
+
+
+class WorkRecordMatrixTests(TestCase):
+    def setUp(self):
+        self.employee = create_employee("Matrix")
+        self.idle = create_employee("Idle")
+        WorkRecords.objects.all().delete()
+        shift = EmployeeShift(employee_shift="Day")
+        shift.save()
+        records = [
+            (1, "FDP", shift),
+            (2, "HDP", shift),
+            (5, "DFT", shift),  # holiday
+            (6, "DFT", shift),  # absent
+            (7, "DFT", None),  # no shift, not absent
+            (8, "ABS", shift),
+            (9, "LEA", shift),
+            (12, "LFD", shift),
+            (13, "LHD", shift),
+            (21, "DFT", shift),  # after today
+            (25, "FDP", shift),
+        ]
+        WorkRecords.objects.bulk_create(
+            WorkRecords(
+                employee_id=self.employee,
+                date=date(2026, 10, day),
+                work_record_type=record_type,
+                is_leave_record=record_type in ["LEA", "LFD", "LHD"],
+                shift_id=shift_id,
+            )
+            for day, record_type, shift_id in records
+        )
+        self.matrix = WorkRecordMatrix(
+            [self.employee, self.idle],
+            2026,
+            10,
+            leave_dates=[date(2026, 10, 5)],
+            today=date(2026, 10, 20),
+        )
+
+    def test_totals(self):
+        totals = {
+            column: [int(value) for value in values]
+            for column, values in self.matrix.totals().items()
+        }
+        self.assertEqual(
+            totals,
+            {
+                "present": [2, 0],
+                "half_day": [1, 0],
+                "leave": [2, 0],
+                "half_day_leave": [1, 0],
+                "absent": [2, 0],
+                "late": [0, 0],
+            },
+        )
+
+    def test_rows(self):
+        rows = list(self.matrix.rows())
+        employee, cells, totals = rows[0]
+        self.assertEqual(employee, self.employee)
+        self.assertEqual(len(cells), 31)
+        self.assertIsNone(cells[3])
+        self.assertEqual(cells[8].work_record_type, "LEA")
+        self.assertTrue(cells[8].is_leave_record)
+        self.assertFalse(cells[6].shift_id)
+        self.assertEqual(totals["absent"], 2)
+        self.assertEqual(rows[1][1], [None] * 31)
+
+    def test_export_values(self):
+        values = self.matrix.export_values()[0]
+        self.assertEqual(values[0], "FDP")
+        self.assertEqual(values[2], "DFT")  # past working day without a record
+        self.assertEqual(values[4], "")  # draft on a holiday
+        self.assertEqual(values[5], "DFT")
+        self.assertEqual(values[19], "")  # today
+        self.assertEqual(values[20], "")
+        self.assertEqual(values[24], "")  # future records are left out
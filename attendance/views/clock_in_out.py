@@ -4,41 +4,42 @@ clock_in_out.py
 This module is used register endpoints to the check-in check-out functionalities
 """
 
-import ipaddress
 import logging
 
 logger = logging.getLogger(__name__)
 from datetime import date, datetime, timedelta
 
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q
 from django.http import HttpResponse
 from django.utils.translation import gettext_lazy as _
 
+from attendance.methods.clock_lookups import (
+    get_attendance_general_setting,
+    get_late_come_early_out_tracking,
+    get_shift_day,
+    get_time_runner_enabled,
+    is_ip_allowed,
+)
 from attendance.methods.utils import (
     activity_datetime,
     employee_exists,
     format_time,
     overtime_calculation,
-    shift_schedule_today,
     strtime_seconds,
 )
 from attendance.models import (
     Attendance,
     AttendanceActivity,
-    AttendanceGeneralSetting,
     AttendanceLateComeEarlyOut,
     GraceTime,
 )
 from attendance.views.views import attendance_validate
-from base.context_processors import (
-    enable_late_come_early_out_tracking,
-    timerunner_enabled,
-)
-from base.models import AttendanceAllowedIP, Company, EmployeeShiftDay
+from base.shift_calendar import get_employee_shift_day
+from employee.models import Employee
 from horilla.decorators import hx_request_required, login_required
 from horilla.horilla_middlewares import _thread_locals
-from attendance.filters import AttendanceActivityFilter
 
 def late_come_create(attendance):
     """
@@ -72,7 +73,7 @@ def late_come(attendance, start_time, end_time, shift):
         end_time : attendance day shift end time
 
     """
-    if not enable_late_come_early_out_tracking(None).get("tracking"):
+    if not get_late_come_early_out_tracking():
         return
     request = getattr(_thread_locals, "request", None)
     now_sec = strtime_seconds(attendance.attendance_clock_in.strftime("%H:%M"))
@@ -111,6 +112,17 @@ def late_come(attendance, start_time, end_time, shift):
     return True
 
 
+def lock_employee(employee):
+    """
+    Lock the employee row until the end of the current transaction
+    """
+    list(
+        Employee._base_manager.select_for_update()
+        .filter(pk=employee.pk)
+        .values_list("pk", flat=True)
+    )
+
+
 def clock_in_attendance_and_activity(
     employee,
     date_today,
@@ -137,58 +149,66 @@ def clock_in_attendance_and_activity(
         end_time        : end time in shift schedule
     """
 
-    # attendance activity create
-    activity = AttendanceActivity.objects.filter(
-        employee_id=employee,
-        attendance_date=attendance_date,
-        clock_in_date=date_today,
-        shift_day=day,
-        clock_out=None,
-    ).first()
-
-    if activity and not activity.clock_out:
-        activity.clock_out = in_datetime
-        activity.clock_out_date = date_today
-        activity.save()
-
-    new_activity = AttendanceActivity.objects.create(
-        employee_id=employee,
-        attendance_date=attendance_date,
-        clock_in_date=date_today,
-        shift_day=day,
-        clock_in=in_datetime,
-        in_datetime=in_datetime,
-    )
-    # create attendance if not exist
-    attendance = Attendance.objects.filter(
-        employee_id=employee, attendance_date=attendance_date
-    )
-    if not attendance.exists():
-        attendance = Attendance()
-        attendance.employee_id = employee
-        attendance.shift_id = shift
-        attendance.work_type_id = attendance.employee_id.employee_work_info.work_type_id
-        attendance.attendance_date = attendance_date
-        attendance.attendance_day = day
-        attendance.attendance_clock_in = now
-        attendance.attendance_clock_in_date = date_today
-        attendance.minimum_hour = minimum_hour
-        attendance.save()
-        # check here late come or not
+    with transaction.atomic():
+        # serialize concurrent clicks of the same employee
+        lock_employee(employee)
+        # attendance activity create
+        activity = (
+            AttendanceActivity.objects.select_for_update()
+            .filter(
+                employee_id=employee,
+                attendance_date=attendance_date,
+                clock_in_date=date_today,
+                shift_day=day,
+                clock_out=None,
+            )
+            .first()
+        )
+
+        if activity and not activity.clock_out:
+            activity.clock_out = in_datetime
+            activity.clock_out_date = date_today
+            activity.save()
+
+        AttendanceActivity.objects.create(
+            employee_id=employee,
+            attendance_date=attendance_date,
+            clock_in_date=date_today,
+            shift_day=day,
+            clock_in=in_datetime,
+            in_datetime=in_datetime,
+        )
+        # create attendance if not exist
+        attendance = (
+            Attendance.objects.select_for_update()
+            .filter(employee_id=employee, attendance_date=attendance_date)
+            .first()
+        )
+        created = attendance is None
+        if created:
+            attendance = Attendance()
+            attendance.employee_id = employee
+            attendance.shift_id = shift
+            attendance.work_type_id = employee.employee_work_info.work_type_id
+            attendance.attendance_date = attendance_date
+            attendance.attendance_day = day
+            attendance.attendance_clock_in = now
+            attendance.attendance_clock_in_date = date_today
+            attendance.minimum_hour = minimum_hour
+            attendance.save()
+        else:
+            attendance.attendance_clock_out = None
+            attendance.attendance_clock_out_date = None
+            attendance.save()
+            # delete if the attendance marked the early out
+            attendance.late_come_early_out.filter(type="early_out").delete()
 
+    if created:
+        # check here late come or not
         attendance = Attendance.find(attendance.id)
         late_come(
             attendance=attendance, start_time=start_time, end_time=end_time, shift=shift
         )
-    else:
-        attendance = attendance[0]
-        attendance.attendance_clock_out = None
-        attendance.attendance_clock_out_date = None
-        attendance.save()
-        # delete if the attendance marked the early out
-        early_out_instance = attendance.late_come_early_out.filter(type="early_out")
-        if early_out_instance.exists():
-            early_out_instance[0].delete()
     return attendance
 
 
@@ -199,48 +219,21 @@ def clock_in(request):
     This method is used to mark the attendance once per a day and multiple attendance activities.
     """
     # check wether check in/check out feature is enabled
-    selected_company = request.session.get("selected_company")
-    if selected_company == "all":
-        attendance_general_settings = AttendanceGeneralSetting.objects.filter(
-            company_id=None
-        ).first()
-    else:
-        company = Company.objects.filter(id=selected_company).first()
-        attendance_general_settings = AttendanceGeneralSetting.objects.filter(
-            company_id=company
-        ).first()
+    attendance_general_settings = get_attendance_general_setting(
+        request.session.get("selected_company")
+    )
     # request.__dict__.get("datetime")' used to check if the request is from a biometric device
     if (
         attendance_general_settings
         and attendance_general_settings.enable_check_in
         or request.__dict__.get("datetime")
     ):
-        allowed_attendance_ips = AttendanceAllowedIP.objects.first()
-
-        if (
-            not request.__dict__.get("datetime")
-            and allowed_attendance_ips
-            and allowed_attendance_ips.is_enabled
-        ):
-
+        if not request.__dict__.get("datetime"):
             x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
             ip = request.META.get("REMOTE_ADDR")
             if x_forwarded_for:
-                ip = x_forwarded_for.split(",")[0]
-
-            allowed_ips = allowed_attendance_ips.additional_data.get("allowed_ips", [])
-            ip_allowed = False
-            for allowed_ip in allowed_ips:
-                try:
-                    if ipaddress.ip_address(ip) in ipaddress.ip_network(
-                        allowed_ip, strict=False
-                    ):
-                        ip_allowed = True
-                        break
-                except ValueError:
-                    continue
-
-            if not ip_allowed:
+                ip = x_forwarded_for.split(",")[0].strip()
+            if not is_ip_allowed(ip):
                 return HttpResponse(_("You cannot mark attendance from this network"))
 
         employee, work_info = employee_exists(request)
@@ -248,20 +241,21 @@ def clock_in(request):
         if request.__dict__.get("datetime"):
             datetime_now = request.datetime
         if employee and work_info is not None:
-            shift = work_info.shift_id
             date_today = date.today()
             if request.__dict__.get("date"):
                 date_today = request.date
             attendance_date = date_today
-            day = date_today.strftime("%A").lower()
-            day = EmployeeShiftDay.objects.get(day=day)
+            day = get_shift_day(date_today.strftime("%A").lower())
+            # shift of the day with rotations and shift requests folded in
+            calendar_day = get_employee_shift_day(employee, date_today)
+            shift = calendar_day.shift_id if calendar_day else work_info.shift_id
             now = datetime.now().strftime("%H:%M")
             if request.__dict__.get("time"):
                 now = request.time.strftime("%H:%M")
             now_sec = strtime_seconds(now)
             mid_day_sec = strtime_seconds("12:00")
-            minimum_hour, start_time_sec, end_time_sec = shift_schedule_today(
-                day=day, shift=shift
+            minimum_hour, start_time_sec, end_time_sec = (
+                calendar_day.schedule_seconds() if calendar_day else ("00:00", 0, 0)
             )
             if start_time_sec > end_time_sec:
                 # night shift
@@ -273,14 +267,18 @@ def clock_in(request):
                     # Here you need to create attendance for yesterday
 
                     date_yesterday = date_today - timedelta(days=1)
-                    day_yesterday = date_yesterday.strftime("%A").lower()
-                    day_yesterday = EmployeeShiftDay.objects.get(day=day_yesterday)
-                    minimum_hour, start_time_sec, end_time_sec = shift_schedule_today(
-                        day=day_yesterday, shift=shift
+                    day_yesterday = get_shift_day(date_yesterday.strftime("%A").lower())
+                    calendar_yesterday = get_employee_shift_day(
+                        employee, date_yesterday
                     )
+                    if calendar_yesterday is not None:
+                        shift = calendar_yesterday.shift_id
+                        minimum_hour, start_time_sec, end_time_sec = (
+                            calendar_yesterday.schedule_seconds()
+                        )
                     attendance_date = date_yesterday
                     day = day_yesterday
-            attendance = clock_in_attendance_and_activity(
+            clock_in_attendance_and_activity(
                 employee=employee,
                 date_today=date_today,
                 attendance_date=attendance_date,
@@ -292,27 +290,16 @@ def clock_in(request):
                 end_time=end_time_sec,
                 in_datetime=datetime_now,
             )
-            filter_obj = AttendanceActivityFilter(request.GET)
-            attendance_activities = filter_obj.qs
-            latest_checkin = (attendance_activities.filter(employee_id=employee, clock_in__isnull=False).order_by('-attendance_date', '-clock_in').first())
-
-            if latest_checkin:
-                # Combine date + time into a datetime object
-                latest_checkin_datetime = datetime.combine(
-                    latest_checkin.attendance_date,
-                    latest_checkin.clock_in
-                )
-
-                now = datetime.now()
-                elapsed_seconds = int((now - latest_checkin_datetime).total_seconds())
-                print("elapsed_seconds in clockin view if", elapsed_seconds)
-                
-            else:
-                print("elapsed_seconds in clockin view else", elapsed_seconds)
-                elapsed_seconds = 0
+            # the activity created above is the latest check-in
+            latest_checkin_datetime = datetime.combine(date_today, datetime_now.time())
+            elapsed_seconds = max(
+                0, int((datetime.now() - latest_checkin_datetime).total_seconds())
+            )
             script = ""
             hidden_label = ""
-            time_runner_enabled = timerunner_enabled(request)["enabled_timerunner"]
+            time_runner_enabled = get_time_runner_enabled(
+                request.session.get("selected_company")
+            )
             mouse_in = ""
             mouse_out = ""
             if time_runner_enabled:
@@ -329,9 +316,6 @@ def clock_in(request):
                     </script>
                     """.format(
                     elapsed_seconds=elapsed_seconds,
-                    at_work_seconds_forecasted=employee.get_forecasted_at_work()[
-                        "forecasted_at_work_seconds"
-                    ]
                 )
                 hidden_label = """
                 style="display:none"
@@ -378,15 +362,21 @@ def clock_out_attendance_and_activity(employee, date_today, now, out_datetime=No
         now         : now
     """
 
+    with transaction.atomic():
+        # serialize concurrent clicks of the same employee
+        lock_employee(employee)
+        return _clock_out_attendance_and_activity(
+            employee, date_today, now, out_datetime
+        )
+
+
+def _clock_out_attendance_and_activity(employee, date_today, now, out_datetime):
     attendance_activities = AttendanceActivity.objects.filter(
         employee_id=employee,
     ).order_by("attendance_date", "id")
-    attendance_activity = None  # Initialize attendance_activity
+    attendance_activity = attendance_activities.filter(clock_out__isnull=True).last()
 
-    if attendance_activities.filter(clock_out__isnull=True).exists():
-        attendance_activity = attendance_activities.filter(
-            clock_out__isnull=True
-        ).last()
+    if attendance_activity is not None:
         attendance_activity.clock_out = out_datetime
         attendance_activity.clock_out_date = date_today
         attendance_activity.out_datetime = out_datetime
@@ -455,7 +445,7 @@ def early_out(attendance, start_time, end_time, shift):
         start_time : attendance day shift start time
         start_end : attendance day shift end time
     """
-    if not enable_late_come_early_out_tracking(None).get("tracking"):
+    if not get_late_come_early_out_tracking():
         return
 
     clock_out_time = attendance.attendance_clock_out
@@ -502,16 +492,9 @@ def clock_out(request):
     This method is used to set the out date and time for attendance and attendance activity
     """
     # check wether check in/check out feature is enabled
-    selected_company = request.session.get("selected_company")
-    if selected_company == "all":
-        attendance_general_settings = AttendanceGeneralSetting.objects.filter(
-            company_id=None
-        ).first()
-    else:
-        company = Company.objects.filter(id=selected_company).first()
-        attendance_general_settings = AttendanceGeneralSetting.objects.filter(
-            company_id=company
-        ).first()
+    attendance_general_settings = get_attendance_general_setting(
+        request.session.get("selected_company")
+    )
     if (
         attendance_general_settings
         and attendance_general_settings.enable_check_in
@@ -521,24 +504,24 @@ def clock_out(request):
         if request.__dict__.get("datetime"):
             datetime_now = request.datetime
         employee, work_info = employee_exists(request)
-        shift = work_info.shift_id
         date_today = date.today()
         if request.__dict__.get("date"):
             date_today = request.date
-        day = date_today.strftime("%A").lower()
-        day = EmployeeShiftDay.objects.get(day=day)
         attendance = (
             Attendance.objects.filter(employee_id=employee)
             .order_by("id", "attendance_date")
             .last()
         )
-        if attendance is not None:
-            day = attendance.attendance_day
+        # shift and schedule of the day the open attendance belongs to
+        calendar_day = get_employee_shift_day(
+            employee, attendance.attendance_date if attendance else date_today
+        )
+        shift = calendar_day.shift_id if calendar_day else work_info.shift_id
         now = datetime.now().strftime("%H:%M")
         if request.__dict__.get("time"):
             now = request.time.strftime("%H:%M")
-        minimum_hour, start_time_sec, end_time_sec = shift_schedule_today(
-            day=day, shift=shift
+        minimum_hour, start_time_sec, end_time_sec = (
+            calendar_day.schedule_seconds() if calendar_day else ("00:00", 0, 0)
         )
         attendance = clock_out_attendance_and_activity(
             employee=employee, date_today=date_today, now=now, out_datetime=datetime_now
@@ -573,7 +556,9 @@ def clock_out(request):
 
         script = ""
         hidden_label = ""
-        time_runner_enabled = timerunner_enabled(request)["enabled_timerunner"]
+        time_runner_enabled = get_time_runner_enabled(
+            request.session.get("selected_company")
+        )
         mouse_in = ""
         mouse_out = ""
         if time_runner_enabled:
@@ -19,11 +19,9 @@ from horilla.methods import remove_dynamic_url
 
 logger = logging.getLogger(__name__)
 
-import calendar
 import contextlib
 import io
 import json
-from collections import defaultdict
 from datetime import date, datetime, timedelta
 from urllib.parse import parse_qs
 
@@ -88,6 +86,7 @@ from attendance.methods.utils import (
     sort_activity_dicts,
     strtime_seconds,
 )
+from attendance.methods.work_record_matrix import WorkRecordMatrix
 from attendance.models import (
     Attendance,
     AttendanceActivity,
@@ -99,7 +98,6 @@ from attendance.models import (
     AttendanceValidationCondition,
     BatchAttendance,
     GraceTime,
-    WorkRecords,
 )
 from attendance.views.handle_attendance_errors import handle_attendance_errors
 from attendance.views.process_attendance_data import process_attendance_data
@@ -2396,34 +2394,17 @@ def work_records_change_month(request):
         year, month = date.today().year, date.today().month
 
     employees = [request.user.employee_get] + list(employees)
+    leave_dates = monthly_leave_days(month, year)
 
-    month_dates = [
-        datetime(year, month, day).date()
-        for week in calendar.monthcalendar(year, month)
-        for day in week
-        if day
-    ]
-
-    work_records = WorkRecords.objects.filter(
-        date__in=month_dates, employee_id__in=employees
-    ).select_related("employee_id", "shift_id", "attendance_id")
-
-    work_records_dict = {(wr.employee_id.id, wr.date): wr for wr in work_records}
-
-    data = {
-        employee: [
-            work_records_dict.get((employee.id, current_date))
-            for current_date in month_dates
-        ]
-        for employee in employees
-    }
-
-    paginator = Paginator(list(data.items()), get_pagination())
+    # only the employees of the page are loaded into the matrix
+    paginator = Paginator(employees, get_pagination())
     page = paginator.get_page(request.GET.get("page"))
+    matrix = WorkRecordMatrix(page.object_list, year, month, leave_dates)
+    page.object_list = list(matrix.rows())
 
     context = {
-        "current_month_dates_list": month_dates,
-        "leave_dates": monthly_leave_days(month, year),
+        "current_month_dates_list": matrix.dates,
+        "leave_dates": leave_dates,
         "data": page,
         "pd": previous_data,
         "current_date": date.today(),
@@ -2443,34 +2424,23 @@ def work_record_export(request):
         return HttpResponseBadRequest("Invalid month or year parameter.")
 
     employees = EmployeeFilter(request.GET).qs
-    records = WorkRecords.objects.filter(date__month=month, date__year=year)
-    num_days = calendar.monthrange(year, month)[1]
-    all_date_objects = [date(year, month, day) for day in range(1, num_days + 1)]
-    leave_dates = set(monthly_leave_days(month, year))
-
-    record_lookup = defaultdict(lambda: "ABS")
-    for record in records:
-        if record.date <= date.today():
-            record_key = (record.employee_id, record.date)
-            record_lookup[record_key] = record.work_record_type
+    matrix = WorkRecordMatrix(employees, year, month, monthly_leave_days(month, year))
 
     date_format = request.user.employee_get.get_date_format()
     format_string = HORILLA_DATE_FORMATS.get(date_format)
-    formatted_dates = [day.strftime(format_string) for day in all_date_objects]
-    data_rows = []
-
-    for employee in employees:
-        row_data = {"Employee": employee}
-        for day, formatted_day in zip(all_date_objects, formatted_dates):
-            if not day in leave_dates and day < date.today():
-                row_data[formatted_day] = record_lookup.get((employee, day), "DFT")
-            else:
-                data = record_lookup.get((employee, day), "")
-                row_data[formatted_day] = data if data != "DFT" else ""
-        data_rows.append(row_data)
-
-    columns = ["Employee"] + formatted_dates
-    df = pd.DataFrame(data_rows, columns=columns)
+    formatted_dates = [day.strftime(format_string) for day in matrix.dates]
+    total_labels = {
+        "present": _("Present"),
+        "half_day": _("Half Day Present"),
+        "leave": _("Leave"),
+        "half_day_leave": _("Half Day Leave"),
+        "absent": _("Absent"),
+        "late": _("Late Come"),
+    }
+    df = pd.DataFrame(matrix.export_values(), columns=formatted_dates)
+    df.insert(0, "Employee", [str(employee) for employee in matrix.employees])
+    for column, values in matrix.totals().items():
+        df[str(total_labels[column])] = values
 
     output = io.BytesIO()
     with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
@@ -2496,10 +2466,22 @@ def work_record_export(request):
             ),
         }
 
-        for row_idx, row in enumerate(df.itertuples(index=False), start=1):
-            for col_idx, cell_value in enumerate(row[1:], start=1):
-                if cell_value in formats:
-                    worksheet.write(row_idx, col_idx, cell_value, formats[cell_value])
+        # one conditional format per record type over the day columns
+        # instead of formatting every cell
+        if len(df.index):
+            for record_type, cell_format in formats.items():
+                worksheet.conditional_format(
+                    1,
+                    1,
+                    len(df.index),
+                    len(formatted_dates),
+                    {
+                        "type": "cell",
+                        "criteria": "equal to",
+                        "value": f'"{record_type}"',
+                        "format": cell_format,
+                    },
+                )
 
         for col_idx, col in enumerate(df.columns):
             max_len = max(df[col].astype(str).map(len).max(), len(col))
@@ -15,7 +15,14 @@ class BaseConfig(AppConfig):
 
     def ready(self) -> None:
         from base import signals
-
+        from base.models import EmployeeShiftSchedule, SearchIndexState
+        from base.search import connect_search_index
+        from horilla.model_cache import connect_model_versions, track_models
+
+        # models read through cached_query, tracked before any process writes
+        track_models(EmployeeShiftSchedule, SearchIndexState)
+        connect_model_versions()
+        connect_search_index()
         super().ready()
         try:
             from base.models import EmployeeShiftDay
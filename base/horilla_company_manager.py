@@ -7,6 +7,7 @@ from typing import Coroutine, Sequence
 
 from django.db import models
 from django.db.models.query import QuerySet
+from django.utils import timezone
 
 from horilla.horilla_middlewares import _thread_locals
 from horilla.signals import post_bulk_update, pre_bulk_update
@@ -16,6 +17,11 @@ django_filter_update = QuerySet.update
 
 
 def update(self, *args, **kwargs):
+    # keep `updated_at` (auto_now) in sync for queryset updates as well
+    if "updated_at" not in kwargs and any(
+        field.name == "updated_at" for field in self.model._meta.concrete_fields
+    ):
+        kwargs["updated_at"] = timezone.now()
     # pre_update signal
     request = getattr(_thread_locals, "request", None)
     self.request = request
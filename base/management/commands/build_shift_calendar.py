@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from base.shift_calendar import SHIFT_CALENDAR_DAYS, build_shift_calendar
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized shift calendar of every active employee"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            default=None,
+            help="First day to rebuild (YYYY-MM-DD), today by default",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=SHIFT_CALENDAR_DAYS,
+            help="Number of days to rebuild",
+        )
+
+    def handle(self, *args, **options):
+        written = build_shift_calendar(start=options["start"], days=options["days"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Shift calendar rebuilt, {written} rows written.")
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from employee.models import EmployeeWorkInformation
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized reporting chain of every employee"
+
+    def handle(self, *args, **kwargs):
+        changed = EmployeeWorkInformation.rebuild_reporting_paths()
+        self.stdout.write(
+            self.style.SUCCESS(f"Reporting paths rebuilt, {changed} rows updated.")
+        )
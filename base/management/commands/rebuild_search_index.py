@@ -0,0 +1,35 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from base.search import get_searchables, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search documents of the searchable models"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            default=None,
+            help="app_label.ModelName of a model to rebuild, every model by default",
+        )
+
+    def handle(self, *args, **options):
+        models = None
+        if options["model"]:
+            try:
+                models = [apps.get_model(label) for label in options["model"]]
+            except (LookupError, ValueError) as error:
+                raise CommandError(error)
+            unknown = [model for model in models if model not in get_searchables()]
+            if unknown:
+                raise CommandError(
+                    f"Not searchable: {', '.join(m._meta.label for m in unknown)}"
+                )
+        for model, written in rebuild_search_index(models).items():
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model._meta.label}: {written} search documents written."
+                )
+            )
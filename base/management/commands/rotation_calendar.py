@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from base.rotation import get_shift_rotation, get_work_type_rotation, project_rotation
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the rotating shift or work type calendar of the active rotating "
+        "assignments for the next weeks, nothing is written"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--weeks", type=int, default=4, help="Number of weeks to project"
+        )
+        parser.add_argument(
+            "--work-type",
+            action="store_true",
+            help="Project the rotating work types instead of the rotating shifts",
+        )
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            default=None,
+            help="First day of the calendar (YYYY-MM-DD), today by default",
+        )
+        parser.add_argument(
+            "--employee", type=int, action="append", help="Employee id, repeatable"
+        )
+
+    def handle(self, *args, **options):
+        rotation = (
+            get_work_type_rotation() if options["work_type"] else get_shift_rotation()
+        )
+        calendar = project_rotation(
+            rotation,
+            weeks=options["weeks"],
+            start=options["start"],
+            employee_ids=options["employee"],
+        )
+        for employee, days in calendar.items():
+            self.stdout.write(self.style.SUCCESS(str(employee)))
+            previous = object()
+            for day, target in days:
+                # only the days the shift/work type changes are printed
+                if target != previous:
+                    self.stdout.write(f"  {day.isoformat()}  {target or '-'}")
+                previous = target
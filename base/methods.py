@@ -6,7 +6,6 @@ import random
 from datetime import date, datetime, time, timedelta
 
 import pandas as pd
-import pdfkit
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import Group
@@ -21,7 +20,14 @@ from django.http import HttpResponse
 from django.template.loader import render_to_string
 from django.utils.translation import gettext as _
 
-from base.models import Company, CompanyLeaves, DynamicPagination, Holidays
+from base.models import Company, CompanyLeaves, Holidays
+from base.pdf_renderer import render_pdf
+from base.working_calendar import (
+    company_leave_dates_between,
+    get_year_calendar,
+    holiday_dates_between,
+    working_dates_between,
+)
 from employee.models import Employee, EmployeeWorkInformation
 from horilla.horilla_apps import NESTED_SUBORDINATE_VISIBILITY
 from horilla.horilla_middlewares import _thread_locals
@@ -38,6 +44,45 @@ def users_count(self):
 Group.add_to_class("users_count", property(users_count))
 
 
+_reporting_paths_checked = False
+
+
+def ensure_reporting_paths():
+    """
+    Materialize the reporting paths once per process if some work information
+    rows are missing theirs (rows written before the column existed)
+    """
+    global _reporting_paths_checked
+    if _reporting_paths_checked:
+        return
+    if EmployeeWorkInformation._base_manager.filter(
+        employee_id__isnull=False, reporting_path__isnull=True
+    ).exists():
+        EmployeeWorkInformation.rebuild_reporting_paths()
+    _reporting_paths_checked = True
+
+
+def subordinates_filter(manager, field=None):
+    """
+    Q object matching every employee below `manager` in the reporting chain.
+
+    Uses the materialized `reporting_path` of EmployeeWorkInformation, so the
+    whole chain is one indexed prefix lookup. `field` is the path to the
+    employee from the filtered model (e.g. "employee_id").
+    """
+    ensure_reporting_paths()
+    manager_id = getattr(manager, "pk", manager)
+    manager_path = (
+        EmployeeWorkInformation._base_manager.filter(employee_id=manager_id)
+        .values_list("reporting_path", flat=True)
+        .first()
+    ) or f"/{manager_id}/"
+    lookup = "employee_work_info__reporting_path"
+    if field:
+        lookup = f"{field}__{lookup}"
+    return Q(**{f"{lookup}__startswith": manager_path, f"{lookup}__gt": manager_path})
+
+
 def filtersubordinates(request, queryset, perm=None, field="employee_id"):
     """
     This method is used to filter out subordinates queryset element.
@@ -49,32 +94,10 @@ def filtersubordinates(request, queryset, perm=None, field="employee_id"):
     if not request:
         return queryset
     if NESTED_SUBORDINATE_VISIBILITY:
-        current_managers = [
-            request.user.employee_get.id,
-        ]
-        all_subordinates = Q(
-            **{
-                f"{field}__employee_work_info__reporting_manager_id__in": current_managers
-            }
+        return queryset.filter(
+            subordinates_filter(request.user.employee_get, field=field)
         )
 
-        while True:
-            sub_managers = queryset.filter(
-                **{
-                    f"{field}__employee_work_info__reporting_manager_id__in": current_managers
-                }
-            ).values_list(f"{field}__id", flat=True)
-            if not sub_managers.exists():
-                break
-            current_managers = sub_managers
-            all_subordinates |= Q(
-                **{
-                    f"{field}__employee_work_info__reporting_manager_id__in": sub_managers
-                }
-            )
-
-        return queryset.filter(all_subordinates)
-
     manager = Employee.objects.filter(employee_user_id=user).first()
 
     if field:
@@ -124,30 +147,7 @@ def filtersubordinatesemployeemodel(request, queryset, perm=None):
         return queryset
 
     if NESTED_SUBORDINATE_VISIBILITY:
-        # Initialize the set of subordinates with the current manager(s)
-        current_managers = [
-            request.user.employee_get.id,
-        ]
-        all_subordinates = Q(
-            employee_work_info__reporting_manager_id__in=current_managers
-        )
-
-        # Iteratively find subordinates in the chain
-        while True:
-            sub_managers = queryset.filter(
-                employee_work_info__reporting_manager_id__in=current_managers
-            ).values_list("id", flat=True)
-
-            if not sub_managers.exists():
-                break
-
-            current_managers = sub_managers
-            all_subordinates |= Q(
-                employee_work_info__reporting_manager_id__in=sub_managers
-            )
-
-        # Apply the filter to the queryset
-        return queryset.filter(all_subordinates).distinct()
+        return queryset.filter(subordinates_filter(request.user.employee_get))
 
     manager = Employee.objects.filter(employee_user_id=user).first()
     queryset = queryset.filter(employee_work_info__reporting_manager_id=manager)
@@ -743,15 +743,12 @@ def generate_pdf(template_path, context, path=True, title=None, html=True):
 
 
 def get_pagination():
-    from horilla.horilla_middlewares import _thread_locals
+    """
+    Pagination size of the current user
+    """
+    from base.user_preferences import get_user_preferences
 
-    request = getattr(_thread_locals, "request", None)
-    user = request.user
-    page = DynamicPagination.objects.filter(user_id=user).first()
-    count = 50
-    if page:
-        count = page.pagination
-    return count
+    return get_user_preferences().pagination
 
 
 def paginator_qry(queryset, page_number):
@@ -838,66 +835,14 @@ def get_holiday_dates(range_start: date, range_end: date, company=None) -> list:
     """
     :return: this functions returns a list of all holiday dates.
     """
-    pay_range_dates = get_date_range(start_date=range_start, end_date=range_end)
-    query = Q()
-    for check_date in pay_range_dates:
-        query |= Q(start_date__lte=check_date, end_date__gte=check_date)
-    
-    if company:
-        query &= Q(company_id=company)
-        
-    holidays = Holidays.objects.filter(query)
-    holiday_dates = set([])
-    for holiday in holidays:
-        holiday_dates = holiday_dates | (
-            set(
-                get_date_range(start_date=holiday.start_date, end_date=holiday.end_date)
-            )
-        )
-    return list(set(holiday_dates))
+    return holiday_dates_between(range_start, range_end, company=company)
 
 
 def get_company_leave_dates(year, company=None):
     """
     :return: This function returns a list of all company leave dates
     """
-    company_leaves = CompanyLeaves.objects.all()
-    if company:
-        company_leaves = company_leaves.filter(company_id=company)
-        
-    company_leave_dates = []
-    for company_leave in company_leaves:
-        based_on_week = company_leave.based_on_week
-        based_on_week_day = company_leave.based_on_week_day
-        for month in range(1, 13):
-            if based_on_week is not None:
-                # Set Sunday as the first day of the week
-                calendar.setfirstweekday(6)
-                month_calendar = calendar.monthcalendar(year, month)
-                weeks = month_calendar[int(based_on_week)]
-                weekdays_in_weeks = [day for day in weeks if day != 0]
-                for day in weekdays_in_weeks:
-                    leave_date = datetime.strptime(
-                        f"{year}-{month:02}-{day:02}", "%Y-%m-%d"
-                    ).date()
-                    if (
-                        leave_date.weekday() == int(based_on_week_day)
-                        and leave_date not in company_leave_dates
-                    ):
-                        company_leave_dates.append(leave_date)
-            else:
-                # Set Monday as the first day of the week
-                calendar.setfirstweekday(0)
-                month_calendar = calendar.monthcalendar(year, month)
-                for week in month_calendar:
-                    if week[int(based_on_week_day)] != 0:
-                        leave_date = datetime.strptime(
-                            f"{year}-{month:02}-{week[int(based_on_week_day)]:02}",
-                            "%Y-%m-%d",
-                        ).date()
-                        if leave_date not in company_leave_dates:
-                            company_leave_dates.append(leave_date)
-    return company_leave_dates
+    return sorted(get_year_calendar(year, company=company).company_leaves)
 
 
 def get_working_days(start_date, end_date, company=None):
@@ -909,36 +854,16 @@ def get_working_days(start_date, end_date, company=None):
         end_date (_type_): the end date till the date needed
     """
 
-    holiday_dates = get_holiday_dates(start_date, end_date, company=company)
-
-    # appending company/holiday leaves
-    # Note: Duplicate entry may exist
-    company_leave_dates = (
-        list(
-            set(
-                get_company_leave_dates(start_date.year, company=company)
-                + get_company_leave_dates(end_date.year, company=company)
-            )
-        )
-
+    working_days_between_ranges = working_dates_between(
+        start_date, end_date, company=company
+    )
+    company_leave_dates = company_leave_dates_between(
+        start_date, end_date, company=company
     )
-
-    date_range = get_date_range(start_date, end_date)
-
-    # making unique list of company/holiday leave dates then filtering
-    # the leave dates only between the start and end date
-    company_leave_dates = [
-        date
-        for date in list(set(company_leave_dates))
-        if start_date <= date <= end_date
-    ]
-
-    working_days_between_ranges = list(set(date_range) - set(company_leave_dates))
-    total_working_days = len(working_days_between_ranges)
 
     return {
         # Total working days on that period
-        "total_working_days": total_working_days,
+        "total_working_days": len(working_days_between_ranges),
         # All the working dates between the start and end date
         "working_days_on": working_days_between_ranges,
         # All the company/holiday leave dates between the range
@@ -1002,23 +927,8 @@ def template_pdf(template, context={}, html=False, filename="payslip.pdf"):
         HttpResponse: A response with the generated PDF file or raw HTML.
     """
     try:
-        bootstrap_css = '<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">'
-        html_content = f"{bootstrap_css}\n{template}"
-
-        pdf_options = {
-            "page-size": "A4",
-            "margin-top": "10mm",
-            "margin-bottom": "10mm",
-            "margin-left": "10mm",
-            "margin-right": "10mm",
-            "encoding": "UTF-8",
-            "enable-local-file-access": None,
-            "dpi": 300,
-            "zoom": 1.3,
-            "footer-center": "[page]/[topage]",
-        }
-
-        pdf = pdfkit.from_string(html_content, False, options=pdf_options)
+        # local stylesheets are inlined by the renderer, no CDN round trip
+        pdf = render_pdf(template)
 
         response = HttpResponse(pdf, content_type="application/pdf")
         response["Content-Disposition"] = f"inline; filename={filename}"
@@ -5,7 +5,6 @@ middleware.py
 from django.apps import apps
 from django.contrib import messages
 from django.contrib.auth import logout
-from django.core.cache import cache
 from django.db.models import Q
 from django.shortcuts import redirect
 from django.utils.translation import gettext_lazy as _
@@ -25,7 +24,9 @@ from horilla.horilla_settings import APPS
 from horilla.methods import get_horilla_model_class
 from horilla_documents.models import DocumentRequest
 
-CACHE_KEY = "horilla_company_models_cache_key"
+# model classes do not change at runtime, keep them per process instead of
+# round-tripping them through the shared cache
+_company_models = None
 
 
 class CompanyMiddleware:
@@ -130,7 +131,8 @@ class CompanyMiddleware:
         """
         Retrieve the list of models that are company-specific.
         """
-        company_models = cache.get(CACHE_KEY)
+        global _company_models
+        company_models = _company_models
 
         if company_models is None:
             company_models = [
@@ -176,7 +178,7 @@ class CompanyMiddleware:
                         [get_horilla_model_class(app_label, model) for model in models]
                     )
 
-            cache.set(CACHE_KEY, company_models)
+            _company_models = company_models
 
         return company_models
 
@@ -13,6 +13,7 @@ from django.apps import apps
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.models import AbstractUser, User
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -931,6 +932,129 @@ class RotatingShiftAssign(HorillaModel):
             raise ValidationError(_("Date must be greater than or equal to today"))
 
 
+class EmployeeShiftCalendar(models.Model):
+    """
+    Materialized shift of an employee on a date, see `base.shift_calendar`.
+    Folds the work information shift, rotating shift assigns and approved
+    shift requests together with the schedule of the day.
+    """
+
+    SOURCES = [
+        ("work_info", _("Work Information")),
+        ("rotating", _("Rotating Shift")),
+        ("request", _("Shift Request")),
+    ]
+
+    employee_id = models.ForeignKey(
+        "employee.Employee",
+        on_delete=models.CASCADE,
+        related_name="shift_calendar",
+        verbose_name=_("Employee"),
+    )
+    date = models.DateField(verbose_name=_("Date"))
+    shift_id = models.ForeignKey(
+        EmployeeShift,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Shift"),
+    )
+    schedule_id = models.ForeignKey(
+        EmployeeShiftSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Shift Schedule"),
+    )
+    source = models.CharField(max_length=10, choices=SOURCES, default="work_info")
+    start_datetime = models.DateTimeField(null=True, blank=True)
+    # next day for night shifts
+    end_datetime = models.DateTimeField(null=True, blank=True)
+    minimum_working_hour = models.CharField(max_length=5, default="00:00")
+    is_night_shift = models.BooleanField(default=False)
+    objects = HorillaCompanyManager("employee_id__employee_work_info__company_id")
+
+    class Meta:
+        """
+        Meta class to add additional options
+        """
+
+        verbose_name = _("Employee Shift Calendar")
+        verbose_name_plural = _("Employee Shift Calendar")
+        unique_together = [["employee_id", "date"]]
+        indexes = [models.Index(fields=["date", "shift_id"])]
+
+    def __str__(self) -> str:
+        return f"{self.employee_id} {self.date} {self.shift_id}"
+
+    def is_working_day(self):
+        """
+        Whether the shift has a schedule on the date
+        """
+        return self.schedule_id_id is not None
+
+    def schedule_seconds(self):
+        """
+        (minimum hour, start seconds, end seconds) as `shift_schedule_today`
+        """
+        schedule = self.schedule_id
+        if schedule is None:
+            return ("00:00", 0, 0)
+        start_time = schedule.start_time
+        end_time = schedule.end_time
+        return (
+            self.minimum_working_hour,
+            start_time.hour * 3600 + start_time.minute * 60 if start_time else 0,
+            end_time.hour * 3600 + end_time.minute * 60 if end_time else 0,
+        )
+
+
+class SearchDocument(models.Model):
+    """
+    Normalized searchable text of one row of a searchable model, see
+    `base.search`
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255, blank=True)
+    # lowercase words separated by single spaces
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta class to add additional options
+        """
+
+        verbose_name = _("Search Document")
+        verbose_name_plural = _("Search Documents")
+        unique_together = [["content_type", "object_id"]]
+
+    def __str__(self) -> str:
+        return self.title
+
+
+class SearchIndexState(models.Model):
+    """
+    Searchable model whose search documents were built for every row
+    """
+
+    content_type = models.OneToOneField(ContentType, on_delete=models.CASCADE)
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta class to add additional options
+        """
+
+        verbose_name = _("Search Index State")
+        verbose_name_plural = _("Search Index States")
+
+    def __str__(self) -> str:
+        return f"{self.content_type} {self.built_at}"
+
+
 class BaserequestFile(models.Model):
     file = models.FileField(upload_to=upload_path)
     objects = models.Manager()
@@ -0,0 +1,166 @@
+"""
+pdf_renderer.py
+
+PDF rendering service used by template_pdf and the payslip downloads.
+
+Every document is rendered by a wkhtmltopdf process (through pdfkit). The
+renders are dispatched to a bounded pool so that bulk downloads and mail
+sends render several documents at a time without spawning an unbounded
+number of wkhtmltopdf processes. The stylesheets are inlined from the local
+static files, so rendering never waits on a CDN and works offline.
+"""
+
+import hashlib
+import io
+import logging
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import pdfkit
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PDF_OPTIONS = {
+    "page-size": "A4",
+    "margin-top": "10mm",
+    "margin-bottom": "10mm",
+    "margin-left": "10mm",
+    "margin-right": "10mm",
+    "encoding": "UTF-8",
+    "enable-local-file-access": None,
+    "dpi": getattr(settings, "PDF_RENDER_DPI", 300),
+    "zoom": 1.3,
+    "footer-center": "[page]/[topage]",
+}
+PDF_INLINE_CSS = getattr(settings, "PDF_INLINE_CSS", ["bootstrap/bootstrap.min.css"])
+PDF_RENDER_WORKERS = getattr(settings, "PDF_RENDER_WORKERS", 4)
+PDF_CACHE_TIMEOUT = getattr(settings, "PDF_CACHE_TIMEOUT", 60 * 60 * 24)
+# the PDFs are large, they are kept in their own cache so they do not evict
+# the entries of the default cache
+PDF_CACHE_ALIAS = getattr(settings, "PDF_CACHE_ALIAS", "pdf")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Shared pool bounding the concurrent wkhtmltopdf processes
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=PDF_RENDER_WORKERS,
+                    thread_name_prefix="horilla-pdf",
+                )
+    return _executor
+
+
+@lru_cache(maxsize=None)
+def inline_css():
+    """
+    <style> block with the locally bundled stylesheets
+    """
+    styles = []
+    for path in PDF_INLINE_CSS:
+        absolute_path = finders.find(path)
+        if not absolute_path:
+            logger.warning("PDF stylesheet %s not found in static files", path)
+            continue
+        with open(absolute_path, encoding="utf-8") as css_file:
+            styles.append(css_file.read())
+    if not styles:
+        return ""
+    return "<style>\n" + "\n".join(styles) + "\n</style>"
+
+
+def _render(html, options):
+    return pdfkit.from_string(html, False, options=options)
+
+
+def render_pdf(html, options=None, with_css=True):
+    """
+    Render one HTML document to PDF bytes through the shared pool
+    """
+    return render_pdfs([html], options=options, with_css=with_css)[0]
+
+
+def render_pdfs(html_documents, options=None, with_css=True):
+    """
+    Render several HTML documents concurrently, results keep the input order
+    """
+    options = options if options is not None else DEFAULT_PDF_OPTIONS
+    css = inline_css() if with_css else ""
+    documents = [f"{css}\n{html}" if css else html for html in html_documents]
+    return list(get_executor().map(lambda html: _render(html, options), documents))
+
+
+def cached_render_pdfs(keyed_documents, options=None, with_css=True):
+    """
+    Render (cache_key, html) pairs, reusing PDFs cached under the same key and
+    HTML. Only the missing ones are sent to the pool. Nothing is cached when
+    the PDF_CACHE_ALIAS cache is not configured.
+    """
+    keyed_documents = list(keyed_documents)
+    if PDF_CACHE_ALIAS not in settings.CACHES:
+        return render_pdfs(
+            [html for _cache_key, html in keyed_documents],
+            options=options,
+            with_css=with_css,
+        )
+    cache = caches[PDF_CACHE_ALIAS]
+    keys = []
+    for cache_key, html in keyed_documents:
+        digest = hashlib.md5(html.encode("utf-8")).hexdigest()
+        keys.append(f"horilla_pdf:{cache_key}:{digest}")
+    cached = cache.get_many(keys)
+    missing = [index for index, key in enumerate(keys) if key not in cached]
+    if missing:
+        rendered = render_pdfs(
+            [keyed_documents[index][1] for index in missing],
+            options=options,
+            with_css=with_css,
+        )
+        fresh = {keys[index]: pdf for index, pdf in zip(missing, rendered)}
+        cache.set_many(fresh, PDF_CACHE_TIMEOUT)
+        cached.update(fresh)
+    return [cached[key] for key in keys]
+
+
+def zip_pdfs(named_pdfs):
+    """
+    ZIP archive bytes of (filename, pdf bytes) pairs
+    """
+    buffer = io.BytesIO()
+    used_names = set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for filename, pdf in named_pdfs:
+            name, counter = filename, 1
+            while name in used_names:
+                name = filename.replace(".pdf", f" ({counter}).pdf")
+                counter += 1
+            used_names.add(name)
+            archive.writestr(name, pdf)
+    return buffer.getvalue()
+
+
+def merge_pdfs(pdfs):
+    """
+    Single PDF with the pages of all the given PDFs
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for pdf in pdfs:
+        for page in PdfReader(io.BytesIO(pdf)).pages:
+            writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,437 @@
+"""
+rotation.py
+
+Rotation engine for rotating shift and rotating work type assignments.
+
+All due assignments are loaded at once, their next shift or work type and
+next switch date are computed in memory, and the changes are written with
+`bulk_update` (with audit history) in a single transaction. Employees are
+notified with one bulk insert per message instead of one notification call
+per employee. The same step function projects the rotation calendar ahead
+without writing anything.
+
+The work informations are written without their pre_save signal, so the
+payroll contracts that signal creates for employees without one are created
+here in bulk.
+"""
+
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Max
+from django.urls import reverse
+from django.utils.translation import gettext_noop
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from notifications.bulk import notify_many
+
+
+class Rotation:
+    """
+    Field layout of one kind of rotating assignment
+    """
+
+    def __init__(
+        self,
+        assign_model,
+        target_model,
+        rotating_field,
+        first_fields,
+        additional_key,
+        current_field,
+        next_field,
+        index_key,
+        work_info_field,
+        message,
+        keep_empty_slots=False,
+        deactivate_stale=True,
+    ):
+        self.assign_model = assign_model
+        self.target_model = target_model
+        self.rotating_field = rotating_field
+        self.first_fields = first_fields
+        self.additional_key = additional_key
+        self.current_field = current_field
+        self.next_field = next_field
+        self.index_key = index_key
+        self.work_info_field = work_info_field
+        self.message = message
+        self.keep_empty_slots = keep_empty_slots
+        self.deactivate_stale = deactivate_stale
+
+    def sequences(self, rotatings):
+        """
+        Ordered targets of each rotating shift/work type, keyed by its id.
+        The additional targets of every rotation are fetched in one query.
+        """
+        additional_ids = {
+            int(target_id)
+            for rotating in rotatings
+            for target_id in (rotating.additional_data or {}).get(
+                self.additional_key, []
+            )
+            or []
+            if target_id
+        }
+        targets = self.target_model._base_manager.in_bulk(additional_ids)
+        sequences = {}
+        for rotating in rotatings:
+            sequence = [getattr(rotating, field) for field in self.first_fields]
+            for target_id in (rotating.additional_data or {}).get(
+                self.additional_key, []
+            ) or []:
+                if target_id:
+                    target = targets.get(int(target_id))
+                    if target is not None:
+                        sequence.append(target)
+                elif self.keep_empty_slots:
+                    sequence.append(None)
+            sequences[rotating.pk] = sequence
+        return sequences
+
+
+def get_shift_rotation():
+    """
+    Rotation of RotatingShiftAssign
+    """
+    from base.models import EmployeeShift, RotatingShiftAssign
+
+    return Rotation(
+        RotatingShiftAssign,
+        EmployeeShift,
+        "rotating_shift_id",
+        ("shift1", "shift2"),
+        "additional_shifts",
+        "current_shift",
+        "next_shift",
+        "next_shift_index",
+        "shift_id",
+        {"verb": gettext_noop("Your shift has been changed."), "icon": "infinite"},
+        # an empty slot of a rotating shift rotates the employee to no shift
+        keep_empty_slots=True,
+    )
+
+
+def get_work_type_rotation():
+    """
+    Rotation of RotatingWorkTypeAssign
+    """
+    from base.models import RotatingWorkTypeAssign, WorkType
+
+    return Rotation(
+        RotatingWorkTypeAssign,
+        WorkType,
+        "rotating_work_type_id",
+        ("work_type1", "work_type2"),
+        "additional_work_types",
+        "current_work_type",
+        "next_work_type",
+        "next_work_type_index",
+        "work_type_id",
+        {
+            "verb": gettext_noop("Your Work Type has been changed."),
+            "icon": "infinite",
+        },
+        # the work type scheduler never deactivated the older assignments
+        deactivate_stale=False,
+    )
+
+
+def next_change_date(assign, change_date):
+    """
+    Switch date that follows a switch of the assignment on `change_date`
+    """
+    if assign.based_on == "weekly":
+        return change_date + timedelta(days=7)
+    if assign.based_on == "monthly":
+        year = change_date.year + change_date.month // 12
+        month = change_date.month % 12 + 1
+        last_day = calendar.monthrange(year, month)[1]
+        if assign.rotate_every == "last":
+            return date(year, month, last_day)
+        return date(year, month, min(int(assign.rotate_every or 1), last_day))
+    return change_date + timedelta(days=max(int(assign.rotate_after_day or 1), 1))
+
+
+class RotationState:
+    """
+    In-memory rotation state of one assignment
+    """
+
+    __slots__ = ("current", "next", "index", "change_date")
+
+    def __init__(self, current, next, index, change_date):
+        self.current = current
+        self.next = next
+        self.index = index
+        self.change_date = change_date
+
+    def step(self, assign, sequence):
+        """
+        Switch to the next target, as the scheduler does on the switch date
+        """
+        self.current = self.next
+        if sequence:
+            self.index %= len(sequence)
+            self.next = sequence[self.index]
+            self.index = (self.index + 1) % len(sequence)
+        self.change_date = next_change_date(assign, self.change_date)
+
+
+def _initial_state(rotation, assign):
+    return RotationState(
+        getattr(assign, rotation.current_field),
+        getattr(assign, rotation.next_field),
+        (assign.additional_data or {}).get(rotation.index_key) or 0,
+        assign.next_change_date,
+    )
+
+
+def _active_assigns(rotation, today, employee_ids=None, deactivate_stale=True):
+    """
+    Active assignments with their rotation loaded. Of the assignments of an
+    employee that already started only the latest one is kept, the older ones
+    are deactivated unless `deactivate_stale` is False.
+    """
+    assigns = rotation.assign_model._base_manager.filter(is_active=True)
+    if employee_ids is not None:
+        assigns = assigns.filter(employee_id__in=employee_ids)
+    started = assigns.filter(start_date__lte=today)
+    latest = (
+        started.order_by()
+        .values("employee_id")
+        .annotate(latest_id=Max("id"))
+        .values_list("latest_id", flat=True)
+    )
+    stale = list(started.exclude(id__in=list(latest)).values_list("id", flat=True))
+    if stale and deactivate_stale:
+        rotation.assign_model._base_manager.filter(id__in=stale).update(is_active=False)
+    return list(
+        assigns.exclude(id__in=stale).select_related(
+            "employee_id__employee_user_id",
+            rotation.rotating_field,
+            f"{rotation.rotating_field}__{rotation.first_fields[0]}",
+            f"{rotation.rotating_field}__{rotation.first_fields[1]}",
+            rotation.current_field,
+            rotation.next_field,
+        )
+    )
+
+
+def _sequences(rotation, assigns):
+    rotatings = {
+        getattr(assign, rotation.rotating_field).pk: getattr(
+            assign, rotation.rotating_field
+        )
+        for assign in assigns
+    }
+    return rotation.sequences(list(rotatings.values()))
+
+
+def get_bot():
+    """
+    User the scheduler notifications are sent from
+    """
+    from django.contrib.auth.models import User
+
+    return User.objects.filter(username="Horilla Bot").first()
+
+
+def notify_employees(bot, employees, message):
+    """
+    Notify the employees of the message ({"verb": translation key, "icon":
+    ...}) with one bulk insert
+    """
+    if bot is None:
+        return
+    redirect = reverse("employee-profile")
+    notify_many(
+        bot,
+        [
+            (employee.employee_user_id, message["verb"], {}, redirect)
+            for employee in employees
+        ],
+        icon=message.get("icon", "information"),
+    )
+
+
+def create_missing_contracts(work_infos):
+    """
+    Payroll contracts of the active employees of the work informations that
+    have no contract yet, created with one bulk insert the way the pre_save
+    signal of EmployeeWorkInformation creates them one by one
+    """
+    if not apps.is_installed("payroll"):
+        return []
+    from payroll.models.models import Contract
+
+    active = [work_info for work_info in work_infos if work_info.employee_id.is_active]
+    with_contract = set(
+        Contract._base_manager.filter(
+            employee_id__in=[work_info.employee_id_id for work_info in active]
+        ).values_list("employee_id", flat=True)
+    )
+    contracts = []
+    for work_info in active:
+        if work_info.employee_id_id in with_contract:
+            continue
+        contract = Contract(
+            contract_name=f"{work_info.employee_id}'s Contract",
+            employee_id=work_info.employee_id,
+            contract_start_date=work_info.date_joining or date.today(),
+            wage=work_info.basic_salary if work_info.basic_salary is not None else 0,
+            department=work_info.department_id,
+            job_position=work_info.job_position_id,
+            job_role=work_info.job_role_id,
+            work_type=work_info.work_type_id,
+            shift=work_info.shift_id,
+        )
+        contract.total_salary = (
+            (contract.wage or 0)
+            + (contract.housing_allowance or 0)
+            + (contract.transport_allowance or 0)
+            + (contract.other_allowance or 0)
+        )
+        contracts.append(contract)
+    if contracts:
+        bulk_create_with_history(contracts, Contract)
+    return contracts
+
+
+def update_work_infos(employee_targets, field, bot=None, message=None):
+    """
+    Set `field` of the work information of each employee in
+    `employee_targets` ({employee: target}) with one bulk update and notify
+    the employees whose work information was changed.
+    """
+    from employee.models import EmployeeWorkInformation
+
+    targets = {employee.pk: target for employee, target in employee_targets.items()}
+    work_infos = list(
+        EmployeeWorkInformation._base_manager.filter(
+            employee_id__in=targets
+        ).select_related("employee_id")
+    )
+    for work_info in work_infos:
+        setattr(work_info, field, targets[work_info.employee_id_id])
+    if work_infos:
+        create_missing_contracts(work_infos)
+        bulk_update_with_history(
+            work_infos,
+            EmployeeWorkInformation,
+            [field],
+            manager=EmployeeWorkInformation._base_manager,
+        )
+    if message is not None:
+        changed = {work_info.employee_id_id for work_info in work_infos}
+        notify_employees(
+            bot,
+            [employee for employee in employee_targets if employee.pk in changed],
+            message,
+        )
+    return work_infos
+
+
+def apply_rotation(rotation, today=None, bot=None):
+    """
+    Rotate every due assignment of the rotation. Switches missed while the
+    scheduler was not running are caught up, so the assignment ends in the
+    same state as if it had rotated on each switch date.
+    """
+    today = today or date.today()
+    assigns = _active_assigns(
+        rotation, today, deactivate_stale=rotation.deactivate_stale
+    )
+    due = [
+        assign
+        for assign in assigns
+        if assign.next_change_date is not None
+        and assign.start_date <= today
+        and assign.next_change_date <= today
+    ]
+    if not due:
+        return []
+    sequences = _sequences(rotation, due)
+
+    employee_targets = {}
+    for assign in due:
+        state = _initial_state(rotation, assign)
+        sequence = sequences[getattr(assign, f"{rotation.rotating_field}_id")]
+        while state.change_date <= today:
+            state.step(assign, sequence)
+        setattr(assign, rotation.current_field, state.current)
+        setattr(assign, rotation.next_field, state.next)
+        assign.next_change_date = state.change_date
+        assign.additional_data = dict(assign.additional_data or {})
+        assign.additional_data[rotation.index_key] = state.index
+        employee_targets[assign.employee_id] = state.current
+
+    with transaction.atomic():
+        update_work_infos(employee_targets, rotation.work_info_field)
+        bulk_update_with_history(
+            due,
+            rotation.assign_model,
+            [
+                rotation.current_field,
+                rotation.next_field,
+                "next_change_date",
+                "additional_data",
+            ],
+            manager=rotation.assign_model._base_manager,
+        )
+    notify_employees(
+        bot or get_bot(), [assign.employee_id for assign in due], rotation.message
+    )
+    return due
+
+
+def project_rotation(rotation, weeks=4, start=None, employee_ids=None, days=None):
+    """
+    Rotation calendar of the active assignments for the next `weeks` weeks
+    (or `days` days), nothing is written.
+
+    Returns {employee: [(date, shift or work type), ...]} with one entry per
+    day from `start` (today by default).
+    """
+    start = start or date.today()
+    end = start + timedelta(days=days if days is not None else weeks * 7)
+    assigns = [
+        assign
+        for assign in _active_assigns(
+            rotation, start, employee_ids, deactivate_stale=False
+        )
+        if assign.next_change_date is not None
+    ]
+    sequences = _sequences(rotation, assigns)
+
+    calendar_by_employee = defaultdict(list)
+    for assign in sorted(assigns, key=lambda assign: assign.start_date):
+        state = _initial_state(rotation, assign)
+        sequence = sequences[getattr(assign, f"{rotation.rotating_field}_id")]
+        days = calendar_by_employee[assign.employee_id]
+        day = max(start, assign.start_date)
+        # days before a future assignment starts keep the previous target
+        days[:] = [entry for entry in days if entry[0] < day]
+        while day < end:
+            while state.change_date <= day:
+                state.step(assign, sequence)
+            days.append((day, state.current))
+            day += timedelta(days=1)
+    return dict(calendar_by_employee)
+
+
+def rotate_shifts(today=None, bot=None):
+    """
+    Rotate every due rotating shift assignment
+    """
+    return apply_rotation(get_shift_rotation(), today, bot)
+
+
+def rotate_work_types(today=None, bot=None):
+    """
+    Rotate every due rotating work type assignment
+    """
+    return apply_rotation(get_work_type_rotation(), today, bot)
@@ -1,252 +1,55 @@
-import calendar
 import sys
 from datetime import date, datetime, timedelta
 
 from apscheduler.schedulers.background import BackgroundScheduler
-from django.urls import reverse
+from django.utils.translation import gettext_noop
+from simple_history.utils import bulk_update_with_history
 
-from notifications.signals import notify
-
-
-def update_rotating_work_type_assign(rotating_work_type, new_date):
-    """
-    Here will update the employee work information details and send notification
-    """
-    from django.contrib.auth.models import User
-
-    employee = rotating_work_type.employee_id
-    employee_work_info = employee.employee_work_info
-    work_type1 = rotating_work_type.rotating_work_type_id.work_type1
-    work_type2 = rotating_work_type.rotating_work_type_id.work_type2
-    additional_work_types = (
-        rotating_work_type.rotating_work_type_id.additional_work_types()
-    )
-    if additional_work_types is None:
-        total_rotate_work_types = [work_type1, work_type2]
-    else:
-        total_rotate_work_types = [work_type1, work_type2] + list(additional_work_types)
-    next_work_type_index = rotating_work_type.additional_data.get(
-        "next_work_type_index", 0
-    )
-    next_work_type = total_rotate_work_types[next_work_type_index]
-    if next_work_type_index < len(total_rotate_work_types) - 1:
-        next_work_type_index += 1
-    else:
-        next_work_type_index = 0
-
-    rotating_work_type.additional_data["next_work_type_index"] = next_work_type_index
-    employee_work_info.work_type_id = rotating_work_type.next_work_type
-    employee_work_info.save()
-    rotating_work_type.next_change_date = new_date
-    rotating_work_type.current_work_type = rotating_work_type.next_work_type
-    rotating_work_type.next_work_type = next_work_type
-    rotating_work_type.save()
-    bot = User.objects.filter(username="Horilla Bot").first()
-    if bot is not None:
-        employee = rotating_work_type.employee_id
-        notify.send(
-            bot,
-            recipient=employee.employee_user_id,
-            verb="Your Work Type has been changed.",
-            verb_ar="لقد تغير نوع عملك.",
-            verb_de="Ihre Art der Arbeit hat sich geändert.",
-            verb_es="Su tipo de trabajo ha sido cambiado.",
-            verb_fr="Votre type de travail a été modifié.",
-            icon="infinite",
-            redirect=reverse("employee-profile"),
-        )
-    return
-
-
-def work_type_rotate_after(rotating_work_work_type):
-    """
-    This method for rotate work type based on after day
-    """
-    date_today = datetime.now()
-    switch_date = rotating_work_work_type.next_change_date
-    if switch_date.strftime("%Y-%m-%d") == date_today.strftime("%Y-%m-%d"):
-        new_date = date_today + timedelta(days=rotating_work_work_type.rotate_after_day)
-        update_rotating_work_type_assign(rotating_work_work_type, new_date)
-    return
-
-
-def work_type_rotate_weekend(rotating_work_type):
-    """
-    This method for rotate work type based on weekend
-    """
-    date_today = datetime.now()
-    switch_date = rotating_work_type.next_change_date
-    if switch_date.strftime("%Y-%m-%d") == date_today.strftime("%Y-%m-%d"):
-        day = datetime.now().strftime("%A").lower()
-        switch_day = rotating_work_type.rotate_every_weekend
-        if day == switch_day:
-            new_date = date_today + timedelta(days=7)
-            update_rotating_work_type_assign(rotating_work_type, new_date)
-    return
-
-
-def work_type_rotate_every(rotating_work_type):
-    """
-    This method for rotate work type based on every month
-    """
-    date_today = datetime.now()
-    switch_date = rotating_work_type.next_change_date
-    day_date = rotating_work_type.rotate_every
-    if switch_date.strftime("%Y-%m-%d") == date_today.strftime("%Y-%m-%d"):
-        if day_date == switch_date.strftime("%d").lstrip("0"):
-            new_date = date_today.replace(month=date_today.month + 1)
-            update_rotating_work_type_assign(rotating_work_type, new_date)
-        elif day_date == "last":
-            year = date_today.strftime("%Y")
-            month = date_today.strftime("%m")
-            last_day = calendar.monthrange(int(year), int(month) + 1)[1]
-            new_date = datetime(int(year), int(month) + 1, last_day)
-            update_rotating_work_type_assign(rotating_work_type, new_date)
-    return
+from base.rotation import get_bot, rotate_shifts, rotate_work_types, update_work_infos
+from base.search import build_missing_search_indexes
+from base.shift_calendar import build_shift_calendar
 
 
 def rotate_work_type():
     """
-    This method will identify the based on condition to the rotating shift assign
-    and redirect to the chunk method to execute.
+    This method rotates the work type of every due rotating work type assign
+    in bulk, see `base.rotation`.
     """
-    from base.models import RotatingWorkTypeAssign
-
-    rotating_work_types = RotatingWorkTypeAssign.objects.filter(is_active=True)
-    for rotating_work_type in rotating_work_types:
-        based_on = rotating_work_type.based_on
-        if based_on == "after":
-            work_type_rotate_after(rotating_work_type)
-        elif based_on == "weekly":
-            work_type_rotate_weekend(rotating_work_type)
-        elif based_on == "monthly":
-            work_type_rotate_every(rotating_work_type)
+    rotate_work_types(today=date.today())
     return
 
 
-def update_rotating_shift_assign(rotating_shift, new_date):
-    """
-    Here will update the employee work information and send notification
-    """
-    from django.contrib.auth.models import User
-
-    next_shift_index = 0
-    employee = rotating_shift.employee_id
-    employee_work_info = employee.employee_work_info
-    rotating_shift_id = rotating_shift.rotating_shift_id
-    shift1 = rotating_shift_id.shift1
-    shift2 = rotating_shift_id.shift2
-    additional_shifts = rotating_shift_id.additional_shifts()
-    if additional_shifts is None:
-        total_rotate_shifts = [shift1, shift2]
-    else:
-        total_rotate_shifts = [shift1, shift2] + list(additional_shifts)
-    next_shift_index = rotating_shift.additional_data.get("next_shift_index")
-    next_shift = total_rotate_shifts[next_shift_index]
-    if next_shift_index < len(total_rotate_shifts) - 1:
-        next_shift_index += 1
-    else:
-        next_shift_index = 0  # Wrap around to the beginning of the list
-    rotating_shift.additional_data["next_shift_index"] = next_shift_index
-    employee_work_info.shift_id = rotating_shift.next_shift
-    employee_work_info.save()
-    rotating_shift.next_change_date = new_date
-    rotating_shift.current_shift = rotating_shift.next_shift
-    rotating_shift.next_shift = next_shift
-    rotating_shift.save()
-    bot = User.objects.filter(username="Horilla Bot").first()
-    if bot is not None:
-        employee = rotating_shift.employee_id
-        notify.send(
-            bot,
-            recipient=employee.employee_user_id,
-            verb="Your shift has been changed.",
-            verb_ar="تم تغيير التحول الخاص بك.",
-            verb_de="Ihre Schicht wurde geändert.",
-            verb_es="Tu turno ha sido cambiado.",
-            verb_fr="Votre quart de travail a été modifié.",
-            icon="infinite",
-            redirect=reverse("employee-profile"),
-        )
-    return
-
-
-def shift_rotate_after_day(rotating_shift, today):
-    """
-    This method for rotate shift based on after day
-    """
-    switch_date = rotating_shift.next_change_date
-    if switch_date == today:
-        new_date = today + timedelta(days=rotating_shift.rotate_after_day)
-        update_rotating_shift_assign(rotating_shift, new_date)
-    return
-
-
-def shift_rotate_weekend(rotating_shift, today):
-    """
-    This method for rotate shift based on weekend
-    """
-    switch_date = rotating_shift.next_change_date
-    if switch_date == today:
-        day = today.strftime("%A").lower()
-        switch_day = rotating_shift.rotate_every_weekend
-        if day == switch_day:
-            new_date = today + timedelta(days=7)
-            update_rotating_shift_assign(rotating_shift, new_date)
-    return
-
-
-def shift_rotate_every(rotating_shift, today):
+def rotate_shift():
     """
-    This method for rotate shift based on every month
+    This method rotates the shift of every due rotating shift assign in bulk,
+    see `base.rotation`.
     """
-    switch_date = rotating_shift.next_change_date
-    day_date = rotating_shift.rotate_every
-    if switch_date == today:
-        if day_date == switch_date.strftime("%d").lstrip("0"):
-            new_date = today.replace(month=today.month + 1)
-            update_rotating_shift_assign(rotating_shift, new_date)
-        elif day_date == "last":
-            year = today.year
-            month = today.month
-            last_day = calendar.monthrange(int(year), int(month) + 1)[1]
-            new_date = datetime(int(year), int(month) + 1, last_day)
-            update_rotating_shift_assign(rotating_shift, new_date)
+    rotate_shifts(today=date.today())
     return
 
 
-def rotate_shift():
+def apply_requests(requests, work_info_field, target_field, changes, message):
     """
-    This method will identify the based on condition to the rotating shift assign
-    and redirect to the chunk method to execute.
+    Set the `target_field` of each request on the `work_info_field` of its
+    employee's work information with one bulk update, apply `changes` to the
+    requests in bulk and notify the employees.
     """
-    from base.models import RotatingShiftAssign
-
-    rotating_shifts = RotatingShiftAssign.objects.filter(is_active=True)
-    today = datetime.now().date()
-    r_shifts = rotating_shifts.filter(start_date__lte=today)
-    rotating_shifts_modified = None
-    for r_shift in r_shifts:
-        emp_shift = rotating_shifts.filter(
-            employee_id=r_shift.employee_id, start_date__lte=today
-        ).exclude(id=r_shift.id)
-        rotating_shifts_modified = rotating_shifts.exclude(
-            id__in=emp_shift.values_list("id", flat=True)
-        )
-        emp_shift.update(is_active=False)
-
-    for rotating_shift in rotating_shifts_modified:
-        based_on = rotating_shift.based_on
-        # after day condition
-        if based_on == "after":
-            shift_rotate_after_day(rotating_shift, today)
-        # weekly condition
-        elif based_on == "weekly":
-            shift_rotate_weekend(rotating_shift, today)
-        # monthly condition
-        elif based_on == "monthly":
-            shift_rotate_every(rotating_shift, today)
-
+    requests = list(
+        requests.select_related("employee_id__employee_user_id", target_field)
+    )
+    if not requests:
+        return
+    model = type(requests[0])
+    # the last request of an employee wins, as when they were saved one by one
+    employee_targets = {}
+    for request in requests:
+        employee_targets[request.employee_id] = getattr(request, target_field)
+        for field, value in changes.items():
+            setattr(request, field, value)
+    update_work_infos(employee_targets, work_info_field, get_bot(), message)
+    bulk_update_with_history(
+        requests, model, list(changes), manager=model._base_manager
+    )
     return
 
 
@@ -254,8 +57,6 @@ def switch_shift():
     """
     This method change employees shift information regards to the shift request
     """
-    from django.contrib.auth.models import User
-
     from base.models import ShiftRequest
 
     today = date.today()
@@ -263,29 +64,16 @@ def switch_shift():
     shift_requests = ShiftRequest.objects.filter(
         canceled=False, approved=True, requested_date__exact=today, shift_changed=False
     )
-    if shift_requests:
-        for request in shift_requests:
-            work_info = request.employee_id.employee_work_info
-            # updating requested shift to the employee work information.
-            work_info.shift_id = request.shift_id
-            work_info.save()
-            request.approved = True
-            request.shift_changed = True
-            request.save()
-            bot = User.objects.filter(username="Horilla Bot").first()
-            if bot is not None:
-                employee = request.employee_id
-                notify.send(
-                    bot,
-                    recipient=employee.employee_user_id,
-                    verb="Shift Changes notification",
-                    verb_ar="التحول تغيير الإخطار",
-                    verb_de="Benachrichtigung über Schichtänderungen",
-                    verb_es="Notificación de cambios de turno",
-                    verb_fr="Notification des changements de quart de travail",
-                    icon="refresh",
-                    redirect=reverse("employee-profile"),
-                )
+    apply_requests(
+        shift_requests,
+        "shift_id",
+        "shift_id",
+        {"approved": True, "shift_changed": True},
+        {
+            "verb": gettext_noop("Shift Changes notification"),
+            "icon": "refresh",
+        },
+    )
     return
 
 
@@ -293,8 +81,6 @@ def undo_shift():
     """
     This method undo previous employees shift information regards to the shift request
     """
-    from django.contrib.auth.models import User
-
     from base.models import ShiftRequest
 
     today = date.today()
@@ -306,28 +92,17 @@ def undo_shift():
         is_active=True,
         shift_changed=True,
     )
-    if shift_requests:
-        for request in shift_requests:
-            work_info = request.employee_id.employee_work_info
-            work_info.shift_id = request.previous_shift_id
-            work_info.save()
-            # making the instance in-active
-            request.is_active = False
-            request.save()
-            bot = User.objects.filter(username="Horilla Bot").first()
-            if bot is not None:
-                employee = request.employee_id
-                notify.send(
-                    bot,
-                    recipient=employee.employee_user_id,
-                    verb="Shift changes notification, Requested date expired.",
-                    verb_ar="التحول يغير الإخطار ، التاريخ المطلوب انتهت صلاحيته.",
-                    verb_de="Benachrichtigung über Schichtänderungen, gewünschtes Datum abgelaufen.",
-                    verb_es="Notificación de cambios de turno, Fecha solicitada vencida.",
-                    verb_fr="Notification de changement d'équipe, la date demandée a expiré.",
-                    icon="refresh",
-                    redirect=reverse("employee-profile"),
-                )
+    # the requests are made in-active
+    apply_requests(
+        shift_requests,
+        "shift_id",
+        "previous_shift_id",
+        {"is_active": False},
+        {
+            "verb": gettext_noop("Shift changes notification, Requested date expired."),
+            "icon": "refresh",
+        },
+    )
     return
 
 
@@ -335,8 +110,6 @@ def switch_work_type():
     """
     This method change employees work type information regards to the work type request
     """
-    from django.contrib.auth.models import User
-
     from base.models import WorkTypeRequest
 
     today = date.today()
@@ -346,28 +119,16 @@ def switch_work_type():
         requested_date__exact=today,
         work_type_changed=False,
     )
-    for request in work_type_requests:
-        work_info = request.employee_id.employee_work_info
-        # updating requested work type to the employee work information.
-        work_info.work_type_id = request.work_type_id
-        work_info.save()
-        request.approved = True
-        request.work_type_changed = True
-        request.save()
-        bot = User.objects.filter(username="Horilla Bot").first()
-        if bot is not None:
-            employee = request.employee_id
-            notify.send(
-                bot,
-                recipient=employee.employee_user_id,
-                verb="Work Type Changes notification",
-                verb_ar="إخطار تغييرات نوع العمل",
-                verb_de="Benachrichtigung über Änderungen des Arbeitstyps",
-                verb_es="Notificación de cambios de tipo de trabajo",
-                verb_fr="Notification de changement de type de travail",
-                icon="swap-horizontal",
-                redirect=reverse("employee-profile"),
-            )
+    apply_requests(
+        work_type_requests,
+        "work_type_id",
+        "work_type_id",
+        {"approved": True, "work_type_changed": True},
+        {
+            "verb": gettext_noop("Work Type Changes notification"),
+            "icon": "swap-horizontal",
+        },
+    )
     return
 
 
@@ -375,8 +136,6 @@ def undo_work_type():
     """
     This method undo previous employees work type information regards to the work type request
     """
-    from django.contrib.auth.models import User
-
     from base.models import WorkTypeRequest
 
     today = date.today()
@@ -388,28 +147,46 @@ def undo_work_type():
         is_active=True,
         work_type_changed=True,
     )
-    for request in work_type_requests:
-        work_info = request.employee_id.employee_work_info
-        # updating employee work information's work type to previous work type
-        work_info.work_type_id = request.previous_work_type_id
-        work_info.save()
-        # making the instance is in-active
-        request.is_active = False
-        request.save()
-        bot = User.objects.filter(username="Horilla Bot").first()
-        if bot is not None:
-            employee = request.employee_id
-            notify.send(
-                bot,
-                recipient=employee.employee_user_id,
-                verb="Work type changes notification, Requested date expired.",
-                verb_ar="إعلام بتغيير نوع العمل ، انتهاء صلاحية التاريخ المطلوب.",
-                verb_de="Benachrichtigung über Änderungen des Arbeitstyps, angefordertes Datum abgelaufen.",
-                verb_es="Notificación de cambios de tipo de trabajo, fecha solicitada vencida.",
-                verb_fr="Notification de changement de type de travail, la date demandée a expiré.",
-                icon="swap-horizontal",
-                redirect=reverse("employee-profile"),
-            )
+    # the requests are made in-active
+    apply_requests(
+        work_type_requests,
+        "work_type_id",
+        "previous_work_type_id",
+        {"is_active": False},
+        {
+            "verb": gettext_noop(
+                "Work type changes notification, Requested date expired."
+            ),
+            "icon": "swap-horizontal",
+        },
+    )
+    return
+
+
+def roll_shift_calendar():
+    """
+    This method rolls the materialized shift calendar forward from today
+    """
+    build_shift_calendar(start=date.today())
+    return
+
+
+def build_search_indexes():
+    """
+    This method builds the search documents of the models not indexed yet
+    """
+    build_missing_search_indexes()
+    return
+
+
+def prune_notifications():
+    """
+    This method archives the read notifications past their TTL in batches,
+    see `notifications.retention`.
+    """
+    from notifications.retention import prune_notifications as prune
+
+    prune()
     return
 
 
@@ -497,5 +274,37 @@ if not any(
     except:
         pass
 
+    try:
+        scheduler.add_job(
+            roll_shift_calendar,
+            "interval",
+            hours=4,
+            id="job7",
+        )
+    except:
+        pass
+
+    try:
+        scheduler.add_job(
+            build_search_indexes,
+            "interval",
+            hours=4,
+            id="job8",
+            # first run once the apps have loaded, not while they load
+            next_run_time=datetime.now() + timedelta(minutes=1),
+        )
+    except:
+        pass
+
+    try:
+        scheduler.add_job(
+            prune_notifications,
+            "interval",
+            hours=24,
+            id="job9",
+        )
+    except:
+        pass
+
     scheduler.add_job(recurring_holiday, "interval", hours=4)
     scheduler.start()
@@ -0,0 +1,625 @@
+"""
+search.py
+
+Indexed full-text search across employees, tickets, FAQs and candidates.
+
+Every row of a searchable model has one SearchDocument holding its title
+and its searchable text, normalized to lowercase words. The documents are
+kept in sync by signals (the row itself, the rows its text is read from
+through relations, and many to many changes) once the transaction commits.
+
+A search matches every word of the query as a word prefix and ranks the
+documents with the database full-text engine:
+
+- PostgreSQL: a GIN index on `to_tsvector('simple', body)` queried with a
+  `word:* & ...` tsquery and ranked by `ts_rank`
+- SQLite: an FTS5 table over the documents kept up to date by triggers,
+  queried with `"word"* ...` and ranked by `bm25`
+- other databases (or SQLite without FTS5): a `contains` per word
+
+The filter classes fall back to their `icontains` lookups until the
+documents of their model are built (`rebuild_search_index` command or the
+scheduler), see `search_queryset`.
+"""
+
+import logging
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.urls import reverse
+
+from horilla.model_cache import cached_query
+from horilla.signals import post_bulk_update
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SEARCH_LIMIT = getattr(settings, "GLOBAL_SEARCH_LIMIT", 20)
+SEARCH_INDEX_BATCH_SIZE = 1000
+# words of a query that are searched, the rest is ignored
+SEARCH_MAX_WORDS = 8
+WORD_RE = re.compile(r"\w+")
+FTS_TABLE_SUFFIX = "_fts"
+PG_INDEX_SUFFIX = "_body_fts"
+# {database alias: whether the sqlite FTS5 table exists}
+_fts_tables = {}
+
+
+class Searchable:
+    """
+    Searchable model: the fields its text is read from, the attribute (or
+    method) used as title and the url of a row
+    """
+
+    def __init__(self, label, fields, title, url_name, url_field="pk", perm=None):
+        self.label = label
+        self.fields = fields
+        self.title = title
+        self.url_name = url_name
+        self.url_field = url_field
+        # permission needed to see the rows in the global search, None for
+        # every logged in user
+        self.perm = perm
+
+    @property
+    def model(self):
+        """
+        Model class of the label
+        """
+        return apps.get_model(self.label)
+
+    @property
+    def relations(self):
+        """
+        Relation paths the fields are read through
+        """
+        paths = []
+        for field in self.fields:
+            path = "__".join(field.split("__")[:-1])
+            if path and path not in paths:
+                paths.append(path)
+        return paths
+
+    def related_model(self, path):
+        """
+        (model at the end of the relation path, whether the path goes
+        through a many valued relation)
+        """
+        model, many = self.model, False
+        for part in path.split("__"):
+            field = model._meta.get_field(part)
+            many = many or field.many_to_many or field.one_to_many
+            model = field.related_model
+        return model, many
+
+    def get_title(self, instance):
+        """
+        Title of the search results of the row
+        """
+        title = getattr(instance, self.title, "")
+        if callable(title):
+            title = title()
+        return str(title or "")[:255]
+
+    def get_url(self, url_value):
+        """
+        Url of a row from its `url_field` value
+        """
+        if url_value is None:
+            return None
+        return reverse(self.url_name, args=[url_value])
+
+
+SEARCHABLES = [
+    Searchable(
+        "employee.Employee",
+        ["employee_first_name", "employee_last_name", "email", "badge_id", "phone"],
+        "get_full_name",
+        "employee-view-individual",
+        perm="employee.view_employee",
+    ),
+    Searchable(
+        "helpdesk.Ticket",
+        [
+            "title",
+            "description",
+            "employee_id__employee_first_name",
+            "employee_id__employee_last_name",
+        ],
+        "title",
+        "ticket-detail",
+        perm="helpdesk.view_ticket",
+    ),
+    Searchable(
+        "helpdesk.FAQ",
+        ["question", "answer", "tags__title"],
+        "question",
+        "faq-view",
+        url_field="category_id",
+    ),
+    Searchable(
+        "recruitment.Candidate",
+        [
+            "name",
+            "email",
+            "mobile",
+            "stage_id__stage",
+            "recruitment_id__title",
+        ],
+        "name",
+        "candidate-view-individual",
+        perm="recruitment.view_candidate",
+    ),
+]
+
+
+def get_searchables():
+    """
+    {model: Searchable} of the searchable models of the installed apps
+    """
+    return {
+        searchable.model: searchable
+        for searchable in SEARCHABLES
+        if apps.is_installed(searchable.label.split(".")[0])
+    }
+
+
+def normalize(text):
+    """
+    Lowercase words of a text separated by single spaces
+    """
+    return " ".join(WORD_RE.findall(str(text).lower()))
+
+
+def search_words(search):
+    """
+    Words of a search query
+    """
+    return WORD_RE.findall(str(search or "").lower())[:SEARCH_MAX_WORDS]
+
+
+def _field_values(instance, path):
+    values = [instance]
+    for part in path.split("__"):
+        next_values = []
+        for value in values:
+            value = getattr(value, part, None)
+            if value is None:
+                continue
+            if hasattr(value, "all"):
+                next_values.extend(value.all())
+            else:
+                next_values.append(value)
+        values = next_values
+    return values
+
+
+def document_body(searchable, instance):
+    """
+    Normalized searchable text of a row
+    """
+    values = []
+    for field in searchable.fields:
+        values.extend(_field_values(instance, field))
+    return normalize(" ".join(str(value) for value in values if value != ""))
+
+
+def _document_rows(searchable, queryset):
+    select, prefetch = [], []
+    for path in searchable.relations:
+        _, many = searchable.related_model(path)
+        (prefetch if many else select).append(path)
+    queryset = queryset.select_related(*select).prefetch_related(*prefetch)
+    return queryset.order_by("pk").iterator(chunk_size=SEARCH_INDEX_BATCH_SIZE)
+
+
+def index_rows(model, pks=None):
+    """
+    Build (or refresh) the search documents of the rows `pks` of the model,
+    of every row by default. Documents of rows that no longer exist are
+    removed. Returns the number of documents written.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    from base.models import SearchDocument
+
+    searchable = get_searchables().get(model)
+    if searchable is None:
+        return 0
+    content_type = ContentType.objects.get_for_model(model)
+    rows = model._base_manager.all()
+    stale = SearchDocument._base_manager.filter(content_type=content_type)
+    if pks is not None:
+        pks = list(pks)
+        if not pks:
+            return 0
+        rows = rows.filter(pk__in=pks)
+        stale = stale.filter(object_id__in=pks)
+
+    written, seen, batch = 0, set(), []
+    for instance in _document_rows(searchable, rows):
+        seen.add(instance.pk)
+        batch.append(
+            SearchDocument(
+                content_type=content_type,
+                object_id=instance.pk,
+                title=searchable.get_title(instance),
+                body=document_body(searchable, instance),
+            )
+        )
+        if len(batch) >= SEARCH_INDEX_BATCH_SIZE:
+            written += _upsert_documents(batch)
+            batch = []
+    written += _upsert_documents(batch)
+
+    if pks is not None:
+        stale = stale.exclude(object_id__in=seen)
+    else:
+        stale = stale.exclude(object_id__in=model._base_manager.values("pk"))
+    stale.delete()
+    return written
+
+
+def _upsert_documents(documents):
+    from base.models import SearchDocument
+
+    if not documents:
+        return 0
+    # upsert on (content type, object id), the update keeps the document id
+    # so the FTS5 triggers only replace its text
+    SearchDocument._base_manager.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=(
+            ["content_type", "object_id"]
+            if connections["default"].features.supports_update_conflicts_with_target
+            else None
+        ),
+        update_fields=["title", "body", "updated_at"],
+    )
+    return len(documents)
+
+
+def rebuild_search_index(models=None):
+    """
+    Build the documents of the searchable models (all of them by default)
+    and mark them as indexed, returns {model: number of documents}
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    from base.models import SearchIndexState
+
+    written = {}
+    for model in models or list(get_searchables()):
+        written[model] = index_rows(model)
+        SearchIndexState._base_manager.update_or_create(
+            content_type=ContentType.objects.get_for_model(model)
+        )
+    return written
+
+
+def build_missing_search_indexes():
+    """
+    Build the documents of the searchable models that were never indexed
+    """
+    missing = [model for model in get_searchables() if not is_indexed(model)]
+    if missing:
+        rebuild_search_index(missing)
+    return missing
+
+
+def _indexed_content_types():
+    from base.models import SearchIndexState
+
+    def load():
+        return set(
+            SearchIndexState._base_manager.values_list("content_type_id", flat=True)
+        )
+
+    try:
+        return cached_query("base:search_index_states", [SearchIndexState], load)
+    except DatabaseError:
+        # the search tables are not migrated yet
+        return set()
+
+
+def is_indexed(model):
+    """
+    Whether every row of the model has its search document
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    if model not in get_searchables():
+        return False
+    content_type = ContentType.objects.get_for_model(model)
+    return content_type.pk in _indexed_content_types()
+
+
+def prepare_search_backend(using="default"):
+    """
+    Create the full-text index of the search documents for the database
+    backend, safe to run more than once
+    """
+    from base.models import SearchDocument
+
+    connection = connections[using]
+    table = SearchDocument._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{table}{PG_INDEX_SUFFIX}" '
+                f'ON "{table}" USING GIN (to_tsvector(\'simple\', "body"))'
+            )
+        elif connection.vendor == "sqlite":
+            _fts_tables[using] = _create_fts_table(cursor, table)
+
+
+def _create_fts_table(cursor, table):
+    fts = f"{table}{FTS_TABLE_SUFFIX}"
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [fts])
+    if cursor.fetchone():
+        return True
+    try:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE "{fts}" USING fts5(body, '
+            f"content='{table}', content_rowid='id')"
+        )
+    except DatabaseError:
+        logger.warning("SQLite FTS5 is not available, search falls back to LIKE")
+        return False
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_insert" AFTER INSERT ON "{table}" '
+        f'BEGIN INSERT INTO "{fts}"(rowid, body) VALUES (new.id, new.body); END'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_delete" AFTER DELETE ON "{table}" '
+        f'BEGIN INSERT INTO "{fts}"("{fts}", rowid, body) '
+        f"VALUES ('delete', old.id, old.body); END"
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_update" AFTER UPDATE ON "{table}" '
+        f'BEGIN INSERT INTO "{fts}"("{fts}", rowid, body) '
+        f"VALUES ('delete', old.id, old.body); "
+        f'INSERT INTO "{fts}"(rowid, body) VALUES (new.id, new.body); END'
+    )
+    # index the documents written before the table existed
+    cursor.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')')
+    return True
+
+
+def _has_fts_table(connection):
+    from base.models import SearchDocument
+
+    if connection.alias not in _fts_tables:
+        fts = f"{SearchDocument._meta.db_table}{FTS_TABLE_SUFFIX}"
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [fts])
+            _fts_tables[connection.alias] = cursor.fetchone() is not None
+    return _fts_tables[connection.alias]
+
+
+def match_documents(search, models=None):
+    """
+    SearchDocument queryset of the documents matching every word of `search`
+    as a word prefix, best match first, limited to the documents of `models`
+    when given
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    from base.models import SearchDocument
+
+    documents = SearchDocument._base_manager.all()
+    words = search_words(search)
+    if not words:
+        return documents.none()
+    if models is not None:
+        documents = documents.filter(
+            content_type__in=ContentType.objects.get_for_models(*models).values()
+        )
+    connection = connections[documents.db]
+    table = SearchDocument._meta.db_table
+    # unqualified, the documents are aliased when used as a subquery
+    body = '"body"'
+
+    if connection.vendor == "postgresql":
+        query = " & ".join(f"{word}:*" for word in words)
+        vector = f"to_tsvector('simple', {body})"
+        return (
+            documents.alias(
+                matched=RawSQL(
+                    f"{vector} @@ to_tsquery('simple', %s)",
+                    [query],
+                    output_field=BooleanField(),
+                )
+            )
+            .filter(matched=True)
+            .annotate(
+                rank=RawSQL(
+                    f"ts_rank({vector}, to_tsquery('simple', %s))",
+                    [query],
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-rank", "title")
+        )
+
+    if connection.vendor == "sqlite" and _has_fts_table(connection):
+        fts = f'"{table}{FTS_TABLE_SUFFIX}"'
+        query = " ".join(f'"{word}"*' for word in words)
+        return (
+            documents.filter(
+                pk__in=RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [query])
+            )
+            .annotate(
+                # bm25 is lower for better matches
+                rank=RawSQL(
+                    f"(SELECT bm25({fts}) FROM {fts} "
+                    f'WHERE {fts} MATCH %s AND rowid = "id")',
+                    [query],
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("rank", "title")
+        )
+
+    for word in words:
+        documents = documents.filter(body__contains=word)
+    return documents.order_by("title")
+
+
+def search_queryset(queryset, search):
+    """
+    `queryset` narrowed to the rows whose search document matches `search`,
+    None when the documents of its model are not built yet so the caller
+    keeps its own lookups
+    """
+    if not is_indexed(queryset.model):
+        return None
+    if not search_words(search):
+        return queryset
+    return queryset.filter(
+        pk__in=match_documents(search, [queryset.model]).values("object_id")
+    )
+
+
+def global_search(user, search, limit=GLOBAL_SEARCH_LIMIT):
+    """
+    Best matches of `search` among the searchable rows the user can see,
+    [{"model", "id", "title", "url"}]
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    searchables = {
+        model: searchable
+        for model, searchable in get_searchables().items()
+        if is_indexed(model)
+        and (searchable.perm is None or user.has_perm(searchable.perm))
+    }
+    if not searchables:
+        return []
+    content_types = ContentType.objects.get_for_models(*searchables)
+    # rows hidden by the company manager of the model are left out
+    visible = Q(pk__in=[])
+    for model, content_type in content_types.items():
+        visible |= Q(
+            content_type=content_type, object_id__in=model.objects.values("pk")
+        )
+    documents = list(
+        match_documents(search, list(searchables))
+        .filter(visible)
+        .values_list("content_type_id", "object_id", "title")[:limit]
+    )
+
+    models = {content_type.pk: model for model, content_type in content_types.items()}
+    url_values = {}
+    for content_type_id in {document[0] for document in documents}:
+        model = models[content_type_id]
+        url_field = searchables[model].url_field
+        url_values[content_type_id] = dict(
+            model._base_manager.filter(
+                pk__in=[
+                    document[1]
+                    for document in documents
+                    if document[0] == content_type_id
+                ]
+            ).values_list("pk", url_field)
+        )
+
+    results = []
+    for content_type_id, object_id, title in documents:
+        model = models[content_type_id]
+        results.append(
+            {
+                "model": str(model._meta.verbose_name),
+                "id": object_id,
+                "title": title,
+                "url": searchables[model].get_url(
+                    url_values[content_type_id].get(object_id)
+                ),
+            }
+        )
+    return results
+
+
+def refresh_search_documents(model, pks):
+    """
+    Refresh the documents of the rows once the current transaction commits
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if pks:
+        transaction.on_commit(lambda: index_rows(model, pks))
+
+
+def _connect_model(model, searchable):
+    uid = f"search_index:{model._meta.label_lower}"
+
+    def on_save(sender, instance, **kwargs):
+        refresh_search_documents(model, [instance.pk])
+
+    def on_bulk_update(sender, queryset, *args, **kwargs):
+        refresh_search_documents(model, queryset.values_list("pk", flat=True))
+
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    post_bulk_update.connect(on_bulk_update, sender=model, weak=False, dispatch_uid=uid)
+
+    for path in searchable.relations:
+        related_model, _ = searchable.related_model(path)
+
+        def on_related_save(sender, instance, path=path, **kwargs):
+            refresh_search_documents(
+                model,
+                model._base_manager.filter(**{path: instance.pk}).values_list(
+                    "pk", flat=True
+                ),
+            )
+
+        def on_related_bulk_update(sender, queryset, *args, path=path, **kwargs):
+            refresh_search_documents(
+                model,
+                model._base_manager.filter(
+                    **{f"{path}__in": queryset.values("pk")}
+                ).values_list("pk", flat=True),
+            )
+
+        related_uid = f"{uid}:{path}"
+        post_save.connect(
+            on_related_save, sender=related_model, weak=False, dispatch_uid=related_uid
+        )
+        post_bulk_update.connect(
+            on_related_bulk_update,
+            sender=related_model,
+            weak=False,
+            dispatch_uid=related_uid,
+        )
+
+        field = model._meta.get_field(path.split("__")[0])
+        if field.many_to_many and not field.auto_created:
+
+            def on_m2m_changed(sender, instance, action, pk_set=None, **kwargs):
+                if action not in ["post_add", "post_remove", "post_clear"]:
+                    return
+                if isinstance(instance, model):
+                    refresh_search_documents(model, [instance.pk])
+                elif pk_set:
+                    refresh_search_documents(model, pk_set)
+
+            m2m_changed.connect(
+                on_m2m_changed,
+                sender=field.remote_field.through,
+                weak=False,
+                dispatch_uid=f"{uid}:{path}:m2m",
+            )
+
+
+def connect_search_index():
+    """
+    Keep the search documents of the searchable models in sync with their
+    rows
+    """
+    for model, searchable in get_searchables().items():
+        _connect_model(model, searchable)
@@ -0,0 +1,238 @@
+"""
+shift_calendar.py
+
+Materialized per-employee, per-day shift calendar.
+
+The shift of an employee on a date comes from the work information shift,
+overridden by the active rotating shift assign and then by approved shift
+requests. Each day is stored in EmployeeShiftCalendar together with its
+schedule and the shift start/end datetimes (the end falls on the next day
+for night shifts), so "what is X's schedule on date D" is a single indexed
+lookup. The calendar is rolled forward by the scheduler and rebuilt from
+today for the affected employees by signals whenever one of the sources
+changes.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from base.rotation import get_shift_rotation, project_rotation
+from horilla.model_cache import cached_query
+
+SHIFT_CALENDAR_DAYS = getattr(settings, "SHIFT_CALENDAR_DAYS", 35)
+
+
+def _shift_schedules():
+    """
+    {(shift id, day name): schedule} of every shift schedule
+    """
+    from base.models import EmployeeShiftSchedule
+
+    def load():
+        return {
+            (schedule.shift_id_id, schedule.day.day): schedule
+            for schedule in EmployeeShiftSchedule._base_manager.select_related("day")
+        }
+
+    return cached_query("base:shift_schedules", [EmployeeShiftSchedule], load)
+
+
+def _shift_requests(employee_ids, start, end):
+    """
+    {employee id: [(from, till, shift id), ...]} of the approved shift
+    requests overlapping the period, the latest request last
+    """
+    from base.models import ShiftRequest
+
+    requests = ShiftRequest._base_manager.filter(
+        approved=True,
+        canceled=False,
+        is_active=True,
+        requested_date__lte=end,
+    ).filter(
+        Q(requested_till__gte=start)
+        # a permanent request counts until it is applied to the work info
+        | Q(is_permanent_shift=True, requested_till__isnull=True, shift_changed=False)
+    )
+    if employee_ids is not None:
+        requests = requests.filter(employee_id__in=employee_ids)
+    periods = defaultdict(list)
+    for employee_id, requested_date, requested_till, shift_id in requests.order_by(
+        "id"
+    ).values_list("employee_id", "requested_date", "requested_till", "shift_id"):
+        periods[employee_id].append((requested_date, requested_till, shift_id))
+    return periods
+
+
+def _calendar_day(employee_id, day, shift_id, source, schedules):
+    from base.models import EmployeeShiftCalendar
+
+    calendar_day = EmployeeShiftCalendar(
+        employee_id_id=employee_id, date=day, shift_id_id=shift_id, source=source
+    )
+    schedule = schedules.get((shift_id, day.strftime("%A").lower()))
+    if schedule is None:
+        return calendar_day
+    calendar_day.schedule_id = schedule
+    calendar_day.minimum_working_hour = schedule.minimum_working_hour
+    start_time, end_time = schedule.start_time, schedule.end_time
+    calendar_day.is_night_shift = bool(
+        start_time and end_time and start_time > end_time
+    )
+    if start_time:
+        calendar_day.start_datetime = timezone.make_aware(
+            datetime.combine(day, start_time)
+        )
+    if end_time:
+        end_day = day + timedelta(days=1) if calendar_day.is_night_shift else day
+        calendar_day.end_datetime = timezone.make_aware(
+            datetime.combine(end_day, end_time)
+        )
+    return calendar_day
+
+
+def compute_shift_calendar(employee_ids=None, start=None, days=None):
+    """
+    Unsaved EmployeeShiftCalendar rows of the active employees (or of
+    `employee_ids`) for `days` days from `start`, employees without work
+    information have no rows
+    """
+    from employee.models import EmployeeWorkInformation
+
+    start = start or date.today()
+    days = days or SHIFT_CALENDAR_DAYS
+    end = start + timedelta(days=days - 1)
+    work_infos = EmployeeWorkInformation._base_manager.filter(employee_id__isnull=False)
+    if employee_ids is None:
+        work_infos = work_infos.filter(employee_id__is_active=True)
+    else:
+        work_infos = work_infos.filter(employee_id__in=employee_ids)
+    base_shifts = dict(work_infos.values_list("employee_id", "shift_id"))
+    if not base_shifts:
+        return []
+
+    rotations = {
+        employee.pk: dict(rotation_days)
+        for employee, rotation_days in project_rotation(
+            get_shift_rotation(),
+            start=start,
+            days=days,
+            employee_ids=None if employee_ids is None else list(base_shifts),
+        ).items()
+    }
+    requests = _shift_requests(
+        None if employee_ids is None else list(base_shifts), start, end
+    )
+    schedules = _shift_schedules()
+
+    calendar_days = []
+    for employee_id, base_shift_id in base_shifts.items():
+        rotation = rotations.get(employee_id, {})
+        employee_requests = requests.get(employee_id, [])
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            shift_id, source = base_shift_id, "work_info"
+            if day in rotation:
+                shift = rotation[day]
+                shift_id, source = getattr(shift, "pk", None), "rotating"
+            for requested_date, requested_till, requested_shift_id in employee_requests:
+                if requested_date <= day and (
+                    requested_till is None or day <= requested_till
+                ):
+                    shift_id, source = requested_shift_id, "request"
+            calendar_days.append(
+                _calendar_day(employee_id, day, shift_id, source, schedules)
+            )
+    return calendar_days
+
+
+def build_shift_calendar(employee_ids=None, start=None, days=None):
+    """
+    Rebuild the stored calendar of the employees (every employee by default)
+    for `days` days from `start`, returns the number of rows written
+    """
+    from base.models import EmployeeShiftCalendar
+
+    if employee_ids is not None:
+        employee_ids = list(employee_ids)
+        if not employee_ids:
+            return 0
+    calendar_days = compute_shift_calendar(employee_ids, start, days)
+    # upsert on (employee, date), a delete would load every row to send the
+    # delete signals
+    EmployeeShiftCalendar._base_manager.bulk_create(
+        calendar_days,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=(
+            ["employee_id", "date"]
+            if connection.features.supports_update_conflicts_with_target
+            else None
+        ),
+        update_fields=[
+            "shift_id",
+            "schedule_id",
+            "source",
+            "start_datetime",
+            "end_datetime",
+            "minimum_working_hour",
+            "is_night_shift",
+        ],
+    )
+    return len(calendar_days)
+
+
+def refresh_shift_calendar(employee_ids=None):
+    """
+    Rebuild the calendar from today once the current transaction commits
+    """
+    if employee_ids is not None:
+        employee_ids = {employee_id for employee_id in employee_ids if employee_id}
+        if not employee_ids:
+            return
+    transaction.on_commit(lambda: build_shift_calendar(employee_ids))
+
+
+def _stored_days(day, employee_ids):
+    from base.models import EmployeeShiftCalendar
+
+    calendar_days = EmployeeShiftCalendar._base_manager.filter(date=day).select_related(
+        "shift_id", "schedule_id__day"
+    )
+    if employee_ids is not None:
+        calendar_days = calendar_days.filter(employee_id__in=employee_ids)
+    return {calendar_day.employee_id_id: calendar_day for calendar_day in calendar_days}
+
+
+def get_shift_calendar_days(day=None, employee_ids=None):
+    """
+    {employee id: EmployeeShiftCalendar} of the date (today by default) for
+    the employees (every employee by default), missing rows are built on the
+    fly
+    """
+    day = day or date.today()
+    if employee_ids is not None:
+        employee_ids = set(employee_ids)
+    by_employee = _stored_days(day, employee_ids)
+    if employee_ids is None:
+        missing = None if not by_employee else set()
+    else:
+        missing = employee_ids - set(by_employee)
+    if missing is None or missing:
+        build_shift_calendar(missing, start=day, days=1)
+        by_employee.update(_stored_days(day, missing))
+    return by_employee
+
+
+def get_employee_shift_day(employee, day=None):
+    """
+    EmployeeShiftCalendar of the employee on the date (today by default),
+    None for employees without work information
+    """
+    employee_id = getattr(employee, "pk", employee)
+    return get_shift_calendar_days(day, [employee_id]).get(employee_id)
@@ -1,20 +1,44 @@
 import logging
 import os
 import time
-from datetime import datetime
+from datetime import date, datetime
 
 from django.apps import apps
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.signals import user_login_failed
 from django.db.models import Max, Q
-from django.db.models.signals import m2m_changed, post_migrate, post_save
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_save,
+)
 from django.dispatch import receiver
 from django.http import Http404
 from django.shortcuts import redirect, render
 
-from base.models import Announcement, PenaltyAccounts
+from base.models import (
+    Announcement,
+    CompanyLeaves,
+    DashboardEmployeeCharts,
+    DynamicPagination,
+    EmployeeShiftCalendar,
+    EmployeeShiftSchedule,
+    Holidays,
+    PenaltyAccounts,
+    RotatingShiftAssign,
+    ShiftRequest,
+)
+from base.search import prepare_search_backend
+from base.shift_calendar import refresh_shift_calendar
+from base.user_preferences import invalidate_user_preferences
+from base.working_calendar import invalidate_working_calendar
+from employee.models import EmployeeWorkInformation
 from horilla.methods import get_horilla_model_class
+from horilla.signals import post_bulk_update
+from horilla_views.models import SavedFilter, ToggleColumn
 
 
 @receiver(post_save, sender=PenaltyAccounts)
@@ -91,6 +115,161 @@ def clean_work_records(sender, **kwargs):
         )
 
 
+@receiver(post_save, sender=Holidays)
+@receiver(post_delete, sender=Holidays)
+@receiver(post_bulk_update, sender=Holidays)
+@receiver(post_save, sender=CompanyLeaves)
+@receiver(post_delete, sender=CompanyLeaves)
+@receiver(post_bulk_update, sender=CompanyLeaves)
+def refresh_working_calendar(sender, **kwargs):
+    """
+    Drop the cached holiday/company leave calendars when they change
+    """
+    invalidate_working_calendar()
+
+
+def _preference_owner_field(sender):
+    if sender is DashboardEmployeeCharts:
+        return "employee__employee_user_id"
+    if sender is SavedFilter:
+        return "created_by_id"
+    return "user_id_id"
+
+
+@receiver(post_save, sender=DynamicPagination)
+@receiver(post_delete, sender=DynamicPagination)
+@receiver(post_save, sender=DashboardEmployeeCharts)
+@receiver(post_delete, sender=DashboardEmployeeCharts)
+@receiver(post_save, sender=SavedFilter)
+@receiver(post_delete, sender=SavedFilter)
+@receiver(post_save, sender=ToggleColumn)
+@receiver(post_delete, sender=ToggleColumn)
+def refresh_user_preferences(sender, instance, **kwargs):
+    """
+    Drop the cached preferences of the user owning the changed row
+    """
+    if sender is DashboardEmployeeCharts:
+        employee = instance.employee
+        invalidate_user_preferences(getattr(employee, "employee_user_id_id", None))
+        return
+    invalidate_user_preferences(getattr(instance, _preference_owner_field(sender)))
+
+
+@receiver(post_bulk_update, sender=DynamicPagination)
+@receiver(post_bulk_update, sender=DashboardEmployeeCharts)
+@receiver(post_bulk_update, sender=SavedFilter)
+@receiver(post_bulk_update, sender=ToggleColumn)
+def refresh_bulk_user_preferences(sender, queryset, *args, **kwargs):
+    """
+    Drop the cached preferences of the users owning the updated rows
+    """
+    invalidate_user_preferences(
+        *queryset.order_by()
+        .values_list(_preference_owner_field(sender), flat=True)
+        .distinct()
+    )
+
+
+@receiver(pre_save, sender=EmployeeWorkInformation)
+def remember_work_info_shift(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the shift of the work information before the save, to rebuild the
+    shift calendar only when it changes
+    """
+    if update_fields is not None and "shift_id" not in update_fields:
+        return
+    instance._shift_id_before_save = (
+        sender._base_manager.filter(pk=instance.pk)
+        .values_list("shift_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=EmployeeWorkInformation)
+def refresh_work_info_shift_calendar(sender, instance, created, **kwargs):
+    """
+    Rebuild the shift calendar of the employee when the shift of the work
+    information changed
+    """
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "shift_id" not in update_fields:
+        return
+    if (
+        not created
+        and hasattr(instance, "_shift_id_before_save")
+        and instance._shift_id_before_save == instance.shift_id_id
+    ):
+        return
+    refresh_shift_calendar([instance.employee_id_id])
+
+
+@receiver(post_save, sender=RotatingShiftAssign)
+@receiver(post_delete, sender=RotatingShiftAssign)
+@receiver(post_save, sender=ShiftRequest)
+@receiver(post_delete, sender=ShiftRequest)
+def refresh_employee_shift_calendar(sender, instance, **kwargs):
+    """
+    Rebuild the shift calendar of the employee whose shift source changed
+    """
+    refresh_shift_calendar([instance.employee_id_id])
+
+
+@receiver(post_bulk_update, sender=EmployeeWorkInformation)
+@receiver(post_bulk_update, sender=RotatingShiftAssign)
+@receiver(post_bulk_update, sender=ShiftRequest)
+def refresh_bulk_employee_shift_calendar(sender, queryset, *args, **kwargs):
+    """
+    Rebuild the shift calendar of the employees of the updated rows
+    """
+    if sender is EmployeeWorkInformation and "shift_id" not in (
+        kwargs.get("kwargs") or {}
+    ):
+        return
+    refresh_shift_calendar(
+        queryset.order_by().values_list("employee_id", flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=EmployeeShiftSchedule)
+@receiver(post_delete, sender=EmployeeShiftSchedule)
+@receiver(post_bulk_update, sender=EmployeeShiftSchedule)
+def refresh_shift_schedule_calendar(sender, **kwargs):
+    """
+    Rebuild the shift calendar of the employees working the changed shifts
+    """
+    instance = kwargs.get("instance")
+    if instance is not None:
+        shift_ids = [instance.shift_id_id]
+    else:
+        shift_ids = list(
+            kwargs["queryset"].order_by().values_list("shift_id", flat=True)
+        )
+    refresh_shift_calendar(
+        set(
+            EmployeeWorkInformation._base_manager.filter(
+                shift_id__in=shift_ids
+            ).values_list("employee_id", flat=True)
+        )
+        | set(
+            EmployeeShiftCalendar._base_manager.filter(
+                shift_id__in=shift_ids, date__gte=date.today()
+            ).values_list("employee_id", flat=True)
+        )
+    )
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using="default", **kwargs):
+    """
+    Create the full-text index of the search documents once base is migrated
+    """
+    if sender.label != "base":
+        return
+    prepare_search_backend(using)
+
+
 @receiver(m2m_changed, sender=Announcement.employees.through)
 def filtered_employees(sender, instance, action, **kwargs):
     """
@@ -1,3 +1,426 @@
-from django.test import TestCase
+import io
+import zipfile
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from base import pdf_renderer
+from base.models import (
+    Company,
+    CompanyLeaves,
+    Department,
+    DynamicPagination,
+    EmployeeShift,
+    EmployeeShiftCalendar,
+    EmployeeShiftDay,
+    EmployeeShiftSchedule,
+    Holidays,
+    RotatingShift,
+    RotatingShiftAssign,
+)
+from base.rotation import (
+    get_shift_rotation,
+    next_change_date,
+    project_rotation,
+    rotate_shifts,
+)
+from base.search import (
+    global_search,
+    index_rows,
+    match_documents,
+    normalize,
+    rebuild_search_index,
+    search_queryset,
+    search_words,
+)
+from base.shift_calendar import get_employee_shift_day
+from base.user_preferences import DEFAULT_PAGINATION, get_user_preferences
+from base.working_calendar import (
+    company_leave_dates_in_year,
+    holiday_dates_between,
+    working_dates_between,
+)
+from employee.models import Employee, EmployeeWorkInformation
+from horilla.horilla_middlewares import _thread_locals
+from horilla.model_cache import (
+    TRACKED_MODELS,
+    cache_for_models,
+    cached_query,
+    model_versions,
+)
+from horilla_views.models import SavedFilter
+
+
+def create_company(name):
+    return Company.objects.create(
+        company=name, address="-", country="-", state="-", city="-", zip="-"
+    )
+
+
+class CompanyLeaveDatesTests(SimpleTestCase):
+    def test_week_based_leave(self):
+        # second Saturday of each month, weeks start on Sunday
+        dates = company_leave_dates_in_year(
+            SimpleNamespace(based_on_week="1", based_on_week_day="5"), 2026
+        )
+        self.assertEqual(len(dates), 12)
+        self.assertIn(date(2026, 10, 10), dates)
+
+    def test_every_week_leave(self):
+        dates = company_leave_dates_in_year(
+            SimpleNamespace(based_on_week=None, based_on_week_day="6"), 2026
+        )
+        self.assertEqual(len(dates), 52)
+        self.assertTrue(all(day.weekday() == 6 for day in dates))
+
+
+class WorkingCalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = create_company("Horilla")
+        self.other_company = create_company("Other")
+        CompanyLeaves(
+            based_on_week=None, based_on_week_day="6", company_id=self.company
+        ).save()
+        Holidays(
+            name="Holiday",
+            start_date=date(2026, 10, 21),
+            end_date=date(2026, 10, 22),
+            company_id=self.company,
+        ).save()
+
+    def test_working_dates_exclude_only_company_leaves(self):
+        working_dates = working_dates_between(
+            date(2026, 10, 19), date(2026, 10, 25), self.company
+        )
+        self.assertEqual(working_dates[0], date(2026, 10, 19))
+        self.assertEqual(len(working_dates), 6)
+        self.assertNotIn(date(2026, 10, 25), working_dates)
+        self.assertIn(date(2026, 10, 21), working_dates)
+
+    def test_calendars_are_per_company(self):
+        self.assertEqual(
+            holiday_dates_between(date(2026, 10, 1), date(2026, 10, 31), self.company),
+            [date(2026, 10, 21), date(2026, 10, 22)],
+        )
+        self.assertEqual(
+            holiday_dates_between(
+                date(2026, 10, 1), date(2026, 10, 31), self.other_company
+            ),
+            [],
+        )
+        self.assertEqual(
+            len(working_dates_between(date(2026, 10, 19), date(2026, 10, 25))), 6
+        )
+
+    def test_calendar_is_rebuilt_after_a_holiday_change(self):
+        start, end = date(2026, 12, 1), date(2026, 12, 31)
+        self.assertEqual(holiday_dates_between(start, end, self.company), [])
+        Holidays(
+            name="Christmas", start_date=date(2026, 12, 25), company_id=self.company
+        ).save()
+        self.assertEqual(
+            holiday_dates_between(start, end, self.company), [date(2026, 12, 25)]
+        )
+
+
+def fake_render(html, options):
+    return html.encode()
+
+
+@mock.patch("base.pdf_renderer._render", side_effect=fake_render)
+class PdfRendererTests(SimpleTestCase):
+    def setUp(self):
+        caches["pdf"].clear()
+
+    def test_render_pdfs_keeps_the_input_order(self, render):
+        documents = [f"<p>{index}</p>" for index in range(10)]
+        self.assertEqual(
+            pdf_renderer.render_pdfs(documents, with_css=False),
+            [html.encode() for html in documents],
+        )
+
+    def test_cached_render_pdfs_renders_only_missing_documents(self, render):
+        pdfs = pdf_renderer.cached_render_pdfs(
+            [("payslip-1", "<p>1</p>"), ("payslip-2", "<p>2</p>")], with_css=False
+        )
+        self.assertEqual(pdfs, [b"<p>1</p>", b"<p>2</p>"])
+        render.reset_mock()
+        pdfs = pdf_renderer.cached_render_pdfs(
+            [("payslip-1", "<p>1</p>"), ("payslip-2", "<p>2 changed</p>")],
+            with_css=False,
+        )
+        self.assertEqual(pdfs, [b"<p>1</p>", b"<p>2 changed</p>"])
+        self.assertEqual(render.call_count, 1)
+
+    def test_pdfs_are_not_kept_in_the_default_cache(self, render):
+        cache.clear()
+        pdf_renderer.cached_render_pdfs([("payslip-1", "<p>1</p>")], with_css=False)
+        self.assertEqual(len(caches["pdf"]._cache), 1)
+        self.assertEqual(len(cache._cache), 0)
+
+    def test_zip_pdfs_keeps_duplicate_names(self, render):
+        archive = zipfile.ZipFile(
+            io.BytesIO(pdf_renderer.zip_pdfs([("a.pdf", b"1"), ("a.pdf", b"2")]))
+        )
+        self.assertEqual(archive.namelist(), ["a.pdf", "a (1).pdf"])
+        self.assertEqual(archive.read("a (1).pdf"), b"2")
+
+
+class UserPreferencesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="preferences")
+        _thread_locals.request = SimpleNamespace(user=self.user)
+
+    def tearDown(self):
+        _thread_locals.request = None
+
+    def test_preferences_are_loaded_once(self):
+        self.assertEqual(get_user_preferences().pagination, DEFAULT_PAGINATION)
+        with self.assertNumQueries(0):
+            get_user_preferences()
+        _thread_locals.request = SimpleNamespace(user=self.user)
+        with self.assertNumQueries(0):
+            get_user_preferences(self.user)
+
+    def test_preferences_are_dropped_when_a_source_row_changes(self):
+        self.assertIsNone(get_user_preferences().default_filter("/employee/"))
+        DynamicPagination.objects.create(pagination=20)
+        saved_filter = SavedFilter(
+            title="Mine", filter="{}", path="/employee/", is_default=True
+        )
+        saved_filter.created_by = self.user
+        saved_filter.save()
+        preferences = get_user_preferences()
+        self.assertEqual(preferences.pagination, 20)
+        self.assertEqual(preferences.default_filter("/employee/"), saved_filter)
+        self.assertEqual(
+            preferences.stored_filters("/employee/", "/dashboard/"), [saved_filter]
+        )
+
+
+@cache_for_models(Department)
+def department_names():
+    return sorted(Department.objects.entire().values_list("department", flat=True))
+
+
+class ModelCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_until_a_tracked_model_is_written(self):
+        self.assertEqual(department_names(), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(department_names(), [])
+        department = Department(department="HR")
+        department.save()
+        self.assertEqual(department_names(), ["HR"])
+        Department.objects.entire().update(department="People")
+        self.assertEqual(department_names(), ["People"])
+        department.delete()
+        self.assertEqual(department_names(), [])
+
+    def test_untracked_writes_keep_the_cache(self):
+        self.assertEqual(cached_query("companies", [Company], list), [])
+        self.assertNotIn(Holidays, TRACKED_MODELS)
+        versions = model_versions([Company])
+        Holidays(name="Holiday", start_date=date(2026, 1, 1)).save()
+        self.assertEqual(model_versions([Company]), versions)
+
+
+def create_employee(name):
+    employee = Employee(
+        employee_first_name=name, email=f"{name.lower()}@horilla.test", phone="1"
+    )
+    employee.save()
+    return employee
+
+
+class NextChangeDateTests(SimpleTestCase):
+    def test_switch_dates(self):
+        after = SimpleNamespace(based_on="after", rotate_after_day=3)
+        weekly = SimpleNamespace(based_on="weekly")
+        last = SimpleNamespace(based_on="monthly", rotate_every="last")
+        thirty_first = SimpleNamespace(based_on="monthly", rotate_every="31")
+        self.assertEqual(next_change_date(after, date(2026, 1, 30)), date(2026, 2, 2))
+        self.assertEqual(next_change_date(weekly, date(2026, 1, 30)), date(2026, 2, 6))
+        self.assertEqual(next_change_date(last, date(2026, 1, 31)), date(2026, 2, 28))
+        self.assertEqual(
+            next_change_date(thirty_first, date(2026, 12, 31)), date(2027, 1, 31)
+        )
+        self.assertEqual(
+            next_change_date(thirty_first, date(2027, 1, 31)), date(2027, 2, 28)
+        )
+
+
+class RotationTests(TestCase):
+    def setUp(self):
+        self.today = date.today()
+        self.shifts = []
+        for name in ["Morning", "Evening", "Night"]:
+            shift = EmployeeShift(employee_shift=name)
+            shift.save()
+            self.shifts.append(shift)
+        morning, evening, night = self.shifts
+        rotating_shift = RotatingShift(
+            name="Rotation",
+            shift1=morning,
+            shift2=evening,
+            additional_data={"additional_shifts": [str(night.pk)]},
+        )
+        rotating_shift.save()
+        self.employee = create_employee("Rotating")
+        # switches were due 5 and 2 days ago, the next one is tomorrow
+        self.assign = RotatingShiftAssign._base_manager.create(
+            employee_id=self.employee,
+            rotating_shift_id=rotating_shift,
+            start_date=self.today - timedelta(days=10),
+            next_change_date=self.today - timedelta(days=5),
+            current_shift=morning,
+            next_shift=evening,
+            based_on="after",
+            rotate_after_day=3,
+            additional_data={"next_shift_index": 2},
+        )
+
+    def test_missed_switches_are_caught_up(self):
+        morning, _evening, night = self.shifts
+        rotated = rotate_shifts(self.today)
+        self.assertEqual([assign.pk for assign in rotated], [self.assign.pk])
+        self.assign.refresh_from_db()
+        self.assertEqual(self.assign.current_shift, night)
+        self.assertEqual(self.assign.next_shift, morning)
+        self.assertEqual(self.assign.next_change_date, self.today + timedelta(days=1))
+        self.assertEqual(self.assign.additional_data["next_shift_index"], 1)
+        self.assertEqual(
+            EmployeeWorkInformation._base_manager.get(
+                employee_id=self.employee
+            ).shift_id,
+            night,
+        )
+        self.assertEqual(rotate_shifts(self.today), [])
+
+    def test_projection_writes_nothing(self):
+        morning, evening, night = self.shifts
+        self.assign.next_change_date = self.today + timedelta(days=1)
+        self.assign.current_shift = night
+        self.assign.next_shift = morning
+        self.assign.additional_data = {"next_shift_index": 1}
+        self.assign.save()
+        projection = project_rotation(get_shift_rotation(), days=5)
+        self.assertEqual(
+            [shift for _day, shift in projection[self.employee]],
+            [night, morning, morning, morning, evening],
+        )
+        self.assign.refresh_from_db()
+        self.assertEqual(self.assign.current_shift, night)
+
+
+class ShiftCalendarTests(TestCase):
+    def setUp(self):
+        self.day = date(2026, 10, 19)  # a Monday
+        monday = EmployeeShiftDay.objects.create(day="monday")
+        self.night = EmployeeShift(employee_shift="Night")
+        self.night.save()
+        self.day_shift = EmployeeShift(employee_shift="Day")
+        self.day_shift.save()
+        EmployeeShiftSchedule.objects.create(
+            day=monday,
+            shift_id=self.night,
+            minimum_working_hour="08:00",
+            start_time=time(22, 0),
+            end_time=time(6, 0),
+        )
+        self.employee = create_employee("Calendar")
+        self.work_info = EmployeeWorkInformation._base_manager.get(
+            employee_id=self.employee
+        )
+
+    def set_shift(self, shift, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.work_info.shift_id = shift
+            self.work_info.save(**kwargs)
+        return callbacks
+
+    def test_night_shift_day(self):
+        self.set_shift(self.night)
+        calendar_day = get_employee_shift_day(self.employee, self.day)
+        self.assertEqual(calendar_day.shift_id, self.night)
+        self.assertEqual(calendar_day.source, "work_info")
+        self.assertTrue(calendar_day.is_night_shift)
+        self.assertEqual(
+            timezone.localtime(calendar_day.end_datetime).date(),
+            date(2026, 10, 20),
+        )
+        self.assertIsNone(
+            get_employee_shift_day(self.employee, date(2026, 10, 20)).schedule_id
+        )
+
+    def test_calendar_is_rebuilt_only_when_the_shift_changes(self):
+        self.assertEqual(len(self.set_shift(self.night)), 1)
+        self.assertEqual(len(self.set_shift(self.night)), 0)
+        self.assertEqual(
+            len(self.set_shift(self.night, update_fields=["experience"])), 0
+        )
+        self.assertEqual(len(self.set_shift(self.day_shift)), 1)
+        today = EmployeeShiftCalendar._base_manager.get(
+            employee_id=self.employee, date=date.today()
+        )
+        self.assertEqual(today.shift_id, self.day_shift)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ada = create_employee("Ada")
+        self.adam = create_employee("Adam")
+        self.grace = create_employee("Grace")
+
+    def employees(self, search):
+        queryset = search_queryset(Employee.objects.entire(), search)
+        return None if queryset is None else set(queryset)
+
+    def test_words(self):
+        self.assertEqual(normalize("Ada-Lovelace, ADA!"), "ada lovelace ada")
+        self.assertEqual(search_words(" ".join("abcdefghij")), list("abcdefgh"))
+
+    def test_filters_keep_their_lookups_until_the_index_is_built(self):
+        self.assertIsNone(self.employees("ada"))
+        rebuild_search_index([Employee])
+        self.assertEqual(self.employees("ada"), {self.ada, self.adam})
+        self.assertEqual(self.employees("adam horilla"), {self.adam})
+        self.assertEqual(self.employees("da"), set())
+        self.assertEqual(len(self.employees("")), 3)
+
+    def test_match_documents(self):
+        rebuild_search_index([Employee])
+        documents = match_documents("adam", [Employee])
+        self.assertEqual([document.object_id for document in documents], [self.adam.pk])
+        self.assertEqual(match_documents("", [Employee]).count(), 0)
+
+    def test_documents_follow_the_rows(self):
+        rebuild_search_index([Employee])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grace.employee_last_name = "Hopper"
+            self.grace.save()
+        self.assertEqual(self.employees("hopper"), {self.grace})
+        pk = self.grace.pk
+        self.grace.contract_set.all().delete()
+        self.grace.delete()
+        self.assertEqual(index_rows(Employee, [pk]), 0)
+        self.assertEqual(self.employees("grace"), set())
+
+    def test_global_search_checks_the_permissions(self):
+        rebuild_search_index([Employee])
+        admin = User.objects.create_superuser("admin", password="admin")
+        results = global_search(admin, "grace")
+        self.assertEqual([result["id"] for result in results], [self.grace.pk])
+        self.assertEqual(results[0]["url"], f"/employee/employee-view/{self.grace.pk}/")
+        user = User.objects.create_user("plain", password="plain")
+        self.assertEqual(global_search(user, "grace"), [])
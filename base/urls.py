@@ -1099,6 +1099,7 @@ urlpatterns = [
         "company-leave-filter", views.company_leave_filter, name="company-leave-filter"
     ),
     path("view-penalties", views.view_penalties, name="view-penalties"),
+    path("global-search", views.global_search, name="global-search"),
     # static page
     
     path("support", views.support, name="support"),
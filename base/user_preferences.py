@@ -0,0 +1,132 @@
+"""
+user_preferences.py
+
+Per-user preference store.
+
+The pagination size, saved filters, hidden columns and excluded dashboard
+charts of a user are read on almost every list render. They are loaded
+together once, kept in the Django cache under the user's key and memoized on
+the request, so reading a preference costs no query. The cached entry is
+dropped by signals whenever one of the source rows changes.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from horilla.horilla_middlewares import _thread_locals
+
+PREFERENCES_KEY_PREFIX = "base:user_preferences"
+PREFERENCES_CACHE_TIMEOUT = getattr(settings, "USER_PREFERENCES_CACHE_TIMEOUT", 3600)
+DEFAULT_PAGINATION = 50
+
+
+class UserPreferences:
+    """
+    Preferences of one user
+    """
+
+    __slots__ = ("pagination", "saved_filters", "toggle_columns", "dashboard_charts")
+
+    def __init__(self, pagination, saved_filters, toggle_columns, dashboard_charts):
+        self.pagination = pagination
+        self.saved_filters = saved_filters
+        self.toggle_columns = toggle_columns
+        self.dashboard_charts = dashboard_charts
+
+    def default_filter(self, path):
+        """
+        SavedFilter marked as default for the path
+        """
+        for saved_filter in self.saved_filters:
+            if saved_filter.path == path and saved_filter.is_default:
+                return saved_filter
+        return None
+
+    def stored_filters(self, path, referrer=""):
+        """
+        SavedFilters saved on the path or on the referrer
+        """
+        return [
+            saved_filter
+            for saved_filter in self.saved_filters
+            if saved_filter.path == path or saved_filter.referrer == referrer
+        ]
+
+    def toggle_column(self, path):
+        """
+        ToggleColumn row of the path
+        """
+        return self.toggle_columns.get(path)
+
+
+def preferences_key(user_id):
+    """
+    Cache key of a user's preferences
+    """
+    return f"{PREFERENCES_KEY_PREFIX}:{user_id}"
+
+
+def _load_user_preferences(user_id):
+    from base.models import DashboardEmployeeCharts, DynamicPagination
+    from horilla_views.models import SavedFilter, ToggleColumn
+
+    pagination = (
+        DynamicPagination.objects.filter(user_id=user_id)
+        .values_list("pagination", flat=True)
+        .first()
+    )
+    saved_filters = list(SavedFilter.objects.filter(created_by_id=user_id))
+    toggle_columns = {}
+    for toggle_column in ToggleColumn.objects.filter(user_id=user_id).order_by("pk"):
+        # the first row of a path wins, as with `.filter(...).first()`
+        toggle_columns.setdefault(toggle_column.path, toggle_column)
+    charts = (
+        DashboardEmployeeCharts.objects.filter(employee__employee_user_id=user_id)
+        .values_list("charts", flat=True)
+        .first()
+    )
+    return UserPreferences(
+        pagination or DEFAULT_PAGINATION,
+        saved_filters,
+        toggle_columns,
+        charts or [],
+    )
+
+
+def get_user_preferences(user=None) -> UserPreferences:
+    """
+    Preferences of the user, the user of the current request by default
+    """
+    request = getattr(_thread_locals, "request", None)
+    if user is None:
+        user = getattr(request, "user", None)
+    user_id = getattr(user, "pk", None)
+    if user_id is None:
+        return UserPreferences(DEFAULT_PAGINATION, [], {}, [])
+
+    memo = getattr(request, "_user_preferences", None) if request else None
+    if memo is not None and memo[0] == user_id:
+        return memo[1]
+
+    key = preferences_key(user_id)
+    preferences = cache.get(key)
+    if preferences is None:
+        preferences = _load_user_preferences(user_id)
+        cache.set(key, preferences, PREFERENCES_CACHE_TIMEOUT)
+    if request is not None:
+        request._user_preferences = (user_id, preferences)
+    return preferences
+
+
+def invalidate_user_preferences(*user_ids):
+    """
+    Drop the cached preferences of the given users
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    cache.delete_many([preferences_key(user_id) for user_id in user_ids])
+    request = getattr(_thread_locals, "request", None)
+    memo = getattr(request, "_user_preferences", None) if request else None
+    if memo is not None and memo[0] in user_ids:
+        request._user_preferences = None
@@ -211,6 +211,10 @@ from payroll.models.models import Payslip
 from base.models import EmployeeShiftDay, EmployeeShiftSchedule
 from attendance.models import AttendanceLateComeEarlyOut, Attendance, WorkRecords, AttendanceActivity
 from base.models import Holidays
+from base.search import global_search as search_everywhere
+from base.shift_calendar import get_employee_shift_day
+from base.user_preferences import get_user_preferences
+from base.working_calendar import invalidate_working_calendar
 from datetime import timedelta, date as datetime_date
 from django.db.models import Q
     
@@ -1181,22 +1185,16 @@ def get_dashboard_context(request):
         reporting_manager = employee_work_info.reporting_manager_id
         print("Reporting Manager Employee:", reporting_manager)
 
-        shift_schedule = employee_work_info.shift_id
+        # today's shift and schedule from the shift calendar, rotations and
+        # approved shift requests included
+        calendar_day = get_employee_shift_day(employee, today)
+        shift_schedule = (
+            calendar_day.shift_id if calendar_day else employee_work_info.shift_id
+        )
         print("Shift Schedule:", shift_schedule)
 
-        # Try to get today's shift timing from EmployeeShiftSchedule (through model)
         if shift_schedule:
-            today_day_key = today.strftime("%A").lower()
-            print("Today Day Key:", today_day_key)
-
-            today_schedule = (
-                EmployeeShiftSchedule.objects.filter(
-                    shift_id=shift_schedule,
-                    day__day__iexact=today_day_key,
-                )
-                .select_related("day")
-                .first()
-            )
+            today_schedule = calendar_day.schedule_id if calendar_day else None
             print("Today's Schedule:", today_schedule)
 
             if today_schedule:
@@ -1355,9 +1353,7 @@ def home(request):
     first_day_of_week = today - timedelta(days=today_weekday)
     last_day_of_week = first_day_of_week + timedelta(days=6)
  
-    employee_charts = DashboardEmployeeCharts.objects.get_or_create(
-        employee=request.user.employee_get
-    )[0]
+    excluded_charts = get_user_preferences(request.user).dashboard_charts
  
     # ⬇️ Get dashboard data
     dashboard_context = get_dashboard_context(request)
@@ -1366,7 +1362,7 @@ def home(request):
     context = {
         "first_day_of_week": first_day_of_week.strftime("%Y-%m-%d"),
         "last_day_of_week": last_day_of_week.strftime("%Y-%m-%d"),
-        "charts": employee_charts.charts,
+        "charts": excluded_charts,
         **dashboard_context,  # merge everything from dashboard here
     }
 
@@ -6771,7 +6767,7 @@ def notifications(request):
     """
     This method will render notification items
     """
-    all_notifications = request.user.notifications.unread()
+    all_notifications = request.user.notifications.unread().prefetch_related("actor")
     return render(
         request,
         "notification/notification_items.html",
@@ -6922,8 +6918,15 @@ def dashboard_notifications(request):
     """
     Render actionable notifications (leave + attendance) for the dashboard card.
     """
+    # only the notifications redirecting to a leave or attendance request
     unread_notifications = (
-        request.user.notifications.unread().order_by("-timestamp")[:50]
+        request.user.notifications.unread()
+        .filter(
+            Q(data__redirect__icontains="leave/")
+            | Q(data__redirect__icontains="attendance/")
+        )
+        .only("id", "timestamp", "data")
+        .order_by("-timestamp")[:50]
     )
     actionable_notifications = []
     seen_objects = set()
@@ -6937,8 +6940,9 @@ def dashboard_notifications(request):
         actionable_notifications.append(payload)
         seen_objects.add(key)
 
+    references = []
     for notification in unread_notifications:
-        redirect_url = getattr(notification, "data", {}).get("redirect")
+        redirect_url = (notification.data or {}).get("redirect")
         if not redirect_url:
             continue
         object_id = _extract_dashboard_notification_object_id(redirect_url)
@@ -6946,26 +6950,36 @@ def dashboard_notifications(request):
             continue
 
         normalized_path = (urlparse(redirect_url).path or "").lstrip("/")
-
         if normalized_path.startswith("leave/"):
-            try:
-                leave_request = LeaveRequest.objects.select_related(
-                    "employee_id", "leave_type_id"
-                ).get(pk=object_id)
-            except LeaveRequest.DoesNotExist:
-                continue
+            references.append(("leave", object_id, notification))
+        elif normalized_path.startswith("attendance/"):
+            references.append(("attendance", object_id, notification))
+
+    # the referenced requests are loaded with one query per type
+    leave_requests = LeaveRequest.objects.select_related(
+        "employee_id", "leave_type_id"
+    ).in_bulk(
+        {object_id for kind, object_id, notification in references if kind == "leave"}
+    )
+    attendances = Attendance.objects.select_related("employee_id").in_bulk(
+        {
+            object_id
+            for kind, object_id, notification in references
+            if kind == "attendance"
+        }
+    )
+    for kind, object_id, notification in references:
+        if kind == "leave":
             _append_payload(
-                _build_leave_notification_payload(leave_request, notification)
+                _build_leave_notification_payload(
+                    leave_requests.get(object_id), notification
+                )
             )
-        elif normalized_path.startswith("attendance/"):
-            try:
-                attendance_instance = Attendance.objects.select_related(
-                    "employee_id"
-                ).get(pk=object_id)
-            except Attendance.DoesNotExist:
-                continue
+        else:
             _append_payload(
-                _build_attendance_notification_payload(attendance_instance, notification)
+                _build_attendance_notification_payload(
+                    attendances.get(object_id), notification
+                )
             )
 
         if len(actionable_notifications) >= _DASHBOARD_NOTIFICATION_LIMIT:
@@ -7108,7 +7122,7 @@ def all_notifications(request):
     return render(
         request,
         "notification/all_notifications.html",
-        {"notifications": request.user.notifications.all()},
+        {"notifications": request.user.notifications.prefetch_related("actor")},
     )
 
 
@@ -8965,6 +8979,7 @@ def csv_holiday_import(file):
 
     if holiday_list:
         Holidays.objects.bulk_create(holiday_list)
+        invalidate_working_calendar()
 
     if os.path.exists(holiday_file):
         os.remove(holiday_file)
@@ -9038,6 +9053,7 @@ def excel_holiday_import(file):
 
     if valid_holidays:
         Holidays.objects.bulk_create(valid_holidays)
+        invalidate_working_calendar()
 
     return error_list, len(holiday_dicts)
 
@@ -9435,6 +9451,17 @@ def view_penalties(request):
     return render(request, "penalty/penalty_view.html", {"records": records})
 
 
+@login_required
+def global_search(request):
+    """
+    This method returns the best matches of the search across employees,
+    tickets, FAQs and candidates as JSON
+    """
+    return JsonResponse(
+        {"results": search_everywhere(request.user, request.GET.get("search", ""))}
+    )
+
+
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import UntypedToken
@@ -0,0 +1,184 @@
+"""
+working_calendar.py
+
+Company-aware non-working-day calendar.
+
+Holidays and company leaves are expanded once per (company, year) into sets of
+dates and kept in a process cache. The cache is tagged with a version stored
+in the Django cache, which is bumped whenever a Holidays or CompanyLeaves row
+changes, so every worker process drops its calendars on the next lookup.
+
+The rows of a company are exactly the rows with its company_id, and working
+dates only exclude company leaves, as `get_working_days` always did.
+"""
+
+import calendar
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+
+CALENDAR_VERSION_KEY = "base:working_calendar:version"
+
+# Sunday first, used by week based company leaves
+SUNDAY_FIRST_CALENDAR = calendar.Calendar(firstweekday=6)
+MONDAY_FIRST_CALENDAR = calendar.Calendar(firstweekday=0)
+
+_calendars = {}
+_lock = threading.Lock()
+
+
+class YearCalendar:
+    """
+    Holiday and company leave dates of one year for one company
+    """
+
+    __slots__ = ("year", "holidays", "company_leaves")
+
+    def __init__(self, year, holidays, company_leaves):
+        self.year = year
+        self.holidays = frozenset(holidays)
+        self.company_leaves = frozenset(company_leaves)
+
+
+def _company_pk(company):
+    return getattr(company, "pk", company)
+
+
+def _calendar_version():
+    version = cache.get(CALENDAR_VERSION_KEY)
+    if version is None:
+        version = time.time()
+        cache.add(CALENDAR_VERSION_KEY, version, None)
+        version = cache.get(CALENDAR_VERSION_KEY, version)
+    return version
+
+
+def invalidate_working_calendar():
+    """
+    Drop the calendars of every process, called when holidays or company
+    leaves change
+    """
+    cache.set(CALENDAR_VERSION_KEY, time.time(), None)
+    with _lock:
+        _calendars.clear()
+
+
+def company_leave_dates_in_year(company_leave, year):
+    """
+    Dates of a year matching one CompanyLeaves rule
+    """
+    weekday = int(company_leave.based_on_week_day)
+    based_on_week = company_leave.based_on_week
+    dates = []
+    for month in range(1, 13):
+        if based_on_week is not None:
+            weeks = SUNDAY_FIRST_CALENDAR.monthdayscalendar(year, month)
+            week_index = int(based_on_week)
+            if week_index >= len(weeks):
+                continue
+            for day in weeks[week_index]:
+                if day and date(year, month, day).weekday() == weekday:
+                    dates.append(date(year, month, day))
+        else:
+            for week in MONDAY_FIRST_CALENDAR.monthdayscalendar(year, month):
+                if week[weekday]:
+                    dates.append(date(year, month, week[weekday]))
+    return dates
+
+
+def _build_year_calendar(year, company_pk):
+    from base.models import CompanyLeaves, Holidays
+
+    year_start = date(year, 1, 1)
+    year_end = date(year, 12, 31)
+    company_query = Q()
+    if company_pk is not None:
+        company_query = Q(company_id=company_pk)
+
+    holidays = set()
+    holiday_rows = (
+        Holidays.objects.entire()
+        .filter(company_query, start_date__lte=year_end)
+        .filter(Q(end_date__gte=year_start) | Q(end_date__isnull=True))
+        .values_list("start_date", "end_date")
+    )
+    for start_date, end_date in holiday_rows:
+        end_date = end_date or start_date
+        current = max(start_date, year_start)
+        last = min(end_date, year_end)
+        while current <= last:
+            holidays.add(current)
+            current += timedelta(days=1)
+
+    company_leaves = set()
+    for company_leave in CompanyLeaves.objects.entire().filter(company_query):
+        company_leaves.update(company_leave_dates_in_year(company_leave, year))
+
+    return YearCalendar(year, holidays, company_leaves)
+
+
+def get_year_calendar(year, company=None):
+    """
+    Cached YearCalendar of a company, `company=None` covers every company
+    """
+    company_pk = _company_pk(company)
+    version = _calendar_version()
+    key = (company_pk, year)
+    cached = _calendars.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    year_calendar = _build_year_calendar(year, company_pk)
+    with _lock:
+        _calendars[key] = (version, year_calendar)
+    return year_calendar
+
+
+def _year_calendars(start_date, end_date, company):
+    return {
+        year: get_year_calendar(year, company)
+        for year in range(start_date.year, end_date.year + 1)
+    }
+
+
+def holiday_dates_between(start_date, end_date, company=None) -> list:
+    """
+    Holiday dates within the range
+    """
+    calendars = _year_calendars(start_date, end_date, company)
+    return sorted(
+        day
+        for year_calendar in calendars.values()
+        for day in year_calendar.holidays
+        if start_date <= day <= end_date
+    )
+
+
+def company_leave_dates_between(start_date, end_date, company=None) -> list:
+    """
+    Company leave dates within the range
+    """
+    calendars = _year_calendars(start_date, end_date, company)
+    return sorted(
+        day
+        for year_calendar in calendars.values()
+        for day in year_calendar.company_leaves
+        if start_date <= day <= end_date
+    )
+
+
+def working_dates_between(start_date, end_date, company=None) -> list:
+    """
+    Dates within the range that are not company leaves, holidays are not
+    excluded
+    """
+    calendars = _year_calendars(start_date, end_date, company)
+    working_dates = []
+    current = start_date
+    while current <= end_date:
+        if current not in calendars[current.year].company_leaves:
+            working_dates.append(current)
+        current += timedelta(days=1)
+    return working_dates
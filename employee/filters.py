@@ -15,6 +15,7 @@ from django_filters import CharFilter
 from accessibility.methods import check_is_accessible
 from accessibility.models import DefaultAccessibility
 from base.methods import filtersubordinatesemployeemodel
+from base.search import search_queryset
 from employee.models import DisciplinaryAction, Employee, Policy
 from horilla.filters import FilterSet, HorillaFilterSet, filter_by_name
 from horilla.horilla_middlewares import _thread_locals
@@ -211,6 +212,10 @@ class EmployeeFilter(HorillaFilterSet):
         if self.data.get("search_field"):
             return queryset
 
+        indexed = search_queryset(queryset, value)
+        if indexed is not None:
+            return indexed
+
         def _icontains(instance):
             result = str(getattribute(instance, "get_full_name")).lower()
             return instance.pk if value in result else None
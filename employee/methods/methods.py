@@ -5,13 +5,18 @@ employee/methods.py
 import logging
 import re
 import threading
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from itertools import chain, groupby
 
 import pandas as pd
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
 from django.db import connection, models, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.templatetags.static import static
 from django.utils.translation import gettext as _
 
 from base.context_processors import get_initial_prefix
@@ -25,6 +30,7 @@ from base.models import (
     WorkType,
 )
 from employee.models import Employee, EmployeeWorkInformation
+from horilla.methods import get_horilla_model_class
 
 logger = logging.getLogger(__name__)
 
@@ -1076,6 +1082,8 @@ def bulk_create_work_info_import(success_lists):
         EmployeeWorkInformation.objects.bulk_create(
             new_work_info_list, batch_size=None if is_postgres else 999
         )
+        # bulk_create skips save(), materialize the reporting chain
+        EmployeeWorkInformation.rebuild_reporting_paths()
         
     if update_work_info_list:
         EmployeeWorkInformation.objects.bulk_update(
@@ -1108,4 +1116,123 @@ def bulk_create_work_info_import(success_lists):
             target=create_contracts_in_thread,
             args=(new_work_info_list, update_work_info_list),
         )
-        contract_creation_thread.start()
\ No newline at end of file
+        contract_creation_thread.start()
+
+
+AVATAR_CACHE_TIMEOUT = getattr(settings, "EMPLOYEE_AVATAR_CACHE_TIMEOUT", 60 * 60)
+
+
+def _avatar_urls(employees):
+    """
+    Avatar url of each employee, the storage existence checks are cached
+    """
+    default_avatar = static("images/ui/default_avatar.jpg")
+    keys = {
+        employee.pk: f"employee:avatar_exists:{employee.employee_profile.name}"
+        for employee in employees
+        if employee.employee_profile
+    }
+    exists = cache.get_many(list(keys.values()))
+    missing = {}
+    for employee in employees:
+        key = keys.get(employee.pk)
+        if key and key not in exists:
+            missing[key] = default_storage.exists(employee.employee_profile.name)
+    if missing:
+        cache.set_many(missing, AVATAR_CACHE_TIMEOUT)
+        exists.update(missing)
+    return {
+        employee.pk: (
+            employee.employee_profile.url
+            if exists.get(keys.get(employee.pk))
+            else default_avatar
+        )
+        for employee in employees
+    }
+
+
+def annotate_employee_status(employees):
+    """
+    Precompute the status shown on employee cards, lists and dashboards.
+
+    For a page of employees this loads the work information, today's leave
+    requests, yesterday's and today's attendances with their activities using
+    a fixed number of queries, and attaches the results to the instances so
+    that `get_leave_status`, `get_forecasted_at_work`, `check_online` and
+    `get_avatar` do not query per employee. Returns the employees as a list.
+    """
+    employees = [employee for employee in employees]
+    if not employees:
+        return employees
+    employee_ids = [employee.pk for employee in employees]
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+
+    prefetch_related_objects(
+        employees,
+        Prefetch(
+            "employee_work_info",
+            queryset=EmployeeWorkInformation._base_manager.select_related(
+                "job_position_id",
+                "department_id",
+                "shift_id",
+                "work_type_id",
+                "reporting_manager_id",
+                "company_id",
+                "job_role_id",
+            ),
+        ),
+    )
+
+    leave_statuses = {pk: set() for pk in employee_ids}
+    if apps.is_installed("leave"):
+        LeaveRequest = get_horilla_model_class("leave", "leaverequest")
+        for employee_id, status in LeaveRequest.objects.filter(
+            employee_id__in=employee_ids, start_date__lte=today, end_date__gte=today
+        ).values_list("employee_id", "status"):
+            leave_statuses[employee_id].add(status)
+
+    latest_attendance = {}
+    has_attendance_today = set()
+    online = set()
+    activities = {}
+    attendance_installed = apps.is_installed("attendance")
+    if attendance_installed:
+        Attendance = get_horilla_model_class("attendance", "attendance")
+        AttendanceActivity = get_horilla_model_class("attendance", "attendanceactivity")
+        for attendance in Attendance.objects.filter(
+            employee_id__in=employee_ids, attendance_date__in=[yesterday, today]
+        ).order_by("attendance_date"):
+            latest_attendance[attendance.employee_id_id] = attendance
+            if attendance.attendance_date == today:
+                has_attendance_today.add(attendance.employee_id_id)
+            if attendance.attendance_clock_out_date is None:
+                online.add(attendance.employee_id_id)
+        for activity in AttendanceActivity.objects.filter(
+            employee_id__in=list(latest_attendance),
+            attendance_date__in=[yesterday, today],
+        ).order_by("clock_in"):
+            activities.setdefault(
+                (activity.employee_id_id, activity.attendance_date), []
+            ).append(activity)
+
+    avatars = _avatar_urls(employees)
+    for employee in employees:
+        attendance = latest_attendance.get(employee.pk)
+        employee._leave_status = Employee.leave_status_label(
+            leave_statuses[employee.pk], employee.pk in has_attendance_today
+        )
+        employee._is_online = employee.pk in online
+        employee._avatar = avatars[employee.pk]
+        if attendance_installed:
+            at_work = 0
+            if attendance:
+                at_work = attendance.get_at_work_from_activities(
+                    activities.get((employee.pk, attendance.attendance_date), [])
+                )
+            employee._forecasted_at_work = Employee.forecasted_at_work_summary(
+                attendance, at_work
+            )
+        else:
+            employee._forecasted_at_work = {}
+    return employees
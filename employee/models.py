@@ -14,7 +14,6 @@ from django.contrib.auth.models import Permission, User
 from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
 from django.db import models
-from django.db.models.query import QuerySet
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.templatetags.static import static
@@ -36,6 +35,7 @@ from employee.methods.duration_methods import format_time, strtime_seconds
 from horilla import horilla_middlewares
 from horilla.methods import get_horilla_model_class
 from horilla.models import HorillaModel, has_xss, upload_path
+from horilla.signals import post_bulk_update
 from horilla_audit.methods import get_diff
 from horilla_audit.models import HorillaAuditInfo, HorillaAuditLog
 
@@ -110,6 +110,9 @@ class Employee(models.Model):
     is_directly_converted = models.BooleanField(
         default=False, null=True, blank=True, editable=False
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, null=True, blank=True, db_index=True, editable=False
+    )
     objects = HorillaCompanyManager(
         related_company_field="employee_work_info__company_id"
     )
@@ -200,14 +203,13 @@ class Employee(models.Model):
 
     def get_shift_schedule(self):
         """
-        This method is used to check if the employee has a shift assigned
+        This method is used to return today's shift schedule of the employee
+        from the shift calendar
         """
-        shift = self.get_shift()
-        day = datetime.today().strftime("%A").lower()
-        if not shift:
-            return None
-        schedule = shift.employeeshiftschedule_set.filter(day__day=day).first()
-        return schedule if schedule else None
+        from base.shift_calendar import get_employee_shift_day
+
+        calendar_day = get_employee_shift_day(self)
+        return calendar_day.schedule_id if calendar_day else None
 
     def get_mail(self):
         """
@@ -243,6 +245,8 @@ class Employee(models.Model):
         )
 
     def get_avatar(self):
+        if hasattr(self, "_avatar"):
+            return self._avatar
         if self.employee_profile and default_storage.exists(self.employee_profile.name):
             return self.employee_profile.url
         return static("images/ui/default_avatar.jpg")
@@ -251,33 +255,48 @@ class Employee(models.Model):
         """
         This method is used to get the leave status of the employee
         """
+        if hasattr(self, "_leave_status"):
+            return self._leave_status
         today = date.today()
-        leaves_requests = (
-            self.leaverequest_set.filter(start_date__lte=today, end_date__gte=today)
+        leave_statuses = (
+            set(
+                self.leaverequest_set.filter(
+                    start_date__lte=today, end_date__gte=today
+                ).values_list("status", flat=True)
+            )
             if apps.is_installed("leave")
-            else QuerySet().none()
+            else set()
         )
-        status = _("Expected working")
-        if leaves_requests.exists():
-            if leaves_requests.filter(status="approved").exists():
-                status = _("On Leave")
-            elif leaves_requests.filter(status="requested"):
-                status = _("Waiting Approval")
-            else:
-                status = _("Canceled / Rejected")
-        elif (
-            apps.is_installed("attendance")
+        has_attendance = (
+            not leave_statuses
+            and apps.is_installed("attendance")
             and self.employee_attendances.filter(
                 attendance_date=today,
             ).exists()
-        ):
-            status = _("On a break")
-        return status
+        )
+        return self.leave_status_label(leave_statuses, has_attendance)
+
+    @staticmethod
+    def leave_status_label(leave_statuses, has_attendance):
+        """
+        Leave status label from the statuses of today's leave requests
+        """
+        if leave_statuses:
+            if "approved" in leave_statuses:
+                return _("On Leave")
+            if "requested" in leave_statuses:
+                return _("Waiting Approval")
+            return _("Canceled / Rejected")
+        if has_attendance:
+            return _("On a break")
+        return _("Expected working")
 
     def get_forecasted_at_work(self):
         """
         This method is used to the employees current day shift status
         """
+        if hasattr(self, "_forecasted_at_work"):
+            return self._forecasted_at_work
         if apps.is_installed("attendance"):
             today = datetime.today()
             yesterday = today - timedelta(days=1)
@@ -299,25 +318,28 @@ class Employee(models.Model):
             attendance = today_attendance
             if not today_attendance:
                 attendance = yesterday_attendance
-            minimum_hour_seconds = strtime_seconds(
-                getattr(attendance, "minimum_hour", "0")
-            )
             at_work = 0
-            forecasted_pending_hours = 0
             if attendance:
                 at_work = attendance.get_at_work_from_activities()
-            forecasted_pending_hours = max(0, (minimum_hour_seconds - at_work))
-
-            return {
-                "forecasted_at_work": format_time(at_work),
-                "forecasted_pending_hours": format_time(forecasted_pending_hours),
-                "forecasted_at_work_seconds": at_work,
-                "forecasted_pending_hours_seconds": forecasted_pending_hours,
-                "has_attendance": attendance is not None,
-            }
+            return self.forecasted_at_work_summary(attendance, at_work)
         else:
             return {}
 
+    @staticmethod
+    def forecasted_at_work_summary(attendance, at_work):
+        """
+        Forecasted at work dict of an attendance and its at work seconds
+        """
+        minimum_hour_seconds = strtime_seconds(getattr(attendance, "minimum_hour", "0"))
+        forecasted_pending_hours = max(0, (minimum_hour_seconds - at_work))
+        return {
+            "forecasted_at_work": format_time(at_work),
+            "forecasted_pending_hours": format_time(forecasted_pending_hours),
+            "forecasted_at_work_seconds": at_work,
+            "forecasted_pending_hours_seconds": forecasted_pending_hours,
+            "has_attendance": attendance is not None,
+        }
+
     def get_today_attendance(self):
         """
         This method will returns employees todays attendance
@@ -438,6 +460,8 @@ class Employee(models.Model):
         """
         This method is used to check if the user is in the list of online users.
         """
+        if hasattr(self, "_is_online"):
+            return self._is_online
         if apps.is_installed("attendance"):
             Attendance = get_horilla_model_class("attendance", "attendance")
             request = getattr(horilla_middlewares._thread_locals, "request", None)
@@ -705,8 +729,14 @@ class EmployeeWorkInformation(models.Model):
     )
     additional_info = models.JSONField(null=True, blank=True)
     experience = models.FloatField(null=True, blank=True, default=0)
+    # Materialized reporting chain: "/<top manager id>/.../<employee id>/".
+    # Everyone below a manager shares the manager's path as prefix.
+    reporting_path = models.CharField(
+        max_length=1024, null=True, blank=True, editable=False, db_index=True
+    )
     history = HorillaAuditLog(
         related_name="history_set",
+        excluded_fields=["reporting_path"],
         bases=[
             HorillaAuditInfo,
         ],
@@ -718,7 +748,105 @@ class EmployeeWorkInformation(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
+        stored_path = self.reporting_path
+        self.reporting_path = self.build_reporting_path()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.reporting_path != stored_path:
+            kwargs["update_fields"] = set(update_fields) | {"reporting_path"}
         super().save(*args, **kwargs)
+        # subordinates of an employee without a stored path hang under
+        # "/<employee id>/", see build_reporting_path
+        previous_path = stored_path or (
+            f"/{self.employee_id_id}/" if self.employee_id_id else None
+        )
+        if previous_path and self.reporting_path != previous_path:
+            self.move_reporting_subtree(previous_path, self.reporting_path)
+
+    def build_reporting_path(self):
+        """
+        Reporting path of this employee from the manager's stored path
+        """
+        if not self.employee_id_id:
+            return None
+        own = f"{self.employee_id_id}/"
+        manager_id = self.reporting_manager_id_id
+        if not manager_id or manager_id == self.employee_id_id:
+            return f"/{own}"
+        manager_path = (
+            EmployeeWorkInformation._base_manager.filter(employee_id=manager_id)
+            .values_list("reporting_path", flat=True)
+            .first()
+        ) or f"/{manager_id}/"
+        if f"/{own}" in manager_path:
+            # reporting cycle, this employee becomes the root of its chain
+            return f"/{own}"
+        return f"{manager_path}{own}"
+
+    @staticmethod
+    def move_reporting_subtree(previous_path, new_path):
+        """
+        Re-root every path below `previous_path` under `new_path`
+        """
+        from django.db.models import Value
+        from django.db.models.functions import Concat, Substr
+
+        EmployeeWorkInformation._base_manager.filter(
+            reporting_path__startswith=previous_path,
+            reporting_path__gt=previous_path,
+        ).update(
+            reporting_path=Concat(
+                Value(new_path),
+                Substr("reporting_path", len(previous_path) + 1),
+                output_field=models.CharField(),
+            )
+        )
+
+    @staticmethod
+    def rebuild_reporting_paths():
+        """
+        Recompute every reporting path with one read and a bulk update, used
+        after imports/bulk updates that bypass save()
+        """
+        rows = list(
+            EmployeeWorkInformation._base_manager.filter(
+                employee_id__isnull=False
+            ).values_list("id", "employee_id", "reporting_manager_id", "reporting_path")
+        )
+        managers = {employee: manager for _id, employee, manager, _path in rows}
+        paths = {}
+
+        def path_of(employee):
+            if employee in paths:
+                return paths[employee]
+            chain = []
+            current = employee
+            while current is not None and current not in paths:
+                if current in chain:
+                    # reporting cycle, cut it at the repeated employee
+                    paths[current] = f"/{current}/"
+                    break
+                chain.append(current)
+                manager = managers.get(current)
+                current = manager if manager != current else None
+            for member in reversed(chain):
+                if member in paths:
+                    continue
+                manager = managers.get(member)
+                if manager is None or manager == member:
+                    paths[member] = f"/{member}/"
+                else:
+                    paths[member] = f"{paths.get(manager, f'/{manager}/')}{member}/"
+            return paths[employee]
+
+        changed = []
+        for pk, employee, _manager, stored_path in rows:
+            path = path_of(employee)
+            if path != stored_path:
+                changed.append(EmployeeWorkInformation(pk=pk, reporting_path=path))
+        EmployeeWorkInformation._base_manager.bulk_update(
+            changed, ["reporting_path"], batch_size=500
+        )
+        return len(changed)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -766,6 +894,15 @@ class EmployeeWorkInformation(models.Model):
         return self
 
 
+@receiver(post_bulk_update, sender=EmployeeWorkInformation)
+def refresh_reporting_paths(sender, queryset, *args, **kwargs):
+    """
+    Queryset updates of the reporting manager bypass save(), rebuild the paths
+    """
+    if "reporting_manager_id" in (kwargs.get("kwargs") or {}):
+        EmployeeWorkInformation.rebuild_reporting_paths()
+
+
 class EmployeeBankDetails(HorillaModel):
     """
     EmployeeBankDetails model
@@ -20,6 +20,7 @@ from base.forms import MailTemplateForm
 from base.methods import export_data, generate_pdf
 from base.models import HorillaMailTemplate
 from employee.filters import EmployeeFilter
+from employee.methods.methods import annotate_employee_status
 from employee.models import Employee
 from horilla import settings
 from horilla.decorators import login_required, manager_can_enter
@@ -48,12 +49,14 @@ def not_in_yet(request):
         .qs.exclude(employee_work_info__isnull=True)
         .filter(is_active=True)
     )
+    employees = paginator_qry(emps, page_number)
+    annotate_employee_status(employees)
 
     return render(
         request,
         "dashboard/not_in_yet.html",
         {
-            "employees": paginator_qry(emps, page_number),
+            "employees": employees,
             "pd": previous_data,
         },
     )
@@ -71,6 +74,7 @@ def not_out_yet(request):
         .qs.exclude(employee_work_info__isnull=True)
         .filter(is_active=True)
     )
+    emps = annotate_employee_status(emps)
     return render(request, "dashboard/not_out_yet.html", {"employees": emps})
 
 
@@ -1,3 +1,107 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from base.methods import subordinates_filter
+from employee.methods.methods import annotate_employee_status
+from employee.models import Employee, EmployeeWorkInformation
+
+
+def create_employee(name):
+    employee = Employee(
+        employee_first_name=name, email=f"{name.lower()}@horilla.test", phone="1"
+    )
+    employee.save()
+    return employee
+
+
+def set_manager(employee, manager):
+    work_info = EmployeeWorkInformation.objects.entire().get(employee_id=employee)
+    work_info.reporting_manager_id = manager
+    work_info.save()
+
+
+def reporting_path(employee):
+    return (
+        EmployeeWorkInformation.objects.entire()
+        .get(employee_id=employee)
+        .reporting_path
+    )
+
+
+class ReportingPathTests(TestCase):
+    def setUp(self):
+        self.ceo = create_employee("Ceo")
+        self.manager = create_employee("Manager")
+        self.staff = create_employee("Staff")
+        set_manager(self.manager, self.ceo)
+        set_manager(self.staff, self.manager)
+
+    def subordinates(self, manager):
+        return set(Employee.objects.entire().filter(subordinates_filter(manager)))
+
+    def test_paths_follow_the_reporting_chain(self):
+        self.assertEqual(
+            reporting_path(self.staff),
+            f"/{self.ceo.pk}/{self.manager.pk}/{self.staff.pk}/",
+        )
+        self.assertEqual(self.subordinates(self.ceo), {self.manager, self.staff})
+        self.assertEqual(self.subordinates(self.manager), {self.staff})
+        self.assertEqual(self.subordinates(self.staff), set())
+
+    def test_subtree_moves_with_its_manager(self):
+        director = create_employee("Director")
+        set_manager(self.manager, director)
+        self.assertEqual(
+            reporting_path(self.staff),
+            f"/{director.pk}/{self.manager.pk}/{self.staff.pk}/",
+        )
+        self.assertEqual(self.subordinates(self.ceo), set())
+
+    def test_reporting_cycle_is_cut(self):
+        set_manager(self.ceo, self.staff)
+        self.assertEqual(reporting_path(self.ceo), f"/{self.ceo.pk}/")
+
+    def test_queryset_update_rebuilds_the_paths(self):
+        EmployeeWorkInformation.objects.entire().filter(employee_id=self.staff).update(
+            reporting_manager_id=self.ceo
+        )
+        self.assertEqual(reporting_path(self.staff), f"/{self.ceo.pk}/{self.staff.pk}/")
+        self.assertEqual(self.subordinates(self.manager), set())
+
+
+class LeaveStatusLabelTests(SimpleTestCase):
+    def test_labels(self):
+        label = Employee.leave_status_label
+        self.assertEqual(label({"approved", "rejected"}, True), "On Leave")
+        self.assertEqual(label({"requested", "cancelled"}, False), "Waiting Approval")
+        self.assertEqual(label({"rejected"}, False), "Canceled / Rejected")
+        self.assertEqual(label(set(), True), "On a break")
+        self.assertEqual(label(set(), False), "Expected working")
+
+
+class AnnotateEmployeeStatusTests(TestCase):
+    def setUp(self):
+        self.employees = [create_employee(f"Employee{index}") for index in range(4)]
+
+    def annotate(self, employees):
+        employees = [Employee.objects.entire().get(pk=e.pk) for e in employees]
+        with CaptureQueriesContext(connection) as queries:
+            annotated = annotate_employee_status(employees)
+        return annotated, len(queries)
+
+    def test_annotated_values_match_the_accessors(self):
+        annotated, _queries = self.annotate(self.employees)
+        for employee in annotated:
+            fresh = Employee.objects.entire().get(pk=employee.pk)
+            self.assertEqual(employee.get_leave_status(), fresh.get_leave_status())
+            self.assertEqual(employee.check_online(), fresh.check_online())
+            self.assertEqual(
+                employee.get_forecasted_at_work(), fresh.get_forecasted_at_work()
+            )
+            self.assertEqual(employee.get_avatar(), fresh.get_avatar())
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        _annotated, one = self.annotate(self.employees[:1])
+        _annotated, four = self.annotate(self.employees)
+        self.assertEqual(one, four)
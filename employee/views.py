@@ -54,6 +54,7 @@ from base.methods import (
     get_key_instances,
     get_pagination,
     sortby,
+    subordinates_filter,
 )
 from base.models import (
     Company,
@@ -84,6 +85,7 @@ from employee.forms import (
     excel_columns,
 )
 from employee.methods.methods import (
+    annotate_employee_status,
     bulk_create_department_import,
     bulk_create_employee_import,
     bulk_create_employee_types,
@@ -1332,12 +1334,14 @@ def employee_view(request):
 
     # Store filtered IDs in session
     request.session["filtered_employees"] = [emp.id for emp in filter_obj]
+    data = paginator_qry(filter_obj, page_number)
+    annotate_employee_status(data)
 
     return render(
         request,
         "employee_personal_info/employee_view.html",
         {
-            "data": paginator_qry(filter_obj, page_number),
+            "data": data,
             "pd": previous_data,
             "f": EmployeeFilter(),
             "update_fields_form": update_fields,
@@ -2067,6 +2071,7 @@ def employee_filter_view(request):
     else:
         employees = sortby(request, employees, "orderby")
         employees = paginator_qry(employees, page_number)
+        annotate_employee_status(employees)
 
         # Store the employees in the session
         request.session["filtered_employees"] = [employee.id for employee in employees]
@@ -2112,11 +2117,13 @@ def employee_card(request):
         )
     page_number = request.GET.get("page")
     employees = sortby(request, filter_obj.qs, "orderby")
+    data = paginator_qry(employees, page_number)
+    annotate_employee_status(data)
     return render(
         request,
         "employee_personal_info/employee_card.html",
         {
-            "data": paginator_qry(employees, page_number),
+            "data": data,
             "f": filter_obj,
             "pd": previous_data,
         },
@@ -2151,11 +2158,13 @@ def employee_list(request):
     )
     employees = sortby(request, employees, "orderby")
     page_number = request.GET.get("page")
+    data = paginator_qry(employees, page_number)
+    annotate_employee_status(data)
     return render(
         request,
         "employee_personal_info/employee_list.html",
         {
-            "data": paginator_qry(employees, page_number),
+            "data": data,
             "f": filter_obj,
             "pd": previous_data,
         },
@@ -2532,11 +2541,13 @@ def employee_search(request):
     employees = sortby(request, employees, "orderby")
     data_dict = parse_qs(previous_data)
     get_key_instances(Employee, data_dict)
+    data = paginator_qry(employees, page_number)
+    annotate_employee_status(data)
     return render(
         request,
         template,
         {
-            "data": paginator_qry(employees, page_number),
+            "data": data,
             "pd": previous_data,
             "filter_dict": data_dict,
         },
@@ -3680,6 +3691,7 @@ def bonus_points_tab(request, emp_id):
                 }
             )
         activity_list = sorted(activity_list, key=lambda x: x["date"], reverse=True)
+        activity_list = paginator_qry(activity_list, request.GET.get("page"))
         context = {
             "employee": employee_obj,
             "points": points,
@@ -3827,52 +3839,45 @@ def organisation_chart(request):
     # Iterate through the queryset and add reporting manager id and name to the dictionary
     result_dict = {item.id: item.get_full_name() for item in reporting_managers}
 
-    entered_req_managers = []
-
-    # Helper function to recursively create the hierarchy structure
+    # Helper function to create the hierarchy structure
     def create_hierarchy(manager):
         """
-        Hierarchy generator method
+        Hierarchy generator method, the whole reporting subtree of the manager
+        is loaded with one query and arranged in memory
         """
-        nodes = []
-        # check the manager is a reporting manager if yes, store it into entered_req_managers
-        if manager.id in result_dict.keys():
-            entered_req_managers.append(manager)
-        # filter the subordinates
-        subordinates = Employee.objects.filter(
-            is_active=True, employee_work_info__reporting_manager_id=manager
-        ).exclude(id=manager.id)
-
-        # itrating through subordinates
-        for employee in subordinates:
-            if employee in entered_req_managers:
-                continue
-            # check the employee is a reporting manager if yes,remove className store
-            # it into entered_req_managers
-            if employee.id in result_dict.keys():
-                nodes.append(
-                    {
-                        "name": employee.get_full_name(),
-                        "title": getattr(
-                            employee.get_job_position(), "job_position", _("Not set")
-                        ),
-                        "children": create_hierarchy(employee),
-                    }
-                )
-                entered_req_managers.append(employee)
-
-            else:
-                nodes.append(
-                    {
-                        "name": employee.get_full_name(),
-                        "title": getattr(
-                            employee.get_job_position(), "job_position", _("Not set")
-                        ),
-                        "className": "middle-level",
-                        "children": create_hierarchy(employee),
-                    }
-                )
-        return nodes
+        subtree = (
+            Employee.objects.filter(is_active=True)
+            .filter(subordinates_filter(manager))
+            .select_related("employee_work_info__job_position_id")
+        )
+        children = {}
+        for employee in subtree:
+            children.setdefault(
+                employee.employee_work_info.reporting_manager_id_id, []
+            ).append(employee)
+
+        visited = {manager.id}
+
+        def build_nodes(parent_id):
+            nodes = []
+            for employee in children.get(parent_id, []):
+                if employee.id in visited:
+                    continue
+                visited.add(employee.id)
+                node = {
+                    "name": employee.get_full_name(),
+                    "title": getattr(
+                        employee.get_job_position(), "job_position", _("Not set")
+                    ),
+                }
+                # reporting managers are shown without the middle-level class
+                if employee.id not in result_dict:
+                    node["className"] = "middle-level"
+                node["children"] = build_nodes(employee.id)
+                nodes.append(node)
+            return nodes
+
+        return build_nodes(manager.id)
 
     selected_company = request.session.get("selected_company")
     if (
@@ -8,6 +8,7 @@ This page is used to register filter for employee models
 from django import forms
 from django_filters import CharFilter, DateFilter
 
+from base.search import search_queryset
 from helpdesk.models import FAQ, FAQCategory, Ticket
 from horilla.filters import FilterSet
 
@@ -20,7 +21,7 @@ class FAQFilter(FilterSet):
         FilterSet (class): custom filter set class to apply styling
     """
 
-    search = CharFilter(field_name="question", lookup_expr="icontains")
+    search = CharFilter(method="search_method")
 
     class Meta:
         """
@@ -33,6 +34,15 @@ class FAQFilter(FilterSet):
             "tags",
         ]
 
+    def search_method(self, queryset, _, value):
+        """
+        Indexed search of the FAQs, the question until the index is built
+        """
+        indexed = search_queryset(queryset, value)
+        if indexed is not None:
+            return indexed
+        return queryset.filter(question__icontains=value)
+
 
 class FAQCategoryFilter(FilterSet):
     """
@@ -63,7 +73,7 @@ class TicketFilter(FilterSet):
         FilterSet (class): custom filter set class to apply styling
     """
 
-    search = CharFilter(field_name="title", lookup_expr="icontains")
+    search = CharFilter(method="search_method")
     from_date = DateFilter(
         field_name="deadline",
         lookup_expr="gte",
@@ -93,6 +103,15 @@ class TicketFilter(FilterSet):
             "is_active",
         ]
 
+    def search_method(self, queryset, _, value):
+        """
+        Indexed search of the tickets, the title until the index is built
+        """
+        indexed = search_queryset(queryset, value)
+        if indexed is not None:
+            return indexed
+        return queryset.filter(title__icontains=value)
+
 
 class TicketReGroup:
     """
@@ -122,6 +141,9 @@ class FaqSearch(FilterSet):
         """
         This method is used to add custom search condition
         """
+        indexed = search_queryset(queryset, value)
+        if indexed is not None:
+            return indexed
         return (
             queryset.filter(question__icontains=value)
             | queryset.filter(answer__icontains=value)
@@ -0,0 +1,166 @@
+"""
+inbox.py
+
+Ticket inbox query layer of the ticket view.
+
+Each tab (my, allocated and all tickets) is a Q object over one ticket
+queryset, so a tab is filtered, sorted, grouped and paginated in SQL like
+any other queryset. The number of tickets of every tab comes from one
+aggregate query, which is also used as the paginator count of the tabs.
+The tickets of a page are loaded with their owner, type, assignees and tags,
+and the departments, job positions and employees they are raised on are
+fetched in bulk for the whole page.
+"""
+
+from collections import defaultdict
+
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+
+from base.methods import filtersubordinates, get_pagination, is_reportingmanager
+
+INBOX_TABS = ("my", "allocated", "all")
+
+
+def my_tickets_filter(user):
+    """
+    Tickets raised by or for the user
+    """
+    return Q(employee_id=user.employee_get) | Q(created_by=user)
+
+
+def allocated_tickets_filter(employee):
+    """
+    Active tickets forwarded to the department, job position or person of
+    the employee, or claimed by the employee with an approved claim request
+    """
+    from helpdesk.models import ClaimRequest
+
+    query = Q(raised_on=employee.pk, assigning_type="individual")
+    work_info = getattr(employee, "employee_work_info", None)
+    if work_info is not None:
+        if work_info.department_id_id:
+            query |= Q(
+                raised_on=work_info.department_id_id, assigning_type="department"
+            )
+        if work_info.job_position_id_id:
+            query |= Q(
+                raised_on=work_info.job_position_id_id, assigning_type="job_position"
+            )
+    query |= Q(
+        pk__in=ClaimRequest.objects.filter(
+            employee_id=employee, is_approved=True
+        ).values("ticket_id")
+    )
+    return Q(is_active=True) & query
+
+
+def all_tickets_filter(request):
+    """
+    Every ticket with the view permission, the tickets of the subordinates
+    for reporting managers and nothing otherwise
+    """
+    from helpdesk.models import Ticket
+
+    if request.user.has_perm("helpdesk.view_ticket"):
+        return Q()
+    if is_reportingmanager(request):
+        return Q(
+            pk__in=filtersubordinates(
+                request, Ticket.objects.all(), "helpdesk.view_ticket"
+            ).values("pk")
+        )
+    return Q(pk__in=[])
+
+
+def attach_raised_on(tickets):
+    """
+    Load the departments, job positions and employees the tickets are raised
+    on with one query per type, `get_raised_on_object` reads them from the
+    ticket afterwards
+    """
+    from base.models import Department, JobPosition
+    from employee.models import Employee
+
+    models = {
+        "department": Department,
+        "job_position": JobPosition,
+        "individual": Employee,
+    }
+    ids = defaultdict(set)
+    for ticket in tickets:
+        if ticket.assigning_type in models and str(ticket.raised_on).isdigit():
+            ids[ticket.assigning_type].add(int(ticket.raised_on))
+    targets = {
+        assigning_type: models[assigning_type].objects.in_bulk(type_ids)
+        for assigning_type, type_ids in ids.items()
+    }
+    for ticket in tickets:
+        target = targets.get(ticket.assigning_type, {}).get(
+            int(ticket.raised_on) if str(ticket.raised_on).isdigit() else None
+        )
+        if target is not None:
+            ticket._raised_on_object = target
+    return tickets
+
+
+class TicketInbox:
+    """
+    Tabs of the ticket view over the `tickets` queryset
+    """
+
+    def __init__(self, request, tickets):
+        self.tickets = tickets
+        self.filters = {
+            "my": my_tickets_filter(request.user),
+            "allocated": allocated_tickets_filter(request.user.employee_get),
+            "all": all_tickets_filter(request),
+        }
+        self._counts = None
+
+    def queryset(self, tab):
+        """
+        Tickets of the tab
+        """
+        return self.tickets.filter(self.filters[tab])
+
+    def counts(self):
+        """
+        {tab: number of tickets} with one aggregate query
+        """
+        if self._counts is None:
+            self._counts = self.tickets.order_by().aggregate(
+                **{
+                    tab: Count("pk", filter=self.filters[tab], distinct=True)
+                    for tab in INBOX_TABS
+                }
+            )
+        return self._counts
+
+    def page(self, tab, page_number, queryset=None):
+        """
+        Page of the tab with the tickets of the page loaded with their
+        relations. `queryset` is the tab queryset in another order (as
+        returned by `sortby`), it must not filter out any ticket.
+        """
+        if queryset is None:
+            queryset = self.queryset(tab)
+        paginator = Paginator(
+            queryset.select_related("employee_id", "ticket_type").prefetch_related(
+                "assigned_to", "tags"
+            ),
+            get_pagination(),
+        )
+        paginator.count = self.counts()[tab]
+        page = paginator.get_page(page_number)
+        page.object_list = attach_raised_on(list(page.object_list))
+        return page
+
+    def pages(self, page_numbers):
+        """
+        {"<tab>_tickets": page} of every tab from {tab: page number}
+        """
+        return {
+            f"{tab}_tickets": self.page(tab, page_numbers.get(tab))
+            for tab in INBOX_TABS
+        }
@@ -138,16 +138,19 @@ class Ticket(HorillaModel):
             raise ValidationError(_("Deadline should be greater than today"))
 
     def get_raised_on(self):
-        obj_id = self.raised_on
+        raised_on = self.get_raised_on_object()
         if self.assigning_type == "department":
-            raised_on = Department.objects.get(id=obj_id).department
+            raised_on = raised_on.department
         elif self.assigning_type == "job_position":
-            raised_on = JobPosition.objects.get(id=obj_id).job_position
+            raised_on = raised_on.job_position
         elif self.assigning_type == "individual":
-            raised_on = Employee.objects.get(id=obj_id).get_full_name()
+            raised_on = raised_on.get_full_name()
         return raised_on
 
     def get_raised_on_object(self):
+        # loaded in bulk for a page of tickets by `helpdesk.inbox`
+        if hasattr(self, "_raised_on_object"):
+            return self._raised_on_object
         obj_id = self.raised_on
         if self.assigning_type == "department":
             raised_on = Department.objects.get(id=obj_id)
@@ -1,3 +1,102 @@
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from base.models import Department, JobPosition
+from employee.models import Employee, EmployeeWorkInformation
+from helpdesk.inbox import TicketInbox
+from helpdesk.models import ClaimRequest, Ticket, TicketType
+
+
+def create_employee(name):
+    employee = Employee(
+        employee_first_name=name, email=f"{name.lower()}@horilla.test", phone="1"
+    )
+    employee.save()
+    return employee
+
+
+class TicketInboxTests(TestCase):
+    def setUp(self):
+        self.agent = create_employee("Agent")
+        self.owner = create_employee("Owner")
+        support = Department(department="Support")
+        support.save()
+        self.developer = JobPosition(job_position="Developer", department_id=support)
+        self.developer.save()
+        EmployeeWorkInformation.objects.entire().filter(employee_id=self.agent).update(
+            department_id=support
+        )
+        ticket_type = TicketType.objects.bulk_create(
+            [TicketType(title="Issue", type="suggestion", prefix="ISS")]
+        )[0]
+
+        def ticket(title, owner, assigning_type, raised_on, **kwargs):
+            return Ticket(
+                title=title,
+                employee_id=owner,
+                ticket_type=ticket_type,
+                description=title,
+                assigning_type=assigning_type,
+                raised_on=str(raised_on),
+                **kwargs,
+            )
+
+        # bulk inserts skip the ticket notifications
+        self.own, self.forwarded, self.closed, self.claimed, self.other = (
+            Ticket.objects.bulk_create(
+                [
+                    ticket("Own", self.agent, "individual", self.owner.pk),
+                    ticket("Forwarded", self.owner, "department", support.pk),
+                    ticket(
+                        "Closed",
+                        self.owner,
+                        "individual",
+                        self.agent.pk,
+                        is_active=False,
+                    ),
+                    ticket("Claimed", self.owner, "job_position", self.developer.pk),
+                    ticket("Other", self.owner, "job_position", self.developer.pk),
+                ]
+            )
+        )
+        ClaimRequest.objects.bulk_create(
+            [
+                ClaimRequest(
+                    ticket_id=self.claimed, employee_id=self.agent, is_approved=True
+                )
+            ]
+        )
+
+    def inbox(self, user):
+        user = User.objects.get(pk=user.pk)
+        return TicketInbox(SimpleNamespace(user=user), Ticket.objects.entire())
+
+    def titles(self, queryset):
+        return sorted(ticket.title for ticket in queryset)
+
+    def test_tabs(self):
+        inbox = self.inbox(self.agent.employee_user_id)
+        self.assertEqual(self.titles(inbox.queryset("my")), ["Own"])
+        self.assertEqual(
+            self.titles(inbox.queryset("allocated")), ["Claimed", "Forwarded"]
+        )
+        self.assertEqual(self.titles(inbox.queryset("all")), [])
+
+    def test_counts_come_from_one_query(self):
+        user = self.agent.employee_user_id
+        user.is_superuser = True
+        user.save()
+        inbox = self.inbox(user)
+        with self.assertNumQueries(1):
+            self.assertEqual(inbox.counts(), {"my": 1, "allocated": 2, "all": 5})
+            inbox.counts()
+
+    def test_page_loads_what_it_raises_on(self):
+        inbox = self.inbox(self.agent.employee_user_id)
+        page = inbox.page("allocated", 1)
+        self.assertEqual(page.paginator.count, 2)
+        with self.assertNumQueries(0):
+            raised_on = sorted(str(ticket.get_raised_on()) for ticket in page)
+        self.assertEqual(raised_on, ["Developer", "Support"])
@@ -15,6 +15,7 @@ from base.backends import ConfiguredEmailBackend
 from base.models import Department
 from employee.models import EmployeeWorkInformation
 from helpdesk.models import Ticket
+from horilla_audit.methods import get_diff_page
 
 logger = logging.getLogger(__name__)
 
@@ -105,7 +106,7 @@ class TicketSendThread(Thread):
             owner = self.ticket.employee_id
             manager = self.department_manager
 
-            tracking = self.ticket.tracking()
+            tracking = get_diff_page(self.ticket, per_page=1).object_list
             updated_by = tracking[0]["updated_by"]
             new_status = tracking[0]["changes"][0]["new"]
             old_status = tracking[0]["changes"][0]["old"]
@@ -9,6 +9,7 @@ from urllib.parse import parse_qs
 from django.conf import settings
 from django.contrib import messages
 from django.core import serializers
+from django.core.paginator import Paginator
 from django.db.models import ProtectedError
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.shortcuts import redirect, render
@@ -18,13 +19,7 @@ from django.utils.translation import gettext as _
 from django.views.decorators.http import require_http_methods
 
 from base.forms import TagsForm
-from base.methods import (
-    filtersubordinates,
-    get_key_instances,
-    is_reportingmanager,
-    paginator_qry,
-    sortby,
-)
+from base.methods import get_key_instances, get_pagination, sortby
 from base.models import Department, JobPosition, Tags
 from employee.models import Employee
 from employee.views import get_content_type
@@ -48,6 +43,7 @@ from helpdesk.forms import (
     TicketTagForm,
     TicketTypeForm,
 )
+from helpdesk.inbox import INBOX_TABS, TicketInbox, allocated_tickets_filter
 from helpdesk.methods import is_department_manager
 from helpdesk.models import (
     FAQ,
@@ -385,49 +381,23 @@ def ticket_view(request):
     Parameters:
         request (HttpRequest): The HTTP request object.
     """
-    tickets = Ticket.objects.filter(is_active=True)
     view = request.GET.get("view") if request.GET.get("view") else "list"
-    employee = request.user.employee_get
     previous_data = request.GET.urlencode()
-    my_page_number = request.GET.get("my_page")
-    all_page_number = request.GET.get("all_page")
-    allocated_page_number = request.GET.get("allocated_page")
-
-    my_tickets = tickets.filter(employee_id=employee) | tickets.filter(
-        created_by=request.user
+    inbox = TicketInbox(request, Ticket.objects.filter(is_active=True))
+    pages = inbox.pages(
+        {
+            "my": request.GET.get("my_page"),
+            "all": request.GET.get("all_page"),
+            "allocated": request.GET.get("allocated_page"),
+        }
     )
-    all_tickets = []
-    if is_reportingmanager(request):
-        all_tickets = filtersubordinates(request, tickets, "helpdesk.view_ticket")
-    if request.user.has_perm("helpdesk.view_ticket"):
-        all_tickets = tickets
-    allocated_tickets = []
-    ticket_list = tickets.filter(is_active=True)
-    user = request.user.employee_get
-    if hasattr(user, "employee_work_info"):
-        department = user.employee_work_info.department_id
-        job_position = user.employee_work_info.job_position_id
-        if department:
-            tickets_items = ticket_list.filter(
-                raised_on=department.id, assigning_type="department"
-            )
-            allocated_tickets += tickets_items
-        if job_position:
-            tickets_items = ticket_list.filter(
-                raised_on=job_position.id, assigning_type="job_position"
-            )
-            allocated_tickets += tickets_items
-
-    tickets_items = ticket_list.filter(raised_on=user.id, assigning_type="individual")
-    allocated_tickets += tickets_items
 
     data_dict = parse_qs(previous_data)
     get_key_instances(Ticket, data_dict)
     template = "helpdesk/ticket/ticket_view.html"
     context = {
-        "my_tickets": paginator_qry(my_tickets, my_page_number),
-        "all_tickets": paginator_qry(all_tickets, all_page_number),
-        "allocated_tickets": paginator_qry(allocated_tickets, allocated_page_number),
+        **pages,
+        "ticket_counts": inbox.counts(),
         "f": TicketFilter(request.GET),
         "gp_fields": TicketReGroup.fields,
         "ticket_status": TICKET_STATUS,
@@ -725,24 +695,7 @@ def ticket_delete(request, ticket_id):
 
 
 def get_allocated_tickets(request):
-    user = request.user.employee_get
-    department = user.employee_work_info.department_id
-    job_position = user.employee_work_info.job_position_id
-
-    tickets_items1 = Ticket.objects.filter(
-        is_active=True, raised_on=department.id, assigning_type="department"
-    )
-    # allocated_tickets += tickets_items
-    tickets_items2 = Ticket.objects.filter(
-        is_active=True, raised_on=job_position.id, assigning_type="job_position"
-    )
-    # allocated_tickets += tickets_items
-    tickets_items3 = Ticket.objects.filter(
-        is_active=True, raised_on=user.id, assigning_type="individual"
-    )
-    # allocated_tickets += tickets_items
-    allocated_tickets = tickets_items1 | tickets_items2 | tickets_items3
-    return allocated_tickets
+    return Ticket.objects.filter(allocated_tickets_filter(request.user.employee_get))
 
 
 @login_required
@@ -759,87 +712,43 @@ def ticket_filter(request):
     POST : return ticket view
     """
     previous_data = request.GET.urlencode()
-    tickets = TicketFilter(request.GET).qs
-    my_page_number = request.GET.get("my_page")
-    all_page_number = request.GET.get("all_page")
-    allocated_page_number = request.GET.get("allocated_page")
-    tickets_items1 = Ticket.objects.none()
-    tickets_items2 = Ticket.objects.none()
-
-    my_tickets = tickets.filter(employee_id=request.user.employee_get) | tickets.filter(
-        created_by=request.user
-    )
-
-    all_tickets = tickets.filter(is_active=True)
-    all_tickets = filtersubordinates(request, tickets, "helpdesk.add_tickets")
-    if request.user.has_perm("helpdesk.view_ticket"):
-        all_tickets = tickets
-
-    allocated_tickets = Ticket.objects.none()
-    user = request.user.employee_get
-    department = user.employee_work_info.department_id
-    job_position = user.employee_work_info.job_position_id
-    ticket_list = tickets.filter(is_active=True)
-
-    if hasattr(user, "employee_work_info"):
-        department = user.employee_work_info.department_id
-        job_position = user.employee_work_info.job_position_id
-        if department:
-            tickets_items1 = ticket_list.filter(
-                raised_on=department.id, assigning_type="department"
-            )
-        if job_position:
-            tickets_items2 = ticket_list.filter(
-                raised_on=job_position.id, assigning_type="job_position"
-            )
-
-    tickets_items3 = ticket_list.filter(raised_on=user.id, assigning_type="individual")
+    inbox = TicketInbox(request, TicketFilter(request.GET).qs)
+    page_numbers = {
+        "my": request.GET.get("my_page"),
+        "all": request.GET.get("all_page"),
+        "allocated": request.GET.get("allocated_page"),
+    }
 
     template = "helpdesk/ticket/ticket_list.html"
-
     if request.GET.get("view") == "card":
         template = "helpdesk/ticket/ticket_card.html"
-    allocated_tickets = (
-        list(tickets_items1) + list(tickets_items2) + list(tickets_items3)
-    )
-    if request.GET.get("sortby"):
-        all_tickets = sortby(request, all_tickets, "sortby")
-        my_tickets = sortby(request, my_tickets, "sortby")
-        allocated_tickets = tickets_items1 | tickets_items2 | tickets_items3
-        allocated_tickets = sortby(request, allocated_tickets, "sortby")
 
     field = request.GET.get("field")
     if field != "" and field is not None:
-        my_tickets = group_by_queryset(
-            my_tickets, field, request.GET.get("my_page"), "my_page"
-        )
-        all_tickets = group_by_queryset(
-            all_tickets, field, request.GET.get("all_page"), "all_page"
-        )
-        tickets_items1 = group_by_queryset(
-            tickets_items1, field, request.GET.get("allocated_page"), "allocated_page"
-        )
-        tickets_items2 = group_by_queryset(
-            tickets_items2, field, request.GET.get("allocated_page"), "allocated_page"
-        )
-        tickets_items3 = group_by_queryset(
-            tickets_items3, field, request.GET.get("allocated_page"), "allocated_page"
-        )
         template = "helpdesk/ticket/ticket_group.html"
-        allocated_tickets = (
-            list(tickets_items1) + list(tickets_items2) + list(tickets_items3)
-        )
+        pages = {
+            f"{tab}_tickets": group_by_queryset(
+                inbox.queryset(tab), field, page_numbers[tab], f"{tab}_page"
+            )
+            for tab in INBOX_TABS
+        }
+    elif request.GET.get("sortby"):
+        pages = {
+            f"{tab}_tickets": inbox.page(
+                tab,
+                page_numbers[tab],
+                sortby(request, inbox.queryset(tab), "sortby"),
+            )
+            for tab in INBOX_TABS
+        }
     else:
-        my_tickets = paginator_qry(my_tickets, my_page_number)
-        all_tickets = paginator_qry(all_tickets, all_page_number)
-        allocated_tickets = paginator_qry(allocated_tickets, allocated_page_number)
+        pages = inbox.pages(page_numbers)
 
     data_dict = parse_qs(previous_data)
     get_key_instances(Ticket, data_dict)
     context = {
-        "my_tickets": my_tickets,
-        "all_tickets": all_tickets,
-        "allocated_tickets": allocated_tickets,
+        **pages,
+        "ticket_counts": inbox.counts(),
         "f": TicketFilter(request.GET),
         "pd": previous_data,
         "ticket_status": TICKET_STATUS,
@@ -883,6 +792,11 @@ def ticket_detail(request, ticket_id, **kwargs):
             )
 
         sorted_activity_list = sorted(activity_list, key=itemgetter("date"))
+        # the newest activity is on the last page, open that one by default
+        paginator = Paginator(sorted_activity_list, get_pagination())
+        activity_page = paginator.get_page(
+            request.GET.get("page") or paginator.num_pages
+        )
 
         color = "success"
         remaining_days = ticket.deadline - today
@@ -909,7 +823,8 @@ def ticket_detail(request, ticket_id, **kwargs):
             "attachments": attachments,
             "ticket_status": TICKET_STATUS,
             "tag_form": TicketTagForm(instance=ticket),
-            "sorted_activity_list": sorted_activity_list,
+            "sorted_activity_list": activity_page,
+            "last_activity": sorted_activity_list[-1] if sorted_activity_list else None,
             "create_tag_f": TagsForm(),
             "color": color,
             "remaining": remaining,
@@ -0,0 +1,197 @@
+"""
+horilla/model_cache.py
+
+Per-model version keys for caching query results in the shared cache.
+
+Every model a cached value is built from has a version (the timestamp of
+its last write) stored in the Django cache. The models are registered with
+`track_models` (`cached_query`, `cache_for_models` and the API response
+cache do it for the models they read), and only the post_save, post_delete,
+post_bulk_update and m2m_changed signals of the registered models bump a
+version, so the other writes of the app never touch the cache. A value
+cached together with the versions of the models it was built from is
+invalidated as soon as any of those models is written, in every worker.
+
+The versions are only shared between worker processes when the default
+cache is (Redis or memcached, see CACHES in the settings).
+
+A model must be registered in every process that writes it, so the models
+read through `cached_query` are also registered when the app is ready (see
+`base.apps`).
+
+Usage:
+
+    @cache_for_models(Department, JobPosition)
+    def department_positions(company_id):
+        ...
+
+    positions = cached_query(
+        f"open_positions:{company_id}", [JobPosition], build_positions
+    )
+"""
+
+import functools
+import hashlib
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from horilla.signals import post_bulk_update
+
+VERSION_KEY_PREFIX = "horilla:model_version"
+QUERY_KEY_PREFIX = "horilla:model_cache"
+MODEL_CACHE_TIMEOUT = getattr(settings, "MODEL_CACHE_TIMEOUT", 900)
+_MISSING = object()
+TRACKED_MODELS = set()
+_CONNECTED_MODELS = set()
+
+
+def version_key(model, scope=None):
+    """
+    Cache key holding the version of a model (and scope value)
+    """
+    key = f"{VERSION_KEY_PREFIX}:{model._meta.label_lower}"
+    if scope is not None:
+        key = f"{key}:{scope}"
+    return key
+
+
+def get_versions(keys):
+    """
+    Current versions for the given version keys.
+
+    Keys that are not in the cache yet (or were evicted) start at the current
+    time, which also invalidates anything cached against an older value.
+    """
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = time.time()
+        for key in missing:
+            cache.add(key, now, None)
+        versions.update(cache.get_many(missing))
+        for key in missing:
+            versions.setdefault(key, now)
+    return versions
+
+
+def bump_versions(keys):
+    """
+    Mark the given version keys as changed
+    """
+    if keys:
+        now = time.time()
+        cache.set_many({key: now for key in keys}, None)
+
+
+def model_versions(models):
+    """
+    Version of each model, in the order of `models`
+    """
+    keys = [version_key(model) for model in models]
+    versions = get_versions(keys)
+    return [versions[key] for key in keys]
+
+
+def _on_save_or_delete(sender, **kwargs):
+    bump_versions([version_key(sender)])
+
+
+def _on_bulk_update(sender, *args, **kwargs):
+    bump_versions([version_key(sender)])
+
+
+def _on_m2m_changed(sender, instance, action, model=None, **kwargs):
+    if not action.startswith("post_"):
+        return
+    bump_versions(
+        [
+            version_key(changed)
+            for changed in (type(instance), model)
+            if changed in TRACKED_MODELS
+        ]
+    )
+
+
+def track_models(*models):
+    """
+    Bump the version of the models whenever they are written through the
+    ORM. Models registered before the app registry is ready are connected by
+    `connect_model_versions` once it is.
+    """
+    if TRACKED_MODELS.issuperset(models):
+        return
+    TRACKED_MODELS.update(models)
+    if apps.models_ready:
+        connect_model_versions()
+
+
+def connect_model_versions():
+    """
+    Connect the version receivers of the tracked models not connected yet
+    """
+    for model in TRACKED_MODELS - _CONNECTED_MODELS:
+        _CONNECTED_MODELS.add(model)
+        uid = f"horilla_model_version_{model._meta.label_lower}"
+        post_save.connect(_on_save_or_delete, sender=model, dispatch_uid=uid)
+        post_delete.connect(_on_save_or_delete, sender=model, dispatch_uid=uid)
+        post_bulk_update.connect(_on_bulk_update, sender=model, dispatch_uid=uid)
+        # m2m relations declared on the model and on the models pointing to it
+        throughs = [field.remote_field.through for field in model._meta.many_to_many]
+        throughs += [
+            relation.through
+            for relation in model._meta.related_objects
+            if relation.many_to_many
+        ]
+        for through in throughs:
+            m2m_changed.connect(
+                _on_m2m_changed,
+                sender=through,
+                dispatch_uid=f"horilla_model_version_{through._meta.label_lower}",
+            )
+
+
+def cached_query(key, models, builder, timeout=None):
+    """
+    Value of `builder()` cached under `key` until one of `models` is written
+    """
+    track_models(*models)
+    versions = ":".join(str(version) for version in model_versions(models))
+    digest = hashlib.md5(versions.encode("utf-8")).hexdigest()
+    cache_key = f"{QUERY_KEY_PREFIX}:{key}:{digest}"
+    value = cache.get(cache_key, _MISSING)
+    if value is _MISSING:
+        value = builder()
+        cache.set(cache_key, value, MODEL_CACHE_TIMEOUT if timeout is None else timeout)
+    return value
+
+
+def cache_for_models(*models, timeout=None):
+    """
+    Cache the result of a helper until one of `models` is written. The
+    arguments of the call are part of the key, so they must have a stable
+    `repr` (ids, strings, dates).
+    """
+
+    track_models(*models)
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            arguments = repr((args, sorted(kwargs.items())))
+            digest = hashlib.md5(arguments.encode("utf-8")).hexdigest()
+            return cached_query(
+                f"{name}:{digest}",
+                models,
+                lambda: func(*args, **kwargs),
+                timeout=timeout,
+            )
+
+        return wrapper
+
+    return decorator
@@ -95,6 +95,13 @@ class HorillaModel(models.Model):
         blank=True,
         verbose_name=_("Created At"),
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name=_("Updated At"),
+    )
     created_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
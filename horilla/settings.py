@@ -140,6 +140,24 @@ else:
         }
     }
 
+# Cache
+# The default cache holds the sort and filter state, the model version keys
+# and the cached queries. The local memory default only works with a single
+# worker process: deployments running several workers must share one cache
+# (CACHE_URL=redis://host:6379/1 or pymemcache://host:11211), otherwise a
+# write in one worker is not seen by the entries cached in the others.
+# Rendered payslip PDFs go to their own size limited cache so they never
+# evict the small entries of the default cache.
+
+CACHES = {
+    "default": env.cache_url("CACHE_URL", default="locmemcache://"),
+    "pdf": env.cache_url("PDF_CACHE_URL", default="locmemcache://horilla-pdf"),
+}
+CACHES["default"].setdefault("KEY_PREFIX", env("CACHE_KEY_PREFIX", default="horilla"))
+CACHES["pdf"].setdefault("OPTIONS", {}).setdefault(
+    "MAX_ENTRIES", env.int("PDF_CACHE_MAX_ENTRIES", default=200)
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -1,15 +1,28 @@
+import hashlib
+import json
 from functools import wraps
 
+from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
 from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from rest_framework import status
 from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from base.models import MultipleApprovalManagers
 from employee.models import EmployeeWorkInformation
 from horilla.horilla_middlewares import _thread_locals
+from horilla_api.api_methods.base.cache import (
+    RESPONSE_KEY_PREFIX,
+    TRACKED_MODELS,
+    get_versions,
+    track_model_versions,
+    version_key,
+)
 from horilla_views.cbv_methods import decorator_with_arguments
 
 
@@ -143,3 +156,101 @@ def permission_required(function, perm):
             return Response({"message": "No permission"}, status=401)
 
     return _function
+
+
+def cached_api_response(*models, timeout=None):
+    """
+    Conditional GET and per-user response cache for read-only API views.
+
+    `models` are the models the view reads, either a model class or a
+    `(model, scope_field, scope_getter)` tuple where `scope_getter(request)`
+    returns the value of `scope_field` the response depends on. The models
+    have to be listed in horilla_api/signals.py so their versions are
+    tracked from app loading on (models missing there are only tracked once
+    the view is imported). The ETag is derived from the user, the full path
+    and the model versions:
+    a matching If-None-Match (or a fresh If-Modified-Since) returns 304
+    without touching the view, and a 200 response is served from the cache
+    until one of the models is written again.
+    """
+    timeout = (
+        timeout
+        if timeout is not None
+        else getattr(settings, "API_RESPONSE_CACHE_TIMEOUT", 60 * 15)
+    )
+    scoped_models = []
+    for model in models:
+        if isinstance(model, tuple):
+            model, scope_field, scope_getter = model
+        else:
+            scope_field, scope_getter = None, None
+        if model not in TRACKED_MODELS or scope_field:
+            track_model_versions(model, scope_field)
+        scoped_models.append((model, scope_getter))
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != "GET" or not request.user.is_authenticated:
+                return func(self, request, *args, **kwargs)
+
+            keys = [
+                (
+                    version_key(model, scope_getter(request))
+                    if scope_getter
+                    else version_key(model)
+                )
+                for model, scope_getter in scoped_models
+            ]
+            versions = get_versions(keys)
+            signature = "|".join(
+                [
+                    str(request.user.pk),
+                    getattr(request, "LANGUAGE_CODE", ""),
+                    request.get_full_path(),
+                ]
+                + [f"{key}={versions[key]}" for key in keys]
+            )
+            digest = hashlib.md5(signature.encode()).hexdigest()
+            etag = quote_etag(digest)
+            last_modified = int(max(versions.values())) if versions else None
+
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+            if last_modified:
+                headers["Last-Modified"] = http_date(last_modified)
+
+            if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+            if_modified_since = parse_http_date_safe(
+                request.META.get("HTTP_IF_MODIFIED_SINCE", "")
+            )
+            if if_none_match:
+                not_modified = etag in [
+                    tag.strip() for tag in if_none_match.split(",")
+                ] or (if_none_match.strip() == "*")
+            else:
+                not_modified = bool(
+                    last_modified
+                    and if_modified_since
+                    and last_modified <= if_modified_since
+                )
+            if not_modified:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            cache_key = f"{RESPONSE_KEY_PREFIX}:{digest}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return Response(cached, status=status.HTTP_200_OK, headers=headers)
+
+            response = func(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and hasattr(response, "data"):
+                # plain JSON types, the serializer bound ReturnList/ReturnDict
+                # are not picklable
+                data = json.loads(json.dumps(response.data, cls=JSONEncoder))
+                cache.set(cache_key, data, timeout)
+                for header, value in headers.items():
+                    response[header] = value
+            return response
+
+        return wrapper
+
+    return decorator
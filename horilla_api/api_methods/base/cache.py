@@ -0,0 +1,80 @@
+"""
+horilla_api/api_methods/base/cache.py
+
+Per-model version counters used for conditional GET and response caching.
+
+The model wide versions come from horilla.model_cache, which bumps them for
+the models registered here. This module adds versions scoped to a column
+value (e.g. notifications per recipient). Views decorated with `cached_api_response`
+derive their ETag/Last-Modified from the versions of the models they read, so
+a changed version is enough to invalidate every cached response built from
+that model.
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from horilla.model_cache import (
+    bump_versions,
+    get_versions,
+    track_models,
+    version_key,
+)
+from horilla.signals import post_bulk_update
+
+RESPONSE_KEY_PREFIX = "horilla_api:response"
+
+TRACKED_MODELS = {}
+THROUGH_MODELS = {}
+
+
+def _scoped_keys(sender, instance):
+    scope_field = TRACKED_MODELS.get(sender)
+    if not scope_field:
+        return []
+    return [version_key(sender, getattr(instance, scope_field, None))]
+
+
+def _on_save_or_delete(sender, instance, **kwargs):
+    bump_versions(_scoped_keys(sender, instance))
+
+
+def _on_bulk_update(sender, queryset, *args, **kwargs):
+    scope_field = TRACKED_MODELS.get(sender)
+    if scope_field:
+        scopes = queryset.order_by().values_list(scope_field, flat=True).distinct()
+        bump_versions([version_key(sender, scope) for scope in scopes])
+
+
+def _on_m2m_changed(sender, instance, action, **kwargs):
+    if not action.startswith("post_"):
+        return
+    keys = []
+    for model in THROUGH_MODELS.get(sender, []):
+        if isinstance(instance, model):
+            keys.extend(_scoped_keys(model, instance))
+    bump_versions(keys)
+
+
+def track_model_versions(model, scope_field=None):
+    """
+    Register a model read by `cached_api_response`.
+
+    The model is tracked by horilla.model_cache, which bumps its model wide
+    version. With `scope_field` (an attname such as "recipient_id") a second
+    version is kept per value of that column, so per-user data is not
+    invalidated by writes that belong to other users.
+    """
+    TRACKED_MODELS[model] = scope_field
+    track_models(model)
+    if not scope_field:
+        return
+    uid = f"horilla_api_version_{model._meta.label_lower}"
+    post_save.connect(_on_save_or_delete, sender=model, dispatch_uid=uid)
+    post_delete.connect(_on_save_or_delete, sender=model, dispatch_uid=uid)
+    post_bulk_update.connect(_on_bulk_update, sender=model, dispatch_uid=uid)
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        THROUGH_MODELS.setdefault(through, [])
+        if model not in THROUGH_MODELS[through]:
+            THROUGH_MODELS[through].append(model)
+        m2m_changed.connect(_on_m2m_changed, sender=through, dispatch_uid=uid)
@@ -1,8 +1,15 @@
 from collections import Counter
+from datetime import datetime, time
 
+from django.core.exceptions import FieldDoesNotExist
 from django.db.models import Q
 from django.http import QueryDict
-from rest_framework.pagination import PageNumberPagination
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer
 
 from employee.models import EmployeeWorkInformation
 
@@ -68,3 +75,159 @@ def permission_based_queryset(user, perm, queryset, user_obj=None):
         return merged_queryset
 
     return queryset.filter(employee_id=employee)
+
+
+class HorillaCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the list endpoints.
+
+    The cursor encodes the position of the last row, so fetching a page costs
+    the same at any depth and rows written while a client walks the list are
+    neither skipped nor returned twice.
+    """
+
+    ordering = "-pk"
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+def get_paginator(request, ordering=None):
+    """
+    Cursor pagination when the client asks for it (`?pagination=cursor` or a
+    `cursor` token), page number pagination otherwise so existing clients keep
+    working.
+    """
+    params = request.query_params
+    if params.get("pagination") == "cursor" or "cursor" in params:
+        paginator = HorillaCursorPagination()
+        if ordering:
+            paginator.ordering = ordering
+        return paginator
+    return PageNumberPagination()
+
+
+def sparse_fields(request):
+    """
+    Field names requested through `?fields=a,b,c`, None when not given
+    """
+    value = request.query_params.get("fields")
+    if not value:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def serializer_relations(model, fields):
+    """
+    Related paths the given serializer fields read, as
+    (select_related paths, prefetch_related paths)
+    """
+    select_related = set()
+    prefetch_related = set()
+    for field in fields:
+        source = getattr(field, "source", None)
+        if not source or source == "*":
+            continue
+        parts = source.split(".")
+        current_model = model
+        path = []
+        for index, part in enumerate(parts):
+            try:
+                model_field = current_model._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation:
+                break
+            last = index == len(parts) - 1
+            if model_field.many_to_many or model_field.one_to_many:
+                if last and isinstance(field, (ManyRelatedField, BaseSerializer)):
+                    prefetch_related.add("__".join(path + [part]))
+                break
+            if last and isinstance(field, PrimaryKeyRelatedField):
+                # only the local `<field>_id` column is read
+                break
+            path.append(part)
+            current_model = model_field.related_model
+        if path:
+            select_related.add("__".join(path))
+    return select_related, prefetch_related
+
+
+def filter_updated_since(request, queryset):
+    """
+    Restrict the queryset to rows modified at or after `?updated_since=`
+    (ISO date or datetime)
+    """
+    value = request.query_params.get("updated_since")
+    if not value:
+        return queryset
+    if not any(
+        field.name == "updated_at" for field in queryset.model._meta.concrete_fields
+    ):
+        raise ValidationError(
+            {"updated_since": ["This endpoint does not support updated_since."]}
+        )
+    try:
+        since = parse_datetime(value)
+        if since is None:
+            since_date = parse_date(value)
+            since = since_date and datetime.combine(since_date, time.min)
+    except ValueError:
+        since = None
+    if since is None:
+        raise ValidationError(
+            {"updated_since": ["Enter a valid ISO 8601 date or datetime."]}
+        )
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return queryset.filter(updated_at__gte=since)
+
+
+def paginated_response(
+    request,
+    queryset,
+    serializer_class,
+    context=None,
+    ordering=None,
+    method_relations=None,
+):
+    """
+    Paginated list response with sparse fields and `updated_since` support.
+
+    Only the related objects read by the kept serializer fields are joined
+    (`select_related`) or prefetched. `method_relations` maps
+    SerializerMethodField names to the related paths their method reads.
+    """
+    context = context or {}
+    queryset = filter_updated_since(request, queryset)
+
+    fields = serializer_class(context=context).fields
+    requested = sparse_fields(request)
+    if requested:
+        unknown = requested.difference(fields.keys())
+        if unknown:
+            raise ValidationError(
+                {"fields": [f"Unknown fields: {', '.join(sorted(unknown))}"]}
+            )
+        kept = {name: field for name, field in fields.items() if name in requested}
+    else:
+        kept = fields
+    select_related, prefetch_related = serializer_relations(
+        queryset.model, kept.values()
+    )
+    for name, path in (method_relations or {}).items():
+        if name in kept:
+            select_related.add(path)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+
+    paginator = get_paginator(request, ordering)
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True, context=context)
+    if requested:
+        child_fields = serializer.child.fields
+        for name in list(child_fields.keys()):
+            if name not in requested:
+                child_fields.pop(name)
+    return paginator.get_paginated_response(serializer.data)
@@ -13,6 +13,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from attendance.methods.clock_lookups import get_shift_day
 from attendance.models import Attendance, AttendanceActivity, EmployeeShiftDay
 from attendance.views.clock_in_out import *
 from attendance.views.clock_in_out import clock_out
@@ -25,13 +26,18 @@ from attendance.views.views import *
 from base.backends import ConfiguredEmailBackend
 from base.methods import generate_pdf, is_reportingmanager
 from base.models import HorillaMailTemplate
+from base.shift_calendar import get_employee_shift_day
 from employee.filters import EmployeeFilter
 
 from ...api_decorators.base.decorators import (
     manager_permission_required,
     permission_required,
 )
-from ...api_methods.base.methods import groupby_queryset, permission_based_queryset
+from ...api_methods.base.methods import (
+    groupby_queryset,
+    paginated_response,
+    permission_based_queryset,
+)
 from ...api_serializers.attendance.serializers import (
     AttendanceActivitySerializer,
     AttendanceLateComeEarlyOutSerializer,
@@ -84,20 +90,20 @@ class ClockInAPIView(APIView):
             if request.__dict__.get("datetime"):
                 datetime_now = request.datetime
             if employee and work_info is not None:
-                shift = work_info.shift_id
                 date_today = date.today()
                 if request.__dict__.get("date"):
                     date_today = request.date
                 attendance_date = date_today
-                day = date_today.strftime("%A").lower()
-                day = EmployeeShiftDay.objects.get(day=day)
+                day = get_shift_day(date_today.strftime("%A").lower())
+                calendar_day = get_employee_shift_day(employee, date_today)
+                shift = calendar_day.shift_id if calendar_day else work_info.shift_id
                 now = datetime.now().strftime("%H:%M")
                 if request.__dict__.get("time"):
                     now = request.time.strftime("%H:%M")
                 now_sec = strtime_seconds(now)
                 mid_day_sec = strtime_seconds("12:00")
-                minimum_hour, start_time_sec, end_time_sec = shift_schedule_today(
-                    day=day, shift=shift
+                minimum_hour, start_time_sec, end_time_sec = (
+                    calendar_day.schedule_seconds() if calendar_day else ("00:00", 0, 0)
                 )
                 if start_time_sec > end_time_sec:
                     # night shift
@@ -109,11 +115,17 @@ class ClockInAPIView(APIView):
                         # Here you need to create attendance for yesterday
 
                         date_yesterday = date_today - timedelta(days=1)
-                        day_yesterday = date_yesterday.strftime("%A").lower()
-                        day_yesterday = EmployeeShiftDay.objects.get(day=day_yesterday)
-                        minimum_hour, start_time_sec, end_time_sec = (
-                            shift_schedule_today(day=day_yesterday, shift=shift)
+                        day_yesterday = get_shift_day(
+                            date_yesterday.strftime("%A").lower()
+                        )
+                        calendar_yesterday = get_employee_shift_day(
+                            employee, date_yesterday
                         )
+                        if calendar_yesterday is not None:
+                            shift = calendar_yesterday.shift_id
+                            minimum_hour, start_time_sec, end_time_sec = (
+                                calendar_yesterday.schedule_seconds()
+                            )
                         attendance_date = date_yesterday
                         day = day_yesterday
                 clock_in_attendance_and_activity(
@@ -239,10 +251,12 @@ class AttendanceView(APIView):
                 request, url, field_name, attendances_filter_queryset
             )
         # pagination workflow
-        paginater = PageNumberPagination()
-        page = paginater.paginate_queryset(attendances_filter_queryset, request)
-        serializer = AttendanceSerializer(page, many=True)
-        return paginater.get_paginated_response(serializer.data)
+        return paginated_response(
+            request,
+            attendances_filter_queryset,
+            AttendanceSerializer,
+            method_relations={"employee_profile_url": "employee_id"},
+        )
 
     @manager_permission_required("attendance.add_attendance")
     def post(self, request):
@@ -37,6 +37,7 @@ from employee.models import Actiontype, Employee
 from notifications.signals import notify
 
 from ...api_decorators.base.decorators import (
+    cached_api_response,
     check_approval_status,
     manager_or_owner_permission_required,
     manager_permission_required,
@@ -654,6 +655,7 @@ class EmployeeShiftView(APIView):
     serializer_class = EmployeeShiftSerializer
     permission_classes = [IsAuthenticated]
 
+    @cached_api_response(EmployeeShift)
     def get(self, request, pk=None):
         if pk:
             employee_shift = object_check(EmployeeShift, pk)
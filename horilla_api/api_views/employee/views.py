@@ -8,6 +8,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from base.models import Company, Department, EmployeeShift, JobPosition, WorkType
 from employee.filters import (
     DisciplinaryActionFilter,
     DocumentRequestFilter,
@@ -18,6 +19,7 @@ from employee.models import (
     DisciplinaryAction,
     Employee,
     EmployeeBankDetails,
+    EmployeeTag,
     EmployeeType,
     EmployeeWorkInformation,
     Policy,
@@ -30,11 +32,16 @@ from horilla_documents.models import Document, DocumentRequest
 from notifications.signals import notify
 
 from ...api_decorators.base.decorators import (
+    cached_api_response,
     manager_or_owner_permission_required,
     manager_permission_required,
 )
 from ...api_decorators.employee.decorators import or_condition
-from ...api_methods.base.methods import groupby_queryset, permission_based_queryset
+from ...api_methods.base.methods import (
+    groupby_queryset,
+    paginated_response,
+    permission_based_queryset,
+)
 from ...api_serializers.employee.serializers import (
     ActiontypeSerializer,
     DisciplinaryActionSerializer,
@@ -99,13 +106,16 @@ class EmployeeAPIView(APIView):
     filterset_class = EmployeeFilter
     permission_classes = [IsAuthenticated]
 
+    @cached_api_response(
+        Employee, EmployeeWorkInformation, EmployeeBankDetails, Department, JobPosition
+    )
     def get(self, request, pk):
         user = request.user
         try:
-            employee = Employee.objects.only(
-                "id",
-                "employee_first_name",
-                "employee_last_name",  # include only needed fields
+            employee = Employee.objects.select_related(
+                "employee_work_info__department_id",
+                "employee_work_info__job_position_id",
+                "employee_bank_details",
             ).get(pk=pk)
         except Employee.DoesNotExist:
             return Response(
@@ -188,6 +198,8 @@ class EmployeeAPIView(APIView):
 class EmployeeListAPIView(APIView):
     """
     Retrieves a paginated list of employees with optional search functionality.
+
+    Supports `?pagination=cursor`, sparse `?fields=` and `?updated_since=`.
     """
 
     permission_classes = [IsAuthenticated]
@@ -196,10 +208,9 @@ class EmployeeListAPIView(APIView):
         user = request.user
         search = request.query_params.get("search")
 
-        # Start with a base queryset with only required fields
-        employees_queryset = Employee.objects.only(
-            "id", "employee_first_name", "employee_last_name"
-        )
+        # Related objects are joined by paginated_response based on the
+        # serializer fields the client asked for (`?fields=`)
+        employees_queryset = Employee.objects.all()
 
         # Permission-based filtering
         if user.has_perm("employee.view_employee"):
@@ -207,9 +218,7 @@ class EmployeeListAPIView(APIView):
         else:
             subordinate_qs = user.employee_get.get_subordinate_employees()
             if subordinate_qs.exists():
-                employees_queryset = subordinate_qs.only(
-                    "id", "employee_first_name", "employee_last_name"
-                )
+                employees_queryset = subordinate_qs
             else:
                 employees_queryset = employees_queryset.filter(id=user.employee_get.id)
 
@@ -220,12 +229,7 @@ class EmployeeListAPIView(APIView):
                 | Q(employee_last_name__icontains=search)
             )
 
-        # Paginate
-        paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(employees_queryset, request)
-
-        serializer = EmployeeListSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(request, employees_queryset, EmployeeListSerializer)
 
 
 class EmployeeBankDetailsAPIView(APIView):
@@ -333,8 +337,28 @@ class EmployeeWorkInformationAPIView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @cached_api_response(
+        EmployeeWorkInformation,
+        Employee,
+        JobPosition,
+        Department,
+        EmployeeShift,
+        EmployeeType,
+        WorkType,
+        Company,
+        EmployeeTag,
+    )
     def get(self, request, pk):
-        work_info = EmployeeWorkInformation.objects.get(pk=pk)
+        work_info = EmployeeWorkInformation.objects.select_related(
+            "employee_id",
+            "job_position_id",
+            "department_id",
+            "shift_id",
+            "employee_type_id",
+            "reporting_manager_id",
+            "work_type_id",
+            "company_id",
+        ).get(pk=pk)
         if (
             request.user.employee_get
             in [work_info.employee_id, work_info.reporting_manager_id]
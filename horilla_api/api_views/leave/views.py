@@ -6,7 +6,6 @@ from django.db.models import Count
 from django.http import Http404, QueryDict
 from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -18,20 +17,23 @@ from leave.methods import filter_conditional_leave_request
 from leave.models import LeaveRequest
 from notifications.signals import notify
 
-from ...api_decorators.base.decorators import manager_permission_required
-from ...api_methods.base.methods import groupby_queryset
+from ...api_decorators.base.decorators import (
+    cached_api_response,
+    manager_permission_required,
+)
+from ...api_methods.base.methods import groupby_queryset, paginated_response
 
 
 class EmployeeAvailableLeaveGetAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cached_api_response(AvailableLeave, LeaveType)
     def get(self, request):
         employee = request.user.employee_get
         available_leave = employee.available_leave.all()
-        paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(available_leave, request)
-        serializer = GetAvailableLeaveTypeSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(
+            request, available_leave, GetAvailableLeaveTypeSerializer
+        )
 
 
 class EmployeeLeaveRequestGetCreateAPIView(APIView):
@@ -43,14 +45,13 @@ class EmployeeLeaveRequestGetCreateAPIView(APIView):
         employee = request.user.employee_get
         leave_request = employee.leaverequest_set.all().order_by("-id")
         filterset = self.filterset_class(request.GET, queryset=leave_request)
-        paginator = PageNumberPagination()
         field_name = request.GET.get("groupby_field", None)
         if field_name:
             url = request.build_absolute_uri()
             return groupby_queryset(request, url, field_name, filterset.qs)
-        page = paginator.paginate_queryset(filterset.qs, request)
-        serializer = userLeaveRequestGetAllSerilaizer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(
+            request, filterset.qs, userLeaveRequestGetAllSerilaizer
+        )
 
     def post(self, request):
         employee_id = request.user.employee_get.id
@@ -147,10 +148,7 @@ class LeaveTypeGetCreateAPIView(APIView):
     def get(self, request):
         leave_type = LeaveType.objects.all()
         filterset = self.filterset_class(request.GET, queryset=leave_type)
-        paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(filterset.qs, request)
-        serializer = LeaveTypeAllGetSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(request, filterset.qs, LeaveTypeAllGetSerializer)
 
     @method_decorator(
         permission_required("leave.add_leavetype", raise_exception=True),
@@ -222,14 +220,13 @@ class LeaveAllocationRequestGetCreateAPIView(APIView):
             request, allocation_requests, "leave.view_leaveallocationrequest"
         )
         filterset = self.filterset_class(request.GET, queryset=queryset)
-        paginator = PageNumberPagination()
         field_name = request.GET.get("groupby_field", None)
         if field_name:
             url = request.build_absolute_uri()
             return groupby_queryset(request, url, field_name, filterset.qs)
-        page = paginator.paginate_queryset(filterset.qs, request)
-        serializer = LeaveAllocationRequestGetSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(
+            request, filterset.qs, LeaveAllocationRequestGetSerializer
+        )
 
     def post(self, request):
         data = request.data
@@ -315,14 +312,11 @@ class AssignLeaveGetCreateAPIView(APIView):
             request, available_leave, "leave.view_availableleave"
         )
         filterset = self.filterset_class(request.GET, queryset=queryset)
-        paginator = PageNumberPagination()
         field_name = request.GET.get("groupby_field", None)
         if field_name:
             url = request.build_absolute_uri()
             return groupby_queryset(request, url, field_name, filterset.qs)
-        page = paginator.paginate_queryset(filterset.qs, request)
-        serializer = AssignLeaveGetSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(request, filterset.qs, AssignLeaveGetSerializer)
 
     @method_decorator(
         permission_required("leave.add_availableleave", raise_exception=True),
@@ -414,16 +408,16 @@ class LeaveRequestGetCreateAPIView(APIView):
             | multiple_approvals
         )
         filterset = self.filterset_class(request.GET, queryset=queryset)
-        paginator = PageNumberPagination()
         field_name = request.GET.get("groupby_field", None)
         if field_name:
             url = request.build_absolute_uri()
             return groupby_queryset(request, url, field_name, filterset.qs)
-        page = paginator.paginate_queryset(filterset.qs, request)
-        serializer = LeaveRequestGetAllSerilaizer(
-            page, context={"request": request}, many=True
+        return paginated_response(
+            request,
+            filterset.qs,
+            LeaveRequestGetAllSerilaizer,
+            context={"request": request},
         )
-        return paginator.get_paginated_response(serializer.data)
 
     @manager_permission_required("leave.add_leaverequest")
     def post(self, request):
@@ -530,10 +524,7 @@ class CompanyLeaveGetCreateAPIView(APIView):
     )
     def get(self, request):
         company_leave = CompanyLeave.objects.all().order_by("-id")
-        paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(company_leave, request)
-        serializer = CompanyLeaveSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(request, company_leave, CompanyLeaveSerializer)
 
     @method_decorator(
         permission_required("leave.add_companyleave", raise_exception=True),
@@ -595,10 +586,7 @@ class HolidayGetCreateAPIView(APIView):
     )
     def get(self, request):
         holiday = Holiday.objects.all().order_by("-id")
-        paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(holiday, request)
-        serializer = HoildaySerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(request, holiday, HoildaySerializer)
 
     @method_decorator(
         permission_required("leave.add_holiday", raise_exception=True), name="dispatch"
@@ -931,14 +919,13 @@ class EmployeeLeaveAllocationGetCreateAPIView(APIView):
         employee = self.get_user(request).employee_get
         allocation_requests = employee.leaveallocationrequest_set.all().order_by("-id")
         filterset = self.filterset_class(request.GET, queryset=allocation_requests)
-        paginator = PageNumberPagination()
         field_name = request.GET.get("groupby_field", None)
         if field_name:
             url = request.build_absolute_uri()
             return groupby_queryset(request, url, field_name, filterset.qs)
-        page = paginator.paginate_queryset(filterset.qs, request)
-        serializer = LeaveAllocationRequestGetSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(
+            request, filterset.qs, LeaveAllocationRequestGetSerializer
+        )
 
     def post(self, request):
         data = request.data
@@ -1027,10 +1014,7 @@ class EmployeeAvailableLeaveTypeGetAPIView(APIView):
         available_leave = employee.available_leave.all()
         leave_type_ids = available_leave.values_list("leave_type_id", flat=True)
         leave_types = LeaveType.objects.filter(id__in=leave_type_ids)
-        paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(leave_types, request)
-        serializer = LeaveTypeAllGetSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(request, leave_types, LeaveTypeAllGetSerializer)
 
 
 class LeaveTypeGetPermissionCheckAPIView(APIView):
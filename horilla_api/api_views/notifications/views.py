@@ -3,6 +3,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from notifications.models import Notification
+
+from ...api_decorators.base.decorators import cached_api_response
 from ...api_serializers.notifications.serializers import NotificationSerializer
 
 # Create your views here.
@@ -11,6 +14,9 @@ from ...api_serializers.notifications.serializers import NotificationSerializer
 class NotificationView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cached_api_response(
+        (Notification, "recipient_id", lambda request: request.user.pk)
+    )
     def get(self, request, type):
         if type == "all":
             queryset = request.user.notifications.all()
@@ -4,7 +4,6 @@ from collections import defaultdict
 from django.contrib.auth.decorators import permission_required
 from django.shortcuts import render
 from django.utils.decorators import method_decorator
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -29,7 +28,7 @@ from payroll.models.tax_models import TaxBracket
 from payroll.threadings.mail import MailSendThread
 from payroll.views.views import payslip_pdf
 
-from ...api_methods.base.methods import groupby_queryset
+from ...api_methods.base.methods import groupby_queryset, paginated_response
 from ...api_serializers.payroll.serializers import (
     AllowanceSerializer,
     ContractSerializer,
@@ -66,10 +65,7 @@ class PayslipView(APIView):
         if field_name:
             url = request.build_absolute_uri()
             return groupby_queryset(request, url, field_name, payslip_filter_queryset)
-        pagination = PageNumberPagination()
-        page = pagination.paginate_queryset(payslip_filter_queryset, request)
-        serializer = PayslipSerializer(page, many=True)
-        return pagination.get_paginated_response(serializer.data)
+        return paginated_response(request, payslip_filter_queryset, PayslipSerializer)
 
 
 class PayslipDownloadView(APIView):
@@ -131,10 +127,7 @@ class ContractView(APIView):
         if field_name:
             url = request.build_absolute_uri()
             return groupby_queryset(request, url, field_name, filter_queryset)
-        pagination = PageNumberPagination()
-        page = pagination.paginate_queryset(filter_queryset, request)
-        serializer = ContractSerializer(page, many=True)
-        return pagination.get_paginated_response(serializer.data)
+        return paginated_response(request, filter_queryset, ContractSerializer)
 
     @method_decorator(permission_required("payroll.add_contract"))
     def post(self, request):
@@ -171,10 +164,7 @@ class AllowanceView(APIView):
             return Response(serializer.data, status=200)
         allowance = Allowance.objects.all()
         filter_queryset = AllowanceFilter(request.GET, allowance).qs
-        pagination = PageNumberPagination()
-        page = pagination.paginate_queryset(filter_queryset, request)
-        serializer = AllowanceSerializer(page, many=True)
-        return pagination.get_paginated_response(serializer.data)
+        return paginated_response(request, filter_queryset, AllowanceSerializer)
 
     @method_decorator(permission_required("payroll.add_allowance"))
     def post(self, request):
@@ -211,10 +201,7 @@ class DeductionView(APIView):
             return Response(serializer.data, status=200)
         deduction = Deduction.objects.all()
         filter_queryset = DeductionFilter(request.GET, deduction).qs
-        pagination = PageNumberPagination()
-        page = pagination.paginate_queryset(filter_queryset, request)
-        serializer = DeductionSerializer(page, many=True)
-        return pagination.get_paginated_response(serializer.data)
+        return paginated_response(request, filter_queryset, DeductionSerializer)
 
     @method_decorator(permission_required("payroll.add_deduction"))
     def post(self, request):
@@ -258,10 +245,7 @@ class LoanAccountView(APIView):
             serializer = LoanAccountSerializer(instance=loan_account)
             return Response(serializer.data, status=200)
         loan_accounts = LoanAccount.objects.all()
-        pagination = PageNumberPagination()
-        page = pagination.paginate_queryset(loan_accounts, request)
-        serializer = LoanAccountSerializer(page, many=True)
-        return pagination.get_paginated_response(serializer.data)
+        return paginated_response(request, loan_accounts, LoanAccountSerializer)
 
     @method_decorator(permission_required("payroll.change_loanaccount"))
     def put(self, request, pk):
@@ -296,10 +280,7 @@ class ReimbursementView(APIView):
             reimbursements = Reimbursement.objects.filter(
                 employee_id=request.user.employee_get
             )
-        pagination = PageNumberPagination()
-        page = pagination.paginate_queryset(reimbursements, request)
-        serializer = self.serializer_class(page, many=True)
-        return pagination.get_paginated_response(serializer.data)
+        return paginated_response(request, reimbursements, self.serializer_class)
 
     def post(self, request):
         serializer = self.serializer_class(
@@ -402,7 +383,7 @@ from payroll.views.component_views import filter_payslip
 from payroll.views.views import equalize_lists_length
 
 try:
-    import pdfkit
+    from base.pdf_renderer import render_pdf
 
     HAVE_PDFKIT = True
 except Exception:
@@ -535,7 +516,7 @@ class PayslipPDFAPIView(APIView):
                 pdf_options = {
                     "enable-local-file-access": None,  # if your template references local CSS
                 }
-                pdf_bytes = pdfkit.from_string(html, False, options=pdf_options)
+                pdf_bytes = render_pdf(html, options=pdf_options, with_css=False)
                 response = HttpResponse(pdf_bytes, content_type="application/pdf")
                 response["Content-Disposition"] = f'inline; filename="payslip-{id}.pdf"'
                 return response
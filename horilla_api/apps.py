@@ -9,6 +9,7 @@ class HorillaApiConfig(AppConfig):
         from django.urls import include, path
 
         from horilla.urls import urlpatterns
+        from horilla_api import signals
 
         urlpatterns.append(
             path("api/", include("horilla_api.urls")),
@@ -0,0 +1,45 @@
+"""
+horilla_api/signals.py
+
+Version tracking for the models read by `cached_api_response` views. It is
+registered when the app is loaded, so writes made by management commands,
+scheduler jobs or workers that never import the API views still invalidate
+the cached responses.
+"""
+
+from base.models import (
+    Company,
+    Department,
+    EmployeeShift,
+    EmployeeType,
+    JobPosition,
+    WorkType,
+)
+from employee.models import (
+    Employee,
+    EmployeeBankDetails,
+    EmployeeTag,
+    EmployeeWorkInformation,
+)
+from horilla_api.api_methods.base.cache import track_model_versions
+from leave.models import AvailableLeave, LeaveType
+from notifications.models import Notification
+
+CACHED_API_MODELS = [
+    Company,
+    Department,
+    EmployeeShift,
+    EmployeeType,
+    JobPosition,
+    WorkType,
+    Employee,
+    EmployeeBankDetails,
+    EmployeeTag,
+    EmployeeWorkInformation,
+    AvailableLeave,
+    LeaveType,
+]
+
+for model in CACHED_API_MODELS:
+    track_model_versions(model)
+track_model_versions(Notification, "recipient_id")
@@ -1,3 +1,131 @@
-from django.test import TestCase
+from datetime import timedelta
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from base.models import Department
+from employee.models import Employee
+from horilla_api.api_decorators.base.decorators import cached_api_response
+from horilla_api.api_methods.base.cache import TRACKED_MODELS
+from horilla_api.api_methods.base.methods import paginated_response
+from notifications.models import Notification
+
+
+class DepartmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Department
+        fields = ["id", "department", "is_active"]
+
+
+def api_request(**params):
+    return Request(APIRequestFactory().get("/", params))
+
+
+class PaginatedResponseTests(TestCase):
+    def setUp(self):
+        for index in range(5):
+            Department(department=f"Department {index}").save()
+        self.queryset = Department.objects.entire().order_by("pk")
+
+    def test_page_number_pagination_is_the_default(self):
+        response = paginated_response(
+            api_request(), self.queryset, DepartmentSerializer
+        )
+        self.assertEqual(response.data["count"], 5)
+
+    def test_cursor_pages_do_not_overlap(self):
+        seen = []
+        params = {"pagination": "cursor", "page_size": 2}
+        while params is not None:
+            data = paginated_response(
+                api_request(**params), self.queryset, DepartmentSerializer
+            ).data
+            seen += [row["id"] for row in data["results"]]
+            params = None
+            if data["next"]:
+                params = {
+                    key: value[0]
+                    for key, value in parse_qs(urlparse(data["next"]).query).items()
+                }
+        self.assertEqual(
+            seen, sorted(self.queryset.values_list("id", flat=True), reverse=True)
+        )
+
+    def test_sparse_fields(self):
+        response = paginated_response(
+            api_request(fields="id,department"), self.queryset, DepartmentSerializer
+        )
+        self.assertEqual(set(response.data["results"][0]), {"id", "department"})
+        with self.assertRaises(ValidationError):
+            paginated_response(
+                api_request(fields="id,salary"), self.queryset, DepartmentSerializer
+            )
+
+    def test_updated_since(self):
+        past = timezone.now() - timedelta(days=10)
+        Department.objects.entire().update(updated_at=past)
+        Department.objects.entire().filter(department="Department 0").update(
+            is_active=False
+        )
+        response = paginated_response(
+            api_request(updated_since=(past + timedelta(days=5)).date().isoformat()),
+            self.queryset,
+            DepartmentSerializer,
+        )
+        self.assertEqual(
+            [row["department"] for row in response.data["results"]], ["Department 0"]
+        )
+        with self.assertRaises(ValidationError):
+            paginated_response(
+                api_request(updated_since="yesterday"),
+                self.queryset,
+                DepartmentSerializer,
+            )
+
+
+class CachedDepartmentView:
+    calls = 0
+
+    @cached_api_response(Department)
+    def get(self, request):
+        self.calls += 1
+        return Response({"departments": Department.objects.entire().count()})
+
+
+class CachedApiResponseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.view = CachedDepartmentView()
+
+    def get(self, **headers):
+        request = RequestFactory().get("/api/departments/", **headers)
+        request.user = SimpleNamespace(pk=1, is_authenticated=True)
+        return self.view.get(request)
+
+    def test_models_are_tracked_at_app_loading(self):
+        self.assertIn(Employee, TRACKED_MODELS)
+        self.assertEqual(TRACKED_MODELS[Notification], "recipient_id")
+
+    def test_conditional_get_and_response_cache(self):
+        response = self.get()
+        etag = response["ETag"]
+        self.assertEqual(response.data, {"departments": 0})
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get().data, {"departments": 0})
+        self.assertEqual(self.view.calls, 1)
+
+        Department(department="HR").save()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data, {"departments": 1})
+        self.assertEqual(self.view.calls, 2)
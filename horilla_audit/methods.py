@@ -4,7 +4,7 @@ methods.py
 This module is used to write methods related to the history
 """
 
-from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
 from django.core.paginator import Paginator
 from django.db import models
 from django.shortcuts import render
@@ -73,85 +73,218 @@ def filter_history(histories, track_fields):
     return histories
 
 
-def get_diff(instance):
+def build_changes(model_class, new_record, old_record):
     """
-    This method is used to find the differences in the history
+    This method is used to diff two historical records into a change list
     """
-    remove_duplicate_history(instance)
-    history = instance.history_set.all()
-    history_list = list(history)
-    pairs = [
-        [history_list[i], history_list[i + 1]] for i in range(len(history_list) - 1)
-    ]
-    delta_changes = []
-    create_history = history.filter(history_type="+").first()
-    for pair in pairs:
-        delta = pair[0].diff_against(pair[1])
-        diffs = []
-        class_name = pair[0].instance.__class__
-        for change in delta.changes:
-            old = change.old
-            new = change.new
-            field = instance._meta.get_field(change.field)
-            is_fk = False
-            if (
-                isinstance(field, models.fields.CharField)
-                and field.choices
-                and old
-                and new
-            ):
-                choices = dict(field.choices)
-                old = choices[old]
-                new = choices[new]
-            if isinstance(field, models.ForeignKey):
-                is_fk = True
-                # old = getattr(pair[0], change.field)
-                # new = getattr(pair[1], change.field)
-            diffs.append(
-                {
-                    "field": get_field_label(class_name, change.field),
-                    "field_name": change.field,
-                    "is_fk": is_fk,
-                    "old": old,
-                    "new": new,
-                }
-            )
-        updated_by = (
-            User.objects.get(id=pair[0].history_user.id).employee_get
-            if pair[0].history_user
-            else Bot()
-        )
-        delta_changes.append(
+    delta = new_record.diff_against(old_record)
+    diffs = []
+    for change in delta.changes:
+        old = change.old
+        new = change.new
+        field = model_class._meta.get_field(change.field)
+        is_fk = False
+        if isinstance(field, models.fields.CharField) and field.choices and old and new:
+            choices = dict(field.choices)
+            old = choices.get(old, old)
+            new = choices.get(new, new)
+        if isinstance(field, models.ForeignKey):
+            is_fk = True
+        diffs.append(
             {
-                "type": "Changes",
-                "pair": pair,
-                "changes": diffs,
-                "updated_by": updated_by,
+                "field": get_field_label(model_class, change.field),
+                "field_name": change.field,
+                "is_fk": is_fk,
+                "old": old,
+                "new": new,
             }
         )
-    if create_history:
-        try:
-            updated_by = create_history.history_user.employee_get
-        except:
-            updated_by = Bot()
-        delta_changes.append(
-            {
-                "type": f"{create_history.instance.__class__._meta.verbose_name.capitalize()} created",
-                "pair": (create_history, create_history),
-                "updated_by": updated_by,
-            }
+    return diffs
+
+
+def _history_change(model_class, record, previous, changes):
+    from .models import AuditHistoryChange
+
+    return AuditHistoryChange(
+        content_type=ContentType.objects.get_for_model(model_class),
+        object_id=str(getattr(record, model_class._meta.pk.attname)),
+        history_id=record.pk,
+        previous_history_id=getattr(previous, "pk", None),
+        history_type=record.history_type,
+        history_date=record.history_date,
+        history_user_id=getattr(record, "history_user_id", None),
+        changes=changes,
+    )
+
+
+def record_history_change(history_instance):
+    """
+    This method is used to store the change list of a new historical record.
+    A change record without any changed field is a duplicate and is removed.
+    """
+    model_class = history_instance.instance_type
+    previous = history_instance.prev_record
+    changes = []
+    if previous is not None:
+        changes = build_changes(model_class, history_instance, previous)
+        if history_instance.history_type == "~" and not changes:
+            history_instance.delete()
+            return None
+    history_change = _history_change(model_class, history_instance, previous, changes)
+    history_change.save()
+    return history_change
+
+
+def history_change_queryset(instance, history_related_name="history_set"):
+    """
+    This method is used to return the precomputed change rows of the instance
+    """
+    from .models import AuditHistoryChange
+
+    return AuditHistoryChange.objects.filter(
+        content_type=ContentType.objects.get_for_model(instance.__class__),
+        object_id=str(instance.pk),
+    )
+
+
+def backfill_history_changes(instance, history_related_name="history_set"):
+    """
+    This method is used to compute the change rows of historical records
+    written before the changes were stored at write time, and to remove the
+    duplicate records among them
+    """
+    from .models import AuditHistoryChange
+
+    history = getattr(instance, history_related_name).all()
+    known_ids = set(
+        history_change_queryset(instance, history_related_name).values_list(
+            "history_id", flat=True
         )
+    )
+    if not history.exclude(history_id__in=known_ids).exists():
+        return
+    model_class = instance.__class__
+    records = list(history)
+    records.reverse()
+    previous = None
+    duplicate_ids = []
+    history_changes = []
+    for record in records:
+        if record.pk in known_ids:
+            previous = record
+            continue
+        changes = []
+        if previous is not None:
+            changes = build_changes(model_class, record, previous)
+            if record.history_type == "~" and not changes:
+                duplicate_ids.append(record.pk)
+                continue
+        history_changes.append(_history_change(model_class, record, previous, changes))
+        previous = record
+    if duplicate_ids:
+        history.filter(history_id__in=duplicate_ids).delete()
+    AuditHistoryChange.objects.bulk_create(history_changes, ignore_conflicts=True)
+
+
+def build_tracking(instance, history_changes, history_related_name="history_set"):
+    """
+    This method is used to build the tracking entries used by the history
+    templates from precomputed change rows
+    """
+    history_changes = list(history_changes)
+    history_ids = {change.history_id for change in history_changes} | {
+        change.previous_history_id
+        for change in history_changes
+        if change.previous_history_id
+    }
+    history = getattr(instance, history_related_name).filter(history_id__in=history_ids)
+    if hasattr(history.model, "history_tags"):
+        history = history.prefetch_related("history_tags")
+    records = {record.pk: record for record in history}
+
+    track_fields = []
     if instance._meta.model_name == "employeeworkinformation":
         from .models import HistoryTrackingFields
 
         history_tracking_instance = HistoryTrackingFields.objects.first()
         if history_tracking_instance and history_tracking_instance.tracking_fields:
             track_fields = history_tracking_instance.tracking_fields["tracking_fields"]
+
+    delta_changes = []
+    for history_change in history_changes:
+        record = records.get(history_change.history_id)
+        if record is None:
+            continue
+        updated_by = (
+            getattr(history_change.history_user, "employee_get", None)
+            if history_change.history_user
+            else None
+        ) or Bot()
+        previous = records.get(history_change.previous_history_id)
+        if previous is not None:
+            changes = history_change.changes
             if track_fields:
-                delta_changes = filter_history(delta_changes, track_fields)
+                changes = [
+                    change
+                    for change in changes
+                    if change.get("field_name", "") in track_fields
+                ]
+                if not changes:
+                    continue
+            delta_changes.append(
+                {
+                    "type": "Changes",
+                    "pair": [record, previous],
+                    "changes": changes,
+                    "updated_by": updated_by,
+                }
+            )
+        if history_change.history_type == "+" and not track_fields:
+            delta_changes.append(
+                {
+                    "type": f"{instance.__class__._meta.verbose_name.capitalize()} created",
+                    "pair": (record, record),
+                    "updated_by": updated_by,
+                }
+            )
     return delta_changes
 
 
+def _tracking_queryset(instance, history_related_name):
+    backfill_history_changes(instance, history_related_name)
+    return (
+        history_change_queryset(instance, history_related_name)
+        .select_related("history_user__employee_get")
+        .order_by("-history_date", "-history_id")
+    )
+
+
+def get_diff(instance, history_related_name="history_set"):
+    """
+    This method is used to find the differences in the history
+    """
+    return build_tracking(
+        instance,
+        _tracking_queryset(instance, history_related_name),
+        history_related_name,
+    )
+
+
+def get_diff_page(
+    instance, page_number=1, per_page=20, history_related_name="history_set"
+):
+    """
+    This method is used to find the differences in the history, one page of
+    change rows at a time
+    """
+    paginator = Paginator(_tracking_queryset(instance, history_related_name), per_page)
+    page_obj = paginator.get_page(page_number)
+    page_obj.object_list = build_tracking(
+        instance, page_obj.object_list, history_related_name
+    )
+    return page_obj
+
+
 def history_tracking(request, obj_id, **kwargs):
     model = kwargs.get("model")
     decorator_strings = kwargs.get("decorators", [])
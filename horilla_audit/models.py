@@ -2,8 +2,12 @@
 models.py
 """
 
+import logging
 from collections.abc import Iterable
 
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.dispatch import receiver
 from simple_history.models import (
@@ -19,7 +23,9 @@ from simple_history.signals import (  # pre_create_historical_m2m_records,; post
 
 # from employee.models import Employee
 from horilla.models import HorillaModel
-from horilla_audit.methods import remove_duplicate_history
+from horilla_audit.methods import record_history_change
+
+logger = logging.getLogger(__name__)
 
 # Create your models here.
 
@@ -111,14 +117,60 @@ def post_create_horilla_audit_log(sender, instance, *_args, **kwargs):
         )
         if isinstance(history_instance, HorillaAuditLog):
             history_instance.history_title = "Demo Title"
-            remove_duplicate_history(instance)
             if instance.skip_history:
                 instance.history_set.filter(pk=history_instance.pk).delete()
+                history_instance.skipped = True
             kwargs["history_instance"] = None
     except:
         pass
 
 
+@receiver(post_create_historical_record)
+def record_horilla_history_change(sender, instance, *_args, **kwargs):
+    """
+    Diff the new historical record against the previous one once, at write
+    time, so the history views never have to diff the whole history again
+    """
+    history_instance = kwargs["history_instance"]
+    if getattr(history_instance, "skipped", False):
+        return
+    try:
+        record_history_change(history_instance)
+    except Exception as e:
+        logger.error(e)
+
+
+class AuditHistoryChange(models.Model):
+    """
+    Precomputed change list of one historical record
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=64)
+    history_id = models.BigIntegerField()
+    previous_history_id = models.BigIntegerField(null=True, blank=True)
+    history_type = models.CharField(max_length=1)
+    history_date = models.DateTimeField()
+    history_user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    changes = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        """
+        Meta class for aditional info
+        """
+
+        app_label = "horilla_audit"
+        unique_together = ("content_type", "history_id")
+        indexes = [
+            models.Index(fields=["content_type", "object_id", "-history_date"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.content_type} #{self.object_id} ({self.history_id})"
+
+
 class HistoryTrackingFields(HorillaModel):
     tracking_fields = models.JSONField(null=True, blank=True, editable=False)
     work_info_track = models.BooleanField(default=True)
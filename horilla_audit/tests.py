@@ -1,3 +1,54 @@
+from types import SimpleNamespace
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from employee.models import BonusPoint
+from horilla_audit.methods import get_diff_page
+from horilla_audit.models import AuditHistoryChange, record_horilla_history_change
+
+
+class TrackingTests(TestCase):
+    def setUp(self):
+        self.points = BonusPoint.objects.create(points=0)
+        for points in range(1, 26):
+            self.points.points = points
+            self.points.save()
+
+    def test_tracking_returns_the_full_history(self):
+        tracking = self.points.tracking()
+        # 25 updates and the creation record
+        self.assertEqual(len(tracking), 26)
+        self.assertEqual(tracking[0]["changes"][0]["new"], 25)
+        self.assertEqual(tracking[-2]["changes"][0]["new"], 1)
+
+    def test_diff_page(self):
+        page = get_diff_page(self.points, page_number=2)
+        self.assertEqual(len(page.object_list), 6)
+        self.assertFalse(page.has_next())
+        latest = get_diff_page(self.points, per_page=1).object_list
+        self.assertEqual(latest[0]["changes"][0]["new"], 25)
+
+    def test_unchanged_save_adds_no_history(self):
+        self.points.save()
+        self.assertEqual(len(self.points.tracking()), 26)
+
+
+class RecordHistoryChangeTests(TestCase):
+    def test_skipped_record_is_not_diffed(self):
+        history_instance = SimpleNamespace(skipped=True)
+        with mock.patch(
+            "horilla_audit.models.record_history_change"
+        ) as record_history_change:
+            record_horilla_history_change(
+                BonusPoint, BonusPoint(), history_instance=history_instance
+            )
+        record_history_change.assert_not_called()
+
+    def test_change_rows_are_written_on_save(self):
+        points = BonusPoint.objects.create(points=0)
+        points.points = 10
+        points.save()
+        self.assertEqual(
+            AuditHistoryChange.objects.filter(object_id=str(points.pk)).count(), 2
+        )
@@ -0,0 +1,294 @@
+"""
+horilla_automations/methods/engine.py
+
+Compiled automation engine.
+
+Each active MailAutomation is compiled once into a `CompiledAutomation`
+holding its parsed conditions and the model fields they reference. The
+signal handlers use it to snapshot only those fields before a save or a
+bulk update, evaluate the conditions for all affected rows with a couple of
+`values()` queries and push the matching rows onto a worker queue.
+
+The queue holds at most AUTOMATION_QUEUE_SIZE jobs. When it is full a new
+job waits up to AUTOMATION_QUEUE_TIMEOUT seconds for a free slot and is then
+dropped with an error in the log, so a stuck mail server slows the requests
+that trigger automations down instead of growing the queue without limit.
+"""
+
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import close_old_connections
+
+from horilla_automations.methods.methods import (
+    evaluate_condition,
+    operator_map,
+    split_query_string,
+)
+
+logger = logging.getLogger(__name__)
+
+FIELD_KIND_VALUE = "value"
+FIELD_KIND_FK = "fk"
+FIELD_KIND_M2M = "m2m"
+FIELD_KIND_ATTR = "attr"
+
+
+class CompiledCondition:
+    """
+    One `field operator value [logic]` row of an automation condition
+    """
+
+    __slots__ = ("attr", "operator", "value", "logic")
+
+    def __init__(self, attr, operator, value, logic=None):
+        if value == "on":
+            value = True
+        elif value == "off":
+            value = False
+        self.attr = attr
+        self.operator = operator
+        self.value = value
+        self.logic = logic
+
+
+class CompiledAutomation:
+    """
+    MailAutomation with its condition querystring parsed once
+    """
+
+    def __init__(self, automation, model_class):
+        self.automation = automation
+        self.model_class = model_class
+        condition_querystring = (automation.condition_querystring or "").replace(
+            "automation_multiple_", ""
+        )
+        self.conditions = []
+        for query_dict in split_query_string(condition_querystring):
+            condition = query_dict.getlist("condition")
+            if len(condition) < 3:
+                continue
+            self.conditions.append(
+                CompiledCondition(
+                    condition[0], condition[1], condition[2], query_dict.get("logic")
+                )
+            )
+        self.fields = {
+            condition.attr: resolve_field_kind(model_class, condition.attr)
+            for condition in self.conditions
+        }
+
+    def is_applicable(self, values: dict) -> bool:
+        """
+        Evaluate the compiled conditions against a snapshot of field values
+        """
+        applicable = False
+        and_exists = False
+        false_exists = False
+        for condition in self.conditions:
+            result = evaluate_condition(
+                values.get(condition.attr), condition.operator, condition.value
+            )
+            if condition.logic:
+                applicable = operator_map[condition.logic](applicable, result)
+            else:
+                applicable = result
+            if not applicable:
+                false_exists = True
+            if condition.logic == "and":
+                and_exists = True
+            if false_exists and and_exists:
+                return False
+        return applicable
+
+    def should_trigger(self, created, values, previous_values=None) -> bool:
+        """
+        Whether the automation fires for a row.
+
+        `on_update` automations only fire when one of the referenced fields
+        actually changed between the previous and the current snapshot.
+        """
+        trigger = self.automation.trigger
+        if trigger == "on_create" and not created:
+            return False
+        if trigger == "on_update":
+            if created or previous_values is None:
+                return False
+            if all(
+                previous_values.get(attr) == values.get(attr) for attr in self.fields
+            ):
+                return False
+        elif trigger != "on_create":
+            return False
+        return self.is_applicable(values)
+
+
+def resolve_field_kind(model_class, attr):
+    """
+    Classify a condition attribute so it can be read with a `values()` query
+    """
+    if "__" in attr:
+        return FIELD_KIND_ATTR
+    try:
+        field = model_class._meta.get_field(attr)
+    except FieldDoesNotExist:
+        return FIELD_KIND_ATTR
+    if field.many_to_many and not field.auto_created:
+        return FIELD_KIND_M2M
+    if field.is_relation and field.concrete:
+        return FIELD_KIND_FK
+    if field.concrete:
+        return FIELD_KIND_VALUE
+    return FIELD_KIND_ATTR
+
+
+def normalize_value(kind, value):
+    """
+    Bring in-memory and `values()` representations of a field to one form
+    """
+    if kind == FIELD_KIND_FK:
+        value = getattr(value, "pk", value)
+        return None if value is None else str(value)
+    if kind == FIELD_KIND_M2M:
+        return sorted(value)
+    return value
+
+
+def merge_fields(compiled_automations):
+    """
+    Union of the fields referenced by a set of compiled automations
+    """
+    fields = {}
+    for compiled in compiled_automations:
+        fields.update(compiled.fields)
+    return fields
+
+
+def snapshot_queryset(queryset, fields: dict) -> dict:
+    """
+    Read the given fields for every row of the queryset.
+
+    Returns {pk: {attr: normalized value}} using one query for the concrete
+    fields plus one per many to many field.
+    """
+    from horilla_views.templatetags.generic_template_filters import getattribute
+
+    queryset = queryset.order_by()
+    concrete = [
+        attr
+        for attr, kind in fields.items()
+        if kind in (FIELD_KIND_VALUE, FIELD_KIND_FK)
+    ]
+    snapshot = {
+        row["pk"]: {attr: normalize_value(fields[attr], row[attr]) for attr in concrete}
+        for row in queryset.values("pk", *concrete)
+    }
+    for attr, kind in fields.items():
+        if kind == FIELD_KIND_M2M:
+            related = {pk: [] for pk in snapshot}
+            for pk, related_pk in queryset.values_list("pk", attr):
+                if related_pk is not None and pk in related:
+                    related[pk].append(related_pk)
+            for pk, values in related.items():
+                snapshot[pk][attr] = sorted(values)
+        elif kind == FIELD_KIND_ATTR:
+            for instance in queryset.filter(pk__in=list(snapshot)):
+                snapshot[instance.pk][attr] = getattribute(instance, attr)
+    return snapshot
+
+
+def snapshot_instance(instance, fields: dict) -> dict:
+    """
+    Read the given fields from an in-memory instance
+    """
+    from horilla_views.templatetags.generic_template_filters import getattribute
+
+    values = {}
+    for attr, kind in fields.items():
+        if kind == FIELD_KIND_FK:
+            field = instance._meta.get_field(attr)
+            values[attr] = normalize_value(kind, getattr(instance, field.attname))
+        elif kind == FIELD_KIND_M2M:
+            values[attr] = (
+                sorted(getattr(instance, attr).values_list("pk", flat=True))
+                if instance.pk
+                else []
+            )
+        elif kind == FIELD_KIND_VALUE:
+            values[attr] = getattr(instance, attr)
+        else:
+            values[attr] = getattribute(instance, attr)
+    return values
+
+
+class AutomationWorker:
+    """
+    Pool of daemon threads consuming automation jobs from a bounded queue
+    """
+
+    def __init__(self, workers=2, maxsize=1000, put_timeout=5):
+        self.workers = workers
+        self.put_timeout = put_timeout
+        self.queue = queue.Queue(maxsize=maxsize)
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run,
+                    name=f"horilla-automation-{index}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            func, args, kwargs = self.queue.get()
+            # the connection of the thread outlives CONN_MAX_AGE between jobs
+            close_old_connections()
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                close_old_connections()
+                self.queue.task_done()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Enqueue a job for the worker threads, returns False when the queue
+        stayed full and the job was dropped
+        """
+        self._ensure_started()
+        try:
+            self.queue.put((func, args, kwargs), timeout=self.put_timeout)
+        except queue.Full:
+            logger.error(
+                "Automation queue is full, dropped %s",
+                getattr(func, "__name__", func),
+            )
+            return False
+        return True
+
+    def join(self):
+        """
+        Block until every queued job is processed
+        """
+        self.queue.join()
+
+
+automation_worker = AutomationWorker(
+    getattr(settings, "AUTOMATION_WORKERS", 2),
+    maxsize=getattr(settings, "AUTOMATION_QUEUE_SIZE", 1000),
+    put_timeout=getattr(settings, "AUTOMATION_QUEUE_TIMEOUT", 5),
+)
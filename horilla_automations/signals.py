@@ -3,22 +3,26 @@ horilla_automation/signals.py
 
 """
 
-import copy
 import logging
-import threading
 import time
-import types
 
 from bs4 import BeautifulSoup
 from django import template
 from django.core.mail import EmailMessage
-from django.db import models
+from django.db import models, transaction
 from django.db.models.query import QuerySet
 from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from horilla.horilla_middlewares import _thread_locals
 from horilla.signals import post_bulk_update, pre_bulk_update
+from horilla_automations.methods.engine import (
+    CompiledAutomation,
+    automation_worker,
+    merge_fields,
+    snapshot_instance,
+    snapshot_queryset,
+)
 from notifications.signals import notify
 
 logger = logging.getLogger(__name__)
@@ -38,6 +42,8 @@ setattr(QuerySet, "from_list", from_list)
 SIGNAL_HANDLERS = []
 INSTANCE_HANDLERS = []
 REFRESH_METHODS = {}
+# model class -> list of CompiledAutomation
+COMPILED_AUTOMATIONS = {}
 
 
 def start_automation():
@@ -45,7 +51,7 @@ def start_automation():
     Automation signals
     """
     from base.models import HorillaMailTemplate
-    from horilla_automations.methods.methods import get_model_class, split_query_string
+    from horilla_automations.methods.methods import get_model_class
     from horilla_automations.models import MailAutomation
 
     @receiver(post_delete, sender=MailAutomation)
@@ -66,6 +72,20 @@ def start_automation():
         start_connection()
         track_previous_instance()
 
+    def compile_automations():
+        """
+        Parse the conditions of every active automation once, grouped by model
+        """
+        COMPILED_AUTOMATIONS.clear()
+        automations = MailAutomation.objects.filter(is_active=True).select_related(
+            "mail_template"
+        )
+        for automation in automations:
+            model_class = get_model_class(automation.model)
+            COMPILED_AUTOMATIONS.setdefault(model_class, []).append(
+                CompiledAutomation(automation, model_class)
+            )
+
     def clear_connection():
         """
         Method to clear signals handlers
@@ -77,148 +97,117 @@ def start_automation():
 
     REFRESH_METHODS["clear_connection"] = clear_connection
 
-    def create_post_bulk_update_handler(automation, model_class, query_strings):
+    def create_post_bulk_update_handler(model_class):
         def post_bulk_update_handler(sender, queryset, *args, **kwargs):
-            def _bulk_update_thread_handler(
-                queryset, previous_queryset_copy, automation
-            ):
-                request = getattr(queryset, "request", None)
-
-                if request:
-                    for index, instance in enumerate(queryset):
-                        previous_instance = previous_queryset_copy[index]
-                        send_automated_mail(
-                            request,
-                            False,
-                            automation,
-                            query_strings,
-                            instance,
-                            previous_instance,
-                        )
-
-            previous_bulk_record = getattr(_thread_locals, "previous_bulk_record", None)
-            previous_queryset_copy = []
-            if previous_bulk_record:
-                previous_queryset = previous_bulk_record.get("queryset", None)
-                previous_queryset_copy = previous_bulk_record.get("queryset_copy", [])
-
-            bulk_thread = threading.Thread(
-                target=_bulk_update_thread_handler,
-                args=(queryset, previous_queryset_copy, automation),
+            """
+            Signal handler for bulk updates of the model instances.
+            """
+            request = getattr(queryset, "request", None)
+            previous_bulk_records = getattr(
+                _thread_locals, "automation_previous_bulk_records", {}
+            )
+            previous_snapshot = previous_bulk_records.pop(id(queryset), None)
+            if not request or not previous_snapshot:
+                return
+            transaction.on_commit(
+                lambda: automation_worker.submit(
+                    process_bulk_update, request, model_class, previous_snapshot
+                )
             )
-            bulk_thread.start()
-
-        func_name = f"{automation.method_title}_post_bulk_signal_handler"
 
-        # Dynamically create a function with a unique name
-        handler = types.FunctionType(
-            post_bulk_update_handler.__code__,
-            globals(),
-            name=func_name,
-            argdefs=post_bulk_update_handler.__defaults__,
-            closure=post_bulk_update_handler.__closure__,
+        post_bulk_update_handler.__name__ = (
+            f"{model_class.__name__.lower()}_post_bulk_signal_handler"
         )
+        post_bulk_update_handler.model_class = model_class
+        return post_bulk_update_handler
 
-        # Set additional attributes on the function
-        handler.model_class = model_class
-        handler.automation = automation
+    def create_signal_handler(model_class):
+        def signal_handler(sender, instance, created, **kwargs):
+            """
+            Signal handler for post-save events of the model instances.
+            """
+            request = getattr(_thread_locals, "request", None)
+            previous_records = getattr(
+                _thread_locals, "automation_previous_records", {}
+            )
+            previous_values = previous_records.pop((model_class, instance.pk), None)
+            if not COMPILED_AUTOMATIONS.get(model_class):
+                return
+            transaction.on_commit(
+                lambda: automation_worker.submit(
+                    process_save,
+                    request,
+                    created,
+                    model_class,
+                    instance,
+                    previous_values,
+                )
+            )
 
-        return handler
+        signal_handler.__name__ = f"{model_class.__name__.lower()}_signal_handler"
+        signal_handler.model_class = model_class
+        return signal_handler
 
     def start_connection():
         """
         Method to start signal connection accordingly to the automation
         """
         clear_connection()
-        automations = MailAutomation.objects.filter(is_active=True)
-        for automation in automations:
-
-            condition_querystring = automation.condition_querystring.replace(
-                "automation_multiple_", ""
-            )
-
-            query_strings = split_query_string(condition_querystring)
-
-            model_path = automation.model
-            model_class = get_model_class(model_path)
-
-            handler = create_post_bulk_update_handler(
-                automation, model_class, query_strings
-            )
+        compile_automations()
+        for model_class in COMPILED_AUTOMATIONS:
+            handler = create_post_bulk_update_handler(model_class)
             SIGNAL_HANDLERS.append(handler)
-
             post_bulk_update.connect(handler, sender=model_class)
 
-            def create_signal_handler(name, automation, query_strings):
-                def signal_handler(sender, instance, created, **kwargs):
-                    """
-                    Signal handler for post-save events of the model instances.
-                    """
-                    request = getattr(_thread_locals, "request", None)
-                    previous_record = getattr(_thread_locals, "previous_record", None)
-                    previous_instance = None
-                    if previous_record:
-                        previous_instance = previous_record["instance"]
-
-                    args = (
-                        request,
-                        created,
-                        automation,
-                        query_strings,
-                        instance,
-                        previous_instance,
-                    )
-                    thread = threading.Thread(
-                        target=lambda: send_automated_mail(*args),
-                    )
-                    thread.start()
-
-                signal_handler.__name__ = name
-                signal_handler.model_class = model_class
-                signal_handler.automation = automation
-                return signal_handler
-
-            # Create and connect the signal handler
-            handler_name = f"{automation.method_title}_signal_handler"
-            dynamic_signal_handler = create_signal_handler(
-                handler_name, automation, query_strings
-            )
-            SIGNAL_HANDLERS.append(dynamic_signal_handler)
-            post_save.connect(
-                dynamic_signal_handler, sender=dynamic_signal_handler.model_class
-            )
+            handler = create_signal_handler(model_class)
+            SIGNAL_HANDLERS.append(handler)
+            post_save.connect(handler, sender=model_class)
 
     REFRESH_METHODS["start_connection"] = start_connection
 
-    def create_pre_bulk_update_handler(automation, model_class):
+    def create_pre_bulk_update_handler(model_class):
         def pre_bulk_update_handler(sender, queryset, *args, **kwargs):
+            """
+            Snapshot only the fields the automations of this model refer to
+            """
             request = getattr(_thread_locals, "request", None)
-            if request:
-                queryset_copy = queryset.none()
-                if queryset.count():
-                    queryset_copy = QuerySet.from_list(copy.deepcopy(list(queryset)))
-                _thread_locals.previous_bulk_record = {
-                    "automation": automation,
-                    "queryset": queryset,
-                    "queryset_copy": queryset_copy,
-                }
-
-        func_name = f"{automation.method_title}_pre_bulk_signal_handler"
-
-        # Dynamically create a function with a unique name
-        handler = types.FunctionType(
-            pre_bulk_update_handler.__code__,
-            globals(),
-            name=func_name,
-            argdefs=pre_bulk_update_handler.__defaults__,
-            closure=pre_bulk_update_handler.__closure__,
+            compiled_automations = COMPILED_AUTOMATIONS.get(model_class)
+            if not request or not compiled_automations:
+                return
+            snapshot = snapshot_queryset(queryset, merge_fields(compiled_automations))
+            if not hasattr(_thread_locals, "automation_previous_bulk_records"):
+                _thread_locals.automation_previous_bulk_records = {}
+            _thread_locals.automation_previous_bulk_records[id(queryset)] = snapshot
+
+        pre_bulk_update_handler.__name__ = (
+            f"{model_class.__name__.lower()}_pre_bulk_signal_handler"
         )
+        pre_bulk_update_handler.model_class = model_class
+        return pre_bulk_update_handler
 
-        # Set additional attributes on the function
-        handler.model_class = model_class
-        handler.automation = automation
+    def create_instance_handler(model_class):
+        def instance_handler(sender, instance, **kwargs):
+            """
+            Signal handler for pres-save events of the model instances.
+            """
+            request = getattr(_thread_locals, "request", None)
+            compiled_automations = COMPILED_AUTOMATIONS.get(model_class)
+            if not request or not instance.pk or not compiled_automations:
+                return
+            # to get the previous values of the referenced fields only
+            snapshot = snapshot_queryset(
+                model_class._base_manager.filter(pk=instance.pk),
+                merge_fields(compiled_automations),
+            )
+            if not hasattr(_thread_locals, "automation_previous_records"):
+                _thread_locals.automation_previous_records = {}
+            _thread_locals.automation_previous_records[(model_class, instance.pk)] = (
+                snapshot.get(instance.pk)
+            )
 
-        return handler
+        instance_handler.__name__ = f"{model_class.__name__.lower()}_instance_handler"
+        instance_handler.model_class = model_class
+        return instance_handler
 
     def track_previous_instance():
         """
@@ -235,120 +224,69 @@ def start_automation():
             INSTANCE_HANDLERS.clear()
 
         clear_instance_signal_connection()
-        automations = MailAutomation.objects.filter(is_active=True)
-        for automation in automations:
-            model_class = get_model_class(automation.model)
-
-            handler = create_pre_bulk_update_handler(automation, model_class)
+        if not COMPILED_AUTOMATIONS:
+            compile_automations()
+        for model_class in COMPILED_AUTOMATIONS:
+            handler = create_pre_bulk_update_handler(model_class)
             INSTANCE_HANDLERS.append(handler)
             pre_bulk_update.connect(handler, sender=model_class)
 
-            @receiver(pre_save, sender=model_class)
-            def instance_handler(sender, instance, **kwargs):
-                """
-                Signal handler for pres-save events of the model instances.
-                """
-                # prevented storing the scheduled activities
-                request = getattr(_thread_locals, "request", None)
-                if instance.pk:
-                    # to get the previous instance
-                    instance = model_class.objects.filter(id=instance.pk).first()
-                if request:
-                    _thread_locals.previous_record = {
-                        "automation": automation,
-                        "instance": instance,
-                    }
-                instance_handler.__name__ = (
-                    f"{automation.method_title}_instance_handler"
-                )
-                return instance_handler
-
-            instance_handler.model_class = model_class
-            instance_handler.automation = automation
-
-            INSTANCE_HANDLERS.append(instance_handler)
+            handler = create_instance_handler(model_class)
+            INSTANCE_HANDLERS.append(handler)
+            pre_save.connect(handler, sender=model_class)
 
     track_previous_instance()
     start_connection()
 
 
-def send_automated_mail(
-    request,
-    created,
-    automation,
-    query_strings,
-    instance,
-    previous_instance,
-):
-    from horilla_automations.methods.methods import evaluate_condition, operator_map
-    from horilla_views.templatetags.generic_template_filters import getattribute
-
-    applicable = False
-    and_exists = False
-    false_exists = False
-    instance_values = []
-    previous_instance_values = []
-    for condition in query_strings:
-        if condition.getlist("condition"):
-            attr = condition.getlist("condition")[0]
-            operator = condition.getlist("condition")[1]
-            value = condition.getlist("condition")[2]
-
-            if value == "on":
-                value = True
-            elif value == "off":
-                value = False
-            instance_value = getattribute(instance, attr)
-            previous_instance_value = getattribute(previous_instance, attr)
-            # The send mail method only trigger when actually any changes
-            # b/w the previous, current instance's `attr` field's values and
-            # if applicable for the automation
-            if getattr(instance_value, "pk", None) and isinstance(
-                instance_value, models.Model
-            ):
-                instance_value = str(getattr(instance_value, "pk", None))
-                previous_instance_value = str(
-                    getattr(previous_instance_value, "pk", None)
-                )
-            elif isinstance(instance_value, QuerySet):
-                instance_value = list(instance_value.values_list("pk", flat=True))
-                previous_instance_value = list(
-                    previous_instance_value.values_list("pk", flat=True)
-                )
-
-            instance_values.append(instance_value)
-
-            previous_instance_values.append(previous_instance_value)
+def process_save(request, created, model_class, instance, previous_values):
+    """
+    Worker job: evaluate every automation of the model for a saved instance
+    """
+    compiled_automations = COMPILED_AUTOMATIONS.get(model_class, [])
+    if not compiled_automations:
+        return
+    if instance.pk:
+        # refreshing instance due to m2m fields are not loading here some times
+        time.sleep(0.1)
+        instance = model_class._base_manager.filter(pk=instance.pk).first()
+        if instance is None:
+            return
+    values = snapshot_instance(instance, merge_fields(compiled_automations))
+    for compiled in compiled_automations:
+        if compiled.should_trigger(created, values, previous_values):
+            send_mail(request, compiled.automation, instance, refresh=False)
 
-            if not condition.get("logic"):
 
-                applicable = evaluate_condition(instance_value, operator, value)
-            logic = condition.get("logic")
-            if logic:
-                applicable = operator_map[logic](
-                    applicable,
-                    evaluate_condition(instance_value, operator, value),
-                )
-            if not applicable:
-                false_exists = True
-            if logic == "and":
-                and_exists = True
-            if false_exists and and_exists:
-                applicable = False
-                break
-    if applicable:
-        if created and automation.trigger == "on_create":
-            send_mail(request, automation, instance)
-        elif (automation.trigger == "on_update") and (
-            set(previous_instance_values) != set(instance_values)
-        ):
-
-            send_mail(request, automation, instance)
-
-
-def send_mail(request, automation, instance):
+def process_bulk_update(request, model_class, previous_snapshot):
+    """
+    Worker job: evaluate every automation of the model against all the rows
+    touched by a queryset update, using one snapshot query
+    """
+    compiled_automations = COMPILED_AUTOMATIONS.get(model_class, [])
+    if not compiled_automations:
+        return
+    current_snapshot = snapshot_queryset(
+        model_class._base_manager.filter(pk__in=list(previous_snapshot)),
+        merge_fields(compiled_automations),
+    )
+    matches = [
+        (compiled, pk)
+        for pk, values in current_snapshot.items()
+        for compiled in compiled_automations
+        if compiled.should_trigger(False, values, previous_snapshot.get(pk))
+    ]
+    if not matches:
+        return
+    instances = model_class._base_manager.in_bulk({pk for _, pk in matches})
+    for compiled, pk in matches:
+        if pk in instances:
+            send_mail(request, compiled.automation, instances[pk], refresh=False)
+
+
+def send_mail(request, automation, instance, refresh=True):
     """
-    mail sending method
+    mail sending method, runs on the automation worker
     """
     from base.backends import ConfiguredEmailBackend
     from base.methods import eval_validate, generate_pdf
@@ -363,7 +301,7 @@ def send_mail(request, automation, instance):
     employees = []
     to_emails = []
 
-    if instance.pk:
+    if refresh and instance.pk:
         # refreshing instance due to m2m fields are not loading here some times
         time.sleep(0.1)
         instance = instance._meta.model.objects.get(pk=instance.pk)
@@ -504,16 +442,10 @@ def send_mail(request, automation, instance):
             )
 
         if automation.delivery_channel != "notification":
-            thread = threading.Thread(
-                target=lambda: _send_mail(email),
-            )
-            thread.start()
+            _send_mail(email)
 
         if automation.delivery_channel != "email":
-            thread = threading.Thread(
-                target=lambda: _send_notification(plain_text),
-            )
-            thread.start()
+            _send_notification(plain_text)
         logger.info(
             f"Automation Triggered | {automation.get_delivery_channel_display()} | {automation}"
         )
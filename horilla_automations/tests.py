@@ -1,3 +1,102 @@
-from django.test import TestCase
+import threading
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from employee.models import Employee
+from horilla_automations.methods.engine import (
+    FIELD_KIND_FK,
+    FIELD_KIND_VALUE,
+    AutomationWorker,
+    CompiledAutomation,
+)
+
+# first name == John and is_active == on
+CONDITION_QUERYSTRING = (
+    "condition=employee_first_name&condition=%3D%3D&condition=John"
+    "&logic=and&condition=is_active&condition=%3D%3D&condition=on"
+)
+
+
+def compile_automation(trigger, querystring=CONDITION_QUERYSTRING):
+    automation = SimpleNamespace(condition_querystring=querystring, trigger=trigger)
+    return CompiledAutomation(automation, Employee)
+
+
+class CompiledAutomationTests(SimpleTestCase):
+    def test_conditions_are_parsed_once(self):
+        compiled = compile_automation("on_create")
+        self.assertEqual(
+            [(c.attr, c.operator, c.value) for c in compiled.conditions],
+            [("employee_first_name", "==", "John"), ("is_active", "==", True)],
+        )
+        self.assertEqual(
+            compiled.fields,
+            {"employee_first_name": FIELD_KIND_VALUE, "is_active": FIELD_KIND_VALUE},
+        )
+
+    def test_relation_fields_are_read_by_id(self):
+        compiled = compile_automation(
+            "on_create", "condition=employee_user_id&condition=%3D%3D&condition=1"
+        )
+        self.assertEqual(compiled.fields, {"employee_user_id": FIELD_KIND_FK})
+
+    def test_on_create(self):
+        compiled = compile_automation("on_create")
+        values = {"employee_first_name": "John", "is_active": True}
+        self.assertTrue(compiled.should_trigger(True, values))
+        self.assertFalse(compiled.should_trigger(False, values, values))
+        self.assertFalse(compiled.should_trigger(True, {**values, "is_active": False}))
+
+    def test_on_update_needs_a_changed_field(self):
+        compiled = compile_automation("on_update")
+        values = {"employee_first_name": "John", "is_active": True}
+        self.assertFalse(compiled.should_trigger(False, values, dict(values)))
+        self.assertTrue(
+            compiled.should_trigger(
+                False, values, {"employee_first_name": "Jon", "is_active": True}
+            )
+        )
+        self.assertFalse(compiled.should_trigger(True, values, None))
+
+
+class AutomationWorkerTests(SimpleTestCase):
+    def test_jobs_run_between_connection_cleanups(self):
+        worker = AutomationWorker(workers=1)
+        calls = []
+        with mock.patch(
+            "horilla_automations.methods.engine.close_old_connections",
+            side_effect=lambda: calls.append("close"),
+        ):
+            worker.submit(calls.append, "job")
+            worker.join()
+        self.assertEqual(calls, ["close", "job", "close"])
+
+    def test_failing_job_does_not_stop_the_worker(self):
+        worker = AutomationWorker(workers=1)
+        done = []
+        with mock.patch("horilla_automations.methods.engine.close_old_connections"):
+            with self.assertLogs("horilla_automations.methods.engine", "ERROR"):
+                worker.submit(lambda: 1 / 0)
+                worker.submit(done.append, True)
+                worker.join()
+        self.assertEqual(done, [True])
+
+    def test_job_is_dropped_when_the_queue_is_full(self):
+        worker = AutomationWorker(workers=1, maxsize=1, put_timeout=0.01)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        with mock.patch("horilla_automations.methods.engine.close_old_connections"):
+            self.assertTrue(worker.submit(block))
+            started.wait(5)
+            self.assertTrue(worker.submit(print))
+            with self.assertLogs("horilla_automations.methods.engine", "ERROR"):
+                self.assertFalse(worker.submit(print))
+            release.set()
+            worker.join()
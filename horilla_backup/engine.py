@@ -0,0 +1,349 @@
+"""
+engine.py
+
+Streaming backup engine.
+
+The database dump and the media folder are streamed into archives that are
+cut into parts of BACKUP_PART_SIZE bytes, each part handed to the sink
+(see `horilla_backup.sinks`) as soon as it is full, so no full copy of a
+backup is ever written to the server:
+
+- the database is piped from pg_dump (custom format, already compressed)
+  into the parts of `db-<time>.dump`
+- the media files are written into a tar stream compressed by a pool of
+  threads, each block of BACKUP_BLOCK_SIZE bytes as its own gzip member.
+  The parts of `media-<time>.tar.gz` joined together are a regular
+  .tar.gz archive (`cat media-<time>.tar.gz.part* | tar xz`).
+
+Media backups are incremental. The manifest of a backup records the size,
+modification time and SHA-256 of every media file, and the next backup only
+archives the files that are new or whose content changed (a file with a new
+modification time but the same size is hashed before it is archived, so a
+restored or copied media folder is not archived again). The files removed
+since the previous backup are listed in the manifest. A full backup is made
+when there is no previous manifest or the last full backup is older than
+BACKUP_FULL_INTERVAL_DAYS. A file removed while the backup runs is left
+out of it, and a backup that fails removes the parts it already published,
+so no part is left behind without its manifest.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tarfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+BACKUP_PART_SIZE = getattr(settings, "BACKUP_PART_SIZE", 64 * 1024 * 1024)
+BACKUP_BLOCK_SIZE = getattr(settings, "BACKUP_BLOCK_SIZE", 1024 * 1024)
+BACKUP_COMPRESSION_WORKERS = getattr(
+    settings, "BACKUP_COMPRESSION_WORKERS", os.cpu_count() or 1
+)
+BACKUP_FULL_INTERVAL_DAYS = getattr(settings, "BACKUP_FULL_INTERVAL_DAYS", 7)
+MEDIA_MANIFEST = "media-manifest.json"
+
+
+class ChunkedWriter:
+    """
+    Writable stream cut into the parts `<name>.part0001`, `<name>.part0002`,
+    ... of at most `part_size` bytes, published to the sink one by one
+    """
+
+    def __init__(self, sink, name, part_size=None):
+        self.sink = sink
+        self.name = name
+        self.part_size = part_size or BACKUP_PART_SIZE
+        self.parts = []
+        self._part = None
+        self._written = 0
+
+    def write(self, data):
+        data = memoryview(data)
+        written = len(data)
+        while data:
+            if self._part is None:
+                self.parts.append(f"{self.name}.part{len(self.parts) + 1:04d}")
+                self._part = self.sink.open(self.parts[-1])
+                self._written = 0
+            size = min(len(data), self.part_size - self._written)
+            self._part.write(data[:size])
+            self._written += size
+            data = data[size:]
+            if self._written >= self.part_size:
+                self._part.close()
+                self._part = None
+        return written
+
+    def close(self, failed=False):
+        if self._part is not None:
+            self._part.close(failed=failed)
+            self._part = None
+
+    def discard(self):
+        """
+        Drop the part being written and remove the parts already published
+        """
+        self.close(failed=True)
+        for part in self.parts:
+            self.sink.delete(part)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # an archive is published whole or not at all
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+
+def compress_block(block, level):
+    """
+    Block compressed as a complete gzip member
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(block) + compressor.flush()
+
+
+class ParallelGzipWriter:
+    """
+    Writable stream compressed into `output` by a pool of threads. The
+    stream is cut into blocks that are compressed as separate gzip members
+    (zlib releases the GIL while compressing) and written in order, which
+    gzip, tar and `gzip.open` read as one stream.
+    """
+
+    def __init__(self, output, workers=None, block_size=None, level=6):
+        self.output = output
+        self.block_size = block_size or BACKUP_BLOCK_SIZE
+        self.level = level
+        self.workers = workers or BACKUP_COMPRESSION_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        # compressed blocks not written yet, bounded to limit the memory used
+        self._pending = deque()
+        self._buffer = bytearray()
+
+    def _submit(self, block):
+        self._pending.append(
+            self._executor.submit(compress_block, bytes(block), self.level)
+        )
+        while len(self._pending) > self.workers * 2:
+            self.output.write(self._pending.popleft().result())
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(self._buffer[: self.block_size])
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def close(self, failed=False):
+        """
+        Write the rest of the stream, or drop it when `failed`
+        """
+        try:
+            if not failed:
+                if self._buffer:
+                    self._submit(self._buffer)
+                while self._pending:
+                    self.output.write(self._pending.popleft().result())
+        finally:
+            self._buffer = bytearray()
+            self._pending.clear()
+            self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(failed=exc_type is not None)
+
+
+class HashingReader:
+    """
+    File read through while computing its SHA-256
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.hash.update(data)
+        return data
+
+
+def file_hash(path):
+    """
+    SHA-256 of a file
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(BACKUP_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def media_files(root, exclude=()):
+    """
+    {relative path: (size, modification time in ns)} of the regular files
+    under `root`, the directories of `exclude` are skipped
+    """
+    exclude = {os.path.abspath(path) for path in exclude}
+    files = {}
+    for directory, dirs, names in os.walk(root):
+        dirs[:] = sorted(
+            name
+            for name in dirs
+            if os.path.abspath(os.path.join(directory, name)) not in exclude
+        )
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            try:
+                info = os.lstat(path)
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(info.st_mode):
+                files[os.path.relpath(path, root)] = (info.st_size, info.st_mtime_ns)
+    return files
+
+
+def load_manifest(sink):
+    """
+    Manifest of the last media backup in the sink, None when there is none
+    """
+    content = sink.read(MEDIA_MANIFEST)
+    return json.loads(content) if content else None
+
+
+def plan_media_backup(root, previous=None, full=False, exclude=()):
+    """
+    (files, changed, deleted) of a media backup: the manifest entries
+    {path: [size, mtime, sha256]} of every current file (the hash of the
+    changed files is None until they are archived), the paths to archive and
+    the paths removed since the `previous` manifest
+    """
+    known = {} if full or previous is None else previous["files"]
+    files = {}
+    changed = []
+    for path, (size, mtime) in media_files(root, exclude).items():
+        entry = known.get(path)
+        if entry and entry[0] == size and entry[1] == mtime:
+            files[path] = entry
+            continue
+        if entry and entry[0] == size:
+            try:
+                digest = file_hash(os.path.join(root, path))
+            except FileNotFoundError:
+                continue
+            if digest == entry[2]:
+                files[path] = [size, mtime, digest]
+                continue
+        files[path] = [size, mtime, None]
+        changed.append(path)
+    deleted = sorted(set(known) - set(files))
+    return files, changed, deleted
+
+
+def is_full_due(previous, now):
+    """
+    Whether the next media backup after the `previous` manifest is full
+    """
+    if previous is None:
+        return True
+    full_at = datetime.fromisoformat(previous["full_at"])
+    return now - full_at >= timedelta(days=BACKUP_FULL_INTERVAL_DAYS)
+
+
+def backup_media(sink, root=None, full=None, now=None, exclude=()):
+    """
+    Archive the media files changed since the last backup in the sink (all
+    of them for a full backup), returns the manifest of the backup
+    """
+    root = root or settings.MEDIA_ROOT
+    now = now or datetime.now()
+    previous = load_manifest(sink)
+    if full is None or previous is None:
+        full = full or is_full_due(previous, now)
+    files, changed, deleted = plan_media_backup(root, previous, full, exclude)
+    known = {} if full or previous is None else previous["files"]
+
+    name = f"media-{now:%Y%m%dT%H%M%S}{'' if full else '-incremental'}.tar.gz"
+    with ChunkedWriter(sink, name) as output, ParallelGzipWriter(output) as stream:
+        with tarfile.open(fileobj=stream, mode="w|") as archive:
+            for path in list(changed):
+                full_path = os.path.join(root, path)
+                try:
+                    info = archive.gettarinfo(full_path, arcname=path)
+                    file = open(full_path, "rb")
+                except FileNotFoundError:
+                    # removed since the backup was planned
+                    changed.remove(path)
+                    del files[path]
+                    if path in known:
+                        deleted.append(path)
+                    continue
+                with file:
+                    reader = HashingReader(file)
+                    archive.addfile(info, reader)
+                files[path] = [info.size, files[path][1], reader.hash.hexdigest()]
+
+    manifest = {
+        "archive": name,
+        "parts": output.parts,
+        "created_at": now.isoformat(),
+        "full": full,
+        "full_at": now.isoformat() if full else previous["full_at"],
+        "previous": None if full else previous["archive"],
+        "archived": changed,
+        "deleted": sorted(deleted),
+        "files": files,
+    }
+    content = json.dumps(manifest).encode()
+    sink.write(f"{name}.manifest.json", content)
+    # the next backup starts from this one only once it is complete
+    sink.write(MEDIA_MANIFEST, content)
+    return manifest
+
+
+def backup_database(sink, database=None, now=None):
+    """
+    Stream the dump of the PostgreSQL database (the default one) into the
+    sink, returns the names of the parts
+    """
+    from .pgdump import stream_postgres_db
+
+    database = database or settings.DATABASES["default"]
+    now = now or datetime.now()
+    with ChunkedWriter(sink, f"db-{now:%Y%m%dT%H%M%S}.dump") as output:
+        stream_postgres_db(
+            output,
+            db_name=database["NAME"],
+            username=database["USER"],
+            password=database.get("PASSWORD"),
+            host=database.get("HOST") or "localhost",
+            port=database.get("PORT") or 5432,
+        )
+    return output.parts
+
+
+def run_backup(sink, backup_db=True, backup_media_files=True, full=None):
+    """
+    Back up the database and the media folder into the sink
+    """
+    now = datetime.now()
+    result = {}
+    if backup_db:
+        result["db"] = backup_database(sink, now=now)
+    if backup_media_files:
+        # a local sink inside the media folder is not backed up in itself
+        exclude = [sink.path] if getattr(sink, "path", None) else []
+        result["media"] = backup_media(sink, full=full, now=now, exclude=exclude)
+    return result
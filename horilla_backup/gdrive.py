@@ -1,8 +1,17 @@
+import io
 import os
+import tempfile
 
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import (
+    MediaFileUpload,
+    MediaIoBaseDownload,
+    MediaIoBaseUpload,
+)
+
+from .engine import BACKUP_PART_SIZE
+from .sinks import BackupSink, PendingFile
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 
@@ -26,3 +35,72 @@ def upload_file(file_path, service_account_file, parent_folder_id):
         .create(body=file_metadata, media_body=media, fields="id")
         .execute()
     )
+
+
+class GoogleDriveSink(BackupSink):
+    """
+    Backup files uploaded to a Google Drive folder. A file is spooled in
+    memory up to `spool_size` bytes (on disk beyond) and uploaded when it is
+    closed, a file with the same name in the folder is replaced.
+    """
+
+    def __init__(self, service_account_file, parent_folder_id, spool_size=None):
+        self.service = build(
+            "drive", "v3", credentials=authenticate(service_account_file)
+        )
+        self.parent_folder_id = parent_folder_id
+        self.spool_size = spool_size or BACKUP_PART_SIZE
+
+    def _find(self, name):
+        escaped = name.replace("\\", "\\\\").replace("'", "\\'")
+        files = (
+            self.service.files()
+            .list(
+                q=f"name = '{escaped}' and '{self.parent_folder_id}' in parents "
+                "and trashed = false",
+                fields="files(id)",
+                pageSize=1,
+            )
+            .execute()
+            .get("files", [])
+        )
+        return files[0]["id"] if files else None
+
+    def open(self, name):
+        def publish(file):
+            file.seek(0)
+            media = MediaIoBaseUpload(
+                file, mimetype="application/octet-stream", resumable=True
+            )
+            file_id = self._find(name)
+            if file_id:
+                self.service.files().update(fileId=file_id, media_body=media).execute()
+            else:
+                self.service.files().create(
+                    body={"name": name, "parents": [self.parent_folder_id]},
+                    media_body=media,
+                    fields="id",
+                ).execute()
+            file.close()
+
+        return PendingFile(
+            tempfile.SpooledTemporaryFile(max_size=self.spool_size), publish
+        )
+
+    def read(self, name):
+        file_id = self._find(name)
+        if file_id is None:
+            return None
+        content = io.BytesIO()
+        downloader = MediaIoBaseDownload(
+            content, self.service.files().get_media(fileId=file_id)
+        )
+        done = False
+        while not done:
+            _status, done = downloader.next_chunk()
+        return content.getvalue()
+
+    def delete(self, name):
+        file_id = self._find(name)
+        if file_id is not None:
+            self.service.files().delete(fileId=file_id).execute()
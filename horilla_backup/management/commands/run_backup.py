@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from horilla_backup.engine import run_backup
+from horilla_backup.models import LocalBackup
+from horilla_backup.sinks import LocalDirectorySink
+
+
+class Command(BaseCommand):
+    help = "Stream the database dump and the changed media files to a directory"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--to",
+            default=None,
+            help="Directory of the backup (the local backup path by default)",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Archive every media file instead of the changed ones",
+        )
+        parser.add_argument("--no-db", action="store_true", help="Skip the database")
+        parser.add_argument("--no-media", action="store_true", help="Skip the media")
+
+    def handle(self, *args, **options):
+        path = options["to"]
+        if path is None:
+            local_backup = LocalBackup.objects.first()
+            path = local_backup.backup_path if local_backup else None
+        if not path:
+            raise CommandError("Give the backup directory with --to")
+        result = run_backup(
+            LocalDirectorySink(path),
+            backup_db=not options["no_db"],
+            backup_media_files=not options["no_media"],
+            full=True if options["full"] else None,
+        )
+        if "db" in result:
+            self.stdout.write(f"Database: {len(result['db'])} parts")
+        if "media" in result:
+            media = result["media"]
+            self.stdout.write(
+                f"Media: {media['archive']}, {len(media['archived'])} files archived, "
+                f"{len(media['deleted'])} removed, {len(media['parts'])} parts"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Backup written to {path}."))
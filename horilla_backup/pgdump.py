@@ -1,16 +1,15 @@
 import os
+import shutil
 import subprocess
+import tempfile
 
 
-def dump_postgres_db(
-    db_name, username, output_file, password=None, host="localhost", port=5432
-):
-    # Set environment variable for the password if provided
-    if password:
-        os.environ["PGPASSWORD"] = password
-
-    # Construct the pg_dump command
-    dump_command = [
+def pg_dump_command(db_name, username, host="localhost", port=5432, output_file=None):
+    """
+    pg_dump command of the database in the custom format, written to
+    `output_file` or to the standard output
+    """
+    command = [
         "pg_dump",
         "-h",
         host,
@@ -20,19 +19,59 @@ def dump_postgres_db(
         username,
         "-F",
         "c",  # Custom format
-        "-f",
-        output_file,
-        db_name,
     ]
+    if output_file:
+        command += ["-f", output_file]
+    return command + [db_name]
+
+
+def pg_dump_env(password=None):
+    """
+    Environment of the pg_dump process, the password is only given to the
+    process and never set in the environment of the server
+    """
+    env = dict(os.environ)
+    if password:
+        env["PGPASSWORD"] = password
+    return env
 
-    try:
-        # Execute the pg_dump command
-        result = subprocess.run(
-            dump_command, check=True, text=True, capture_output=True
+
+def dump_postgres_db(
+    db_name, username, output_file, password=None, host="localhost", port=5432
+):
+    """
+    Dump the database to `output_file`, raises CalledProcessError (with the
+    error output of pg_dump) when the dump fails
+    """
+    subprocess.run(
+        pg_dump_command(db_name, username, host, port, output_file),
+        check=True,
+        text=True,
+        capture_output=True,
+        env=pg_dump_env(password),
+    )
+
+
+def stream_postgres_db(
+    output, db_name, username, password=None, host="localhost", port=5432
+):
+    """
+    Write the dump of the database to the writable binary file `output` as
+    pg_dump produces it, raises CalledProcessError when the dump fails
+    """
+    command = pg_dump_command(db_name, username, host, port)
+    # the error output goes to a file so a verbose pg_dump never blocks on it
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=errors, env=pg_dump_env(password)
         )
-    except subprocess.CalledProcessError as e:
-        pass
-    finally:
-        # Clean up the environment variable
-        if password:
-            del os.environ["PGPASSWORD"]
+        try:
+            shutil.copyfileobj(process.stdout, output, 1024 * 1024)
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        if returncode:
+            errors.seek(0)
+            raise subprocess.CalledProcessError(
+                returncode, command, stderr=errors.read().decode(errors="replace")
+            )
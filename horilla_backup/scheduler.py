@@ -5,6 +5,7 @@ from django.core.management import call_command
 
 from horilla import settings
 
+from .engine import run_backup
 from .gdrive import *
 
 # from horilla.settings import DBBACKUP_STORAGE_OPTIONS
@@ -82,26 +83,20 @@ scheduler = BackgroundScheduler()
 
 
 def google_drive_backup():
+    """
+    Stream the database dump and the changed media files to Google Drive,
+    see `horilla_backup.engine`
+    """
     if GoogleDriveBackup.objects.exists():
         google_drive = GoogleDriveBackup.objects.first()
-        service_account_file = google_drive.service_account_file.path
-        gdrive_folder_id = google_drive.gdrive_folder_id
-        if google_drive.backup_db:
-            db = settings.DATABASES["default"]
-            dump_postgres_db(
-                db_name=db["NAME"],
-                username=db["USER"],
-                output_file="backupdb.dump",
-                password=db["PASSWORD"],
-            )
-            upload_file("backupdb.dump", service_account_file, gdrive_folder_id)
-            os.remove("backupdb.dump")
-        if google_drive.backup_media:
-            folder_to_zip = settings.MEDIA_ROOT
-            output_zip_file = "media.zip"
-            zip_folder(folder_to_zip, output_zip_file)
-            upload_file("media.zip", service_account_file, gdrive_folder_id)
-            os.remove("media.zip")
+        sink = GoogleDriveSink(
+            google_drive.service_account_file.path, google_drive.gdrive_folder_id
+        )
+        run_backup(
+            sink,
+            backup_db=bool(google_drive.backup_db),
+            backup_media_files=bool(google_drive.backup_media),
+        )
 
 
 def start_gdrive_backup_job():
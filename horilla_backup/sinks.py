@@ -0,0 +1,112 @@
+"""
+sinks.py
+
+Destinations of the backup engine.
+
+A sink stores the named files of a backup: the parts of the archives as
+they are produced and the manifests of the media backups. A file opened
+with `open` is only published under its name once it is closed without an
+error, so an interrupted backup never leaves a truncated part or manifest
+behind under its final name.
+"""
+
+import os
+
+
+class BackupSink:
+    """
+    Destination of the files of a backup
+    """
+
+    def open(self, name):
+        """
+        Writable binary file published as `name` when closed
+        """
+        raise NotImplementedError
+
+    def read(self, name):
+        """
+        Content of the file `name`, None when there is no such file
+        """
+        raise NotImplementedError
+
+    def write(self, name, data):
+        """
+        Publish `data` as the file `name`
+        """
+        with self.open(name) as file:
+            file.write(data)
+
+    def delete(self, name):
+        """
+        Remove the published file `name`, nothing when there is no such file
+        """
+        raise NotImplementedError
+
+
+class PendingFile:
+    """
+    Writable file that calls `publish(file)` when closed without an error
+    and `discard(file)` otherwise
+    """
+
+    def __init__(self, file, publish, discard=None):
+        self.file = file
+        self.publish = publish
+        self.discard = discard
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def close(self, failed=False):
+        if self.file.closed:
+            return
+        if failed:
+            if self.discard is not None:
+                self.discard(self.file)
+            self.file.close()
+            return
+        self.publish(self.file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(failed=exc_type is not None)
+
+
+class LocalDirectorySink(BackupSink):
+    """
+    Backup files kept in a directory of the server
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def open(self, name):
+        path = os.path.join(self.path, name)
+        pending = f"{path}.partial"
+
+        def publish(file):
+            file.close()
+            os.replace(pending, path)
+
+        def discard(file):
+            file.close()
+            os.remove(pending)
+
+        return PendingFile(open(pending, "wb"), publish, discard)
+
+    def read(self, name):
+        path = os.path.join(self.path, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as file:
+            return file.read()
+
+    def delete(self, name):
+        try:
+            os.remove(os.path.join(self.path, name))
+        except FileNotFoundError:
+            pass
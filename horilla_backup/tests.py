@@ -0,0 +1,134 @@
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from datetime import datetime
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from horilla_backup.engine import (
+    MEDIA_MANIFEST,
+    ChunkedWriter,
+    ParallelGzipWriter,
+    backup_media,
+)
+from horilla_backup.sinks import LocalDirectorySink
+
+
+class BackupTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.sink = LocalDirectorySink(os.path.join(self.directory, "backups"))
+        self.media = os.path.join(self.directory, "media")
+        os.makedirs(self.media)
+
+    def sink_files(self):
+        return sorted(os.listdir(self.sink.path))
+
+    def read_archive(self, manifest):
+        content = b"".join(self.sink.read(part) for part in manifest["parts"])
+        with tarfile.open(fileobj=io.BytesIO(content), mode="r:gz") as archive:
+            return {
+                member.name: archive.extractfile(member).read() for member in archive
+            }
+
+    def write_media(self, name, content, mtime=None):
+        path = os.path.join(self.media, name)
+        with open(path, "wb") as file:
+            file.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+
+class ChunkedWriterTests(BackupTestCase):
+    def test_parts_are_cut_at_the_part_size(self):
+        with ChunkedWriter(self.sink, "db.dump", part_size=4) as output:
+            output.write(b"abc")
+            output.write(b"defghij")
+        self.assertEqual(
+            output.parts, [f"db.dump.part000{index}" for index in (1, 2, 3)]
+        )
+        self.assertEqual(
+            [self.sink.read(part) for part in output.parts], [b"abcd", b"efgh", b"ij"]
+        )
+
+    def test_a_full_last_part_opens_no_empty_part(self):
+        with ChunkedWriter(self.sink, "db.dump", part_size=4) as output:
+            output.write(b"abcdefgh")
+        self.assertEqual(self.sink_files(), ["db.dump.part0001", "db.dump.part0002"])
+
+    def test_failure_removes_the_published_parts(self):
+        with self.assertRaises(RuntimeError):
+            with ChunkedWriter(self.sink, "db.dump", part_size=4) as output:
+                output.write(b"abcdefghij")
+                raise RuntimeError
+        self.assertEqual(self.sink_files(), [])
+
+
+class ParallelGzipWriterTests(BackupTestCase):
+    def test_tar_round_trip(self):
+        content = os.urandom(5000) + b"horilla" * 1000
+        output = io.BytesIO()
+        with ParallelGzipWriter(output, workers=2, block_size=1024) as stream:
+            with tarfile.open(fileobj=stream, mode="w|") as archive:
+                info = tarfile.TarInfo("media/file.bin")
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content))
+        output.seek(0)
+        with tarfile.open(fileobj=output, mode="r:gz") as archive:
+            self.assertEqual(archive.extractfile("media/file.bin").read(), content)
+
+
+class BackupMediaTests(BackupTestCase):
+    def backup(self, day):
+        return backup_media(self.sink, root=self.media, now=datetime(2026, 10, day))
+
+    def test_incremental_backups(self):
+        self.write_media("kept.txt", b"kept", mtime=1_000_000)
+        self.write_media("removed.txt", b"removed")
+        full = self.backup(1)
+        self.assertTrue(full["full"])
+        self.assertEqual(
+            self.read_archive(full), {"kept.txt": b"kept", "removed.txt": b"removed"}
+        )
+
+        # same size and content with a new modification time
+        self.write_media("kept.txt", b"kept", mtime=2_000_000)
+        os.remove(os.path.join(self.media, "removed.txt"))
+        self.write_media("new.txt", b"new")
+        incremental = self.backup(2)
+        self.assertFalse(incremental["full"])
+        self.assertEqual(incremental["previous"], full["archive"])
+        self.assertEqual(incremental["archived"], ["new.txt"])
+        self.assertEqual(incremental["deleted"], ["removed.txt"])
+        self.assertEqual(self.read_archive(incremental), {"new.txt": b"new"})
+        self.assertEqual(
+            json.loads(self.sink.read(MEDIA_MANIFEST))["archive"],
+            incremental["archive"],
+        )
+
+    def test_files_removed_while_archiving_are_skipped(self):
+        self.write_media("kept.txt", b"kept")
+        listing = {"kept.txt": (4, 1), "vanished.txt": (3, 1)}
+        with mock.patch("horilla_backup.engine.media_files", return_value=listing):
+            manifest = self.backup(1)
+        self.assertEqual(manifest["archived"], ["kept.txt"])
+        self.assertEqual(list(manifest["files"]), ["kept.txt"])
+        self.assertEqual(self.read_archive(manifest), {"kept.txt": b"kept"})
+
+    def test_failed_backup_leaves_nothing_behind(self):
+        self.write_media("large.bin", os.urandom(4096))
+        self.write_media("other.bin", os.urandom(4096))
+        with mock.patch("horilla_backup.engine.BACKUP_PART_SIZE", 1024), mock.patch(
+            "horilla_backup.engine.BACKUP_BLOCK_SIZE", 512
+        ), mock.patch(
+            "horilla_backup.engine.HashingReader.read",
+            side_effect=[os.urandom(4096), OSError("disk error")],
+        ):
+            with self.assertRaises(OSError):
+                self.backup(1)
+        self.assertEqual(self.sink_files(), [])
@@ -37,6 +37,7 @@ from openpyxl.utils import get_column_letter
 
 from horilla import settings
 from horilla.horilla_middlewares import _thread_locals
+from horilla.signals import post_generic_import, pre_generic_import
 from horilla_views.templatetags.generic_template_filters import getattribute
 
 FIELD_WIDGET_MAP = {
@@ -795,6 +796,65 @@ def split_by_import_reference(employee_data):
     return with_import_reference, without_import_reference
 
 
+def build_import_lookup(values_mapping, field_mapping):
+    """
+    Index the pre-resolved related objects of an import by their lookup value
+
+    Returns {mapping: {str(value): instance}} so every cell is resolved with
+    a dict access instead of a scan or a query.
+    """
+    return {
+        mapping: {
+            str(getattr(instance, field_mapping[mapping], None)): instance
+            for instance in instances
+        }
+        for mapping, instances in values_mapping.items()
+        if mapping in field_mapping
+    }
+
+
+def prefetch_import_lookup(related_model, lookup_field, values, view=None):
+    """
+    Resolve every distinct value of an import column with one query and
+    create the missing related records with one bulk insert
+    """
+    values = {value for value in values if value not in [None, ""]}
+    manager = related_model.objects
+    if hasattr(manager, "entire"):
+        manager = manager.entire()
+    existing = {
+        str(getattr(instance, lookup_field)): instance
+        for instance in manager.filter(**{f"{lookup_field}__in": list(values)})
+    }
+    to_create = [
+        related_model(**{lookup_field: value})
+        for value in values
+        if str(value) not in existing
+    ]
+    if to_create:
+        pre_generic_import.send(sender=related_model, records=to_create, view=view)
+        related_model.objects.bulk_create(to_create)
+        post_generic_import.send(sender=related_model, records=to_create, view=view)
+        existing.update(
+            {str(getattr(instance, lookup_field)): instance for instance in to_create}
+        )
+    return existing
+
+
+def batched(iterable, batch_size):
+    """
+    Split an iterable into lists of at most batch_size items
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def resolve_foreign_keys(
     base_model,
     record,
@@ -804,6 +864,13 @@ def resolve_foreign_keys(
     pk_values_mapping,
     prefix="",
 ):
+    """
+    Resolve the foreign key values of a nested import record.
+
+    `pk_values_mapping` is used as a per import cache
+    ({full_key: {str(value): instance}}, see `prefetch_import_lookup`), so
+    each distinct value is queried at most once per import.
+    """
     resolved = {}
 
     for key, value in record.items():
@@ -839,10 +906,15 @@ def resolve_foreign_keys(
                     resolved[key] = None
                     continue
 
+                cached = pk_values_mapping.setdefault(full_key, {})
+                if str(value) in cached:
+                    resolved[key] = cached[str(value)]
+                    continue
                 try:
                     instance, _ = model_class.objects.get_or_create(
                         **{lookup_field: value}
                     )
+                    cached[str(value)] = instance
                     resolved[key] = instance
                 except Exception as e:
                     raise ValueError(
@@ -859,7 +931,13 @@ def update_related(
     record,
     primary_key_mapping,
     reverse_model_relation_to_base_model,
+    lookup=None,
 ):
+    """
+    Update the reverse related records of an imported record, `lookup` is
+    the import lookup built by `build_import_lookup`
+    """
+    lookup = {} if lookup is None else lookup
     related_objects = {
         key: getattribute(obj, key) or None
         for key in reverse_model_relation_to_base_model
@@ -873,9 +951,12 @@ def update_related(
             if obj_related_field in primary_key_mapping and pk_mapping:
                 previous_obj = getattr(related_object, key, None)
                 if previous_obj and value is not None:
-                    new_obj = previous_obj._meta.model.objects.get(
-                        **{pk_mapping: value}
-                    )
+                    new_obj = lookup.setdefault(obj_related_field, {}).get(str(value))
+                    if new_obj is None:
+                        new_obj = previous_obj._meta.model.objects.get(
+                            **{pk_mapping: value}
+                        )
+                        lookup[obj_related_field][str(value)] = new_obj
                     setattr(related_object, key, new_obj)
             else:
                 if value is not None:
@@ -889,38 +970,29 @@ def assign_related(
     reverse_field,
     pk_values_mapping,
     pk_field_mapping,
+    lookup=None,
 ):
     """
     Method to assign related records
+
+    When `lookup` (see `build_import_lookup`) is passed the related objects
+    are resolved with dict accesses instead of scanning `pk_values_mapping`.
     """
+    if lookup is None:
+        lookup = build_import_lookup(pk_values_mapping, pk_field_mapping)
     reverse_obj_dict = {}
     if reverse_field in record:
         if isinstance(record[reverse_field], dict):
             for field, value in record[reverse_field].items():
                 full_field = reverse_field + "__" + field
                 if full_field in pk_values_mapping:
-                    reverse_obj_dict.update(
-                        {
-                            field: data
-                            for data in pk_values_mapping[full_field]
-                            if getattr(data, pk_field_mapping[full_field], None)
-                            == value
-                        }
-                    )
+                    instance = lookup.get(full_field, {}).get(str(value))
+                    if instance is not None:
+                        reverse_obj_dict[field] = instance
                 else:
                     reverse_obj_dict[field] = value
         else:
-            instances = [
-                data
-                for data in pk_values_mapping[reverse_field]
-                if getattr(
-                    data,
-                    pk_field_mapping[reverse_field],
-                    record[reverse_field],
-                )
-                == record[reverse_field]
-            ]
-            if instances:
-                instance = instances[0]
+            instance = lookup.get(reverse_field, {}).get(str(record[reverse_field]))
+            if instance is not None:
                 reverse_obj_dict.update({reverse_field: instance})
     return reverse_obj_dict
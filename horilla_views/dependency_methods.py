@@ -0,0 +1,151 @@
+"""
+dependency_methods.py
+
+Count-first dependency analysis for the generic delete confirmation.
+
+The relations a delete cascades through are read from the model metadata
+(the same candidate relations Django's delete collector follows) and cached
+per model. Every dependent model is reached from the deleted row through one
+or more lookups, so its rows are counted with one aggregate query and listed
+page by page from a filtered queryset instead of collecting the rows of the
+whole cascade graph.
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import (
+    CASCADE,
+    PROTECT,
+    RESTRICT,
+    CharField,
+    ForeignKey,
+    Q,
+    TextField,
+)
+from django.db.models.deletion import get_candidate_relations_to_delete
+
+# cascade levels followed from the deleted row, self referencing cascades
+# are not followed further than this
+GENERIC_DELETE_DEPTH = getattr(settings, "GENERIC_DELETE_DEPTH", 4)
+
+
+class Dependency:
+    """
+    Rows of one model that a delete removes, or that protect it
+    """
+
+    def __init__(self, model, protected):
+        self.model = model
+        self.protected = protected
+        # lookups from the model to the primary key of the deleted row
+        self.lookups = []
+        # (name, verbose name) of the protecting foreign keys
+        self.fields = []
+        # foreign keys pointing at the deleted row itself
+        self.direct_fields = []
+
+    @property
+    def name(self):
+        """
+        Display name, many to many tables are named after the model holding
+        the field
+        """
+        return self.model.__name__.split("_")[0]
+
+    @property
+    def label(self):
+        """
+        app_label.ModelName of the model
+        """
+        return self.model._meta.label
+
+    def filter(self, pk):
+        """
+        Q object matching the rows of the dependency for the row `pk`
+        """
+        query = Q()
+        for lookup in self.lookups:
+            query |= Q(**{lookup: pk})
+        return query
+
+    def queryset(self, pk):
+        """
+        Rows of the dependency for the row `pk`
+        """
+        return self.model._base_manager.filter(self.filter(pk))
+
+
+@lru_cache(maxsize=None)
+def get_dependencies(model):
+    """
+    Dependencies of deleting a `model` row: the model itself and the models
+    the delete cascades to, followed by the models whose rows protect it
+    """
+    root = Dependency(model, False)
+    root.lookups.append("pk")
+    cascade = {model: root}
+    protected = {}
+    # (model, lookup to the deleted row, foreign keys followed to reach it)
+    pending = [(model, "pk", ())]
+    while pending:
+        parent, parent_lookup, path = pending.pop(0)
+        for relation in get_candidate_relations_to_delete(parent._meta):
+            field = relation.field
+            if field in path:
+                continue
+            related_model = relation.related_model
+            on_delete = field.remote_field.on_delete
+            lookup = f"{field.name}__{parent_lookup}"
+            if on_delete in (PROTECT, RESTRICT):
+                dependency = protected.setdefault(
+                    related_model, Dependency(related_model, True)
+                )
+                if (field.name, field.verbose_name) not in dependency.fields:
+                    dependency.fields.append((field.name, field.verbose_name))
+            elif on_delete is CASCADE:
+                dependency = cascade.setdefault(
+                    related_model, Dependency(related_model, False)
+                )
+                if len(path) + 1 < GENERIC_DELETE_DEPTH:
+                    pending.append((related_model, lookup, path + (field,)))
+            else:
+                # SET_NULL, SET_DEFAULT, DO_NOTHING... leave the rows in place
+                continue
+            dependency.lookups.append(lookup)
+            if not path:
+                dependency.direct_fields.append(field.name)
+    return list(cascade.values()) + list(protected.values())
+
+
+def count_dependencies(instance):
+    """
+    [(dependency, number of rows)] of the dependencies of deleting
+    `instance` that have rows, with one count query per dependency
+    """
+    counts = []
+    for dependency in get_dependencies(instance._meta.model):
+        count = dependency.queryset(instance.pk).count()
+        if count:
+            counts.append((dependency, count))
+    return counts
+
+
+def search_filter(model, search):
+    """
+    Q object matching `search` in the text fields of the model and of the
+    models its foreign keys point at
+    """
+    if not search:
+        return Q()
+    query = Q()
+    for field in model._meta.fields:
+        if isinstance(field, (CharField, TextField)):
+            query |= Q(**{f"{field.name}__icontains": search})
+        elif isinstance(field, ForeignKey):
+            for related_field in field.related_model._meta.fields:
+                if isinstance(related_field, (CharField, TextField)):
+                    query |= Q(
+                        **{f"{field.name}__{related_field.name}__icontains": search}
+                    )
+    return query if query else Q(pk__in=[])
@@ -9,9 +9,9 @@ from django.views.generic import DetailView
 from simple_history.utils import get_history_model_for_model
 
 from horilla.horilla_middlewares import _thread_locals
+from horilla_audit.methods import get_diff_page
 from horilla_views.cbv_methods import hx_request_required
 from horilla_views.generic.cbv.views import HorillaFormView
-from horilla_views.history_methods import get_diff
 
 
 @method_decorator(hx_request_required, name="dispatch")
@@ -24,6 +24,7 @@ class HorillaHistoryView(DetailView):
     has_perm_to_revert = False
     fields: list = []
     history_related_name = "history"
+    paginate_by = 20
 
     def get_context_data(self, **kwargs):
         """
@@ -31,7 +32,12 @@ class HorillaHistoryView(DetailView):
         """
         context = super().get_context_data(**kwargs)
         instance = self.get_object()
-        context["tracking"] = get_diff(instance, self.history_related_name)
+        context["tracking"] = get_diff_page(
+            instance,
+            self.request.GET.get("page", 1),
+            self.paginate_by,
+            self.history_related_name,
+        )
         context["model"] = (
             f"{self.model._meta.app_label}.{self.model._meta.object_name}"
         )
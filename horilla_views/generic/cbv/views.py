@@ -17,7 +17,7 @@ from django.core.cache import cache as CACHE
 from django.core.exceptions import FieldDoesNotExist
 from django.core.paginator import Page
 from django.db import transaction
-from django.db.models import CharField, F
+from django.db.models import CharField, F, QuerySet
 from django.db.models.functions import Cast
 from django.http import HttpRequest, HttpResponse, JsonResponse, QueryDict
 from django.shortcuts import render
@@ -29,6 +29,7 @@ from django.views.generic import DetailView, FormView, ListView, TemplateView
 from xhtml2pdf import pisa
 
 from base.methods import closest_numbers, eval_validate, get_key_instances
+from base.user_preferences import get_user_preferences
 from horilla.filters import FilterSet
 from horilla.group_by import group_by_queryset
 from horilla.horilla_middlewares import _thread_locals
@@ -36,12 +37,15 @@ from horilla.signals import post_generic_import, pre_generic_import
 from horilla_views import models
 from horilla_views.cbv_methods import (  # update_initial_cache,
     assign_related,
+    batched,
+    build_import_lookup,
     export_xlsx,
     generate_import_excel,
     get_short_uuid,
     get_verbose_name_from_field_path,
     hx_request_required,
     paginator_qry,
+    prefetch_import_lookup,
     sortby,
     split_by_import_reference,
     structured,
@@ -93,6 +97,7 @@ class HorillaListView(ListView):
     fk_o2o_field_in_base_model: list = []
     individual_update: bool = False
     o2o_related_name_mapping: dict = {}
+    import_batch_size: int = 500
 
     custom_empty_template: str = ""
 
@@ -173,9 +178,9 @@ class HorillaListView(ListView):
         hidden_fields = []
         existing_instance = None
         if request:
-            existing_instance = models.ToggleColumn.objects.filter(
-                user_id=request.user, path=request.path_info
-            ).first()
+            existing_instance = get_user_preferences(request.user).toggle_column(
+                request.path_info
+            )
             if existing_instance:
                 hidden_fields = existing_instance.excluded_columns
 
@@ -322,6 +327,134 @@ class HorillaListView(ListView):
         wb.save(response)
         return response
 
+    def build_import_row(
+        self,
+        record,
+        update_reference_key,
+        pk_values_mapping,
+        pk_lookup,
+        fk_lookup,
+        related_fields,
+    ):
+        """
+        Resolve and validate one imported record without touching the
+        database, returns (instance, {fk_field: instance}, {relation: instance})
+        """
+        record.pop(update_reference_key, None)
+        for reverse_field in related_fields + self.fk_o2o_field_in_base_model:
+            if reverse_field in list(self.primary_key_mapping.keys()) + related_fields:
+                record[reverse_field] = assign_related(
+                    record,
+                    reverse_field,
+                    pk_values_mapping,
+                    self.primary_key_mapping,
+                    lookup=pk_lookup,
+                )
+            elif reverse_field in self.fk_mapping:
+                fk_instance = fk_lookup.get(reverse_field, {}).get(
+                    str(record.get(reverse_field))
+                )
+                if fk_instance is not None:
+                    record[reverse_field] = fk_instance
+
+        instance_record = {
+            key: value
+            for key, value in record.items()
+            if key not in related_fields
+            and not (
+                key in self.fk_o2o_field_in_base_model and key not in self.fk_mapping
+            )
+        }
+        instance = self.model(**instance_record)
+        fk_instances = {}
+        for fk_field in self.fk_o2o_field_in_base_model:
+            fk_record = record[fk_field]
+            if isinstance(fk_record, dict):
+                fk_instance = self.import_related_model_column_mapping[fk_field](
+                    **fk_record
+                )
+                fk_instance.clean_fields()
+                fk_instances[fk_field] = fk_instance
+            else:
+                fk_instance = fk_record
+            setattr(instance, fk_field, fk_instance)
+        instance.clean_fields(exclude=related_fields + self.fk_o2o_field_in_base_model)
+
+        related_instances = {}
+        for relation in related_fields:
+            related_record = dict(record[relation])
+            related_name = self.reverse_model_relation_to_base_model[relation]
+            related_record[related_name] = instance
+            related_instance = self.import_related_model_column_mapping[relation](
+                **related_record
+            )
+            related_instance.clean_fields(exclude=[related_name])
+            related_instances[relation] = related_instance
+        return instance, fk_instances, related_instances
+
+    def bulk_create_import_rows(self, rows, related_fields):
+        """
+        Insert a batch of resolved rows, one bulk insert per model
+        """
+        for fk_field in self.fk_o2o_field_in_base_model:
+            if fk_field in self.fk_mapping:
+                continue
+            items = [row[1][fk_field] for row in rows if fk_field in row[1]]
+            if not items:
+                continue
+            related_model = self.import_related_model_column_mapping[fk_field]
+            pre_generic_import.send(sender=related_model, records=items, view=self)
+            related_model.objects.bulk_create(items)
+            post_generic_import.send(sender=related_model, records=items, view=self)
+
+        items = [row[0] for row in rows]
+        pre_generic_import.send(sender=self.model, records=items, view=self)
+        self.model.objects.bulk_create(items)
+        post_generic_import.send(sender=self.model, records=items, view=self)
+
+        for relation in related_fields:
+            items = [row[2][relation] for row in rows]
+            related_model = self.import_related_model_column_mapping[relation]
+            pre_generic_import.send(sender=related_model, records=items, view=self)
+            related_model.objects.bulk_create(items)
+            post_generic_import.send(sender=related_model, records=items, view=self)
+
+    def import_batch(self, rows, related_fields, error_records):
+        """
+        Write one batch of rows in its own transaction. When the batch fails,
+        the rows are retried one by one so a bad row is reported without
+        aborting the rest of the batch.
+        """
+        try:
+            with transaction.atomic():
+                self.bulk_create_import_rows(rows, related_fields)
+            return len(rows)
+        except Exception:
+            logger.error(traceback.format_exc())
+        imported = 0
+        for instance, fk_instances, related_instances in rows:
+            # drop the keys assigned by the rolled back insert before retrying
+            instance.pk = None
+            for fk_field, fk_instance in fk_instances.items():
+                fk_instance.pk = None
+                setattr(instance, fk_field, fk_instance)
+            for relation, related_instance in related_instances.items():
+                related_instance.pk = None
+                setattr(
+                    related_instance,
+                    self.reverse_model_relation_to_base_model[relation],
+                    instance,
+                )
+            try:
+                with transaction.atomic():
+                    self.bulk_create_import_rows(
+                        [(instance, fk_instances, related_instances)], related_fields
+                    )
+                imported += 1
+            except Exception as e:
+                error_records.append({"record": str(instance), "error": str(e)})
+        return imported
+
     def import_records(self, request, *args, **kwargs):
         """
         Method to import records
@@ -347,22 +480,22 @@ class HorillaListView(ListView):
 
             df = pd.read_excel(excel_file)
 
+            # streaming pass over the sheet, collecting the distinct values of
+            # every related column so they can be resolved once per model
+            lookup_fields = list(self.primary_key_mapping.keys()) + list(
+                self.import_related_model_column_mapping.keys()
+            )
             serialized = []
             field_column_mapping_values = {}
-            for _, row in df.iterrows():
+            for row in df.to_dict("records"):
                 record = {}
                 for model_field, excel_col in field_column_mapping.items():
                     if excel_col in row:
                         value = row[excel_col]
-                        if model_field in (
-                            list(self.primary_key_mapping.keys())
-                            + list(self.import_related_model_column_mapping.keys())
-                        ) and not pd.isna(value):
-                            field_column_mapping_values[model_field] = (
-                                field_column_mapping_values.get(
-                                    model_field, set({})
-                                ).union({value})
-                            )
+                        if model_field in lookup_fields and not pd.isna(value):
+                            field_column_mapping_values.setdefault(
+                                model_field, set()
+                            ).add(value)
                         if pd.isna(value):
                             value = None
                         if isinstance(value, str):
@@ -377,8 +510,6 @@ class HorillaListView(ListView):
                 serialized.append(record)
             with_ref, without_ref = split_by_import_reference(serialized)
 
-            error_records = []
-
             error_records = []
             pk_values_mapping = {}
             fk_values_mapping = {}
@@ -387,226 +518,45 @@ class HorillaListView(ListView):
                 related_model = self.import_related_model_column_mapping[mapping]
                 if mapping in self.primary_key_mapping:
                     field = self.primary_key_mapping[mapping]
-                    if hasattr(related_model.objects, "entire"):
-                        existing_objects = (
-                            related_model.objects.entire()
-                            .filter(**{f"{field}__in": list(values)})
-                            .only("pk", field)
-                        )
-                    else:
-                        existing_objects = related_model.objects.filter(
-                            **{f"{field}__in": list(values)}
-                        ).only("pk", field)
-
-                    existing_values = existing_objects.annotate(
-                        field_as_str=Cast(F(field), CharField())
-                    ).values_list("field_as_str", flat=True)
-
-                    to_create = [
-                        related_model(**{field: value})
-                        for value in values
-                        if str(value) not in existing_values
-                    ]
-
-                    if to_create:
-                        pre_generic_import.send(
-                            sender=related_model,
-                            records=to_create,
-                            view=self,
-                        )
-                        related_model.objects.bulk_create(to_create)
-                        post_generic_import.send(
-                            sender=related_model,
-                            records=to_create,
-                            view=self,
-                        )
-                    pk_values_mapping[mapping] = pk_values_mapping.get(
-                        mapping, []
-                    ) + list(existing_objects)
                 elif mapping in self.fk_mapping:
                     field = self.fk_mapping[mapping]
-                    related_model = self.import_related_model_column_mapping[mapping]
-                    existing_objects = related_model.objects.filter(
-                        **{f"{field}__in": list(values)}
-                    ).only("pk", field)
-                    existing_values = existing_objects.values_list(field, flat=True)
-                    to_create = [
-                        related_model(**{field: value})
-                        for value in values
-                        if value not in existing_values
-                    ]
-                    if to_create:
-                        pre_generic_import.send(
-                            sender=related_model,
-                            records=to_create,
-                            view=self,
-                        )
-                        related_model.objects.bulk_create(to_create)
-                        post_generic_import.send(
-                            sender=related_model,
-                            records=to_create,
-                            view=self,
-                        )
-                    fk_values_mapping[mapping] = fk_values_mapping.get(
-                        mapping, []
-                    ) + list(existing_objects)
-            if without_ref:
-                with transaction.atomic():
-                    records_to_import = []
-                    for record in without_ref:
-                        try:
-                            for reverse_field in (
-                                list(self.reverse_model_relation_to_base_model.keys())
-                                + self.fk_o2o_field_in_base_model
-                            ):
-                                if reverse_field in list(
-                                    self.primary_key_mapping.keys()
-                                ) + list(
-                                    self.reverse_model_relation_to_base_model.keys()
-                                ):
-                                    result = assign_related(
-                                        record,
-                                        reverse_field,
-                                        pk_values_mapping,
-                                        self.primary_key_mapping,
-                                    )
-                                    record[reverse_field] = result
-                                elif reverse_field in self.fk_mapping:
-                                    record.update(
-                                        {
-                                            reverse_field: data
-                                            for data in fk_values_mapping[reverse_field]
-                                            if getattr(
-                                                data,
-                                                self.fk_mapping[reverse_field],
-                                                None,
-                                            )
-                                            == record[reverse_field]
-                                        }
-                                    )
-                            records_to_import.append(record)
-
-                        except Exception as e:
-                            error_records.append(
-                                {
-                                    "record": record.get(next(iter(record)), "Unknown"),
-                                    "error": str(e),
-                                }
-                            )
-                    bulk_base_fk_grouping = {}
-                    bulk_create_reverse_related_grouping = {}
-                    bulk_create_base_grouping = []
-                    items = []
-
-                    related_fields = list(
-                        self.reverse_model_relation_to_base_model.keys()
-                    )
-                    fk_fields = self.fk_o2o_field_in_base_model
-
-                    for record in records_to_import:
-                        if record.get(update_reference_key):
-                            del record[update_reference_key]
-                        instance_record = record.copy()
-                        if update_reference_key in instance_record:
-                            del instance_record[update_reference_key]
-                        for relation in related_fields:
-                            if relation in instance_record:
-                                del instance_record[relation]
-                        for fk_field in self.fk_o2o_field_in_base_model:
-                            if (
-                                fk_field in instance_record
-                                and fk_field not in self.fk_mapping
-                            ):
-                                del instance_record[fk_field]
+                else:
+                    continue
+                resolved = prefetch_import_lookup(
+                    related_model, field, values, view=self
+                )
+                if mapping in self.primary_key_mapping:
+                    pk_values_mapping[mapping] = list(resolved.values())
+                else:
+                    fk_values_mapping[mapping] = list(resolved.values())
+            pk_lookup = build_import_lookup(pk_values_mapping, self.primary_key_mapping)
+            fk_lookup = build_import_lookup(fk_values_mapping, self.fk_mapping)
 
-                        instance = self.model(**instance_record)
-                        for relation in related_fields:
-                            related_record = record[relation]
-                            related_record[
-                                self.reverse_model_relation_to_base_model[relation]
-                            ] = instance
-                            related_instance = self.import_related_model_column_mapping[
-                                relation
-                            ](**related_record)
-                            bulk_create_reverse_related_grouping[relation] = (
-                                bulk_create_reverse_related_grouping.get(relation, [])
-                                + [related_instance]
+            imported = 0
+            if without_ref:
+                related_fields = list(self.reverse_model_relation_to_base_model.keys())
+                rows = []
+                for record in without_ref:
+                    try:
+                        rows.append(
+                            self.build_import_row(
+                                record,
+                                update_reference_key,
+                                pk_values_mapping,
+                                pk_lookup,
+                                fk_lookup,
+                                related_fields,
                             )
-
-                        for fk_field in fk_fields:
-                            fk_record = record[fk_field]
-                            if isinstance(fk_record, dict):
-                                fk_instance = self.import_related_model_column_mapping[
-                                    fk_field
-                                ](**fk_record)
-                            else:
-                                fk_instance = fk_record
-                            bulk_base_fk_grouping[fk_field] = bulk_base_fk_grouping.get(
-                                fk_field, []
-                            ) + [fk_instance]
-                            setattr(instance, fk_field, fk_instance)
-
-                        bulk_create_base_grouping.append(instance)
-
-                    for fk_field in self.fk_o2o_field_in_base_model:
-                        if fk_field not in self.fk_mapping:
-                            for relation, items in bulk_base_fk_grouping.items():
-                                pre_generic_import.send(
-                                    sender=self.import_related_model_column_mapping[
-                                        fk_field
-                                    ],
-                                    records=items,
-                                    view=self,
-                                )
-
-                                if relation not in self.fk_mapping:
-                                    pre_generic_import.send(
-                                        sender=self.import_related_model_column_mapping[
-                                            fk_field
-                                        ],
-                                        records=items,
-                                        view=self,
-                                    )
-                                    self.import_related_model_column_mapping[
-                                        fk_field
-                                    ].objects.bulk_create(items)
-                                    post_generic_import.send(
-                                        sender=self.import_related_model_column_mapping[
-                                            fk_field
-                                        ],
-                                        records=items,
-                                        view=self,
-                                    )
-
-                    if not items:
-                        items = bulk_create_base_grouping
-                    pre_generic_import.send(
-                        sender=self.model,
-                        records=items,
-                        view=self,
-                    )
-
-                    self.model.objects.bulk_create(bulk_create_base_grouping)
-
-                    post_generic_import.send(
-                        sender=self.model,
-                        records=items,
-                        view=self,
-                    )
-                    for related, items in bulk_create_reverse_related_grouping.items():
-                        pre_generic_import.send(
-                            sender=self.import_related_model_column_mapping[related],
-                            records=items,
-                            view=self,
                         )
-                        self.import_related_model_column_mapping[
-                            related
-                        ].objects.bulk_create(items)
-                        post_generic_import.send(
-                            sender=self.import_related_model_column_mapping[related],
-                            records=items,
-                            view=self,
+                    except Exception as e:
+                        error_records.append(
+                            {
+                                "record": record.get(next(iter(record)), "Unknown"),
+                                "error": str(e),
+                            }
                         )
+                for batch in batched(rows, self.import_batch_size):
+                    imported += self.import_batch(batch, related_fields, error_records)
             if with_ref:
                 base_instance_ids = [item["id_import_reference"] for item in with_ref]
                 fields = (
@@ -651,6 +601,7 @@ class HorillaListView(ListView):
                                         reverse_field,
                                         pk_values_mapping,
                                         self.primary_key_mapping,
+                                        lookup=pk_lookup,
                                     )
                                     if list(result.keys())[0] not in self.fk_mapping:
                                         if (
@@ -666,18 +617,11 @@ class HorillaListView(ListView):
                                             result.values()
                                         )[0]
                                 elif reverse_field in self.fk_mapping:
-                                    record.update(
-                                        {
-                                            reverse_field: data
-                                            for data in fk_values_mapping[reverse_field]
-                                            if getattr(
-                                                data,
-                                                self.fk_mapping[reverse_field],
-                                                None,
-                                            )
-                                            == record[reverse_field]
-                                        }
+                                    fk_instance = fk_lookup.get(reverse_field, {}).get(
+                                        str(record.get(reverse_field))
                                     )
+                                    if fk_instance is not None:
+                                        record[reverse_field] = fk_instance
                             records_to_update.append(record)
 
                         except Exception as e:
@@ -948,7 +892,7 @@ class HorillaListView(ListView):
                 context={
                     "view_id": self.view_id,
                     "status": status,
-                    "imported": len(without_ref),
+                    "imported": imported,
                     "updated": len(with_ref),
                     "errors": error_records[:10],  # Optional: truncate if too large
                     "total_errors": error_records,  # Optional: truncate if too large
@@ -1007,11 +951,9 @@ class HorillaListView(ListView):
                         + "cbv"
                     )["query_dict"]
 
-                default_filter = models.SavedFilter.objects.filter(
-                    path=self.request.path,
-                    created_by=self.request.user,
-                    is_default=True,
-                ).first()
+                default_filter = get_user_preferences(self.request.user).default_filter(
+                    self.request.path
+                )
                 if not bool(query_dict) and default_filter:
                     data = eval_validate(default_filter.filter)
                     query_dict = QueryDict("", mutable=True)
@@ -1081,14 +1023,9 @@ class HorillaListView(ListView):
         if referrer:
             # Remove the protocol and domain part
             referrer = "/" + "/".join(referrer.split("/")[3:])
-        context["stored_filters"] = (
-            models.SavedFilter.objects.filter(
-                path=self.request.path, created_by=self.request.user
-            )
-            | models.SavedFilter.objects.filter(
-                referrer=referrer, created_by=self.request.user
-            )
-        ).distinct()
+        context["stored_filters"] = get_user_preferences(
+            self.request.user
+        ).stored_filters(self.request.path, referrer)
 
         context["select_all_ids"] = self.select_all
         if self._saved_filters.get("field"):
@@ -1139,8 +1076,11 @@ class HorillaListView(ListView):
 
         ordered_ids = []
         if not self._saved_filters.get("field"):
-            for instance in queryset:
-                ordered_ids.append(instance.pk)
+            if isinstance(queryset, QuerySet):
+                # only the ids, the rows are loaded a page at a time
+                ordered_ids = list(queryset.values_list("pk", flat=True))
+            else:
+                ordered_ids = [instance.pk for instance in queryset]
         self.request.session[self.ordered_ids_key] = ordered_ids
         context["queryset"] = paginator_qry(
             queryset, self._saved_filters.get("page"), self.records_per_page
@@ -1672,11 +1612,9 @@ class HorillaCardView(ListView):
                 self.queryset = self.filter_class(
                     query_dict, queryset, request=self.request
                 ).qs
-                default_filter = models.SavedFilter.objects.filter(
-                    path=self.request.path,
-                    created_by=self.request.user,
-                    is_default=True,
-                ).first()
+                default_filter = get_user_preferences(self.request.user).default_filter(
+                    self.request.path
+                )
                 if not bool(query_dict) and default_filter:
                     data = eval_validate(default_filter.filter)
                     query_dict = QueryDict("", mutable=True)
@@ -1730,14 +1668,9 @@ class HorillaCardView(ListView):
         if referrer:
             # Remove the protocol and domain part
             referrer = "/" + "/".join(referrer.split("/")[3:])
-        context["stored_filters"] = (
-            models.SavedFilter.objects.filter(
-                path=self.request.path, created_by=self.request.user
-            )
-            | models.SavedFilter.objects.filter(
-                referrer=referrer, created_by=self.request.user
-            )
-        ).distinct()
+        context["stored_filters"] = get_user_preferences(
+            self.request.user
+        ).stored_filters(self.request.path, referrer)
         context["queryset"] = paginator_qry(
             queryset, self.request.GET.get("page"), self.records_per_page
         )
@@ -2237,9 +2170,9 @@ class HorillaProfileView(DetailView):
 
         # hidden columns configuration
 
-        existing_instance = models.ToggleColumn.objects.filter(
-            user_id=request.user, path=request.path_info
-        ).first()
+        existing_instance = get_user_preferences(request.user).toggle_column(
+            request.path_info
+        )
 
         self.visible_tabs = self.tabs.copy()
 
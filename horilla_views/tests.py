@@ -1,3 +1,113 @@
-from django.test import TestCase
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from base.models import Company, Department, JobPosition
+from horilla_views.cbv_methods import (
+    assign_related,
+    batched,
+    build_import_lookup,
+    prefetch_import_lookup,
+)
+from horilla_views.dependency_methods import (
+    count_dependencies,
+    get_dependencies,
+    search_filter,
+)
+
+
+class ImportHelperTests(SimpleTestCase):
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(batched([], 2)), [])
+
+    def test_build_import_lookup(self):
+        hr = SimpleNamespace(department="HR")
+        lookup = build_import_lookup(
+            {"department_id": [hr], "unmapped": [hr]},
+            {"department_id": "department"},
+        )
+        self.assertEqual(lookup, {"department_id": {"HR": hr}})
+
+    def test_assign_related(self):
+        hr = SimpleNamespace(department="HR")
+        values_mapping = {"department_id": [hr]}
+        field_mapping = {"department_id": "department"}
+        self.assertEqual(
+            assign_related(
+                {"department_id": "HR"}, "department_id", values_mapping, field_mapping
+            ),
+            {"department_id": hr},
+        )
+        self.assertEqual(
+            assign_related(
+                {"department_id": "Sales"},
+                "department_id",
+                values_mapping,
+                field_mapping,
+            ),
+            {},
+        )
+
+
+class PrefetchImportLookupTests(TestCase):
+    def test_existing_values_are_reused_and_missing_ones_created(self):
+        hr = Department(department="HR")
+        hr.save()
+        with CaptureQueriesContext(connection) as queries:
+            lookup = prefetch_import_lookup(
+                Department, "department", ["HR", "Dev", "Dev", "", None]
+            )
+        statements = [query["sql"].split()[0] for query in queries]
+        self.assertEqual(statements.count("INSERT"), 1)
+        self.assertEqual(
+            len([query for query in queries if '"department" IN' in query["sql"]]), 1
+        )
+        self.assertEqual(set(lookup), {"HR", "Dev"})
+        self.assertEqual(lookup["HR"], hr)
+        self.assertEqual(Department.objects.entire().count(), 2)
+
+
+class DependencyTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            company="Horilla", address="-", country="-", state="-", city="-", zip="-"
+        )
+        self.department = Department(department="Engineering")
+        self.department.save()
+        self.department.company_id.add(self.company)
+        JobPosition(job_position="Developer", department_id=self.department).save()
+
+    def test_dependencies_are_read_from_the_metadata(self):
+        dependencies = {
+            dependency.label: dependency for dependency in get_dependencies(Department)
+        }
+        self.assertFalse(dependencies["base.Department"].protected)
+        self.assertTrue(dependencies["base.JobPosition"].protected)
+        self.assertEqual(
+            dependencies["base.JobPosition"].direct_fields, ["department_id"]
+        )
+        through = Department.company_id.through
+        self.assertFalse(dependencies[through._meta.label].protected)
+
+    def test_counts_use_one_query_per_dependency(self):
+        with self.assertNumQueries(len(get_dependencies(Department))):
+            counts = {
+                dependency.label: count
+                for dependency, count in count_dependencies(self.department)
+            }
+        self.assertEqual(counts["base.Department"], 1)
+        self.assertEqual(counts["base.JobPosition"], 1)
+        self.assertEqual(counts[Department.company_id.through._meta.label], 1)
+
+    def test_search_filter_follows_foreign_keys(self):
+        positions = JobPosition.objects.entire()
+        self.assertEqual(
+            positions.filter(search_filter(JobPosition, "engin")).count(), 1
+        )
+        self.assertEqual(
+            positions.filter(search_filter(JobPosition, "sales")).count(), 0
+        )
+        self.assertEqual(positions.filter(search_filter(JobPosition, "")).count(), 1)
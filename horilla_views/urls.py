@@ -45,6 +45,11 @@ urlpatterns = [
         views.HorillaDeleteConfirmationView.as_view(),
         name="generic-delete",
     ),
+    path(
+        "generic-delete-related",
+        views.HorillaDeleteRelatedView.as_view(),
+        name="generic-delete-related",
+    ),
     path(
         "horilla-history-revert/<int:pk>/<int:history_id>/",
         history.HorillaHistoryView.as_view(),
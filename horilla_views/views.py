@@ -7,16 +7,24 @@ from django.contrib import messages
 from django.contrib.admin.utils import NestedObjects
 from django.core.cache import cache as CACHE
 from django.db import router
+from django.db.models import Q
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_protect
 
 from base.methods import eval_validate
+from horilla.horilla_middlewares import _thread_locals
 from horilla.signals import post_generic_delete, pre_generic_delete
 from horilla_views import models
-from horilla_views.cbv_methods import get_short_uuid, login_required, merge_dicts
+from horilla_views.cbv_methods import get_short_uuid, login_required
+from horilla_views.dependency_methods import (
+    count_dependencies,
+    get_dependencies,
+    search_filter,
+)
 from horilla_views.forms import SavedFilterForm
 from horilla_views.generic.cbv.views import HorillaFormView, HorillaListView
 
@@ -281,20 +289,125 @@ class LastAppliedFilter(View):
         return HttpResponse("success")
 
 
-class DynamiListView(HorillaListView):
+@method_decorator(login_required, name="dispatch")
+class HorillaDeleteRelatedView(HorillaListView):
     """
-    DynamicListView for Generic Delete
+    Paginated rows of one model that depend on the object of the generic
+    delete confirmation
     """
 
-    instances = []
+    columns = [
+        (
+            "Record",
+            "dynamic_display_name_generic_delete",
+        ),
+    ]
+    records_per_page = 5
+    filter_selected = False
+    quick_export = False
+
+    def __init__(self, **kwargs):
+        request = getattr(_thread_locals, "request", None)
+        self.model = apps.get_model(request.GET["related"])
+        self.delete_model = apps.get_model(request.GET["model"])
+        self.delete_pk = request.GET["pk"]
+        self.dependencies = [
+            dependency
+            for dependency in get_dependencies(self.delete_model)
+            if dependency.model is self.model
+        ]
+        super().__init__(**kwargs)
+        self._saved_filters = self.request.GET
+        self.search_url = reverse("generic-delete-related")
+        self.bulk_update_fields = [
+            field
+            for dependency in self.dependencies
+            for field in dependency.direct_fields
+        ]
+        app_label = apps.get_app_config(self.model._meta.app_label).verbose_name
+        self.selected_instances_key_id = (
+            f"storedIds{app_label}{self.model.__name__.split('_')[0]}"
+        )
+        self.m2m_field = None
+        if self.model._meta.auto_created:
+            self.m2m_field = next(
+                field
+                for field in self.model._meta.auto_created._meta.many_to_many
+                if field.remote_field.through is self.model
+            )
 
-    def get_queryset(self):
-        search = self.request.GET.get("search", "")
+    def get(self, *args, **kwargs):
+        """
+        GET method
+        """
+        opts = self.delete_model._meta
+        if (
+            not self.request.user.has_perm(f"{opts.app_label}.delete_{opts.model_name}")
+            or not self.delete_model.objects.filter(pk=self.delete_pk).exists()
+        ):
+            return render(self.request, "no_perm.html")
+        return super().get(self.request, *args, **kwargs)
+
+    def get_queryset(self, *args, **kwargs):
+        if not self.dependencies:
+            return self.model._base_manager.none()
+        query = Q()
+        for dependency in self.dependencies:
+            query |= dependency.filter(self.delete_pk)
+        queryset = self.model._base_manager.filter(query).filter(
+            search_filter(self.model, self.request.GET.get("search", "").strip())
+        )
+        if self.m2m_field:
+            queryset = queryset.select_related(self.m2m_field.m2m_field_name())
+        return queryset.order_by("pk")
 
-        def _search_filter(instance):
-            return search in str(instance).lower()
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        rows = list(context["queryset"])
+        protected = [
+            dependency for dependency in self.dependencies if dependency.protected
+        ]
+        protected_ids = set()
+        if protected and rows:
+            query = Q()
+            for dependency in protected:
+                query |= dependency.filter(self.delete_pk)
+            protected_ids = set(
+                self.model._base_manager.filter(
+                    query, pk__in=[row.pk for row in rows]
+                ).values_list("pk", flat=True)
+            )
+        verbose_names = [
+            str(verbose_name)
+            for dependency in protected
+            for _name, verbose_name in dependency.fields
+        ]
+        for row in rows:
+            row.dynamic_display_name_generic_delete = self.display_name(
+                row, verbose_names if row.pk in protected_ids else []
+            )
+        return context
 
-        return filter(_search_filter, self.instances)
+    def display_name(self, row, protected_fields):
+        """
+        Record column of the row, protected rows name the protecting fields
+        """
+        if self.m2m_field:
+            return f"""
+            {getattr(row, self.m2m_field.m2m_field_name())}
+            <i style="color:#989898;">(In {self.m2m_field.verbose_name})</i>
+            """
+        indication = f"""
+        {row}
+        """
+        if protected_fields:
+            indication = (
+                indication
+                + f"""
+            <i style="color:red;">(Record in {",".join(protected_fields)})</i>
+            """
+            )
+        return indication
 
 
 class HorillaDeleteConfirmationView(View):
@@ -308,8 +421,6 @@ class HorillaDeleteConfirmationView(View):
         """
         GET method
         """
-        from horilla.urls import path, urlpatterns
-
         pk = self.request.GET["pk"]
 
         app, MODEL_NAME = self.request.GET["model"].split(".")
@@ -318,219 +429,25 @@ class HorillaDeleteConfirmationView(View):
         model = apps.get_model(app, MODEL_NAME)
 
         delete_object = model.objects.get(pk=pk)
-        objs = [delete_object]
-        using = router.db_for_write(delete_object._meta.model)
-        collector = NestedObjects(using=using, origin=objs)
-        collector.collect(objs)
-        MODEL_MAP = {}
-        PROTECTED_MODEL_MAP = {}
-        DYNAMIC_PATH_MAP = {}
-        MODEL_RELATED_FIELD_MAP = {}
-        MODEL_RELATED_PROTECTED_FIELD_MAP = {}
-
-        def format_callback(instance, protected=False):
-            if not MODEL_RELATED_FIELD_MAP.get(instance._meta.model):
-                MODEL_RELATED_FIELD_MAP[instance._meta.model] = []
-                MODEL_RELATED_PROTECTED_FIELD_MAP[instance._meta.model] = []
-
-            def find_related_field(obj, related_instance):
-                for field in obj._meta.get_fields():
-                    # Check if the field is a foreign key (or related model)
-                    if isinstance(
-                        field, (models.models.ForeignKey, models.models.OneToOneField)
-                    ):
-                        # Get the field value
-                        field_value = getattr(obj, field.name)
-                        # If the field value matches the related instance, return the field name
-                        if field_value == related_instance:
-                            if "PROTECT" in field.remote_field.on_delete.__name__:
-                                MODEL_RELATED_PROTECTED_FIELD_MAP[
-                                    instance._meta.model
-                                ].append((field.name, field.verbose_name))
-                            MODEL_RELATED_FIELD_MAP[instance._meta.model].append(
-                                field.name
-                            )
-
-            find_related_field(instance, delete_object)
-            app_label = instance._meta.app_label
-            app_label = apps.get_app_config(app_label).verbose_name
-            model = instance._meta.model
-
-            model.verbose_name = model.__name__.split("_")[0]
-
-            model_map = PROTECTED_MODEL_MAP if protected else MODEL_MAP
-
-            if app_label not in model_map:
-                model_map[app_label] = {}
-
-            if model not in model_map[app_label]:
-                model_map[app_label][model] = []
-                DYNAMIC_PATH_MAP[model.verbose_name] = (
-                    f"{get_short_uuid(prefix='generic-delete',length=10)}"
-                )
-
-                class DynamiListView(HorillaListView):
-                    """
-                    DynamicListView for Generic Delete
-                    """
-
-                    instances = []
-                    columns = [
-                        (
-                            "Record",
-                            "dynamic_display_name_generic_delete",
-                        ),
-                    ]
-                    records_per_page = 5
-                    filter_selected = False
-                    quick_export = False
-
-                    selected_instances_key_id = "storedIds" + app_label
-
-                    def dynamic_display_name_generic_delete(self):
-
-                        is_protected = False
-                        classname = self.__class__.__name__
-                        app_label = self._meta.app_label
-
-                        app_verbose_name = apps.get_app_config(app_label).verbose_name
-                        protected = PROTECTED_MODEL_MAP.get(app_verbose_name, {}).get(
-                            self._meta.model, []
-                        )
-                        ids = [instance.pk for instance in protected]
-                        if self.pk in ids:
-                            is_protected = True
-
-                        if "_" in classname:
-                            field_name = classname.split("_", 1)[1]
-                            classname = classname.split("_")[0]
-
-                            object_field_name = classname.lower()
-                            model = apps.get_model(app_label, classname)
-
-                            field = model._meta.get_field(field_name)
-
-                            return f"""
-                            {getattr(self, object_field_name)}
-                            <i style="color:#989898;">(In {field.verbose_name})</i>
-                            """
-                        indication = f"""
-                        {self}
-                        """
-                        if is_protected:
-                            verbose_names = [
-                                str(i[1])
-                                for i in list(
-                                    set(
-                                        MODEL_RELATED_PROTECTED_FIELD_MAP.get(
-                                            self._meta.model, ""
-                                        )
-                                    )
-                                )
-                            ]
-                            indication = (
-                                indication
-                                + f"""
-                            <i style="color:red;">(Record in {",".join(verbose_names)})</i>
-                            """
-                            )
-                        return indication
-
-                    def __init__(self, **kwargs):
-                        super().__init__(**kwargs)
-                        self._saved_filters = self.request.GET
-
-                    def get_context_data(self, **kwargs):
-                        context = super().get_context_data(**kwargs)
-                        context["search_url"] = "/" + self.search_url
-                        return context
-
-                    def get_queryset(self):
-                        search = self.request.GET.get("search", "")
-
-                        def _search_filter(instance):
-                            return search in str(instance).lower()
-
-                        self.instances = list(
-                            set(
-                                (
-                                    self.instances
-                                    + MODEL_MAP.get(
-                                        apps.get_app_config(
-                                            self.model._meta.app_label
-                                        ).verbose_name,
-                                        {},
-                                    ).get(self.model, [])
-                                    + PROTECTED_MODEL_MAP.get(
-                                        apps.get_app_config(
-                                            self.model._meta.app_label
-                                        ).verbose_name,
-                                        {},
-                                    ).get(self.model, [])
-                                )
-                            )
-                        )
-
-                        queryset = self.model.objects.filter(
-                            pk__in=[
-                                instance.pk
-                                for instance in filter(_search_filter, self.instances)
-                            ]
-                        )
-                        return queryset
-
-                model.dynamic_display_name_generic_delete = (
-                    DynamiListView.dynamic_display_name_generic_delete
-                )
-
-                DynamiListView.model = model
-                if "_" in model.__name__:
-                    DynamiListView.bulk_update_fields = [MODEL_NAME.lower()]
-                else:
-                    DynamiListView.bulk_update_fields = MODEL_RELATED_FIELD_MAP.get(
-                        model, []
-                    )
-                DynamiListView.instances = model_map[app_label][model]
-                DynamiListView.search_url = DYNAMIC_PATH_MAP[model.verbose_name]
-                DynamiListView.selected_instances_key_id = (
-                    DynamiListView.selected_instances_key_id + model.verbose_name
-                )
-
-                urlpatterns.append(
-                    path(
-                        DynamiListView.search_url,
-                        DynamiListView.as_view(),
-                        name=DynamiListView.search_url,
-                    )
-                )
-            model_map[app_label][model].append(instance)
-
-            return instance
-
-        _to_delete = collector.nested(format_callback)
-        protected = [
-            format_callback(obj, protected=True) for obj in collector.protected
-        ]
-
-        model_count = {
-            model._meta.verbose_name_plural: len(objs)
-            for model, objs in collector.model_objs.items()
-        }
-
+        # {app verbose name: {app_label.ModelName: display name}}
+        model_map = {}
+        model_count = defaultdict(int)
         protected_model_count = defaultdict(int)
+        for dependency, count in count_dependencies(delete_object):
+            app_label = apps.get_app_config(
+                dependency.model._meta.app_label
+            ).verbose_name
+            model_map.setdefault(app_label, {})[dependency.label] = dependency.name
+            counts = protected_model_count if dependency.protected else model_count
+            counts[str(dependency.model._meta.verbose_name_plural)] += count
 
-        for obj in collector.protected:
-            model = type(obj)
-            protected_model_count[model._meta.verbose_name_plural] += 1
-        protected_model_count = dict(protected_model_count)
         context = {
-            "model_map": merge_dicts(MODEL_MAP, PROTECTED_MODEL_MAP),
-            "dynamic_list_path": DYNAMIC_PATH_MAP,
+            "model_map": model_map,
             "delete_object": delete_object,
-            "protected": protected,
+            "protected_count": sum(protected_model_count.values()),
             "model_count_sum": sum(model_count.values()),
-            "related_objects_count": model_count,
-            "protected_objects_count": protected_model_count,
+            "related_objects_count": dict(model_count),
+            "protected_objects_count": dict(protected_model_count),
         }
         for key, value in self.get_context_data().items():
             context[key] = value
@@ -1,3 +1,53 @@
+import django_filters
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
 from django.test import TestCase
 
-# Create your tests here.
+from base.models import Department
+from horilla_widgets.widgets.select_widgets import (
+    WIDGET_SCOPE_KEY,
+    WidgetScope,
+    widget_token,
+)
+
+
+class DepartmentFilter(django_filters.FilterSet):
+    class Meta:
+        model = Department
+        fields = ["department"]
+
+
+class WidgetScopeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("widget", password="widget")
+        for name in ["Sales", "Support", "Finance"]:
+            Department(department=name).save()
+        self.queryset = Department.objects.entire().exclude(department="Finance")
+
+    def test_the_client_only_gets_an_opaque_id(self):
+        token = widget_token(self.user, self.queryset, DepartmentFilter)
+        self.assertNotIn("department", token.lower())
+        self.assertIsNotNone(cache.get(WIDGET_SCOPE_KEY.format(token)))
+
+    def test_scope_searches_the_rendered_choices(self):
+        token = widget_token(
+            self.user, self.queryset, DepartmentFilter, fields=["department"]
+        )
+        scope = WidgetScope(token, self.user)
+        self.assertIs(scope.filter_class, DepartmentFilter)
+        self.assertEqual(
+            [department.department for department in scope.search({})],
+            ["Sales", "Support"],
+        )
+        self.assertEqual(
+            [department.department for department in scope.search({"search": "sup"})],
+            ["Support"],
+        )
+
+    def test_unknown_or_foreign_tokens_are_rejected(self):
+        token = widget_token(self.user, self.queryset)
+        other = User.objects.create_user("other", password="other")
+        for token, user in [(token, other), ("forged", self.user), ("", self.user)]:
+            with self.assertRaises(PermissionDenied):
+                WidgetScope(token, user)
@@ -8,4 +8,14 @@ from horilla_widgets import views
 
 urlpatterns = [
     path("get-filter-form", views.get_filter_form, name="get-filter-form"),
+    path(
+        "horilla-multiselect-search",
+        views.multiselect_search,
+        name="horilla-multiselect-search",
+    ),
+    path(
+        "horilla-multiselect-options",
+        views.multiselect_options,
+        name="horilla-multiselect-options",
+    ),
 ]
@@ -1,9 +1,13 @@
+from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
 
 from horilla.decorators import login_required
 from horilla_widgets.widgets.select_widgets import (
-    ALL_INSTANCES,
-    HorillaMultiSelectWidget,
+    WIDGET_PAGE_SIZE,
+    WidgetScope,
+    widget_option,
 )
 
 # Create your views here.
@@ -26,6 +30,62 @@ def get_filter_form(request):
     """
     This method will return filtering from
     """
-    widget_instance = ALL_INSTANCES[str(request.user.id)]
-    template_path = request.GET["template_path"]
-    return render(request, template_path, {"f": widget_instance.filter_class()})
+    scope = WidgetScope(request.GET.get("widget", ""), request.user)
+    return render(request, scope.template_path, {"f": scope.filter_class()})
+
+
+def widget_queryset(request, filtered=False):
+    """
+    Options of the multi select widget of the request matching its search
+    (and filter form fields when `filtered`)
+    """
+    scope = WidgetScope(request.GET.get("widget", ""), request.user)
+    return scope.search(request.GET, filtered)
+
+
+@login_required
+def multiselect_search(request):
+    """
+    Paginated options of a multi select widget in the select2 ajax format, all
+    the matching options with `all`
+    """
+    queryset = widget_queryset(request, filtered=bool(request.GET.get("all")))
+    if request.GET.get("all"):
+        return JsonResponse(
+            {
+                "results": [widget_option(instance) for instance in queryset],
+                "pagination": {"more": False},
+            }
+        )
+    page = Paginator(queryset, WIDGET_PAGE_SIZE).get_page(request.GET.get("page"))
+    return JsonResponse(
+        {
+            "results": [widget_option(instance) for instance in page],
+            "pagination": {"more": page.has_next()},
+        }
+    )
+
+
+@login_required
+def multiselect_options(request):
+    """
+    Page of the choose table of a multi select widget
+    """
+    page = Paginator(
+        widget_queryset(request, filtered=True), WIDGET_PAGE_SIZE
+    ).get_page(request.GET.get("page"))
+    rows = render_to_string(
+        "horilla_widgets/multiselect_components/table_rows.html",
+        {"page": page, "widget_id": request.GET.get("widget_id", "")},
+        request=request,
+    )
+    return JsonResponse(
+        {
+            "rows": rows,
+            "count": page.paginator.count,
+            "page": page.number,
+            "num_pages": page.paginator.num_pages,
+            "has_next": page.has_next(),
+            "has_previous": page.has_previous(),
+        }
+    )
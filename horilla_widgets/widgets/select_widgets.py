@@ -4,13 +4,23 @@ select_widgets.py
 This module is used to write horilla form select widgets
 """
 
+import secrets
 import uuid
 
 from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db.models import CharField, Q
+from django.utils.module_loading import import_string
 
 from horilla import horilla_middlewares
 
-ALL_INSTANCES = {}
+WIDGET_PAGE_SIZE = getattr(settings, "HORILLA_WIDGET_PAGE_SIZE", 50)
+# seconds a rendered widget can search its options
+WIDGET_SCOPE_TIMEOUT = getattr(settings, "HORILLA_WIDGET_SCOPE_TIMEOUT", 12 * 3600)
+WIDGET_SCOPE_KEY = "horilla_widgets.scope:{}"
 
 
 def get_short_uuid(length: int, prefix: str = "widget"):
@@ -21,6 +31,104 @@ def get_short_uuid(length: int, prefix: str = "widget"):
     return prefix + str(uuid_str[:length]).replace("-", "")
 
 
+def search_query(model, search, search_fields=None):
+    """
+    Q object matching rows where every word of `search` is the start of one
+    of the search fields (the text fields of the model by default)
+    """
+    if search_fields is None:
+        search_fields = [
+            field.name
+            for field in model._meta.fields
+            if isinstance(field, CharField) and not field.choices
+        ]
+    query = Q()
+    for word in (search or "").split():
+        word_query = Q()
+        for field_name in search_fields:
+            word_query |= Q(**{f"{field_name}__istartswith": word})
+        query &= word_query
+    return query
+
+
+def _class_path(cls):
+    return f"{cls.__module__}.{cls.__qualname__}" if cls else None
+
+
+def widget_token(user, queryset, filter_class=None, template_path=None, fields=None):
+    """
+    Opaque id of a rendered widget for the option endpoints. The scope (the
+    user it was rendered for, the query of its choices, its filter class,
+    filter template and search fields) stays in the cache under that id, so
+    the client never sends anything but the id; the cache has to be shared by
+    the workers serving the endpoints
+    """
+    token = secrets.token_urlsafe(24)
+    cache.set(
+        WIDGET_SCOPE_KEY.format(token),
+        {
+            "user": user.pk,
+            "model": queryset.model._meta.label_lower,
+            "query": queryset.query,
+            "filter_class": _class_path(filter_class),
+            "template_path": template_path,
+            "search_fields": fields,
+        },
+        WIDGET_SCOPE_TIMEOUT,
+    )
+    return token
+
+
+class WidgetScope:
+    """
+    Choices, filter class and search fields of a widget token
+    """
+
+    def __init__(self, token, user):
+        data = cache.get(WIDGET_SCOPE_KEY.format(token)) if token else None
+        if data is None or data["user"] != user.pk:
+            raise PermissionDenied("Invalid widget")
+        model = apps.get_model(data["model"])
+        self.queryset = model._base_manager.none()
+        self.queryset.query = data["query"]
+        self.filter_class = (
+            import_string(data["filter_class"]) if data["filter_class"] else None
+        )
+        self.template_path = data["template_path"]
+        self.search_fields = data["search_fields"]
+
+    def search(self, query, filtered=False):
+        """
+        Options matching the `search` of the query dict, and the filter form
+        fields of the query dict when `filtered`
+        """
+        queryset = self.queryset.all()
+        search = query.get("search", "")
+        if filtered and self.filter_class:
+            filterset = self.filter_class(query, queryset=queryset)
+            queryset = filterset.qs
+            if "search" in filterset.filters:
+                search = ""
+        queryset = queryset.filter(
+            search_query(queryset.model, search, self.search_fields)
+        )
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")
+        return queryset
+
+
+def widget_option(instance):
+    """
+    select2 option of an instance
+    """
+    avatar = getattr(instance, "get_avatar", None)
+    return {
+        "id": instance.pk,
+        "text": str(instance),
+        "avatar": avatar() if callable(avatar) else "",
+    }
+
+
 class HorillaMultiSelectWidget(forms.Widget):
     """
     HorillaMultiSelectWidget
@@ -37,7 +145,8 @@ class HorillaMultiSelectWidget(forms.Widget):
         required=False,
         form=None,
         help_text=None,
-        **kwargs
+        search_fields=None,
+        **kwargs,
     ) -> None:
         self.filter_route_name = filter_route_name
         self.required = required
@@ -47,6 +156,7 @@ class HorillaMultiSelectWidget(forms.Widget):
         self.instance = instance
         self.form = form
         self.help_text = help_text
+        self.search_fields = search_fields
         super().__init__()
 
     template_name = "horilla_widgets/horilla_multiselect_widget.html"
@@ -57,19 +167,27 @@ class HorillaMultiSelectWidget(forms.Widget):
         # Add your custom data to the context
         queryset = self.choices.queryset
         field = self.choices.field
-        context["queryset"] = queryset
         context["field_name"] = name
         if self.form and name in self.form.data:
             initial = self.form.data.getlist(name)
-            context["initial"] = initial
         elif value:
-            context["initial"] = value
-
+            initial = value
         elif self.instance and self.instance.pk:
             initial = list(getattr(self.instance, name).values_list("id", flat=True))
-            context["initial"] = initial
         else:
-            context["initial"] = []
+            initial = []
+        pk_field = queryset.model._meta.pk
+        selected_pks = []
+        for pk in initial:
+            try:
+                selected_pks.append(pk_field.to_python(getattr(pk, "pk", pk)))
+            except ValidationError:
+                continue
+        context["initial"] = selected_pks
+        # only the selected options are rendered, the others are searched
+        context["selected"] = (
+            queryset.filter(pk__in=selected_pks) if selected_pks else []
+        )
         context["field"] = field
         context["self"] = self
         context["filter_template_path"] = self.filter_template_path
@@ -83,6 +201,12 @@ class HorillaMultiSelectWidget(forms.Widget):
         context["section_id"] = uid
         context[self.filter_instance_contex_name] = self.filter_class
         request = getattr(horilla_middlewares._thread_locals, "request", None)
-        ALL_INSTANCES[str(request.user.id)] = self
+        context["widget_key"] = widget_token(
+            request.user,
+            queryset,
+            self.filter_class,
+            self.filter_template_path,
+            self.search_fields,
+        )
 
         return context
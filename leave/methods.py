@@ -1,10 +1,10 @@
-import calendar
 from datetime import date, datetime, timedelta
 
 import pandas as pd
 from django.apps import apps
 from django.db.models import Q
 
+from base.working_calendar import company_leave_dates_in_year
 from employee.models import Employee
 from horilla.methods import get_horilla_model_class
 
@@ -51,32 +51,7 @@ def company_leave_dates_list(company_leaves, start_date):
     company_leave_dates = set()
     year = start_date.year
     for company_leave in company_leaves:
-        based_on_week = company_leave.based_on_week
-        based_on_week_day = company_leave.based_on_week_day
-
-        for month in range(1, 13):
-            month_calendar = calendar.monthcalendar(year, month)
-
-            if based_on_week is not None:
-                # Set Sunday as the first day of the week
-                calendar.setfirstweekday(6)
-                try:
-                    week_days = [
-                        day for day in month_calendar[int(based_on_week)] if day != 0
-                    ]
-                    for day in week_days:
-                        date = datetime(year, month, day)
-                        if date.weekday() == int(based_on_week_day):
-                            company_leave_dates.add(date.date())
-                except IndexError:
-                    pass
-            else:
-                # Set Monday as the first day of the week
-                calendar.setfirstweekday(0)
-                for week in month_calendar:
-                    if week[int(based_on_week_day)] != 0:
-                        date = datetime(year, month, week[int(based_on_week_day)])
-                        company_leave_dates.add(date.date())
+        company_leave_dates.update(company_leave_dates_in_year(company_leave, year))
 
     return list(company_leave_dates)
 
@@ -27,7 +27,7 @@ from base.models import (
 from employee.models import Employee, EmployeeWorkInformation
 from horilla import horilla_middlewares
 from horilla.models import HorillaModel, upload_path
-from horilla_audit.methods import get_diff
+from horilla_audit.methods import get_diff, get_diff_page
 from horilla_audit.models import HorillaAuditInfo, HorillaAuditLog
 from leave.methods import (
     calculate_requested_days,
@@ -764,46 +764,8 @@ class LeaveRequest(HorillaModel):
         from datetime import date
 
         company_leaves = CompanyLeaves.objects.all()
-        company_leave_dates = []
-        for company_leave in company_leaves:
-            if self:
-                year = self.start_date.year
-            else:
-                year = date.today().year
-            based_on_week = company_leave.based_on_week
-            based_on_week_day = company_leave.based_on_week_day
-            for month in range(1, 13):
-                if based_on_week != None:
-                    # Set Sunday as the first day of the week
-                    calendar.setfirstweekday(6)
-                    month_calendar = calendar.monthcalendar(year, month)
-                    try:
-                        weeks = month_calendar[int(based_on_week)]
-                        weekdays_in_weeks = [day for day in weeks if day != 0]
-                        for day in weekdays_in_weeks:
-                            date = datetime.strptime(
-                                f"{year}-{month:02}-{day:02}", "%Y-%m-%d"
-                            ).date()
-                            if (
-                                date.weekday() == int(based_on_week_day)
-                                and date not in company_leave_dates
-                            ):
-                                company_leave_dates.append(date)
-                    except IndexError:
-                        pass
-                else:
-                    # Set Monday as the first day of the week
-                    calendar.setfirstweekday(0)
-                    month_calendar = calendar.monthcalendar(year, month)
-                    for week in month_calendar:
-                        if week[int(based_on_week_day)] != 0:
-                            date = datetime.strptime(
-                                f"{year}-{month:02}-{week[int(based_on_week_day)]:02}",
-                                "%Y-%m-%d",
-                            ).date()
-                            if date not in company_leave_dates:
-                                company_leave_dates.append(date)
-        return company_leave_dates
+        year = self.start_date.year if self else date.today().year
+        return company_leave_dates_list(company_leaves, date(year, 1, 1))
 
     def leaveoverlapping(self):
         """
@@ -1266,7 +1228,7 @@ class LeaveAllocationRequest(HorillaModel):
         """
 
         try:
-            histories = get_diff(self)[:2]
+            histories = get_diff_page(self, per_page=2).object_list[:2]
             for history in histories:
                 if history["type"] == "Changes":
                     for update in history["changes"]:
@@ -14,3 +14,7 @@ class Config(AppConfig):
         import notifications.signals
 
         notifications.notify = notifications.signals.notify
+
+        from notifications.bulk import connect_unread_counts
+
+        connect_unread_counts()
@@ -45,6 +45,21 @@ def assert_soft_delete():
 class NotificationQuerySet(models.query.QuerySet):
     """Notification QuerySet"""
 
+    def update(self, **kwargs):
+        """Update the notifications, dropping the cached unread counters of
+        their recipients when the unread or deleted flags change."""
+        if not {"unread", "deleted", "recipient"} & set(kwargs):
+            return super().update(**kwargs)
+
+        from notifications.bulk import drop_unread_counts
+
+        recipient_ids = set(
+            self.order_by().values_list("recipient_id", flat=True).distinct()
+        )
+        updated = super().update(**kwargs)
+        drop_unread_counts(recipient_ids)
+        return updated
+
     def unsent(self):
         return self.filter(emailed=False)
 
@@ -224,8 +239,6 @@ class AbstractNotification(models.Model):
     class Meta:
         abstract = True
         ordering = ("-timestamp",)
-        # speed up notifications count query
-        index_together = ("recipient", "unread")
 
     def __str__(self):
         ctx = {
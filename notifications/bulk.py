@@ -0,0 +1,182 @@
+"""
+bulk.py
+
+Bulk notification fan-out.
+
+`notify_many` takes (recipient, verb key, params, redirect) entries, drops
+the duplicates and inserts one notification per remaining entry with a
+single `bulk_create`. The notifications store the translation key and its
+parameters instead of one pre-rendered verb per language, and are rendered
+in the language of the reader by `Notification.localized_verb`.
+
+The number of unread notifications of a user is cached. The notifications
+inserted by `notify_many` add to the cached counters of their recipients in
+one pass once the transaction commits, and any other write to a
+notification drops the counter of its recipient, so it is counted again on
+the next read. `bulk_create` sends no post_save, so `notify_many` also bumps
+the model cache versions of Notification and of each recipient itself,
+which the cached notification API responses depend on.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext
+from swapper import load_model
+
+from horilla.model_cache import bump_versions, version_key
+
+UNREAD_COUNT_KEY_PREFIX = "notifications:unread"
+UNREAD_COUNT_TIMEOUT = getattr(settings, "NOTIFICATION_UNREAD_COUNT_TIMEOUT", 300)
+
+
+def render_verb(verb_key, params=None, translate=True):
+    """
+    Verb of a translation key and its parameters in the active language (or
+    untranslated)
+    """
+    params = params or {}
+    templates = (gettext(verb_key), verb_key) if translate else (verb_key,)
+    for template in templates:
+        try:
+            return template % params
+        except (KeyError, TypeError, ValueError):
+            continue
+    return verb_key
+
+
+def _params(params):
+    """
+    Parameters as stored in the JSON column, dates and objects as strings
+    """
+    return json.loads(json.dumps(params or {}, default=str))
+
+
+def notify_many(
+    sender, entries, icon="information", label="System", level="info", batch_size=1000
+):
+    """
+    Notify every (recipient user, verb key, params, redirect) entry of
+    `entries` from `sender` with one bulk insert. The same verb with the
+    same parameters and redirect is sent once to a recipient. Returns the
+    created notifications.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    Notification = load_model("notifications", "Notification")
+
+    actor_content_type = ContentType.objects.get_for_model(sender)
+    timestamp = timezone.now()
+    seen = set()
+    notifications = []
+    for recipient, verb_key, params, redirect in entries:
+        if recipient is None:
+            continue
+        params = _params(params)
+        key = (recipient.pk, verb_key, json.dumps(params, sort_keys=True), redirect)
+        if key in seen:
+            continue
+        seen.add(key)
+        notifications.append(
+            Notification(
+                recipient=recipient,
+                actor_content_type=actor_content_type,
+                actor_object_id=sender.pk,
+                verb=render_verb(verb_key, params, translate=False)[:255],
+                verb_key=verb_key,
+                verb_params=params,
+                timestamp=timestamp,
+                level=level,
+                data={"redirect": redirect, "label": label, "icon": icon},
+            )
+        )
+    Notification.objects.bulk_create(notifications, batch_size=batch_size)
+
+    added = {}
+    for notification in notifications:
+        added[notification.recipient_id] = added.get(notification.recipient_id, 0) + 1
+    transaction.on_commit(lambda: notifications_added(Notification, added))
+    return notifications
+
+
+def notifications_added(model, added):
+    """
+    Update the caches after the bulk insert of {user id: number of new
+    notifications}
+    """
+    if not added:
+        return
+    bump_unread_counts(added)
+    bump_versions(
+        [version_key(model)] + [version_key(model, user_id) for user_id in added]
+    )
+
+
+def unread_count_key(user_id):
+    """
+    Cache key of the number of unread notifications of a user
+    """
+    return f"{UNREAD_COUNT_KEY_PREFIX}:{user_id}"
+
+
+def unread_count(user):
+    """
+    Number of unread notifications of the user, from the cache when it is
+    there
+    """
+    key = unread_count_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = user.notifications.unread().count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def bump_unread_counts(added):
+    """
+    Add {user id: number of new unread notifications} to the cached counters,
+    the counters that are not cached are left to be counted on read
+    """
+    keys = {unread_count_key(user_id): count for user_id, count in added.items()}
+    cached = cache.get_many(list(keys))
+    if cached:
+        cache.set_many(
+            {key: count + keys[key] for key, count in cached.items()},
+            UNREAD_COUNT_TIMEOUT,
+        )
+
+
+def drop_unread_counts(user_ids):
+    """
+    Forget the cached counters of the users
+    """
+    keys = [unread_count_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _on_notification_changed(sender, instance, **kwargs):
+    drop_unread_counts([instance.recipient_id])
+
+
+def connect_unread_counts():
+    """
+    Drop the cached counter of the recipient of every notification saved or
+    deleted one by one
+    """
+    from django.db.models.signals import post_delete, post_save
+
+    Notification = load_model("notifications", "Notification")
+    post_save.connect(
+        _on_notification_changed,
+        sender=Notification,
+        dispatch_uid="notifications_unread_count",
+    )
+    post_delete.connect(
+        _on_notification_changed,
+        sender=Notification,
+        dispatch_uid="notifications_unread_count",
+    )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from notifications.retention import prune_notifications
+
+
+class Command(BaseCommand):
+    help = "Archive the read notifications past their TTL and prune the archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Notifications written per transaction (PRUNE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to wait between two batches",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the notifications that would be pruned without writing",
+        )
+
+    def handle(self, *args, **options):
+        counts = prune_notifications(
+            options["batch_size"], dry_run=options["dry_run"], pause=options["pause"]
+        )
+        summary = (
+            f"{counts['archived']} notifications archived, "
+            f"{counts['deleted']} deleted notifications removed, "
+            f"{counts['archive_pruned']} archived notifications removed."
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Dry run, {summary}")
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
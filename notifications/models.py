@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from swapper import swappable_setting
 
 from .base.models import AbstractNotification, notify_handler  # noqa
@@ -10,7 +12,74 @@ class Notification(AbstractNotification):
     verb_de = models.CharField(max_length=255, default="", null=True)
     verb_es = models.CharField(max_length=255, default="", null=True)
     verb_fr = models.CharField(max_length=255, default="", null=True)
+    # translation key and parameters of the notifications sent by notify_many
+    verb_key = models.CharField(max_length=255, default="", blank=True)
+    verb_params = models.JSONField(default=dict, blank=True)
 
     class Meta(AbstractNotification.Meta):
         abstract = False
         swappable = swappable_setting("notifications", "Notification")
+        # speed up the notifications count and the inbox of a user, newest first
+        indexes = [
+            models.Index(
+                fields=["recipient", "unread", "timestamp"],
+                name="notification_inbox_idx",
+            ),
+        ]
+
+    @property
+    def localized_verb(self):
+        """
+        Verb in the active language, rendered from the translation key when
+        the notification has one and from the pre-rendered verbs otherwise
+        """
+        from django.utils.translation import get_language
+
+        from notifications.bulk import render_verb
+
+        if self.verb_key:
+            return render_verb(self.verb_key, self.verb_params)
+        language = (get_language() or "").split("-")[0]
+        return (self.data or {}).get(f"verb_{language}") or self.verb
+
+
+class NotificationArchive(models.Model):
+    """
+    Compact copy of a read notification moved out of the notification table
+    by the retention prune, see `notifications.retention`
+    """
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="archived_notifications",
+        on_delete=models.CASCADE,
+    )
+    verb = models.CharField(max_length=255)
+    verb_key = models.CharField(max_length=255, default="", blank=True)
+    verb_params = models.JSONField(default=dict, blank=True)
+    redirect = models.TextField(default="", blank=True)
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ("-timestamp",)
+        indexes = [
+            models.Index(
+                fields=["recipient", "timestamp"],
+                name="notification_archive_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.verb
+
+    @property
+    def localized_verb(self):
+        """
+        Verb in the active language
+        """
+        from notifications.bulk import render_verb
+
+        if self.verb_key:
+            return render_verb(self.verb_key, self.verb_params)
+        return self.verb
@@ -0,0 +1,175 @@
+"""
+retention.py
+
+Retention of notifications.
+
+A read notification is kept for the number of days configured for its type
+in the TTL_DAYS notifications setting. Its type is its translation key, or
+its verb if it was sent without one. It is then moved to the compact
+NotificationArchive table, which keeps it for ARCHIVE_TTL_DAYS more days.
+Soft deleted notifications past their TTL are deleted without being
+archived. Every step works through batches of primary keys, each batch in
+its own short transaction, so the notification table is never locked for
+long and the inbox queries of the users keep running while it prunes.
+"""
+
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from swapper import load_model
+
+from notifications.settings import get_config
+
+
+def ttl_days():
+    """
+    {notification type: days}, always with a "default" entry
+    """
+    ttls = {"default": 90}
+    ttls.update(get_config()["TTL_DAYS"])
+    return ttls
+
+
+def expired_filter(now=None):
+    """
+    Q of the notifications older than the TTL of their type
+    """
+    now = now or timezone.now()
+    ttls = ttl_days()
+    default = ttls.pop("default")
+    query = Q()
+    for key, days in ttls.items():
+        query |= (Q(verb_key=key) | Q(verb_key="", verb=key)) & Q(
+            timestamp__lt=now - timedelta(days=days)
+        )
+    untyped = Q(timestamp__lt=now - timedelta(days=default))
+    if ttls:
+        untyped &= ~Q(verb_key__in=list(ttls)) & ~Q(verb_key="", verb__in=list(ttls))
+    return query | untyped
+
+
+def _batches(queryset, batch_size, pause=0):
+    """
+    Lists of at most `batch_size` primary keys of the queryset, the queryset
+    is queried again for every batch, so each batch must remove its rows
+    from it
+    """
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        if len(ids) < batch_size:
+            return
+        if pause:
+            time.sleep(pause)
+
+
+def archive_entry(notification):
+    """
+    Unsaved archive row of a notification
+    """
+    from notifications.models import NotificationArchive
+
+    return NotificationArchive(
+        recipient_id=notification.recipient_id,
+        verb=notification.verb,
+        verb_key=notification.verb_key,
+        verb_params=notification.verb_params,
+        redirect=(notification.data or {}).get("redirect") or "",
+        timestamp=notification.timestamp,
+    )
+
+
+def archive_read_notifications(batch_size, now=None, dry_run=False, pause=0):
+    """
+    Move the read notifications past their TTL to the archive, returns
+    their number
+    """
+    from notifications.models import NotificationArchive
+
+    Notification = load_model("notifications", "Notification")
+
+    expired = Notification.objects.filter(
+        expired_filter(now), unread=False, deleted=False
+    )
+    if dry_run:
+        return expired.count()
+    archived = 0
+    for ids in _batches(expired, batch_size, pause):
+        with transaction.atomic():
+            # the notifications marked as unread since the ids were read stay
+            notifications = list(
+                expired.filter(pk__in=ids)
+                .select_for_update()
+                .only(
+                    "recipient",
+                    "verb",
+                    "verb_key",
+                    "verb_params",
+                    "data",
+                    "timestamp",
+                )
+            )
+            NotificationArchive.objects.bulk_create(
+                [archive_entry(notification) for notification in notifications]
+            )
+            Notification.objects.filter(
+                pk__in=[notification.pk for notification in notifications]
+            ).delete()
+        archived += len(notifications)
+    return archived
+
+
+def delete_expired_notifications(batch_size, now=None, dry_run=False, pause=0):
+    """
+    Delete the soft deleted notifications past their TTL, returns their
+    number
+    """
+    Notification = load_model("notifications", "Notification")
+
+    expired = Notification.objects.filter(expired_filter(now), deleted=True)
+    if dry_run:
+        return expired.count()
+    deleted = 0
+    for ids in _batches(expired, batch_size, pause):
+        with transaction.atomic():
+            deleted += Notification.objects.filter(pk__in=ids).delete()[0]
+    return deleted
+
+
+def prune_archive(batch_size, now=None, dry_run=False, pause=0):
+    """
+    Delete the archived notifications past ARCHIVE_TTL_DAYS, returns their
+    number
+    """
+    from notifications.models import NotificationArchive
+
+    now = now or timezone.now()
+    expired = NotificationArchive.objects.filter(
+        archived_at__lt=now - timedelta(days=get_config()["ARCHIVE_TTL_DAYS"])
+    )
+    if dry_run:
+        return expired.count()
+    pruned = 0
+    for ids in _batches(expired, batch_size, pause):
+        pruned += NotificationArchive.objects.filter(pk__in=ids).delete()[0]
+    return pruned
+
+
+def prune_notifications(batch_size=None, now=None, dry_run=False, pause=0):
+    """
+    Run every retention step, returns {"archived": ..., "deleted": ...,
+    "archive_pruned": ...}. With `dry_run` the numbers are counted and
+    nothing is written.
+    """
+    batch_size = batch_size or get_config()["PRUNE_BATCH_SIZE"]
+    now = now or timezone.now()
+    return {
+        "archived": archive_read_notifications(batch_size, now, dry_run, pause),
+        "deleted": delete_expired_notifications(batch_size, now, dry_run, pause),
+        "archive_pruned": prune_archive(batch_size, now, dry_run, pause),
+    }
@@ -8,6 +8,12 @@ CONFIG_DEFAULTS = {
     "USE_JSONFIELD": False,
     "SOFT_DELETE": False,
     "NUM_TO_FETCH": 10,
+    # days a read notification is kept before it is archived, by translation
+    # key (or verb of the notifications without one), "default" for the rest
+    "TTL_DAYS": {"default": 90},
+    # days an archived notification is kept
+    "ARCHIVE_TTL_DAYS": 365,
+    "PRUNE_BATCH_SIZE": 500,
 }
 
 
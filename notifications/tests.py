@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import override
+
+from notifications.bulk import notify_many, unread_count
+from notifications.models import Notification, NotificationArchive
+
+
+class NotifyManyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bot = User.objects.create_user("Horilla Bot")
+        self.ada = User.objects.create_user("ada")
+        self.grace = User.objects.create_user("grace")
+
+    def test_one_insert_without_duplicates(self):
+        verb = "The Asset '%(name)s' expires in %(days)s days"
+        entries = [
+            (self.ada, verb, {"name": "Laptop", "days": 3}, "/assets/"),
+            (self.ada, verb, {"days": 3, "name": "Laptop"}, "/assets/"),
+            (self.grace, verb, {"name": "Laptop", "days": 3}, "/assets/"),
+            (None, verb, {"name": "Laptop", "days": 3}, "/assets/"),
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            notifications = notify_many(self.bot, entries)
+        inserts = [query for query in queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(len(notifications), 2)
+        notification = Notification.objects.get(recipient=self.ada)
+        self.assertEqual(notification.verb, "The Asset 'Laptop' expires in 3 days")
+        self.assertEqual(notification.verb_params, {"name": "Laptop", "days": 3})
+        self.assertEqual(notification.data["redirect"], "/assets/")
+
+    def test_verb_is_rendered_for_the_reader(self):
+        notify_many(
+            self.bot, [(self.ada, "Due on %(day)s", {"day": date(2026, 10, 19)}, "")]
+        )
+        notification = Notification.objects.get(recipient=self.ada)
+        self.assertEqual(notification.verb_params, {"day": "2026-10-19"})
+        with override("en"):
+            self.assertEqual(notification.localized_verb, "Due on 2026-10-19")
+
+    def test_unread_counters_follow_the_inserts(self):
+        self.assertEqual(unread_count(self.ada), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_many(
+                self.bot, [(self.ada, "Hello", {}, ""), (self.ada, "Bye", {}, "")]
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.ada), 2)
+        notification = Notification.objects.filter(recipient=self.ada).first()
+        notification.unread = False
+        notification.save()
+        self.assertEqual(unread_count(self.ada), 1)
+
+
+class PruneNotificationsTests(TestCase):
+    def setUp(self):
+        bot = User.objects.create_user("Horilla Bot")
+        self.user = User.objects.create_user("ada")
+        entries = [
+            (self.user, name, {}, f"/{name}/")
+            for name in ["read old", "read recent", "unread old", "deleted old"]
+        ]
+        notify_many(bot, entries)
+        old = timezone.now() - timedelta(days=91)
+        for verb, unread, deleted, timestamp in [
+            ("read old", False, False, old),
+            ("read recent", False, False, timezone.now()),
+            ("unread old", True, False, old),
+            ("deleted old", False, True, old),
+        ]:
+            Notification.objects.filter(verb=verb).update(
+                unread=unread, deleted=deleted, timestamp=timestamp
+            )
+
+    def prune(self, *args):
+        out = StringIO()
+        call_command("prune_notifications", *args, stdout=out)
+        return out.getvalue()
+
+    def verbs(self):
+        return sorted(Notification.objects.values_list("verb", flat=True))
+
+    def test_dry_run_touches_nothing(self):
+        output = self.prune("--dry-run")
+        self.assertIn("1 notifications archived, 1 deleted notifications", output)
+        self.assertEqual(len(self.verbs()), 4)
+        self.assertFalse(NotificationArchive.objects.exists())
+
+    def test_only_read_notifications_past_their_ttl_are_archived(self):
+        self.prune("--batch-size", "1")
+        self.assertEqual(self.verbs(), ["read recent", "unread old"])
+        archived = NotificationArchive.objects.get()
+        self.assertEqual(
+            (archived.recipient, archived.verb, archived.redirect),
+            (self.user, "read old", "/read old/"),
+        )
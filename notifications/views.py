@@ -16,6 +16,7 @@ from swapper import load_model
 
 from base.models import NotificationSound
 from notifications import settings
+from notifications.bulk import unread_count
 from notifications.settings import get_config
 from notifications.utils import id2slug, slug2id
 
@@ -143,7 +144,7 @@ def live_unread_notification_count(request):
         data = {"unread_count": 0}
     else:
         data = {
-            "unread_count": request.user.notifications.unread().count(),
+            "unread_count": unread_count(request.user),
         }
     return JsonResponse(data)
 
@@ -172,9 +173,13 @@ def live_unread_notification_list(request):
 
     unread_list = []
 
-    for notification in request.user.notifications.unread()[0:num_to_fetch]:
+    notifications = request.user.notifications.unread().prefetch_related(
+        "actor", "target", "action_object"
+    )
+    for notification in notifications[0:num_to_fetch]:
         struct = model_to_dict(notification)
         struct["slug"] = id2slug(notification.id)
+        struct["verb"] = notification.localized_verb
         if notification.actor:
             struct["actor"] = str(notification.actor)
         if notification.target:
@@ -187,7 +192,7 @@ def live_unread_notification_list(request):
         if request.GET.get("mark_as_read"):
             notification.mark_as_read()
     data = {
-        "unread_count": request.user.notifications.unread().count(),
+        "unread_count": unread_count(request.user),
         "unread_list": unread_list,
     }
     return JsonResponse(data)
@@ -217,9 +222,13 @@ def live_all_notification_list(request):
 
     all_list = []
 
-    for notification in request.user.notifications.all()[0:num_to_fetch]:
+    notifications = request.user.notifications.prefetch_related(
+        "actor", "target", "action_object"
+    )
+    for notification in notifications[0:num_to_fetch]:
         struct = model_to_dict(notification)
         struct["slug"] = id2slug(notification.id)
+        struct["verb"] = notification.localized_verb
         if notification.actor:
             struct["actor"] = str(notification.actor)
         if notification.target:
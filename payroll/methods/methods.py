@@ -140,17 +140,12 @@ if apps.is_installed("attendance"):
             - set(attendances_on_period)
             - set(leave_dates)
         )
+        non_working_dates = set(get_holiday_dates(start_date, end_date)) | set(
+            get_company_leave_dates(start_date.year)
+            + get_company_leave_dates(end_date.year)
+        )
         conflict_dates = conflict_dates + [
-            date
-            for date in present_on
-            if date in get_holiday_dates(start_date, end_date)
-            or date
-            in list(
-                set(
-                    get_company_leave_dates(start_date.year)
-                    + get_company_leave_dates(end_date.year)
-                )
-            )
+            date for date in present_on if date in non_working_dates
         ]
 
         return {
@@ -13,7 +13,7 @@ from django.template.loader import render_to_string
 from base.backends import ConfiguredEmailBackend
 from employee.models import EmployeeWorkInformation
 from payroll.models.models import Payslip
-from payroll.views.views import payslip_pdf
+from payroll.views.views import render_payslip_pdfs
 
 logger = logging.getLogger(__name__)
 
@@ -43,16 +43,17 @@ class MailSendThread(Thread):
                 },
                 request=self.request,
             )
-            attachments = []
-            for instance in record["instances"]:
-                response = payslip_pdf(self.request, instance.id)
-                attachments.append(
-                    (
-                        f"{instance.get_payslip_title()}.pdf",
-                        response.content,
-                        "application/pdf",
+            # all the payslips of the record are rendered concurrently
+            try:
+                attachments = [
+                    (filename, pdf, "application/pdf")
+                    for filename, pdf in render_payslip_pdfs(
+                        self.request, record["instances"]
                     )
-                )
+                ]
+            except Exception as e:
+                logger.exception(e)
+                continue
             employee = record["instances"][0].employee_id
             email_backend = ConfiguredEmailBackend()
             display_email_name = email_backend.dynamic_from_email_with_display_name
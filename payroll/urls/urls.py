@@ -53,6 +53,7 @@ urlpatterns = [
         name="single-contract-view",
     ),
     path("payslip-pdf/<int:id>", views.payslip_pdf, name="payslip-pdf"),
+    path("payslip-pdf-batch/", views.payslip_pdf_batch, name="payslip-pdf-batch"),
     path("contract-filter", views.contract_filter, name="contract-filter"),
     path("settings", views.settings, name="payroll-settings"),
     path(
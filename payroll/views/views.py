@@ -12,7 +12,6 @@ from itertools import groupby
 from urllib.parse import parse_qs
 
 import pandas as pd
-import pdfkit
 from django.contrib import messages
 from django.db.models import ProtectedError, Q
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, QueryDict
@@ -32,6 +31,7 @@ from base.methods import (
     sortby,
 )
 from base.models import Company
+from base.pdf_renderer import cached_render_pdfs, merge_pdfs, render_pdf, zip_pdfs
 from employee.models import Employee, EmployeeWorkInformation
 from horilla.decorators import (
     hx_request_required,
@@ -5360,22 +5360,8 @@ def generate_payslip_pdf(template_path, context, html=False):
         if html:
             return HttpResponse(html_content, content_type="text/html")
 
-        # PDF options for pdfkit
-        pdf_options = {
-            "page-size": "A4",
-            "margin-top": "10mm",
-            "margin-bottom": "10mm",
-            "margin-left": "10mm",
-            "margin-right": "10mm",
-            "encoding": "UTF-8",
-            "enable-local-file-access": None,  # Required to load local CSS/images
-            "dpi": 300,
-            "zoom": 1.3,
-            "footer-center": "[page]/[topage]",  # Required to load local CSS/images
-        }
-
         # Generate the PDF as binary content
-        pdf = pdfkit.from_string(html_content, False, options=pdf_options)
+        pdf = render_pdf(html_content)
 
         # Return an HttpResponse containing the PDF content
         response = HttpResponse(pdf, content_type="application/pdf")
@@ -5386,6 +5372,103 @@ def generate_payslip_pdf(template_path, context, html=False):
         return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
 
 
+def payslip_pdf_context(request, payslip, company=None):
+    """
+    Context used to render payroll/payslip/payslip_pdf.html for a payslip
+    """
+    user = request.user
+    employee = user.employee_get
+    date_format = "MMM. D, YYYY"
+
+    # Taking the company_name of the user
+    info = EmployeeWorkInformation.objects.filter(employee_id=employee)
+    if info.exists():
+        for data in info:
+            employee_company = data.company_id
+        company_name = Company.objects.filter(company=employee_company)
+        emp_company = company_name.first()
+
+        # Access the date_format attribute directly
+        date_format = (
+            emp_company.date_format
+            if emp_company and emp_company.date_format
+            else "MMM. D, YYYY"
+        )
+
+    data = payslip.pay_head_data
+    start_date_str = data["start_date"]
+    end_date_str = data["end_date"]
+
+    # Convert the string to a datetime.date object
+    start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+    end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+
+    # Format the start and end dates
+    for format_name, format_string in HORILLA_DATE_FORMATS.items():
+        if format_name == date_format:
+            formatted_start_date = start_date.strftime(format_string)
+            formatted_end_date = end_date.strftime(format_string)
+
+    # Prepare context for the template
+    data.update(
+        {
+            "month_start_name": start_date.strftime("%B %d, %Y"),
+            "month_end_name": end_date.strftime("%B %d, %Y"),
+            "formatted_start_date": formatted_start_date,
+            "formatted_end_date": formatted_end_date,
+            "employee": payslip.employee_id,
+            "payslip": payslip,
+            "json_data": data.copy(),
+            "currency": PayrollSettings.objects.first().currency_symbol,
+            "all_deductions": [],
+            "all_allowances": data["allowances"].copy(),
+            "host": request.get_host(),
+            "protocol": "https" if request.is_secure() else "http",
+            "company": (
+                company
+                if company is not None
+                else Company.objects.filter(hq=True).first()
+            ),
+        }
+    )
+
+    # Merge deductions and allowances for display
+    for deduction_list in [
+        data["basic_pay_deductions"],
+        data["gross_pay_deductions"],
+        data["pretax_deductions"],
+        data["post_tax_deductions"],
+        data["tax_deductions"],
+        data["net_deductions"],
+    ]:
+        data["all_deductions"].extend(deduction_list)
+
+    equalize_lists_length(data["allowances"], data["all_deductions"])
+    data["zipped_data"] = zip(data["allowances"], data["all_deductions"])
+    return data
+
+
+def render_payslip_pdfs(request, payslips):
+    """
+    Render payslips to PDF through the shared renderer pool.
+
+    Returns a list of (filename, pdf bytes). Rendered PDFs are cached per
+    payslip and last update, so unchanged payslips are not rendered twice.
+    """
+    company = Company.objects.filter(hq=True).first()
+    keyed_documents = []
+    filenames = []
+    for payslip in payslips:
+        html_content = render_to_string(
+            "payroll/payslip/payslip_pdf.html",
+            payslip_pdf_context(request, payslip, company=company),
+        )
+        updated_at = payslip.updated_at.timestamp() if payslip.updated_at else ""
+        keyed_documents.append((f"payslip:{payslip.pk}:{updated_at}", html_content))
+        filenames.append(f"{payslip.get_payslip_title()}.pdf")
+    return list(zip(filenames, cached_render_pdfs(keyed_documents)))
+
+
 def payslip_pdf(request, id):
     """
     Generate the payslip as a PDF and return it in an HttpResponse.
@@ -5400,82 +5483,55 @@ def payslip_pdf(request, id):
 
     from .component_views import filter_payslip
 
-    if Payslip.objects.filter(id=id).exists():
-        payslip = Payslip.objects.get(id=id)
-        company = Company.objects.filter(hq=True).first()
+    payslip = Payslip.objects.filter(id=id).select_related("employee_id").first()
+    if payslip:
         if (
             request.user.has_perm("payroll.view_payslip")
             or payslip.employee_id.employee_user_id == request.user
         ):
-            user = request.user
-            employee = user.employee_get
-
-            # Taking the company_name of the user
-            info = EmployeeWorkInformation.objects.filter(employee_id=employee)
-            if info.exists():
-                for data in info:
-                    employee_company = data.company_id
-                company_name = Company.objects.filter(company=employee_company)
-                emp_company = company_name.first()
-
-                # Access the date_format attribute directly
-                date_format = (
-                    emp_company.date_format
-                    if emp_company and emp_company.date_format
-                    else "MMM. D, YYYY"
-                )
+            try:
+                pdf = render_payslip_pdfs(request, [payslip])[0][1]
+            except Exception as e:
+                return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
+            response = HttpResponse(pdf, content_type="application/pdf")
+            response["Content-Disposition"] = "inline; filename=payslip.pdf"
+            return response
+        return redirect(filter_payslip)
+    return render(request, "405.html")
 
-            data = payslip.pay_head_data
-            start_date_str = data["start_date"]
-            end_date_str = data["end_date"]
 
-            # Convert the string to a datetime.date object
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+@login_required
+def payslip_pdf_batch(request):
+    """
+    Download several payslips at once, as a ZIP of PDFs (default) or as one
+    merged PDF with `?output=merged`.
 
-            # Format the start and end dates
-            for format_name, format_string in HORILLA_DATE_FORMATS.items():
-                if format_name == date_format:
-                    formatted_start_date = start_date.strftime(format_string)
-                    formatted_end_date = end_date.strftime(format_string)
+    The payslip ids are passed as `?ids=[1,2,3]` or repeated `?ids=` params.
+    """
+    ids = request.GET.getlist("ids")
+    if len(ids) == 1 and ids[0].startswith("["):
+        ids = json.loads(ids[0])
+    payslips = Payslip.objects.filter(id__in=ids).select_related("employee_id")
+    if not request.user.has_perm("payroll.view_payslip"):
+        payslips = payslips.filter(employee_id__employee_user_id=request.user)
+    payslips = list(payslips.order_by("employee_id", "start_date"))
+    if not payslips:
+        return render(request, "405.html")
 
-            # Prepare context for the template
-            data.update(
-                {
-                    "month_start_name": start_date.strftime("%B %d, %Y"),
-                    "month_end_name": end_date.strftime("%B %d, %Y"),
-                    "formatted_start_date": formatted_start_date,
-                    "formatted_end_date": formatted_end_date,
-                    "employee": payslip.employee_id,
-                    "payslip": payslip,
-                    "json_data": data.copy(),
-                    "currency": PayrollSettings.objects.first().currency_symbol,
-                    "all_deductions": [],
-                    "all_allowances": data["allowances"].copy(),
-                    "host": request.get_host(),
-                    "protocol": "https" if request.is_secure() else "http",
-                    "company": company,
-                }
+    try:
+        named_pdfs = render_payslip_pdfs(request, payslips)
+        if request.GET.get("output") == "merged":
+            response = HttpResponse(
+                merge_pdfs([pdf for _filename, pdf in named_pdfs]),
+                content_type="application/pdf",
             )
-
-            # Merge deductions and allowances for display
-            for deduction_list in [
-                data["basic_pay_deductions"],
-                data["gross_pay_deductions"],
-                data["pretax_deductions"],
-                data["post_tax_deductions"],
-                data["tax_deductions"],
-                data["net_deductions"],
-            ]:
-                data["all_deductions"].extend(deduction_list)
-
-            equalize_lists_length(data["allowances"], data["all_deductions"])
-            data["zipped_data"] = zip(data["allowances"], data["all_deductions"])
-            template_path = "payroll/payslip/payslip_pdf.html"
-
-            return generate_payslip_pdf(template_path, context=data, html=False)
-        return redirect(filter_payslip)
-    return render(request, "405.html")
+            response["Content-Disposition"] = 'attachment; filename="payslips.pdf"'
+            return response
+        response = HttpResponse(zip_pdfs(named_pdfs), content_type="application/zip")
+        response["Content-Disposition"] = 'attachment; filename="payslips.zip"'
+        return response
+    except Exception as e:
+        return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
 
 
 @login_required
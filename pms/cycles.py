@@ -0,0 +1,176 @@
+"""
+cycles.py
+
+Review-cycle roll-over of cyclic feedbacks.
+
+The cyclic feedbacks due on a day are cloned for their next cycle with
+`bulk_create`. Their colleagues, subordinates, other employees and key
+results are copied with one bulk insert per through table, and the
+originals stop cycling with one update. The feedbacks starting their next
+cycle on the same day are rolled over together in one transaction, and a
+dry run returns the same plan without writing anything.
+"""
+
+from collections import defaultdict
+from datetime import date
+
+from django.db import connections, transaction
+
+FEEDBACK_M2M_FIELDS = (
+    "colleague_id",
+    "subordinate_id",
+    "others_id",
+    "employee_key_results_id",
+)
+# fields of the feedback that are not copied to the next cycle
+RESET_FIELDS = (
+    "id",
+    "created_at",
+    "updated_at",
+    "cyclic_next_start_date",
+    "cyclic_next_end_date",
+)
+
+
+class RollOver:
+    """
+    Next cycle of one feedback: the unsaved (or just created) clone and the
+    ids of its participants and key results, {m2m field: [ids]}
+    """
+
+    __slots__ = ("feedback", "clone", "links")
+
+    def __init__(self, feedback, clone, links):
+        self.feedback = feedback
+        self.clone = clone
+        self.links = links
+
+
+def cyclic_title(review_cycle, start_date):
+    """
+    Title of the next cycle of a review cycle
+    """
+    title = review_cycle.split("- cyclic")[0].strip()
+    return f"{title} - cyclic {start_date}"
+
+
+def clone_feedback(feedback):
+    """
+    Unsaved copy of the feedback for its next cycle
+    """
+    from pms.models import Feedback
+
+    clone = Feedback()
+    for field in Feedback._meta.concrete_fields:
+        if field.name not in RESET_FIELDS:
+            setattr(clone, field.attname, getattr(feedback, field.attname))
+    clone.start_date = feedback.cyclic_next_start_date
+    clone.end_date = feedback.cyclic_next_end_date
+    clone.review_cycle = cyclic_title(feedback.review_cycle, clone.start_date)
+    clone.status = "Not Started"
+    if clone.cyclic_feedback_period in dict(Feedback.PERIOD):
+        clone.cyclic_next_start_date, clone.cyclic_next_end_date = (
+            clone.next_cycle_dates()
+        )
+    return clone
+
+
+def _through(name):
+    """
+    (through model, feedback column, related column) of a many to many field
+    """
+    from pms.models import Feedback
+
+    field = Feedback._meta.get_field(name)
+    through = field.remote_field.through
+    return (
+        through,
+        through._meta.get_field(field.m2m_field_name()).attname,
+        through._meta.get_field(field.m2m_reverse_field_name()).attname,
+    )
+
+
+def _links(feedback_ids):
+    """
+    {m2m field: {feedback id: [related ids]}} with one query per field
+    """
+    links = {}
+    for name in FEEDBACK_M2M_FIELDS:
+        through, source, target = _through(name)
+        by_feedback = defaultdict(list)
+        rows = through.objects.filter(**{f"{source}__in": feedback_ids})
+        for feedback_id, related_id in rows.values_list(source, target):
+            by_feedback[feedback_id].append(related_id)
+        links[name] = by_feedback
+    return links
+
+
+def plan_roll_over(today=None):
+    """
+    {next cycle start date: [RollOver, ...]} of the cyclic feedbacks whose
+    next cycle starts on or before `today` (today by default), nothing is
+    written
+    """
+    from pms.models import Feedback
+
+    today = today or date.today()
+    feedbacks = list(
+        Feedback._base_manager.filter(
+            cyclic_feedback=True,
+            cyclic_next_start_date__lte=today,
+            cyclic_next_end_date__isnull=False,
+        ).order_by("cyclic_next_start_date", "pk")
+    )
+    links = _links([feedback.pk for feedback in feedbacks])
+    cycles = defaultdict(list)
+    for feedback in feedbacks:
+        cycles[feedback.cyclic_next_start_date].append(
+            RollOver(
+                feedback,
+                clone_feedback(feedback),
+                {name: links[name].get(feedback.pk, []) for name in links},
+            )
+        )
+    return dict(cycles)
+
+
+def _create_cycle(roll_overs):
+    from pms.models import Feedback
+
+    clones = [roll_over.clone for roll_over in roll_overs]
+    if connections[Feedback._base_manager.db].features.can_return_rows_from_bulk_insert:
+        Feedback._base_manager.bulk_create(clones, batch_size=1000)
+    else:
+        # the ids of the clones are needed for the through rows
+        for clone in clones:
+            clone.save()
+
+    for name in FEEDBACK_M2M_FIELDS:
+        through, source, target = _through(name)
+        through.objects.bulk_create(
+            [
+                through(**{source: roll_over.clone.pk, target: related_id})
+                for roll_over in roll_overs
+                for related_id in roll_over.links[name]
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+    Feedback._base_manager.filter(
+        pk__in=[roll_over.feedback.pk for roll_over in roll_overs]
+    ).update(cyclic_feedback=False)
+
+
+def roll_over_feedbacks(today=None, dry_run=False):
+    """
+    Create the next cycle of every due cyclic feedback, one transaction per
+    cycle start date. Returns the plan of `plan_roll_over`, with the clones
+    saved unless `dry_run` is set.
+    """
+    cycles = plan_roll_over(today)
+    if dry_run:
+        return cycles
+    for roll_overs in cycles.values():
+        with transaction.atomic():
+            _create_cycle(roll_overs)
+    return cycles
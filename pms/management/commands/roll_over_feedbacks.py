@@ -0,0 +1,42 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from pms.cycles import FEEDBACK_M2M_FIELDS, roll_over_feedbacks
+
+
+class Command(BaseCommand):
+    help = "Create the next cycle of the due cyclic feedbacks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            default=None,
+            help="Roll over the cycles starting on or before (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show the feedbacks that would be created without writing anything",
+        )
+
+    def handle(self, *args, **options):
+        cycles = roll_over_feedbacks(options["date"], dry_run=options["dry_run"])
+        for start_date, roll_overs in cycles.items():
+            self.stdout.write(f"Cycle starting {start_date}:")
+            for roll_over in roll_overs:
+                links = ", ".join(
+                    f"{name} {len(roll_over.links[name])}"
+                    for name in FEEDBACK_M2M_FIELDS
+                )
+                self.stdout.write(
+                    f"  {roll_over.clone.review_cycle} "
+                    f"({roll_over.clone.start_date} - {roll_over.clone.end_date}), "
+                    f"{links}"
+                )
+        created = sum(len(roll_overs) for roll_overs in cycles.values())
+        if options["dry_run"]:
+            self.stdout.write(f"Dry run, {created} feedbacks would be created.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{created} feedbacks created."))
@@ -583,32 +583,19 @@ class Feedback(HorillaModel):
         verbose_name = _("Feedback")
         verbose_name_plural = _("Feedbacks")
 
-    def save(self, *args, **kwargs):
-        start_date = self.start_date
-        end_date = self.end_date
-        cyclic_feedback_period = self.cyclic_feedback_period
-        cyclic_feedback_days_count = self.cyclic_feedback_days_count
+    def next_cycle_dates(self):
+        """
+        (start date, end date) of the next cycle of a cyclic feedback
+        """
+        delta = relativedelta(
+            **{self.cyclic_feedback_period: self.cyclic_feedback_days_count}
+        )
+        return self.start_date + delta, self.end_date + delta
 
-        if cyclic_feedback_period == "months":
-            self.cyclic_next_start_date = self.start_date + relativedelta(
-                months=cyclic_feedback_days_count
-            )
-            self.cyclic_next_end_date = end_date + relativedelta(
-                months=cyclic_feedback_days_count
-            )
-        elif cyclic_feedback_period == "years":
-            self.cyclic_next_start_date = start_date + relativedelta(
-                years=cyclic_feedback_days_count
-            )
-            self.cyclic_next_end_date = end_date + relativedelta(
-                years=cyclic_feedback_days_count
-            )
-        elif cyclic_feedback_period == "days":
-            self.cyclic_next_start_date = start_date + relativedelta(
-                days=cyclic_feedback_days_count
-            )
-            self.cyclic_next_end_date = end_date + relativedelta(
-                days=cyclic_feedback_days_count
+    def save(self, *args, **kwargs):
+        if self.cyclic_feedback_period in dict(self.PERIOD):
+            self.cyclic_next_start_date, self.cyclic_next_end_date = (
+                self.next_cycle_dates()
             )
 
         super().save(*args, **kwargs)
@@ -1,3 +1,68 @@
+from datetime import date
+
 from django.test import TestCase
 
-# Create your tests here.
+from employee.models import Employee
+from pms.cycles import roll_over_feedbacks
+from pms.models import Feedback, QuestionTemplate
+
+
+def create_employee(name):
+    employee = Employee(
+        employee_first_name=name, email=f"{name.lower()}@horilla.test", phone="1"
+    )
+    employee.save()
+    return employee
+
+
+class RollOverTests(TestCase):
+    def setUp(self):
+        self.employee = create_employee("Reviewed")
+        self.colleague = create_employee("Colleague")
+        template = QuestionTemplate(question_template="Quarterly")
+        template.save()
+
+        def feedback(title, start_date, end_date):
+            feedback = Feedback(
+                review_cycle=title,
+                employee_id=self.employee,
+                question_template_id=template,
+                start_date=start_date,
+                end_date=end_date,
+                cyclic_feedback=True,
+                cyclic_feedback_days_count=3,
+                cyclic_feedback_period="months",
+            )
+            feedback.save()
+            return feedback
+
+        self.due = feedback("Q3", date(2026, 7, 1), date(2026, 7, 15))
+        self.due.colleague_id.add(self.colleague)
+        self.later = feedback("Q4", date(2026, 10, 1), date(2026, 10, 15))
+
+    def test_dry_run_writes_nothing(self):
+        cycles = roll_over_feedbacks(date(2026, 10, 19), dry_run=True)
+        (roll_over,) = cycles[date(2026, 10, 1)]
+        self.assertEqual(roll_over.feedback, self.due)
+        self.assertIsNone(roll_over.clone.pk)
+        self.assertEqual(roll_over.links["colleague_id"], [self.colleague.pk])
+        self.assertEqual(Feedback.objects.entire().count(), 2)
+        self.assertTrue(Feedback.objects.entire().get(pk=self.due.pk).cyclic_feedback)
+
+    def test_due_feedbacks_roll_over_once(self):
+        roll_over_feedbacks(date(2026, 10, 19))
+        clone = (
+            Feedback.objects.entire().exclude(pk__in=[self.due.pk, self.later.pk]).get()
+        )
+        self.assertEqual(clone.review_cycle, "Q3 - cyclic 2026-10-01")
+        self.assertEqual(
+            (clone.start_date, clone.end_date), (date(2026, 10, 1), date(2026, 10, 15))
+        )
+        self.assertEqual(clone.cyclic_next_start_date, date(2027, 1, 1))
+        self.assertEqual(list(clone.colleague_id.all()), [self.colleague])
+        self.assertTrue(clone.cyclic_feedback)
+        self.assertFalse(Feedback.objects.entire().get(pk=self.due.pk).cyclic_feedback)
+        self.assertTrue(Feedback.objects.entire().get(pk=self.later.pk).cyclic_feedback)
+
+        self.assertEqual(roll_over_feedbacks(date(2026, 10, 19)), {})
+        self.assertEqual(Feedback.objects.entire().count(), 3)
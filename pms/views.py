@@ -808,6 +808,7 @@ def objective_detailed_view_activity(request, id):
             activity_list.append(key_result)
 
         activity_list = sorted(activity_list, key=lambda x: x["date"], reverse=True)
+        activity_list = paginator_qry(activity_list, request.GET.get("page"))
 
         context = {
             "objective": objective,
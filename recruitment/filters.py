@@ -12,6 +12,7 @@ from django import forms
 from django.utils.translation import gettext_lazy as _
 
 from base.filters import FilterSet
+from base.search import search_queryset
 from recruitment.models import (
     Candidate,
     InterviewSchedule,
@@ -111,6 +112,9 @@ class CandidateFilter(FilterSet):
         """
         This method is used to include the candidates when they in the recruitment/stages
         """
+        indexed = search_queryset(queryset, value)
+        if indexed is not None:
+            return indexed
         queryset = (
             queryset.filter(name__icontains=value)
             | queryset.filter(stage_id__stage__icontains=value)
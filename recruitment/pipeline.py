@@ -0,0 +1,102 @@
+"""
+pipeline.py
+
+Pipeline board loading and candidate reordering.
+
+A drag and drop reorder of a stage column is written with one UPDATE that
+sets the sequence through a CASE on the candidate id, so the bulk update
+signals (and the automations listening to them) run once for the whole
+column instead of once per candidate. The board of a page of recruitments
+is loaded with one stage query and one candidate query that is limited to
+the first page of every stage by a ROW_NUMBER() window.
+"""
+
+from collections import defaultdict
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Case, Count, F, IntegerField, Value, When, Window
+from django.db.models.functions import RowNumber
+
+PIPELINE_PAGE_SIZE = 10
+
+
+def reorder_candidates(stage, order):
+    """
+    Move the candidates of `order` (candidate ids in their new display order)
+    to `stage` with their position as sequence, returns the number of
+    candidates updated
+    """
+    from recruitment.models import Candidate
+
+    positions = {}
+    for index, candidate_id in enumerate(order):
+        try:
+            positions[int(candidate_id)] = index
+        except (TypeError, ValueError):
+            continue
+    if not positions:
+        return 0
+    sequence = Case(
+        *[
+            When(pk=candidate_id, then=Value(index))
+            for candidate_id, index in positions.items()
+        ],
+        output_field=IntegerField(),
+    )
+    return Candidate.objects.filter(
+        pk__in=list(positions), recruitment_id=stage.recruitment_id_id
+    ).update(sequence=sequence, stage_id=stage, hired=stage.stage_type == "hired")
+
+
+def first_page(candidates, count, per_page=PIPELINE_PAGE_SIZE):
+    """
+    First page of a stage from its already loaded candidates and the total
+    number of candidates of the stage
+    """
+    paginator = Paginator([], per_page)
+    paginator.count = count
+    return Page(candidates, 1, paginator)
+
+
+def pipeline_board(recruitments, stages, candidates, per_stage=PIPELINE_PAGE_SIZE):
+    """
+    {recruitment id: [stage, ...]} of the recruitments from the `stages` and
+    `candidates` querysets, each stage carrying the first page of its
+    candidates as `candidate_page`
+    """
+    recruitment_ids = [
+        getattr(recruitment, "pk", recruitment) for recruitment in recruitments
+    ]
+    stages = list(
+        stages.filter(recruitment_id__in=recruitment_ids)
+        .select_related("recruitment_id")
+        .prefetch_related("stage_managers")
+        .order_by("recruitment_id", "sequence")
+    )
+    rows = (
+        candidates.filter(stage_id__in=[stage.pk for stage in stages])
+        .annotate(
+            stage_row=Window(
+                RowNumber(),
+                partition_by=[F("stage_id")],
+                order_by=[F("sequence").asc(), F("pk").asc()],
+            ),
+            stage_total=Window(Count("pk"), partition_by=[F("stage_id")]),
+        )
+        .filter(stage_row__lte=per_stage)
+        .select_related("stage_id", "recruitment_id")
+        .order_by("stage_id", "stage_row")
+    )
+    by_stage = defaultdict(list)
+    totals = {}
+    for candidate in rows:
+        by_stage[candidate.stage_id_id].append(candidate)
+        totals[candidate.stage_id_id] = candidate.stage_total
+
+    board = defaultdict(list)
+    for stage in stages:
+        stage.candidate_page = first_page(
+            by_stage[stage.pk], totals.get(stage.pk, 0), per_stage
+        )
+        board[stage.recruitment_id_id].append(stage)
+    return {recruitment_id: board[recruitment_id] for recruitment_id in recruitment_ids}
@@ -1,3 +1,87 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from recruitment.models import Candidate, Recruitment, Stage
+from recruitment.pipeline import pipeline_board, reorder_candidates
+
+
+class PipelineTests(TestCase):
+    def setUp(self):
+        # bulk inserts skip the default stages and the candidate checks
+        self.recruitment, self.other_recruitment = Recruitment.objects.bulk_create(
+            [Recruitment(title="Developer"), Recruitment(title="Designer")]
+        )
+        self.applied, self.hired = Stage.objects.bulk_create(
+            [
+                Stage(
+                    recruitment_id=self.recruitment,
+                    stage="Applied",
+                    stage_type="applied",
+                    sequence=1,
+                ),
+                Stage(
+                    recruitment_id=self.recruitment,
+                    stage="Hired",
+                    stage_type="hired",
+                    sequence=2,
+                ),
+            ]
+        )
+        Candidate.objects.bulk_create(
+            Candidate(
+                name=f"Candidate {index}",
+                email=f"candidate{index}@horilla.test",
+                recruitment_id=self.recruitment,
+                stage_id=self.applied,
+                sequence=index,
+            )
+            for index in range(5)
+        )
+        self.candidates = list(Candidate.objects.order_by("pk"))
+
+    def test_reorder_moves_the_column_with_one_update(self):
+        order = [self.candidates[2].pk, self.candidates[0].pk, "bad"]
+        with CaptureQueriesContext(connection) as queries:
+            updated = reorder_candidates(self.hired, order)
+        self.assertEqual(updated, 2)
+        updates = [
+            query["sql"] for query in queries if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(updates), 1)
+        moved = Candidate.objects.filter(stage_id=self.hired).order_by("sequence")
+        self.assertEqual(
+            list(moved.values_list("pk", "sequence", "hired")),
+            [(self.candidates[2].pk, 0, True), (self.candidates[0].pk, 1, True)],
+        )
+
+    def test_reorder_is_limited_to_the_stage_recruitment(self):
+        stage = Stage.objects.bulk_create(
+            [Stage(recruitment_id=self.other_recruitment, stage="Applied")]
+        )[0]
+        self.assertEqual(reorder_candidates(stage, [self.candidates[0].pk]), 0)
+
+    def test_board_loads_the_first_page_of_every_stage(self):
+        with CaptureQueriesContext(connection) as queries:
+            board = pipeline_board(
+                [self.recruitment],
+                Stage.objects.all(),
+                Candidate.objects.all(),
+                per_stage=2,
+            )
+            applied, hired = board[self.recruitment.pk]
+            self.assertEqual(
+                [candidate.pk for candidate in applied.candidate_page],
+                [candidate.pk for candidate in self.candidates[:2]],
+            )
+        candidate_queries = [
+            query["sql"]
+            for query in queries
+            if '"recruitment_candidate"."name"' in query["sql"]
+            and "COUNT(*)" not in query["sql"]
+        ]
+        self.assertEqual(len(candidate_queries), 1)
+        self.assertEqual(applied.candidate_page.paginator.count, 5)
+        self.assertTrue(applied.candidate_page.has_next())
+        self.assertEqual(list(hired.candidate_page), [])
+        self.assertFalse(hired.candidate_page.has_next())
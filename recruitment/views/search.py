@@ -12,6 +12,7 @@ from django.core.paginator import Paginator
 from django.shortcuts import render
 
 from base.methods import get_key_instances, get_pagination, sortby
+from base.search import search_queryset
 from horilla.decorators import (
     hx_request_required,
     is_recruitment_manager,
@@ -106,7 +107,9 @@ def candidate_search(request):
     search = request.GET.get("search")
     if search is None:
         search = ""
-    candidates = Candidate.objects.filter(name__icontains=search)
+    candidates = search_queryset(Candidate.objects.all(), search)
+    if candidates is None:
+        candidates = Candidate.objects.filter(name__icontains=search)
     candidates = CandidateFilter(request.GET, queryset=candidates).qs
     data_dict = []
     if not request.GET.get("dashboard"):
@@ -119,6 +119,7 @@ from recruitment.models import (
     StageFiles,
     StageNote,
 )
+from recruitment.pipeline import pipeline_board, reorder_candidates
 from recruitment.views.linkedin import delete_post, post_recruitment_in_linkedin
 from recruitment.views.paginator_qry import paginator_qry
 
@@ -177,53 +178,6 @@ def is_recruitmentmanager(request, rec_id=False):
     )
 
 
-def pipeline_grouper(request, recruitments):
-    groups = []
-    for rec in recruitments:
-        stages = StageFilter(request.GET, queryset=rec.stage_set.all()).qs.order_by(
-            "sequence"
-        )
-        all_stages_grouper = []
-        data = {"recruitment": rec, "stages": []}
-        for stage in stages.order_by("sequence"):
-            all_stages_grouper.append({"grouper": stage, "list": []})
-            stage_candidates = CandidateFilter(
-                request.GET,
-                stage.candidate_set.filter(
-                    is_active=True,
-                ),
-            ).qs.order_by("sequence")
-
-            page_name = "page" + stage.stage + str(rec.id)
-            grouper = group_by_queryset(
-                stage_candidates,
-                "stage_id",
-                request.GET.get(page_name),
-                page_name,
-            ).object_list
-            data["stages"] = data["stages"] + grouper
-
-        ordered_data = []
-
-        # combining un used groups in to the grouper
-        groupers = data["stages"]
-        for stage in stages:
-            found = False
-            for grouper in groupers:
-                if grouper["grouper"] == stage:
-                    ordered_data.append(grouper)
-                    found = True
-                    break
-            if not found:
-                ordered_data.append({"grouper": stage})
-        data = {
-            "recruitment": rec,
-            "stages": ordered_data,
-        }
-        groups.append(data)
-    return groups
-
-
 @login_required
 @hx_request_required
 @permission_required(perm="recruitment.add_recruitment")
@@ -532,9 +486,11 @@ def stage_component(request, view: str = "list"):
     """
     recruitment_id = request.GET["rec_id"]
     recruitment = Recruitment.objects.get(id=recruitment_id)
-    ordered_stages = CACHE.get(request.session.session_key + "pipeline")[
-        "stages"
-    ].filter(recruitment_id__id=recruitment_id)
+    pipeline = CACHE.get(request.session.session_key + "pipeline")
+    # the stages come with the first page of their candidates
+    ordered_stages = pipeline_board(
+        [recruitment], pipeline["stages"], pipeline["candidates"]
+    )[recruitment.pk]
     template = "pipeline/components/stages_tab_content.html"
     if view == "card":
         template = "pipeline/kanban_components/kanban_stage_components.html"
@@ -544,9 +500,8 @@ def stage_component(request, view: str = "list"):
         {
             "rec": recruitment,
             "ordered_stages": ordered_stages,
-            "filter_dict": CACHE.get(request.session.session_key + "pipeline")[
-                "filter_dict"
-            ],
+            "filter_dict": pipeline["filter_dict"],
+            "now": timezone.now(),
         },
     )
 
@@ -557,19 +512,12 @@ def update_candidate_stage_and_sequence(request):
     """
     Update candidate sequence method
     """
-    order_list = request.GET.getlist("order")
-    stage_id = request.GET["stage_id"]
-    stage = (
-        CACHE.get(request.session.session_key + "pipeline")["stages"]
-        .filter(id=stage_id)
-        .first()
-    )
+    order_list = request.GET.getlist("order") or request.GET.getlist("order[]")
+    stage = Stage.objects.filter(id=request.GET.get("stage_id")).first()
     context = {}
-    for index, cand_id in enumerate(order_list):
-        candidate = CACHE.get(request.session.session_key + "pipeline")[
-            "candidates"
-        ].filter(id=cand_id)
-        candidate.update(sequence=index, stage_id=stage)
+    if stage is None:
+        return JsonResponse(context)
+    reorder_candidates(stage, order_list)
     if stage.stage_type == "hired":
         if stage.recruitment_id.is_vacancy_filled():
             context["message"] = _("Vaccancy is filled")
@@ -583,22 +531,11 @@ def update_candidate_sequence(request):
     """
     Update candidate sequence method
     """
-    order_list = request.GET.getlist("order")
-    stage_id = request.GET["stage_id"]
-    stage = (
-        CACHE.get(request.session.session_key + "pipeline")["stages"]
-        .filter(id=stage_id)
-        .first()
-    )
+    order_list = request.GET.getlist("order") or request.GET.getlist("order[]")
+    stage = Stage.objects.filter(id=request.GET.get("stage_id")).first()
     data = {}
-
-    for index, cand_id in enumerate(order_list):
-        candidate = CACHE.get(request.session.session_key + "pipeline")[
-            "candidates"
-        ].filter(id=cand_id)
-        candidate.update(
-            sequence=index, stage_id=stage, hired=(stage.stage_type == "hired")
-        )
+    if stage is not None:
+        reorder_candidates(stage, order_list)
 
     return JsonResponse(data)
 